@@ -1,6 +1,6 @@
 """
 Usage:
-    analyse_quantification_run [{log_option_spec} --plot-format=<plot-format> --grouped-threshold=<grouped-threshold> --error-fraction-threshold=<ef-threshold> --not-present-cutoff=<cutoff> --prequant-usage-file=<prequant-usage-file> --quant-usage-file=<quant-usage-file>] --quant-method=<quant-method> --read-length=<read-length> --read-depth=<read-depth> --paired-end=<paired-end> --errors=<errors> --bias=<bias> --stranded=<stranded> --noise-perc=<noise-depth-percentage> <tpm-file> <out-file>
+    analyse_quantification_run [{log_option_spec} --plot-format=<plot-format> --grouped-threshold=<grouped-threshold> --error-fraction-threshold=<ef-threshold> --not-present-cutoff=<cutoff> --bootstrap=<num-resamples> --analysis-processes=<num-processes> --threshold-sweep --prequant-usage-file=<prequant-usage-file> --quant-usage-file=<quant-usage-file> --num-reads-file=<num-reads-file> --num-threads=<num-threads>] --quant-method=<quant-method> --read-length=<read-length> --read-depth=<read-depth> --paired-end=<paired-end> --errors=<errors> --bias=<bias> --stranded=<stranded> --noise-perc=<noise-depth-percentage> <tpm-file> <out-file>
 
 Options:
 {help_option_spec}
@@ -10,7 +10,9 @@ Options:
 {log_option_spec}
     {log_option_description}
 --plot-format=<plot-format>
-    Output format for graphs (one of {plot_formats}) [default: pdf].
+    Comma-separated list of output formats for graphs (each one of
+    {plot_formats}); each graph is drawn once and saved in every format
+    [default: pdf].
 --grouped-threshold=<grouped-threshold>
     Minimum number of data points required for a group of transcripts to be
     shown on a plot [default: 300].
@@ -21,10 +23,26 @@ Options:
 --not-present-cutoff=<cutoff>
     Cut-off value for the number of transcripts per-million below which a
     transcript is considered to be "not present" [default: 0.1].
+--bootstrap=<num-resamples>
+    Number of bootstrap resamples used to calculate confidence intervals for
+    statistics; if zero, confidence intervals are not calculated [default: 0].
+--analysis-processes=<num-processes>
+    Number of processes over which to spread the calculation of bootstrap
+    resamples [default: 1].
+--threshold-sweep
+    If specified, statistics will additionally be calculated over a range of
+    values of the "not present" cut-off and the error fraction threshold.
 --prequant-usage-file=<prequant-usage-file>
     CSV file recording time and memory usage of prequantification steps.
 --quant-usage-file=<quant-usage-file>
     CSV file recording time and memory usage of quantification steps.
+--num-reads-file=<num-reads-file>
+    File recording the number of simulated reads (or read pairs) that were
+    quantified; if specified, the throughput and efficiency of quantification
+    are calculated from the resource usage of quantification steps.
+--num-threads=<num-threads>
+    The number of threads used by multi-threaded quantification methods
+    [default: 1].
 --quant-method=<quant-method>
     Method used to quantify transcript abundances.
 --read-length=<read-length>
@@ -44,11 +62,11 @@ Options:
     (as a percentage of the depth of reads for the set of transcripts to be
     quantified).
 <tpm-file>
-    CSV file containing real and calculated TPMs.
+    Columnar TPM store or CSV file containing real and calculated TPMs.
 <out-file>
     Basename for output graph and data files.
 
-analyse_quantification_run reads a tpms.csv file produced by the
+analyse_quantification_run reads a TPM store or tpms.csv file produced by the
 assemble_quantification_data script, then calculates statistics and plots
 graphs to assess the accuracy of transcript abundance estimates produced in a
 single quantification run.
@@ -59,14 +77,17 @@ import docopt
 import itertools
 import numpy as np
 import os.path
-import pandas as pd
 import schema
 
+from . import bootstrap
 from . import classifiers
+from . import flux_simulator as fs
 from . import options as opt
 from . import piquant_options as po
 from . import resource_usage as ru
 from . import statistics
+from . import sweeps
+from . import tpm_store
 from . import tpms as t
 from . import plot
 from .__init__ import __version__
@@ -76,23 +97,38 @@ TRUE_POSITIVES_LABEL = "true positive TPMs"
 TPM_FILE = "<tpm-file>"
 PREQUANT_USAGE_FILE = "--prequant-usage-file"
 QUANT_USAGE_FILE = "--quant-usage-file"
+NUM_READS_FILE = "--num-reads-file"
+NUM_THREADS = "--num-threads"
+THRESHOLD_SWEEP = "--threshold-sweep"
 OUT_FILE_BASENAME = "<out-file>"
 
 PIQUANT_OPTIONS = [
     po.PLOT_FORMAT,
     po.GROUPED_THRESHOLD,
     po.ERROR_FRACTION_THRESHOLD,
-    po.NOT_PRESENT_CUTOFF
+    po.NOT_PRESENT_CUTOFF,
+    po.BOOTSTRAP_RESAMPLES,
+    po.ANALYSIS_PROCESSES
 ]
 
-TpmInfo = collections.namedtuple("TpmInfo", ["tpms", "label"])
+TpmInfo = collections.namedtuple("TpmInfo", ["tpms", "label", "subset"])
 
 
 def _validate_command_line_options(options):
     try:
         opt.validate_log_level(options)
-        opt.validate_file_option(
-            options[TPM_FILE], "Could not open TPM file")
+        if os.path.isdir(options[TPM_FILE]):
+            opt.validate_file_option(
+                os.path.join(
+                    options[TPM_FILE], tpm_store.ANNOTATION_POINTER_FILE),
+                "Could not open TPM store")
+        else:
+            opt.validate_file_option(
+                options[TPM_FILE], "Could not open TPM file")
+
+        options[NUM_THREADS] = opt.validate_int_option(
+            options[NUM_THREADS], "Number of threads must be positive",
+            min_val=1)
 
         for option in PIQUANT_OPTIONS:
             opt_name = option.get_option_name()
@@ -103,8 +139,8 @@ def _validate_command_line_options(options):
 
 
 def _get_tpm_infos(non_zero, tp_tpms):
-    return [TpmInfo(non_zero, "non-zero real TPMs"),
-            TpmInfo(tp_tpms, TRUE_POSITIVES_LABEL)]
+    return [TpmInfo(non_zero, "non-zero real TPMs", "non_zero"),
+            TpmInfo(tp_tpms, TRUE_POSITIVES_LABEL, "true_positive")]
 
 
 def _add_mqr_option_values(stats, options, options_to_add=None):
@@ -122,6 +158,13 @@ def _write_overall_stats(transcript_tpms, tp_transcript_tpms,
             [(transcript_tpms, tp_transcript_tpms, t.TRANSCRIPT),
              (gene_tpms, tp_gene_tpms, t.GENE)]:
         stats = t.get_stats(tpms, tp_tpms, statistics.get_statistics())
+        if options[po.BOOTSTRAP_RESAMPLES.name] > 0:
+            intervals = bootstrap.get_confidence_intervals(
+                tpms, statistics.get_statistics(),
+                options[po.BOOTSTRAP_RESAMPLES.name],
+                options[po.ANALYSIS_PROCESSES.name], options)
+            for column, value in intervals.items():
+                stats[column] = value
         _add_mqr_option_values(stats, options)
 
         stats_file_name = statistics.get_stats_file(
@@ -129,6 +172,25 @@ def _write_overall_stats(transcript_tpms, tp_transcript_tpms,
         statistics.write_stats_data(stats_file_name, stats, index=False)
 
 
+def _write_threshold_sweep_stats(transcript_tpms, tp_transcript_tpms,
+                                 gene_tpms, tp_gene_tpms, options):
+    sweep_stats = []
+
+    for tpms, tp_tpms, tpm_level in \
+            [(transcript_tpms, tp_transcript_tpms, t.TRANSCRIPT),
+             (gene_tpms, tp_gene_tpms, t.GENE)]:
+        for sweep in sweeps.get_sweeps():
+            stats = sweep.calculate(tpms, tp_tpms)
+            _add_mqr_option_values(stats, options)
+            sweep_stats.append((sweep, tpm_level, stats))
+
+            stats_file_name = statistics.get_stats_file(
+                ".", options[OUT_FILE_BASENAME], tpm_level, sweep)
+            statistics.write_stats_data(stats_file_name, stats, index=False)
+
+    return sweep_stats
+
+
 def _write_stratified_stats(tpms, tp_tpms, non_zero, options):
     clsfr_stats = {}
 
@@ -137,6 +199,11 @@ def _write_stratified_stats(tpms, tp_tpms, non_zero, options):
             column_name = classifier.get_column_name()
             stats = t.get_grouped_stats(
                 tpms, tp_tpms, column_name, statistics.get_statistics())
+            if options[po.BOOTSTRAP_RESAMPLES.name] > 0:
+                stats = stats.join(bootstrap.get_grouped_confidence_intervals(
+                    tpms, column_name, statistics.get_statistics(),
+                    options[po.BOOTSTRAP_RESAMPLES.name],
+                    options[po.ANALYSIS_PROCESSES.name], options))
             _add_mqr_option_values(stats, options)
             clsfr_stats[classifier] = stats
 
@@ -159,6 +226,27 @@ def _write_stratified_stats(tpms, tp_tpms, non_zero, options):
     return clsfr_stats
 
 
+def _write_boxplot_stats(tp_tpms, non_zero, options):
+    boxplot_stats = []
+
+    tpm_infos = _get_tpm_infos(non_zero, tp_tpms)
+    clsfrs = [c for c in classifiers.get_classifiers()
+              if c.produces_grouped_stats()]
+
+    for clsfr, tpm_info in itertools.product(clsfrs, tpm_infos):
+        stats = t.get_boxplot_stats(tpm_info.tpms, clsfr.get_column_name())
+        boxplot_stats.append((clsfr, tpm_info.label, stats))
+
+        stats = stats.copy()
+        _add_mqr_option_values(stats, options)
+        stats_file_name = statistics.get_boxplot_stats_file(
+            ".", options[OUT_FILE_BASENAME], t.TRANSCRIPT,
+            tpm_info.subset, clsfr)
+        statistics.write_stats_data(stats_file_name, stats)
+
+    return boxplot_stats
+
+
 def _draw_tpm_scatter_plots(tp_transcript_tpms, tp_gene_tpms, plot_format,
                             basename, not_present_cutoff):
 
@@ -170,15 +258,11 @@ def _draw_tpm_scatter_plots(tp_transcript_tpms, tp_gene_tpms, plot_format,
         TRUE_POSITIVES_LABEL, not_present_cutoff)
 
 
-def _draw_log_ratio_boxplots(non_zero, tp_tpms, options):
-    tpm_infos = _get_tpm_infos(non_zero, tp_tpms)
-    clsfrs = [c for c in classifiers.get_classifiers()
-              if c.produces_grouped_stats()]
-
-    for clsfr, tpm_info in itertools.product(clsfrs, tpm_infos):
+def _draw_log_ratio_boxplots(boxplot_stats, options):
+    for clsfr, tpm_label, stats in boxplot_stats:
         plot.log_ratio_boxplot(
-            options[po.PLOT_FORMAT.name], tpm_info.tpms,
-            options[OUT_FILE_BASENAME], tpm_info.label, clsfr,
+            options[po.PLOT_FORMAT.name], stats,
+            options[OUT_FILE_BASENAME], tpm_label, clsfr,
             options[po.GROUPED_THRESHOLD.name])
 
 
@@ -241,14 +325,38 @@ def _write_statistics(
     _write_overall_stats(transcript_tpms, tp_transcript_tpms,
                          gene_tpms, tp_gene_tpms, options)
 
+    # Write statistics calculated over ranges of threshold values
+    sweep_stats = []
+    if options[THRESHOLD_SWEEP]:
+        logger.info("Writing threshold sweep statistics...")
+        sweep_stats = _write_threshold_sweep_stats(
+            transcript_tpms, tp_transcript_tpms,
+            gene_tpms, tp_gene_tpms, options)
+
     # Write statistics for TPMS stratified by various classification measures
     logger.info("Writing statistics for stratified TPMs")
-    return _write_stratified_stats(
+    clsfr_stats = _write_stratified_stats(
         transcript_tpms, tp_transcript_tpms, non_zero_transcript_tpms, options)
 
+    # Write summary statistics of the distributions of log ratios for TPMs
+    # stratified by classification measures, from which boxplots are drawn
+    logger.info("Writing boxplot statistics for stratified TPMs")
+    boxplot_stats = _write_boxplot_stats(
+        tp_transcript_tpms, non_zero_transcript_tpms, options)
+
+    return clsfr_stats, boxplot_stats, sweep_stats
+
+
+def _draw_threshold_sweep_curves(sweep_stats, options):
+    for sweep, tpm_level, stats in sweep_stats:
+        for curve in sweep.curves:
+            plot.plot_threshold_sweep_curve(
+                options[po.PLOT_FORMAT.name], stats,
+                options[OUT_FILE_BASENAME] + "_" + tpm_level, sweep, curve)
+
 
 def _draw_graphs(options, tp_transcript_tpms, non_zero_transcript_tpms,
-                 tp_gene_tpms, clsfr_stats):
+                 tp_gene_tpms, clsfr_stats, boxplot_stats, sweep_stats):
 
     # Make a scatter plot of log transformed calculated vs real TPMs
     _draw_tpm_scatter_plots(
@@ -259,8 +367,7 @@ def _draw_graphs(options, tp_transcript_tpms, non_zero_transcript_tpms,
 
     # Make boxplots of log ratios stratified by various classification measures
     # (e.g. the number of transcripts per-originating gene of each transcript)
-    _draw_log_ratio_boxplots(
-        non_zero_transcript_tpms, tp_transcript_tpms, options)
+    _draw_log_ratio_boxplots(boxplot_stats, options)
 
     # Make plots of statistics calculated on groups of transcripts stratified
     # by classification measures
@@ -271,12 +378,16 @@ def _draw_graphs(options, tp_transcript_tpms, non_zero_transcript_tpms,
     _draw_cumulative_dist_plots(
         tp_transcript_tpms, non_zero_transcript_tpms, options)
 
+    # Make plots of ROC, precision-recall and error fraction curves calculated
+    # over ranges of threshold values
+    _draw_threshold_sweep_curves(sweep_stats, options)
+
 
 def _analyse_run(logger, options):
     # Read TPMs into a data frame
     logger.info("Reading TPMs from " + options[TPM_FILE])
 
-    transcript_tpms = pd.read_csv(options[TPM_FILE])
+    transcript_tpms = tpm_store.read_tpms(options[TPM_FILE])
     gene_tpms = transcript_tpms[[t.GENE, t.REAL_TPM, t.CALCULATED_TPM]].\
         groupby(t.GENE).aggregate(np.sum)
 
@@ -290,14 +401,26 @@ def _analyse_run(logger, options):
     non_zero_transcript_tpms = t.get_non_zero_tpms(transcript_tpms)
     tp_gene_tpms = t.get_true_positives(gene_tpms)
 
-    clsfr_stats = _write_statistics(
+    clsfr_stats, boxplot_stats, sweep_stats = _write_statistics(
         options, logger, transcript_tpms, tp_transcript_tpms,
         non_zero_transcript_tpms, gene_tpms, tp_gene_tpms)
 
     # Draw graphs
     logger.info("Plotting graphs...")
-    _draw_graphs(options, tp_transcript_tpms, non_zero_transcript_tpms,
-                 tp_gene_tpms, clsfr_stats)
+    with plot.drawing_plots_in_parallel(options[po.ANALYSIS_PROCESSES.name]):
+        _draw_graphs(options, tp_transcript_tpms, non_zero_transcript_tpms,
+                     tp_gene_tpms, clsfr_stats, boxplot_stats, sweep_stats)
+
+
+def _get_num_reads(logger, options):
+    # The number of reads may not have been recorded (e.g. by older versions
+    # of piquant)
+    num_reads_file = options[NUM_READS_FILE]
+    if not (num_reads_file and os.path.exists(num_reads_file)):
+        return None
+
+    logger.info("Reading number of simulated reads from " + num_reads_file)
+    return fs.read_num_reads(num_reads_file)
 
 
 def _summarise_resource_usage(
@@ -314,21 +437,38 @@ def _summarise_resource_usage(
         return
 
     # Read timing and memory usage info, then calculate sums of times over
-    # multiple command invocations, and maximum memory usage by any command
-    usage_summary = ru.get_usage_summary(usage_file)
+    # multiple command invocations, and maximum memory usage by any command.
+    # The throughput and efficiency of quantification are also calculated,
+    # given the number of reads quantified.
+    num_reads = None if prequant else _get_num_reads(logger, options)
+    usage_summary = ru.get_usage_summary(
+        usage_file, num_reads=num_reads, num_threads=options[NUM_THREADS])
+
+    # Also retain the resource usage of each individual command
+    command_usage = ru.get_command_usage(usage_file)
 
     # Add run identification data
-    if prequant:
-        _add_mqr_option_values(
-            usage_summary, options, options_to_add=[po.QUANT_METHOD])
-    else:
-        _add_mqr_option_values(usage_summary, options)
+    options_to_add = [po.QUANT_METHOD] if prequant else None
+    for usage in [usage_summary, command_usage]:
+        _add_mqr_option_values(usage, options, options_to_add=options_to_add)
 
-    # Write resource usage summary to file
+    # Write resource usage summary, and per-command resource usage, to file
     usage_file_name = ru.get_resource_usage_file(
         resource_type, prefix=options[OUT_FILE_BASENAME], directory=".")
     ru.write_usage_summary(usage_file_name, usage_summary)
 
+    command_usage_file_name = ru.get_command_usage_file(
+        resource_type, prefix=options[OUT_FILE_BASENAME], directory=".")
+    ru.write_usage_summary(command_usage_file_name, command_usage)
+
+    # Plot a timeline of the commands executed, if their start and end times
+    # were recorded
+    if command_usage[ru.START_TIME].notnull().all():
+        plot.resource_usage_timeline(
+            options[po.PLOT_FORMAT.name], command_usage,
+            options[OUT_FILE_BASENAME] + "_" + resource_type,
+            "Prequantification" if prequant else "Quantification")
+
 
 def _analyse_resource_usage(logger, options):
     _summarise_resource_usage(
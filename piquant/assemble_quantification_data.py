@@ -2,7 +2,7 @@
 
 """
 Usage:
-    assemble_quantification_data [{log_option_spec}] --method=<quantification-method> --out=<output-file> <pro-file> <transcript-count-file> <unique-sequence-file>
+    assemble_quantification_data [{log_option_spec} --out=<output-file> --annotation-dir=<annotation-dir>] --method=<quantification-method> --store=<tpm-store> <pro-file> <transcript-count-file> <unique-sequence-file> <composition-file> <unique-kmers-file>
 
 Options:
 {help_option_spec}
@@ -13,18 +13,30 @@ Options:
     {log_option_description}
 -m --method=<quant-method>
     Method used to quantify transcript abundances.
+-s <tpm-store> --store=<tpm-store>
+    Output directory for real and calculated TPMs, written in a compact,
+    memory-mappable columnar format.
 -o <output-file> --out=<output-file>
-    Output file for real and calculated TPMs.
+    If specified, real and calculated TPMs will also be written to this CSV
+    file.
+-a <annotation-dir> --annotation-dir=<annotation-dir>
+    Directory in which transcript annotation data, shared between
+    quantification runs, will be stored (by default, the directory containing
+    the TPM store).
 <pro-file>
     Flux Simulator gene expression profile file.
 <transcript-count-file>
     File containing per-gene transcript counts.
 <unique-sequence-file>
     File containing unique sequence lengths per-transcript.
+<composition-file>
+    File containing GC and homopolymer sequence lengths per-transcript.
+<unique-kmers-file>
+    File containing total and unique k-mer counts per-transcript.
 
 assemble_quantification_data assembles data required to assess the accuracy of
 transcript abundance estimates produced in a single quantification run, then
-writes these data to an output CSV file.
+writes these data to a columnar TPM store and, optionally, an output CSV file.
 """
 
 import pandas as pd
@@ -32,6 +44,7 @@ import pandas as pd
 from . import flux_simulator as fs
 from . import options as opt
 from . import quantifiers as qs
+from . import tpm_store
 from . import tpms
 from .__init__ import __version__
 
@@ -40,9 +53,13 @@ from schema import SchemaError
 
 QUANT_METHOD = "--method"
 OUT_FILE = "--out"
+TPM_STORE = "--store"
+ANNOTATION_DIR = "--annotation-dir"
 PRO_FILE = "<pro-file>"
 COUNT_FILE = "<transcript-count-file>"
 UNIQUE_SEQ_FILE = "<unique-sequence-file>"
+COMPOSITION_FILE = "<composition-file>"
+UNIQUE_KMERS_FILE = "<unique-kmers-file>"
 
 SORTED_PREFIX = "sorted"
 SORTED_BAM_FILE = SORTED_PREFIX + ".bam"
@@ -59,6 +76,14 @@ def _validate_command_line_options(options):
         opt.validate_file_option(
             options[UNIQUE_SEQ_FILE],
             "Could not open unique sequence lengths file")
+        opt.validate_file_option(
+            options[COMPOSITION_FILE],
+            "Could not open transcript composition file")
+        opt.validate_file_option(
+            options[UNIQUE_KMERS_FILE], "Could not open unique k-mers file")
+        opt.validate_dir_option(
+            options[ANNOTATION_DIR], "Annotation directory does not exist",
+            nullable=True)
         options[QUANT_METHOD] = opt.validate_dict_option(
             options[QUANT_METHOD], qs.get_quantification_methods(),
             "Unknown quantification method")
@@ -104,7 +129,17 @@ def _read_unique_sequence_lengths(unique_seq_file, profiles):
         profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL].map(set_unique_length)
 
 
-def _write_quantification_data(out_file, profiles):
+def _read_transcript_annotation(annotation_file, columns, profiles):
+    annotation = pd.read_csv(annotation_file, index_col=tpms.TRANSCRIPT)
+
+    # Values are missing for transcripts not present in the annotation file,
+    # so that such transcripts are left unclassified
+    transcript_ids = profiles[fs.PRO_FILE_TRANSCRIPT_ID_COL].values
+    for column in columns:
+        profiles[column] = annotation[column].reindex(transcript_ids).values
+
+
+def _write_quantification_data(out_file, store_dir, annotation_dir, profiles):
     profiles.rename(
         columns={
             fs.PRO_FILE_TRANSCRIPT_ID_COL: tpms.TRANSCRIPT,
@@ -112,10 +147,17 @@ def _write_quantification_data(out_file, profiles):
         },
         inplace=True)
 
+    tpm_store.write_tpms(store_dir, profiles, annotation_dir)
+
+    if not out_file:
+        return
+
     profiles.to_csv(
         out_file, index=False,
         cols=[tpms.TRANSCRIPT, tpms.GENE, tpms.LENGTH, tpms.UNIQUE_SEQ_LENGTH,
-              tpms.TRANSCRIPT_COUNT, tpms.REAL_TPM, tpms.CALCULATED_TPM])
+              tpms.TRANSCRIPT_COUNT, tpms.REAL_TPM, tpms.CALCULATED_TPM,
+              tpms.GC_LENGTH, tpms.HOMOPOLYMER_LENGTH, tpms.KMER_COUNT,
+              tpms.UNIQUE_KMER_COUNT])
 
 
 def _assemble_and_write_quantification_data(logger, options):
@@ -137,9 +179,26 @@ def _assemble_and_write_quantification_data(logger, options):
     logger.info("Reading unique sequence lengths per-transcript")
     _read_unique_sequence_lengths(options[UNIQUE_SEQ_FILE], profiles)
 
-    # Write TPMs and other relevant data to output file
-    logger.info("Writing TPMs to file {out}".format(out=options[OUT_FILE]))
-    _write_quantification_data(options[OUT_FILE], profiles)
+    # Read GC and homopolymer sequence lengths per-transcript
+    logger.info("Reading sequence composition per-transcript")
+    _read_transcript_annotation(
+        options[COMPOSITION_FILE], [tpms.GC_LENGTH, tpms.HOMOPOLYMER_LENGTH],
+        profiles)
+
+    # Read total and unique k-mer counts per-transcript
+    logger.info("Reading unique k-mer counts per-transcript")
+    _read_transcript_annotation(
+        options[UNIQUE_KMERS_FILE], [tpms.KMER_COUNT, tpms.UNIQUE_KMER_COUNT],
+        profiles)
+
+    # Write TPMs and other relevant data to output files
+    logger.info(
+        "Writing TPMs to store {store}".format(store=options[TPM_STORE]))
+    if options[OUT_FILE]:
+        logger.info("Writing TPMs to file {out}".format(out=options[OUT_FILE]))
+    _write_quantification_data(
+        options[OUT_FILE], options[TPM_STORE], options[ANNOTATION_DIR],
+        profiles)
 
 
 def assemble_quantification_data(args):
@@ -0,0 +1,244 @@
+"""
+Functions and classes for calculating bootstrap confidence intervals for
+statistics calculated from the results of a transcript quantification run.
+Exports:
+
+ResamplingData: Arrays describing TPMs in a form suitable for resampling.
+get_confidence_intervals: Calculate confidence intervals for statistics.
+get_grouped_confidence_intervals: Calculate confidence intervals for
+statistics of TPMs grouped by a classifier.
+"""
+
+import multiprocessing
+import numpy as np
+import pandas as pd
+import warnings
+
+from . import statistics
+from . import tpms as t
+
+CONFIDENCE_LEVEL = 95
+
+# The maximum number of elements in the matrices of resample weights created
+# for a single batch of resamples; this bounds the memory used by each worker
+# process.
+_MAX_BATCH_ELEMENTS = 2000000
+
+# Resamples are seeded deterministically, so that repeated analyses of the
+# same quantification run produce identical confidence intervals.
+_RANDOM_SEED = 0
+
+_WORKER_STATE = {}
+
+
+class SortedValues(object):
+    """
+    Sort order and ties for an array of values.
+
+    order: Indices which sort the values into ascending order.
+    starts: The positions, in sorted order, at which each run of tied values
+    begins.
+    groups: For each position in sorted order, the index of the run of tied
+    values to which the value at that position belongs.
+    """
+    def __init__(self, values):
+        self.order = np.argsort(values, kind="mergesort")
+        self.values = values[self.order]
+
+        is_start = np.ones(len(values), dtype=bool)
+        is_start[1:] = self.values[1:] != self.values[:-1]
+        self.starts = np.flatnonzero(is_start)
+        self.groups = np.cumsum(is_start) - 1
+
+
+class ResamplingData(object):
+    """
+    Arrays describing TPMs in a form suitable for resampling.
+
+    Holds the classification of each transcript (or gene) TPM as a true or
+    false positive or negative, together with sort orders of the values for
+    true positive TPMs which are used in calculating rank- and quantile-based
+    statistics. These are calculated once, and then shared by all bootstrap
+    resamples.
+
+    As each resample draws TPMs uniformly at random, the order in which TPMs
+    are held is immaterial; they are therefore reordered so that true positive
+    TPMs come first, sorted by real TPM. Resample weights for true positive
+    TPMs can then be obtained without copying, already in order of real TPM.
+    The attribute 'order' gives the positions of the held TPMs in the original
+    data frame.
+    """
+    def __init__(self, tpms):
+        self.size = len(tpms)
+
+        true_pos = tpms[t.TRUE_POSITIVE].values.astype(bool)
+        real_tpms = tpms[t.REAL_TPM].values
+        order = np.lexsort((real_tpms, ~true_pos))
+        self.order = order
+
+        self.true_pos = true_pos[order]
+        self.false_pos = tpms[t.FALSE_POSITIVE].values.astype(bool)[order]
+        self.true_neg = tpms[t.TRUE_NEGATIVE].values.astype(bool)[order]
+        self.false_neg = tpms[t.FALSE_NEGATIVE].values.astype(bool)[order]
+
+        self.num_true_pos = int(true_pos.sum())
+        tp_order = order[:self.num_true_pos]
+
+        self.tp_real_tpms = SortedValues(real_tpms[tp_order])
+        self.tp_calc_tpms = SortedValues(
+            tpms[t.CALCULATED_TPM].values[tp_order])
+        self.tp_percent_errors = SortedValues(
+            tpms[t.PERCENT_ERROR].values[tp_order])
+
+
+def _get_resample_weights(indices, size):
+    # Convert a matrix of resampled indices (one row per resample) into a
+    # matrix of the same shape, giving the number of times each element was
+    # drawn in each resample.
+    num_resamples = indices.shape[0]
+    offsets = np.arange(num_resamples)[:, np.newaxis] * size
+    counts = np.bincount(
+        (indices + offsets).ravel(), minlength=num_resamples * size)
+    return counts.reshape(num_resamples, size)
+
+
+def _calculate_resampled_stats(data, stats, seed, num_resamples):
+    random_state = np.random.RandomState(seed)
+    indices = random_state.randint(0, data.size, (num_resamples, data.size))
+    weights = _get_resample_weights(indices, data.size)
+
+    resampled = {}
+    for stat in stats:
+        values = stat.calculate_resampled(data, weights)
+        if values is not None:
+            resampled[stat.name] = values
+    return resampled
+
+
+def _initialise_worker(data, stat_names, options):
+    stats = [s for s in statistics.get_statistics() if s.name in stat_names]
+    for stat in stats:
+        stat.set_options(options)
+
+    _WORKER_STATE["data"] = data
+    _WORKER_STATE["stats"] = stats
+
+
+def _calculate_resampled_stats_in_worker(batch):
+    seed, num_resamples = batch
+    return _calculate_resampled_stats(
+        _WORKER_STATE["data"], _WORKER_STATE["stats"], seed, num_resamples)
+
+
+def _get_batches(data_size, num_resamples):
+    batch_size = max(1, _MAX_BATCH_ELEMENTS // max(1, data_size))
+
+    batches = []
+    for batch_start in range(0, num_resamples, batch_size):
+        batches.append((_RANDOM_SEED + len(batches),
+                        min(batch_size, num_resamples - batch_start)))
+    return batches
+
+
+def _resample(data, stats, num_resamples, processes, options):
+    batches = _get_batches(data.size, num_resamples)
+
+    if processes > 1 and len(batches) > 1:
+        pool = multiprocessing.Pool(
+            processes, _initialise_worker,
+            (data, [s.name for s in stats], options))
+        try:
+            results = pool.map(_calculate_resampled_stats_in_worker, batches)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_calculate_resampled_stats(data, stats, seed, size)
+                   for seed, size in batches]
+
+    resampled = {}
+    for name in results[0]:
+        resampled[name] = np.concatenate([r[name] for r in results])
+    return resampled
+
+
+def _calculate_intervals(data, stats, num_resamples, processes, options):
+    intervals = {}
+    if data.size == 0:
+        return intervals
+
+    tail = (100 - CONFIDENCE_LEVEL) / 2.0
+    resampled = _resample(data, stats, num_resamples, processes, options)
+
+    for name, values in resampled.items():
+        # Statistics may be undefined for some resamples (e.g. if a resample
+        # contains no true positive TPMs); these are ignored.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            lower, upper = np.nanpercentile(values, [tail, 100 - tail])
+
+        lower_col, upper_col = statistics.get_interval_columns(name)
+        intervals[lower_col] = lower
+        intervals[upper_col] = upper
+
+    return intervals
+
+
+def get_confidence_intervals(
+        tpms, stats, num_resamples, processes=1, options=None):
+    """
+    Calculate confidence intervals for statistics.
+
+    Calculate percentile bootstrap confidence intervals for statistics
+    calculated for the results of a quantification run. Returns a dictionary
+    mapping the names of columns holding the lower and upper bounds of the
+    interval for each statistic (see statistics.get_interval_columns) to the
+    values of those bounds. Statistics that are not subject to sampling error
+    are omitted.
+
+    tpms: A pandas DataFrame describing the result of a quantification run,
+    in which TPMs have been marked as true or false positives or negatives,
+    and their percentage errors calculated.
+    stats: An iterable of statistic instances.
+    num_resamples: The number of bootstrap resamples to draw.
+    processes: The number of worker processes over which to spread batches of
+    resamples.
+    options: A dictionary of options with which to configure statistics in
+    worker processes.
+    """
+    return _calculate_intervals(
+        ResamplingData(tpms), list(stats), num_resamples, processes,
+        options if options else {})
+
+
+def get_grouped_confidence_intervals(
+        tpms, column_name, stats, num_resamples, processes=1, options=None):
+    """
+    Calculate confidence intervals for statistics of grouped TPMs.
+
+    Calculate percentile bootstrap confidence intervals for statistics
+    calculated for the results of a quantification run which have been
+    grouped according to a certain method of classifying transcripts.
+    Resampling is stratified, so that each group is resampled independently.
+    Returns a pandas DataFrame indexed by group, with columns as described for
+    get_confidence_intervals.
+
+    tpms: A pandas DataFrame describing the result of a quantification run,
+    as for get_confidence_intervals.
+    column_name: The name of the column by which TPMs should be grouped.
+    stats, num_resamples, processes, options: As for
+    get_confidence_intervals.
+    """
+    stats = list(stats)
+    if options is None:
+        options = {}
+
+    intervals = {}
+    for group, group_tpms in tpms.groupby(column_name):
+        intervals[group] = _calculate_intervals(
+            ResamplingData(group_tpms), stats, num_resamples,
+            processes, options)
+
+    intervals = pd.DataFrame.from_dict(intervals, orient="index")
+    intervals.index.name = column_name
+    return intervals
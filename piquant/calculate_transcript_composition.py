@@ -0,0 +1,178 @@
+"""Usage:
+    calculate_transcript_composition [{log_option_spec} --min-homopolymer=<min-homopolymer>] <gtf-file> <genome-fasta-dir>
+
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+--min-homopolymer=<min-homopolymer>
+    Minimum length of a run of a single base for it to be counted as a
+    homopolymer [default: 6].
+<gtf-file>
+    GTF file containing genes and transcripts.
+<genome-fasta-dir>
+    Directory containing per-chromosome sequence FASTA files.
+
+Calculate the number of G or C bases, and the number of bases lying within
+homopolymer runs, in the sequence of each transcript in the specified GTF
+file. Transcript sequences are read from memory-mapped genome FASTA files,
+one chromosome at a time, and their composition calculated in vectorized
+fashion.
+"""
+
+import docopt
+import numpy as np
+import pandas as pd
+import schema
+import sys
+
+from . import genome
+from . import gtf
+from . import options as opt
+from . import tpms
+from .__init__ import __version__
+
+GTF_FILE = "<gtf-file>"
+GENOME_FASTA_DIR = "<genome-fasta-dir>"
+MIN_HOMOPOLYMER = "--min-homopolymer"
+
+_GC_BASES = np.zeros(256, dtype=bool)
+_GC_BASES[np.frombuffer(b"GC", dtype=np.uint8)] = True
+
+_UNKNOWN_BASE = ord("N")
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        opt.validate_file_option(options[GTF_FILE], "Could not open GTF file")
+        opt.validate_dir_option(
+            options[GENOME_FASTA_DIR],
+            "Genome FASTA directory does not exist")
+        options[MIN_HOMOPOLYMER] = opt.validate_int_option(
+            options[MIN_HOMOPOLYMER],
+            "Minimum homopolymer length must be a positive integer",
+            min_val=1)
+    except schema.SchemaError as exc:
+        exit(exc.code)
+
+
+def get_sequence_composition(sequences, lengths, min_homopolymer_length):
+    """
+    Calculate the composition of a set of concatenated sequences.
+
+    Return a tuple of arrays of the number of G or C bases in each sequence,
+    and of the number of bases in each sequence lying within runs of a single
+    base (other than N) of at least the specified length.
+
+    sequences: A numpy uint8 array containing the concatenated sequences, in
+    upper case.
+    lengths: An array of the length of each sequence.
+    min_homopolymer_length: The minimum length of a homopolymer run.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    base_sequences = np.repeat(np.arange(len(lengths)), lengths)
+
+    gc_lengths = np.bincount(
+        base_sequences, weights=_GC_BASES[sequences], minlength=len(lengths))
+
+    # A run of a single base starts wherever the base changes, or wherever
+    # a new sequence starts
+    run_starts = np.ones(len(sequences), dtype=bool)
+    run_starts[1:] = sequences[1:] != sequences[:-1]
+    run_starts[(np.cumsum(lengths) - lengths)[lengths > 0]] = True
+
+    runs = np.cumsum(run_starts) - 1
+    homopolymers = \
+        (np.bincount(runs) >= min_homopolymer_length) & \
+        (sequences[run_starts] != _UNKNOWN_BASE)
+
+    homopolymer_lengths = np.bincount(
+        base_sequences, weights=homopolymers[runs], minlength=len(lengths))
+
+    return gc_lengths.astype(np.int64), homopolymer_lengths.astype(np.int64)
+
+
+def get_transcript_composition(
+        transcripts_genome, transcripts, min_homopolymer_length,
+        logger=None):
+    """
+    Calculate the composition of the sequence of each transcript.
+
+    Return a pandas DataFrame with a row for each transcript, containing the
+    transcript ID, and the number of G or C bases and of bases within
+    homopolymer runs in the transcript's sequence.
+
+    transcripts_genome: A genome.Genome instance.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    min_homopolymer_length: The minimum length of a homopolymer run.
+    logger: Optionally, logs messages to standard error.
+    """
+    gc_lengths = np.zeros(len(transcripts.ids), dtype=np.int64)
+    homopolymer_lengths = np.zeros(len(transcripts.ids), dtype=np.int64)
+
+    # Sequences are extracted one chromosome at a time, so that only the
+    # sequence of transcripts on a single chromosome is held in memory
+    for chromosome in np.unique(transcripts.chromosomes):
+        chrom_transcripts = np.flatnonzero(
+            transcripts.chromosomes == chromosome)
+        if logger:
+            logger.info(
+                "...processing {n} transcripts for chromosome '{c}'".format(
+                    n=len(chrom_transcripts), c=chromosome))
+
+        sequences, _ = genome.get_transcript_sequences(
+            transcripts_genome, transcripts, chrom_transcripts)
+        gc_lengths[chrom_transcripts], \
+            homopolymer_lengths[chrom_transcripts] = \
+            get_sequence_composition(
+                sequences, transcripts.lengths[chrom_transcripts],
+                min_homopolymer_length)
+
+    return pd.DataFrame.from_dict({
+        tpms.TRANSCRIPT: transcripts.ids,
+        tpms.GC_LENGTH: gc_lengths,
+        tpms.HOMOPOLYMER_LENGTH: homopolymer_lengths
+    })[[tpms.TRANSCRIPT, tpms.GC_LENGTH, tpms.HOMOPOLYMER_LENGTH]]
+
+
+def _calculate_transcript_composition(logger, options):
+    # Read the structure of each transcript from the GTF file
+    logger.info("Reading GTF file {f}".format(f=options[GTF_FILE]))
+    transcripts = gtf.read_transcripts(options[GTF_FILE])
+    logger.info("Read {n} transcripts.".format(n=len(transcripts.ids)))
+
+    # Extract the sequence of transcripts on each chromosome in turn, and
+    # calculate their composition
+    logger.info("Calculating transcript sequence composition...")
+    try:
+        composition = get_transcript_composition(
+            genome.Genome(options[GENOME_FASTA_DIR]), transcripts,
+            options[MIN_HOMOPOLYMER], logger)
+    except (IOError, ValueError) as exc:
+        exit("Exiting. " + str(exc))
+
+    # Write the composition of each transcript to standard output
+    logger.info("Writing composition for {n} transcripts.".format(
+        n=len(composition)))
+    composition.to_csv(sys.stdout, index=False)
+
+
+def calculate_transcript_composition(args):
+    # Read in command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args,
+        version="calculate_transcript_composition v" + __version__)
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Calculate and output the sequence composition of each transcript
+    _calculate_transcript_composition(logger, options)
@@ -0,0 +1,327 @@
+"""Usage:
+    calculate_unique_kmers [{log_option_spec} --kmer-length=<kmer-length>] <gtf-file> <genome-fasta-dir>
+
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+-k <kmer-length> --kmer-length=<kmer-length>
+    Length of k-mers, at most 31 [default: 31].
+<gtf-file>
+    GTF file containing genes and transcripts.
+<genome-fasta-dir>
+    Directory containing per-chromosome sequence FASTA files.
+
+Calculate, for each transcript in the specified GTF file, the number of
+distinct k-mers in its sequence, and the number of those k-mers which occur in
+the sequence of no other transcript. As reads may originate from either strand
+of a transcript, a k-mer and its reverse complement are considered the same.
+
+Transcript sequences are read from memory-mapped genome FASTA files in chunks
+of a bounded number of bases, 2-bit encoded, and the k-mers of each chunk
+calculated in vectorized fashion. The distinct k-mers of each chunk are
+distributed between a number of partitions on disk, according to their hash
+value; each partition is then read in turn to find k-mers occurring in only a
+single transcript. Memory usage is thus bounded by the chunk size and the
+size of a single partition, rather than by the size of the transcriptome.
+"""
+
+import docopt
+import numpy as np
+import os.path
+import pandas as pd
+import schema
+import shutil
+import sys
+import tempfile
+
+from . import genome
+from . import gtf
+from . import options as opt
+from . import tpms
+from .__init__ import __version__
+
+GTF_FILE = "<gtf-file>"
+GENOME_FASTA_DIR = "<genome-fasta-dir>"
+KMER_LENGTH = "--kmer-length"
+
+MAX_KMER_LENGTH = 31
+
+_MAX_CHUNK_BASES = 5000000
+_PARTITION_BITS = 4
+_NUM_PARTITIONS = 2 ** _PARTITION_BITS
+
+# K-mers are assigned to partitions by the top bits of their 64-bit
+# Fibonacci hash
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_PARTITION_SHIFT = np.uint64(64 - _PARTITION_BITS)
+
+_INVALID_CODE = 4
+_BASE_CODES = np.full(256, _INVALID_CODE, dtype=np.uint8)
+_BASE_CODES[np.frombuffer(b"ACGT", dtype=np.uint8)] = np.arange(4)
+
+_KMER_DTYPE = np.uint64
+_TRANSCRIPT_DTYPE = np.int32
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        opt.validate_file_option(options[GTF_FILE], "Could not open GTF file")
+        opt.validate_dir_option(
+            options[GENOME_FASTA_DIR],
+            "Genome FASTA directory does not exist")
+        options[KMER_LENGTH] = validate_kmer_length(options[KMER_LENGTH])
+    except schema.SchemaError as exc:
+        exit(exc.code)
+
+
+def validate_kmer_length(kmer_length):
+    """
+    Check if a k-mer length option is valid.
+
+    Return the k-mer length as an integer, or raise a SchemaError if it is
+    not an integer between 1 and MAX_KMER_LENGTH.
+
+    kmer_length: The k-mer length option, a string.
+    """
+    msg = "K-mer length must be an integer between 1 and {m}".format(
+        m=MAX_KMER_LENGTH)
+    kmer_length = opt.validate_int_option(kmer_length, msg, min_val=1)
+    if kmer_length > MAX_KMER_LENGTH:
+        raise schema.SchemaError(
+            None, "{msg}: '{k}'".format(msg=msg, k=kmer_length))
+    return kmer_length
+
+
+def get_kmers(sequences, lengths, kmer_length):
+    """
+    Calculate the k-mers of a set of concatenated sequences.
+
+    Return a tuple of an array of the canonical 2-bit encoded value of each
+    k-mer (i.e. the lesser of the values of the k-mer and its reverse
+    complement), and an array of the index of the sequence in which each
+    k-mer occurs. K-mers containing bases other than A, C, G or T are
+    omitted.
+
+    sequences: A numpy uint8 array containing the concatenated sequences, in
+    upper case.
+    lengths: An array of the length of each sequence.
+    kmer_length: The length of k-mers, at most MAX_KMER_LENGTH.
+    """
+    num_positions = len(sequences) - kmer_length + 1
+    if num_positions <= 0:
+        return np.zeros(0, dtype=_KMER_DTYPE), \
+            np.zeros(0, dtype=_TRANSCRIPT_DTYPE)
+
+    codes = _BASE_CODES[sequences]
+
+    # Roll each base into the k-mers of all positions at once
+    two = np.uint64(2)
+    forward = np.zeros(num_positions, dtype=_KMER_DTYPE)
+    reverse = np.zeros(num_positions, dtype=_KMER_DTYPE)
+    for i in range(kmer_length):
+        base_codes = codes[i:i + num_positions].astype(_KMER_DTYPE) & \
+            np.uint64(3)
+        forward = (forward << two) | base_codes
+        reverse |= (np.uint64(3) - base_codes) << np.uint64(2 * i)
+
+    # K-mers must lie within a single sequence, and contain no unknown bases
+    sequence_indices = np.repeat(
+        np.arange(len(lengths), dtype=_TRANSCRIPT_DTYPE), lengths)
+    invalid = np.concatenate(
+        ([0], np.cumsum(codes == _INVALID_CODE)))
+    valid = (invalid[kmer_length:] == invalid[:num_positions]) & \
+        (sequence_indices[:num_positions] ==
+         sequence_indices[kmer_length - 1:])
+
+    return np.minimum(forward, reverse)[valid], \
+        sequence_indices[:num_positions][valid]
+
+
+def get_distinct_kmers(kmers, sequence_indices, num_sequences):
+    """
+    Find the distinct k-mers of each of a set of sequences.
+
+    Return a tuple of arrays of the distinct k-mers occurring in any of the
+    sequences, and of the index of the single sequence in which each occurs
+    (or -1 if it occurs in more than one sequence), together with an array
+    of the number of distinct k-mers in each sequence.
+
+    kmers, sequence_indices: As returned by get_kmers().
+    num_sequences: The number of sequences.
+    """
+    order = np.lexsort((sequence_indices, kmers))
+    kmers = kmers[order]
+    sequence_indices = sequence_indices[order]
+
+    distinct = np.ones(len(kmers), dtype=bool)
+    distinct[1:] = (kmers[1:] != kmers[:-1]) | \
+        (sequence_indices[1:] != sequence_indices[:-1])
+    kmers = kmers[distinct]
+    sequence_indices = sequence_indices[distinct]
+
+    kmer_counts = np.bincount(sequence_indices, minlength=num_sequences)
+
+    first = np.ones(len(kmers), dtype=bool)
+    first[1:] = kmers[1:] != kmers[:-1]
+    starts = np.flatnonzero(first)
+    shared = np.diff(np.append(starts, len(kmers))) > 1
+
+    owners = sequence_indices[starts]
+    owners[shared] = -1
+    return kmers[starts], owners, kmer_counts
+
+
+def _get_chunks(transcripts):
+    # Split transcripts into chunks of a bounded total length, each within a
+    # single chromosome
+    for chromosome in pd.unique(transcripts.chromosomes):
+        chrom_transcripts = np.flatnonzero(
+            transcripts.chromosomes == chromosome)
+        lengths = transcripts.lengths[chrom_transcripts]
+        chunk_ids = (np.cumsum(lengths) - lengths) // _MAX_CHUNK_BASES
+        for chunk_id in np.unique(chunk_ids):
+            yield chromosome, chrom_transcripts[chunk_ids == chunk_id]
+
+
+def _get_partitions(kmers):
+    return ((kmers * _HASH_MULTIPLIER) >> _PARTITION_SHIFT).astype(np.intp)
+
+
+def _get_partition_files(partition_dir, partition):
+    return [os.path.join(partition_dir, "{p}.{s}".format(p=partition, s=s))
+            for s in ["kmers", "owners"]]
+
+
+def _write_partitions(partition_dir, kmers, owners):
+    partitions = _get_partitions(kmers)
+    for partition in range(_NUM_PARTITIONS):
+        in_partition = partitions == partition
+        kmers_file, owners_file = \
+            _get_partition_files(partition_dir, partition)
+        with open(kmers_file, "ab") as out_file:
+            kmers[in_partition].tofile(out_file)
+        with open(owners_file, "ab") as out_file:
+            owners[in_partition].astype(_TRANSCRIPT_DTYPE).tofile(out_file)
+
+
+def _count_partition_unique_kmers(partition_dir, partition, num_transcripts):
+    kmers_file, owners_file = _get_partition_files(partition_dir, partition)
+    if not os.path.exists(kmers_file):
+        return np.zeros(num_transcripts, dtype=np.int64)
+
+    kmers = np.fromfile(kmers_file, dtype=_KMER_DTYPE)
+    owners = np.fromfile(owners_file, dtype=_TRANSCRIPT_DTYPE)
+
+    # Each transcript lies in a single chunk, so a k-mer occurs in only one
+    # transcript if it was recorded for only one chunk, in which it was
+    # itself unique to one transcript
+    order = np.argsort(kmers)
+    kmers = kmers[order]
+    owners = owners[order]
+
+    first = np.ones(len(kmers), dtype=bool)
+    first[1:] = kmers[1:] != kmers[:-1]
+    starts = np.flatnonzero(first)
+    single = np.diff(np.append(starts, len(kmers))) == 1
+    owners = owners[starts][single]
+
+    return np.bincount(
+        owners[owners >= 0], minlength=num_transcripts).astype(np.int64)
+
+
+def get_unique_kmers(
+        transcripts_genome, transcripts, kmer_length, logger=None):
+    """
+    Calculate the number of k-mers unique to each transcript.
+
+    Return a pandas DataFrame with a row for each transcript, containing the
+    transcript ID, the number of distinct k-mers in the transcript's sequence,
+    and the number of those k-mers occurring in no other transcript.
+
+    transcripts_genome: A genome.Genome instance.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    kmer_length: The length of k-mers, at most MAX_KMER_LENGTH.
+    logger: Optionally, logs messages to standard error.
+    """
+    num_transcripts = len(transcripts.ids)
+    kmer_counts = np.zeros(num_transcripts, dtype=np.int64)
+    unique_kmer_counts = np.zeros(num_transcripts, dtype=np.int64)
+
+    partition_dir = tempfile.mkdtemp()
+    try:
+        for chromosome, chunk_transcripts in _get_chunks(transcripts):
+            if logger:
+                logger.info(
+                    "...finding k-mers of {n} transcripts for chromosome "
+                    "'{c}'".format(n=len(chunk_transcripts), c=chromosome))
+
+            sequences, _ = genome.get_transcript_sequences(
+                transcripts_genome, transcripts, chunk_transcripts)
+            chunk_kmers, chunk_indices = get_kmers(
+                sequences, transcripts.lengths[chunk_transcripts],
+                kmer_length)
+            kmers, owners, kmer_counts[chunk_transcripts] = \
+                get_distinct_kmers(
+                    chunk_kmers, chunk_indices, len(chunk_transcripts))
+            owners[owners >= 0] = chunk_transcripts[owners[owners >= 0]]
+            _write_partitions(partition_dir, kmers, owners)
+
+        for partition in range(_NUM_PARTITIONS):
+            if logger:
+                logger.info("...finding unique k-mers in partition {p}".format(
+                    p=partition + 1))
+            unique_kmer_counts += _count_partition_unique_kmers(
+                partition_dir, partition, num_transcripts)
+    finally:
+        shutil.rmtree(partition_dir)
+
+    return pd.DataFrame.from_dict({
+        tpms.TRANSCRIPT: transcripts.ids,
+        tpms.KMER_COUNT: kmer_counts,
+        tpms.UNIQUE_KMER_COUNT: unique_kmer_counts
+    })[[tpms.TRANSCRIPT, tpms.KMER_COUNT, tpms.UNIQUE_KMER_COUNT]]
+
+
+def _calculate_unique_kmers(logger, options):
+    # Read the structure of each transcript from the GTF file
+    logger.info("Reading GTF file {f}".format(f=options[GTF_FILE]))
+    transcripts = gtf.read_transcripts(options[GTF_FILE])
+    logger.info("Read {n} transcripts.".format(n=len(transcripts.ids)))
+
+    # Find the k-mers of each transcript, and those which occur in no other
+    # transcript
+    logger.info("Calculating unique {k}-mers per transcript...".format(
+        k=options[KMER_LENGTH]))
+    try:
+        unique_kmers = get_unique_kmers(
+            genome.Genome(options[GENOME_FASTA_DIR]), transcripts,
+            options[KMER_LENGTH], logger)
+    except (IOError, ValueError) as exc:
+        exit("Exiting. " + str(exc))
+
+    # Write the k-mer counts of each transcript to standard output
+    logger.info("Writing unique k-mers for {n} transcripts.".format(
+        n=len(unique_kmers)))
+    unique_kmers.to_csv(sys.stdout, index=False)
+
+
+def calculate_unique_kmers(args):
+    # Read in command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args,
+        version="calculate_unique_kmers v" + __version__)
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Calculate and output the number of unique k-mers per transcript
+    _calculate_unique_kmers(logger, options)
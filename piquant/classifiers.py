@@ -1,6 +1,12 @@
+import pandas as pd
+
 from . import tpms as t
 
 
+def _get_classifier(column_name):
+    return [c for c in _CLASSIFIERS if c.column_name == column_name][0]
+
+
 class _Classifier(object):
     def __init__(self, column_name, value_extractor,
                  grouped_stats=True, distribution_plot_range=None,
@@ -12,6 +18,11 @@ class _Classifier(object):
         self.plot_title = plot_title if plot_title else column_name
         self.units = units
 
+    def __reduce__(self):
+        # Classifiers are pickled (e.g. when passed to other processes) by
+        # name, as their value extractors cannot themselves be pickled.
+        return (_get_classifier, (self.column_name,))
+
     def get_column_name(self):
         return self.column_name
 
@@ -65,6 +76,9 @@ class _LevelsClassifier(_Classifier):
 
     def get_classification_value(self, row):
         row_value = _Classifier.get_classification_value(self, row)
+        if pd.isnull(row_value):
+            # Transcripts for which a value is unavailable are not classified
+            return row_value
         for i, level in enumerate(self.levels):
             if row_value <= level:
                 return i
@@ -100,5 +114,34 @@ _CLASSIFIERS.append(_LevelsClassifier(
     closed=True))
 
 
+def _get_percentage(column_name, total_column_name=t.LENGTH):
+    # Sequence composition and k-mer uniqueness are not recorded in TPM
+    # stores assembled before they were calculated, in which case transcripts
+    # are left unclassified; so too are transcripts for which the percentage
+    # is undefined (e.g. those shorter than the k-mer length)
+    def get_percentage(row):
+        if column_name not in row or not row[total_column_name] > 0:
+            return float("nan")
+        return 100 * float(row[column_name]) / row[total_column_name]
+
+    return get_percentage
+
+
+_CLASSIFIERS.append(_LevelsClassifier(
+    "GC content percentage", _get_percentage(t.GC_LENGTH),
+    [40, 45, 50, 55]))
+
+_CLASSIFIERS.append(_LevelsClassifier(
+    "homopolymer sequence percentage",
+    _get_percentage(t.HOMOPOLYMER_LENGTH),
+    [1, 2, 5]))
+
+_CLASSIFIERS.append(_LevelsClassifier(
+    "unique k-mer percentage",
+    _get_percentage(t.UNIQUE_KMER_COUNT, t.KMER_COUNT),
+    [20, 40, 60, 80, 100],
+    closed=True))
+
+
 def get_classifiers():
     return set(_CLASSIFIERS)
@@ -0,0 +1,198 @@
+"""
+Functions for assessing the agreement between transcript abundances estimated
+by different quantification methods from the same set of simulated reads.
+Exports:
+
+get_concordance_measures: Return all measures of agreement between methods.
+get_concordance: Calculate agreement between quantification methods.
+get_concordance_stats: Calculate agreement for each set of simulated reads.
+write_concordance_stats: Write agreement statistics to a CSV file.
+read_concordance_stats: Read agreement statistics from a CSV file.
+
+Agreement is assessed, for each pair of quantification methods, by the
+Spearman correlation of their calculated TPMs, by the mean absolute log ratio
+of their calculated TPMs for transcripts considered "present" by both methods,
+and by the number of transcripts considered "present" by one method but "not
+present" by the other. All pairs of methods are assessed at once, from the
+stacked vectors of each method's calculated TPMs.
+"""
+
+import numpy as np
+import os.path
+import pandas as pd
+
+from . import piquant_options as po
+from . import statistics
+from . import tpms as t
+
+CONCORDANCE_STATS_FILE = "concordance.csv"
+OTHER_QUANT_METHOD = "other_quant_method"
+
+SPEARMAN = "tpm-rho"
+MEAN_ABS_LOG_RATIO = "mean-abs-log-ratio"
+DISCORDANT_CALLS = "discordant-calls"
+DISCORDANT_FRACTION = "discordant-frac"
+
+
+class _ConcordanceMeasure(object):
+    # Describes a measure of agreement between quantification methods, and how
+    # it should be displayed on a heatmap.
+    def __init__(self, name, title, value_range, colour_map):
+        self.name = name
+        self.title = title
+        self.value_range = value_range
+        self.colour_map = colour_map
+
+
+_MEASURES = [
+    _ConcordanceMeasure(
+        SPEARMAN, "Spearman correlation of calculated TPMs", (0, 1), "YlGnBu"),
+    _ConcordanceMeasure(
+        MEAN_ABS_LOG_RATIO, "Mean absolute log10 ratio of calculated TPMs",
+        (0, None), "YlOrRd"),
+    _ConcordanceMeasure(
+        DISCORDANT_FRACTION, "Fraction of discordant present/absent calls",
+        (0, None), "YlOrRd")
+]
+
+
+def get_concordance_measures():
+    """Return a list of all measures of agreement between methods."""
+    return list(_MEASURES)
+
+
+def _get_ranks(tpms):
+    # Rank values within each row, assigning tied values their average rank.
+    return pd.DataFrame(tpms).rank(axis=1).values
+
+
+def _get_spearman_correlations(tpms):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.corrcoef(_get_ranks(tpms))
+
+
+def _get_discordant_calls(present):
+    # The number of transcripts present for one method but not the other is
+    # obtained for all pairs of methods by a single matrix product.
+    present = present.astype(np.float64)
+    present_absent = present.dot(1 - present.T)
+    return present_absent + present_absent.T
+
+
+def _get_mean_abs_log_ratios(tpms, present):
+    # For each method in turn, calculate the mean absolute log ratio between
+    # its TPMs and those of every method at once, over transcripts present for
+    # both.
+    log_tpms = np.log10(np.where(present, tpms, 1))
+    ratios = np.empty((len(tpms), len(tpms)))
+    for i in range(len(tpms)):
+        both_present = present[i] & present
+        abs_log_ratios = np.abs(log_tpms[i] - log_tpms) * both_present
+        num_both_present = both_present.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratios[i] = abs_log_ratios.sum(axis=1) / num_both_present
+    return ratios
+
+
+def get_concordance(tpms, not_present_cutoff):
+    """
+    Calculate agreement between quantification methods.
+
+    Return a dictionary mapping from the name of each measure of agreement to
+    a (methods x methods) array of the values of that measure for each pair of
+    methods. Transcripts for which any method has no calculated TPM are
+    ignored.
+
+    tpms: A (methods x transcripts) array of calculated TPMs, in which each
+    row contains the TPMs estimated by one quantification method from the
+    same set of simulated reads.
+    not_present_cutoff: Cut-off TPM value at or below which a transcript is
+    considered to be "not present".
+    """
+    tpms = np.asarray(tpms, dtype=np.float64)
+    tpms = tpms[:, ~np.isnan(tpms).any(axis=0)]
+    present = tpms > not_present_cutoff
+
+    discordant_calls = _get_discordant_calls(present)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        discordant_fraction = discordant_calls / float(tpms.shape[1])
+
+    return {
+        SPEARMAN: _get_spearman_correlations(tpms),
+        MEAN_ABS_LOG_RATIO: _get_mean_abs_log_ratios(tpms, present),
+        DISCORDANT_CALLS: discordant_calls,
+        DISCORDANT_FRACTION: discordant_fraction
+    }
+
+
+def _get_reads_options(runs):
+    options = [o for o in po.get_multiple_quant_run_options()
+               if o != po.QUANT_METHOD and o.name in runs.columns]
+    return sorted(options, key=lambda o: o.index)
+
+
+def get_concordance_stats(matrix, not_present_cutoff):
+    """
+    Calculate agreement for each set of simulated reads.
+
+    Return a pandas DataFrame with a row for each ordered pair of
+    quantification methods run on each set of simulated reads, containing the
+    values of options describing the set of reads, the two quantification
+    methods, and the values of each measure of agreement between them.
+
+    matrix: A tpm_matrix.TpmMatrix instance containing calculated TPMs for
+    each quantification run.
+    not_present_cutoff: Cut-off TPM value at or below which a transcript is
+    considered to be "not present".
+    """
+    reads_options = _get_reads_options(matrix.runs)
+    reads_columns = [o.name for o in reads_options]
+
+    stats = []
+    for _, runs in matrix.runs.groupby(reads_columns):
+        num_methods = len(runs)
+        if num_methods < 2:
+            continue
+
+        concordance = get_concordance(
+            matrix.get_tpms(runs, t.CALCULATED_TPM), not_present_cutoff)
+
+        methods = runs[po.QUANT_METHOD.name].values
+        run_stats = pd.DataFrame.from_dict({
+            po.QUANT_METHOD.name: np.repeat(methods, num_methods),
+            OTHER_QUANT_METHOD: np.tile(methods, num_methods)
+        })
+        for column in reads_columns:
+            run_stats[column] = runs[column].values[0]
+        for measure, values in concordance.items():
+            run_stats[measure] = values.ravel()
+
+        stats.append(run_stats)
+
+    return pd.concat(stats, ignore_index=True) if stats else None
+
+
+def write_concordance_stats(stats_dir, stats):
+    """
+    Write agreement statistics to a CSV file.
+
+    stats_dir: The directory in which to write the statistics file.
+    stats: A pandas DataFrame, as returned by get_concordance_stats().
+    """
+    statistics.write_stats_data(
+        os.path.join(stats_dir, CONCORDANCE_STATS_FILE), stats, index=False)
+
+
+def read_concordance_stats(stats_dir):
+    """
+    Read agreement statistics from a CSV file.
+
+    Return a pandas DataFrame, as written by write_concordance_stats(), or
+    None if no agreement statistics were written.
+
+    stats_dir: The directory containing the statistics file.
+    """
+    stats_file = os.path.join(stats_dir, CONCORDANCE_STATS_FILE)
+    return pd.read_csv(stats_file) if os.path.exists(stats_file) else None
+
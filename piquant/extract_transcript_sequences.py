@@ -0,0 +1,192 @@
+"""Usage:
+    extract_transcript_sequences [{log_option_spec} --processes=<processes>] <gtf-file> <genome-fasta-dir> <transcripts-fasta>
+
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+-p <processes> --processes=<processes>
+    Number of processes over which to spread the extraction of transcript
+    sequences for different chromosomes [default: 1].
+<gtf-file>
+    GTF file containing genes and transcripts.
+<genome-fasta-dir>
+    Directory containing per-chromosome sequence FASTA files.
+<transcripts-fasta>
+    FASTA file to which transcript sequences will be written.
+
+Extract the sequence of each transcript in the specified GTF file from
+per-chromosome genome sequence FASTA files, and write them to a FASTA file.
+Exons of each transcript are spliced together and, for transcripts on the
+reverse strand, reverse complemented. Sequences are extracted from memory-mapped
+genome FASTA files one chromosome at a time, and written as soon as they have
+been extracted, so that only the transcript sequences of a small number of
+chromosomes are held in memory at once.
+"""
+
+import docopt
+import multiprocessing
+import pandas as pd
+import schema
+
+from . import genome
+from . import gtf
+from . import options as opt
+from .__init__ import __version__
+
+GTF_FILE = "<gtf-file>"
+GENOME_FASTA_DIR = "<genome-fasta-dir>"
+TRANSCRIPTS_FASTA = "<transcripts-fasta>"
+PROCESSES = "--processes"
+
+# State shared by all chromosomes processed in a worker process
+_WORKER_STATE = {}
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        opt.validate_file_option(options[GTF_FILE], "Could not open GTF file")
+        opt.validate_dir_option(
+            options[GENOME_FASTA_DIR],
+            "Genome FASTA directory does not exist")
+        options[PROCESSES] = opt.validate_int_option(
+            options[PROCESSES],
+            "Number of processes must be a positive integer", min_val=1)
+    except schema.SchemaError as exc:
+        exit(exc.code)
+
+
+def get_fasta_records(ids, sequences, offsets):
+    """
+    Format transcript sequences as FASTA records.
+
+    Return a byte string containing a FASTA record for each transcript, with
+    its sequence on a single line.
+
+    ids: An array of transcript IDs.
+    sequences: A numpy uint8 array containing the concatenated sequences of
+    the transcripts.
+    offsets: An array of the offset of each transcript's sequence in the
+    former.
+    """
+    ends = list(offsets[1:]) + [len(sequences)]
+    records = []
+    for transcript_id, start, end in zip(ids, offsets, ends):
+        records.append(">{t}\n".format(t=transcript_id).encode("utf-8"))
+        records.append(sequences[start:end].tobytes())
+        records.append(b"\n")
+    return b"".join(records)
+
+
+def get_chromosome_records(transcripts_genome, transcripts, chromosome):
+    """
+    Extract the sequences of the transcripts on a chromosome.
+
+    Return a byte string containing a FASTA record for each transcript on the
+    chromosome, in order of their appearance in the GTF file.
+
+    transcripts_genome: A genome.Genome instance.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    chromosome: The name of the chromosome.
+    """
+    chrom_transcripts = (transcripts.chromosomes == chromosome).nonzero()[0]
+    sequences, offsets = genome.get_transcript_sequences(
+        transcripts_genome, transcripts, chrom_transcripts)
+    return get_fasta_records(
+        transcripts.ids[chrom_transcripts], sequences,
+        offsets[chrom_transcripts])
+
+
+def _initialise_worker(genome_dir, transcripts):
+    _WORKER_STATE["genome"] = genome.Genome(genome_dir)
+    _WORKER_STATE["transcripts"] = transcripts
+
+
+def _get_chromosome_records_in_worker(chromosome):
+    return get_chromosome_records(
+        _WORKER_STATE["genome"], _WORKER_STATE["transcripts"], chromosome)
+
+
+def write_transcript_sequences(
+        out_file, genome_dir, transcripts, processes=1, logger=None):
+    """
+    Extract transcript sequences and write them to a FASTA file.
+
+    Transcripts are written grouped by chromosome, with chromosomes in order
+    of their first appearance in the GTF file.
+
+    out_file: A file object, opened for writing in binary mode.
+    genome_dir: Path to a directory containing per-chromosome genome
+    sequences as FASTA files.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    processes: The number of worker processes over which to spread the
+    extraction of sequences for different chromosomes.
+    logger: Optionally, logs messages to standard error.
+    """
+    chromosomes = pd.unique(transcripts.chromosomes)
+
+    if processes > 1 and len(chromosomes) > 1:
+        pool = multiprocessing.Pool(
+            min(processes, len(chromosomes)), _initialise_worker,
+            (genome_dir, transcripts))
+        try:
+            # Records for each chromosome are written as soon as they, and
+            # those of all preceding chromosomes, have been extracted
+            for chromosome, records in zip(chromosomes, pool.imap(
+                    _get_chromosome_records_in_worker, chromosomes)):
+                out_file.write(records)
+                if logger:
+                    logger.info("...wrote sequences for chromosome '{c}'".
+                                format(c=chromosome))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        transcripts_genome = genome.Genome(genome_dir)
+        for chromosome in chromosomes:
+            out_file.write(get_chromosome_records(
+                transcripts_genome, transcripts, chromosome))
+            if logger:
+                logger.info("...wrote sequences for chromosome '{c}'".
+                            format(c=chromosome))
+
+
+def _extract_transcript_sequences(logger, options):
+    # Read the structure of each transcript from the GTF file
+    logger.info("Reading GTF file {f}".format(f=options[GTF_FILE]))
+    transcripts = gtf.read_transcripts(options[GTF_FILE])
+    logger.info("Read {n} transcripts.".format(n=len(transcripts.ids)))
+
+    # Extract the sequence of transcripts on each chromosome and write them
+    # to the output FASTA file
+    logger.info("Writing transcript sequences to {f}".format(
+        f=options[TRANSCRIPTS_FASTA]))
+    try:
+        with open(options[TRANSCRIPTS_FASTA], "wb") as out_file:
+            write_transcript_sequences(
+                out_file, options[GENOME_FASTA_DIR], transcripts,
+                options[PROCESSES], logger)
+    except (IOError, ValueError) as exc:
+        exit("Exiting. " + str(exc))
+
+
+def extract_transcript_sequences(args):
+    # Read in command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args,
+        version="extract_transcript_sequences v" + __version__)
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Extract and write the sequence of each transcript
+    _extract_transcript_sequences(logger, options)
@@ -91,6 +91,10 @@ class BashScriptWriter(_Writer):
     def while_block(self, details):
         return self._adding_bash_block("while ", "; do", "done", details)
 
+    @contextlib.contextmanager
+    def for_block(self, details):
+        return self._adding_bash_block("for ", "; do", "done", details)
+
     @contextlib.contextmanager
     def case_block(self, details):
         return self._adding_bash_block("case ", " in", "esac", details)
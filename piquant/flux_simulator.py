@@ -11,6 +11,7 @@ PRO_FILE_FRAC_COL: Abundance fraction column in FluxSimulator .pro file.
 PRO_FILE_NUM_COL: Transcript count column in FluxSimulator .pro file.
 SIMULATED_READS_PREFIX: FluxSimulator reads FASTA file prefix.
 READ_NUMBER_PLACEHOLDER: Placeholder text for number of reads to simulate.
+NUM_READS_FILE: File recording the number of reads in the final reads files.
 """
 
 import pandas as pd
@@ -25,6 +26,7 @@ PRO_FILE_NUM_COL = 5
 SIMULATED_READS_PREFIX = "reads"
 READ_NUMBER_PLACEHOLDER = "READ_NUMBER_PLACEHOLDER"
 TEMPORARY_DIRECTORY = "flux_simulator_tmp"
+NUM_READS_FILE = "num_reads.txt"
 
 MAIN_TRANSCRIPTS = "main"
 NOISE_TRANSCRIPTS = "noise"
@@ -219,3 +221,15 @@ def get_reads_file(errors, paired_end=None, intermediate=False,
     if paired_end == RIGHT_READS:
         reads_file += ".2"
     return reads_file + (".fastq" if errors else ".fasta")
+
+
+def read_num_reads(num_reads_file):
+    """
+    Return the number of simulated reads recorded in a file.
+
+    For paired-end reads, this is the number of read pairs.
+    num_reads_file: Path to a file recording the number of reads in the final
+    simulated reads files.
+    """
+    with open(num_reads_file) as in_file:
+        return int(in_file.read().strip())
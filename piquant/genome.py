@@ -0,0 +1,319 @@
+"""
+Functions and classes for accessing genome sequence held in per-chromosome
+FASTA files, without reading those files in full. Exports:
+
+build_fasta_index: Build a faidx-style index of the sequences in a FASTA file.
+read_fasta_index: Read a faidx-style FASTA index file.
+write_fasta_index: Write a faidx-style FASTA index file.
+get_fasta_index: Return the index of a FASTA file, building it if necessary.
+Genome: Memory-mapped access to per-chromosome genome sequences.
+get_transcript_sequences: Extract the sequences of a set of transcripts.
+
+The index of a FASTA file records, for each sequence, its name and length, the
+file offset of its first base, and the number of bases and bytes in each of
+its lines (as in the .fai files written by 'samtools faidx'). Indexes are
+cached alongside the FASTA files they describe, and rebuilt if older than
+them. Using the index, the file position of any base can be calculated, so
+that sequence may be read directly from a memory-mapped FASTA file.
+"""
+
+import collections
+import numpy as np
+import os
+import os.path
+
+FASTA_INDEX_SUFFIX = ".fai"
+FASTA_SUFFIXES = [".fa", ".fasta"]
+
+FastaIndexEntry = collections.namedtuple(
+    "FastaIndexEntry",
+    ["name", "length", "offset", "line_bases", "line_width"])
+
+_UPPER_CASE = np.arange(256, dtype=np.uint8)
+_UPPER_CASE[np.frombuffer(b"acgtn", dtype=np.uint8)] = \
+    np.frombuffer(b"ACGTN", dtype=np.uint8)
+
+_COMPLEMENT = np.arange(256, dtype=np.uint8)
+_COMPLEMENT[np.frombuffer(b"ACGTN", dtype=np.uint8)] = \
+    np.frombuffer(b"TGCAN", dtype=np.uint8)
+
+
+def _get_index_entry(name, length, offset, line_lengths):
+    # All lines of a sequence but the last must be of the same length
+    line_bases, line_width = line_lengths[0] if line_lengths else (0, 0)
+    for bases, width in line_lengths[1:-1]:
+        if bases != line_bases or width != line_width:
+            raise ValueError(
+                "Sequence '{n}' has lines of differing lengths.".format(
+                    n=name))
+    if len(line_lengths) > 1 and line_lengths[-1][0] > line_bases:
+        raise ValueError(
+            "Sequence '{n}' has lines of differing lengths.".format(n=name))
+
+    return FastaIndexEntry(name, length, offset, line_bases, line_width)
+
+
+def build_fasta_index(fasta_file):
+    """
+    Build a faidx-style index of the sequences in a FASTA file.
+
+    Return a list of FastaIndexEntry named tuples, one for each sequence in
+    the FASTA file, in order. A ValueError is raised if the lines of any
+    sequence (but the last) are not of the same length, or if a sequence
+    contains blank lines other than at its end.
+
+    fasta_file: Path to a FASTA file.
+    """
+    entries = []
+    name = None
+    length = offset = position = 0
+    line_lengths = []
+    blank_line = False
+
+    with open(fasta_file, "rb") as in_file:
+        for line in in_file:
+            position += len(line)
+            if line.startswith(b">"):
+                if name is not None:
+                    entries.append(_get_index_entry(
+                        name, length, offset, line_lengths))
+                name = line[1:].split()[0].decode("utf-8")
+                length = 0
+                offset = position
+                line_lengths = []
+                blank_line = False
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if bases == 0:
+                    blank_line = True
+                    continue
+                # Offsets of bases are calculated assuming lines of equal
+                # length, and so would be wrong after a blank line
+                if blank_line:
+                    raise ValueError(
+                        "Sequence '{n}' contains a blank line.".format(n=name))
+                length += bases
+                line_lengths.append((bases, len(line)))
+
+    if name is not None:
+        entries.append(_get_index_entry(name, length, offset, line_lengths))
+
+    return entries
+
+
+def read_fasta_index(index_file):
+    """
+    Read a faidx-style FASTA index file.
+
+    Return a list of FastaIndexEntry named tuples.
+
+    index_file: Path to a FASTA index file.
+    """
+    with open(index_file) as in_file:
+        return [FastaIndexEntry(
+                fields[0], *[int(f) for f in fields[1:5]])
+                for fields in [line.split("\t") for line in in_file]]
+
+
+def write_fasta_index(index_file, entries):
+    """
+    Write a faidx-style FASTA index file.
+
+    index_file: Path to the FASTA index file to write.
+    entries: A list of FastaIndexEntry named tuples.
+    """
+    with open(index_file, "w") as out_file:
+        for entry in entries:
+            out_file.write("\t".join([str(e) for e in entry]) + "\n")
+
+
+def get_fasta_index(fasta_file):
+    """
+    Return the index of a FASTA file, building it if necessary.
+
+    Return a list of FastaIndexEntry named tuples. The index is read from
+    the index file alongside the FASTA file, if it is at least as new as the
+    FASTA file; otherwise it is built, and written to the index file if
+    possible.
+
+    fasta_file: Path to a FASTA file.
+    """
+    index_file = fasta_file + FASTA_INDEX_SUFFIX
+    if os.path.exists(index_file) and \
+            os.path.getmtime(index_file) >= os.path.getmtime(fasta_file):
+        return read_fasta_index(index_file)
+
+    entries = build_fasta_index(fasta_file)
+    try:
+        write_fasta_index(index_file, entries)
+    except (IOError, OSError):
+        # The index can still be used, even if it cannot be cached
+        pass
+    return entries
+
+
+def _get_range_indices(starts, lengths):
+    # Return the concatenation of the ranges [start, start + length)
+    ends = np.cumsum(lengths)
+    if len(ends) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1])
+
+
+class Genome(object):
+    """
+    Memory-mapped access to per-chromosome genome sequences.
+
+    Sequence for each chromosome is read from the file <chromosome>.fa (or
+    <chromosome>.fasta) in the genome directory, as for FluxSimulator. Each
+    such file is indexed and memory-mapped when first accessed, so that only
+    those parts of the file containing the sequence required are read.
+    """
+    def __init__(self, genome_dir):
+        self.genome_dir = genome_dir
+        self.chromosomes = {}
+
+    def get_fasta_file(self, chromosome):
+        """Return the path of the FASTA file for a chromosome."""
+        for suffix in FASTA_SUFFIXES:
+            fasta_file = os.path.join(self.genome_dir, chromosome + suffix)
+            if os.path.exists(fasta_file):
+                return fasta_file
+        raise IOError(
+            "Could not find FASTA file for sequence '{c}' in '{d}'.".format(
+                c=chromosome, d=self.genome_dir))
+
+    def _get_chromosome(self, chromosome):
+        if chromosome not in self.chromosomes:
+            fasta_file = self.get_fasta_file(chromosome)
+            entries = get_fasta_index(fasta_file)
+            if not entries:
+                raise ValueError(
+                    "No sequence found in '{f}'.".format(f=fasta_file))
+
+            # Per-chromosome files are expected to contain a single sequence,
+            # whose name may differ from that of the file
+            matching = [e for e in entries if e.name == chromosome]
+            entry = matching[0] if matching else entries[0]
+
+            self.chromosomes[chromosome] = (
+                np.memmap(fasta_file, dtype=np.uint8, mode="r"), entry)
+
+        return self.chromosomes[chromosome]
+
+    def get_length(self, chromosome):
+        """Return the length of a chromosome's sequence."""
+        return self._get_chromosome(chromosome)[1].length
+
+    def get_sequence(self, chromosome, start, end):
+        """
+        Return a region of a chromosome's sequence.
+
+        Return a numpy uint8 array containing the bases of the region, as
+        they appear in the FASTA file (i.e. possibly in lower case). If the
+        region lies within a single line of the file, the array is a view of
+        the memory-mapped file, and no sequence is copied; otherwise, bases
+        are gathered from each line the region spans.
+
+        chromosome: The name of the chromosome.
+        start: The 0-based position of the first base of the region.
+        end: The 0-based position following the last base of the region.
+        """
+        sequence, entry = self._get_chromosome(chromosome)
+        if start < 0 or end > entry.length or start > end:
+            raise IndexError(
+                "Region {s}-{e} is not within sequence '{c}'.".format(
+                    s=start, e=end, c=chromosome))
+
+        if end == start or \
+                start // entry.line_bases == (end - 1) // entry.line_bases:
+            position = self._get_file_positions(entry, start)
+            return sequence[position:position + end - start]
+
+        return sequence[self._get_file_positions(
+            entry, np.arange(start, end, dtype=np.int64))]
+
+    def get_sequences(self, chromosome, starts, lengths):
+        """
+        Return the concatenated sequence of several regions of a chromosome.
+
+        Return a numpy uint8 array containing the bases of each region in
+        turn, converted to upper case.
+
+        chromosome: The name of the chromosome.
+        starts: An array of the 0-based position of the first base of each
+        region.
+        lengths: An array of the length of each region.
+        """
+        sequence, entry = self._get_chromosome(chromosome)
+        starts = np.asarray(starts, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if len(starts) > 0 and (starts.min() < 0 or
+                                (starts + lengths).max() > entry.length):
+            raise IndexError(
+                "Regions are not within sequence '{c}'.".format(
+                    c=chromosome))
+
+        return _UPPER_CASE[sequence[self._get_file_positions(
+            entry, _get_range_indices(starts, lengths))]]
+
+    @staticmethod
+    def _get_file_positions(entry, positions):
+        # Account for the line terminators preceding each base
+        return entry.offset + (positions // entry.line_bases) * \
+            entry.line_width + positions % entry.line_bases
+
+
+def get_transcript_sequences(genome, transcripts, transcript_indices):
+    """
+    Extract the sense-strand sequences of a set of transcripts.
+
+    Return a tuple of a numpy uint8 array containing the concatenated
+    sequences (in upper case) of the specified transcripts, in order of
+    their indices, and an array of the offset of each transcript's sequence
+    in the former (or -1 for transcripts not specified).
+
+    genome: A Genome instance.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    transcript_indices: An array of the indices of transcripts whose
+    sequences should be extracted.
+    """
+    offsets = np.full(len(transcripts.ids), -1, dtype=np.int64)
+    blocks = []
+    block_offset = 0
+
+    transcript_indices = np.unique(transcript_indices)
+    chromosomes = transcripts.chromosomes[transcript_indices]
+
+    for chromosome in np.unique(chromosomes):
+        chrom_transcripts = transcript_indices[chromosomes == chromosome]
+
+        # Exons are ordered by transcript, so gathering the bases of each
+        # exon in turn gives the concatenated sequence of each transcript
+        selected = np.zeros(len(transcripts.ids), dtype=bool)
+        selected[chrom_transcripts] = True
+        exons = selected[transcripts.exon_transcripts]
+        block = genome.get_sequences(
+            chromosome, transcripts.exon_starts[exons] - 1,
+            transcripts.exon_lengths[exons])
+
+        lengths = transcripts.lengths[chrom_transcripts]
+        block_starts = np.cumsum(lengths) - lengths
+
+        # Reverse complement the sequences of reverse strand transcripts
+        reverse = np.repeat(
+            transcripts.strands[chrom_transcripts] == "-", lengths)
+        reversed_positions = \
+            2 * np.repeat(block_starts, lengths) + \
+            np.repeat(lengths, lengths) - 1 - np.arange(len(block))
+        block = np.where(
+            reverse, _COMPLEMENT[block[reversed_positions]], block)
+
+        offsets[chrom_transcripts] = block_offset + block_starts
+        block_offset += len(block)
+        blocks.append(block.astype(np.uint8))
+
+    sequences = np.concatenate(blocks) if blocks \
+        else np.zeros(0, dtype=np.uint8)
+    return sequences, offsets
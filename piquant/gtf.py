@@ -1,3 +1,5 @@
+import collections
+import numpy as np
 import pandas as pd
 
 SEQUENCE_COL = 0
@@ -8,10 +10,16 @@ STRAND_COL = 6
 ATTRIBUTES_COL = 8
 
 EXON_FEATURE = "exon"
+CDS_FEATURE = "CDS"
 
 GENE_ID_ATTRIBUTE = "gene_id"
 TRANSCRIPT_ID_ATTRIBUTE = "transcript_id"
 
+Transcripts = collections.namedtuple(
+    "Transcripts", ["ids", "chromosomes", "strands", "starts", "ends",
+                    "lengths", "coding", "exon_transcripts", "exon_starts",
+                    "exon_lengths"])
+
 
 def read_gtf_file(gtf_file):
     return pd.read_csv(gtf_file, sep='\t', header=None)
@@ -21,3 +29,54 @@ def get_attributes_dict(attributes_str):
     strip_quotes = lambda x: x.replace('"', '')
     return {attr: strip_quotes(val) for attr, val in
             [av.split() for av in attributes_str.split("; ")]}
+
+
+def read_transcripts(gtf_file):
+    """
+    Read the exons of transcripts from a GTF file.
+
+    Return a Transcripts named tuple of arrays describing each transcript (in
+    order of first appearance in the GTF file) and its exons (ordered by
+    transcript and then by start position).
+
+    gtf_file: Path to a GTF-formatted file describing transcripts.
+    """
+    gtf_info = read_gtf_file(gtf_file)
+    features = gtf_info[FEATURE_COL].values
+    exons = features == EXON_FEATURE
+    cds = features == CDS_FEATURE
+
+    transcript_ids = np.array(
+        [get_attributes_dict(a)[TRANSCRIPT_ID_ATTRIBUTE]
+         for a in gtf_info[ATTRIBUTES_COL].values[exons | cds]],
+        dtype=object)
+    coding_ids = set(transcript_ids[cds[exons | cds]])
+
+    exon_transcripts, ids = pd.factorize(transcript_ids[exons[exons | cds]])
+    exon_starts = gtf_info[START_COL].values[exons].astype(np.int64)
+    exon_ends = gtf_info[END_COL].values[exons].astype(np.int64)
+
+    order = np.lexsort((exon_starts, exon_transcripts))
+    exon_transcripts = exon_transcripts[order]
+    exon_starts = exon_starts[order]
+    exon_ends = exon_ends[order]
+    exon_lengths = exon_ends - exon_starts + 1
+
+    # Exons of each transcript are now contiguous, so per-transcript values
+    # can be calculated by reduction over the first exon of each transcript
+    first_exons = np.concatenate(
+        ([0], np.flatnonzero(np.diff(exon_transcripts)) + 1))
+    chromosomes = gtf_info[SEQUENCE_COL].values[exons][order]
+    strands = gtf_info[STRAND_COL].values[exons][order]
+
+    return Transcripts(
+        ids=np.asarray(ids, dtype=object),
+        chromosomes=np.asarray(chromosomes[first_exons], dtype=str),
+        strands=np.asarray(strands[first_exons], dtype=str),
+        starts=np.minimum.reduceat(exon_starts, first_exons),
+        ends=np.maximum.reduceat(exon_ends, first_exons),
+        lengths=np.add.reduceat(exon_lengths, first_exons),
+        coding=np.array([i in coding_ids for i in ids], dtype=bool),
+        exon_transcripts=exon_transcripts,
+        exon_starts=exon_starts,
+        exon_lengths=exon_lengths)
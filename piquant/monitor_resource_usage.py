@@ -0,0 +1,484 @@
+"""
+Usage:
+    monitor_resource_usage [{log_option_spec}] [--interval=<interval>]
+        [--trial=<trial>] <usage-file> <command>...
+
+Options:
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+--interval=<interval>
+    Interval in seconds at which the memory and CPU usage of the command and
+    its child processes are sampled [default: 1].
+--trial=<trial>
+    The number of the timing trial of which the command is part, if commands
+    are executed repeatedly to measure the variability of their resource
+    usage [default: 1].
+<usage-file>
+    CSV file to which a row summarising the resource usage of the command is
+    appended.
+<command>
+    The command to run, followed by its arguments.
+
+Run a command, sampling the memory, CPU and thread usage of the command and
+all of its child processes at regular intervals from the Linux /proc
+filesystem. On completion, a row recording the command line, elapsed real
+time, user and kernel mode CPU time, maximum resident memory (in kilobytes)
+of any process in the command's process tree (left empty if the command
+exited before it could be sampled), bytes read from and written to storage,
+numbers of read and write system calls, start and end times (in seconds since
+the epoch) of the command and the trial number is appended to the usage
+file. In addition, a time series of the memory and CPU usage of the
+command's process tree is appended to the file
+'<usage-file-stem>_timeseries.csv', and the peak usage of each process
+in the tree is appended to the file '<usage-file-stem>_processes.csv'. The
+exit status of the monitored command is returned.
+"""
+
+from __future__ import division
+
+import csv
+import docopt
+import os
+import os.path
+import schema
+import subprocess
+import sys
+import threading
+import time
+
+from . import options as opt
+from . import resource_usage as ru
+from .__init__ import __version__
+
+INTERVAL = "--interval"
+TRIAL = "--trial"
+USAGE_FILE = "<usage-file>"
+COMMAND = "<command>"
+
+_PROC_DIR = "/proc"
+
+# Indices of fields of /proc/<pid>/stat, counted from the field following
+# the command name (see proc(5))
+_STAT_STATE = 0
+_STAT_PPID = 1
+_STAT_UTIME = 11
+_STAT_STIME = 12
+_STAT_CUTIME = 13
+_STAT_CSTIME = 14
+_STAT_NUM_THREADS = 17
+_STAT_START_TIME = 19
+_STAT_RSS = 21
+
+# Fields of /proc/<pid>/io recorded, in the order of the corresponding columns
+# of resource usage files
+_IO_FIELDS = ["read_bytes", "write_bytes", "syscr", "syscw"]
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        options[INTERVAL] = opt.validate_float_option(
+            options[INTERVAL], "Sampling interval must be a positive number",
+            min_val=0.01)
+        options[TRIAL] = opt.validate_int_option(
+            options[TRIAL], "Trial number must be a positive integer",
+            min_val=1)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _get_clock_ticks():
+    return float(os.sysconf(os.sysconf_names["SC_CLK_TCK"]))
+
+
+def _get_page_size_kb():
+    return os.sysconf(os.sysconf_names["SC_PAGE_SIZE"]) / 1024
+
+
+class _ProcessStatus(object):
+    def __init__(self, pid, stat_line, clock_ticks, page_size_kb):
+        comm_end = stat_line.rindex(")")
+        fields = stat_line[comm_end + 2:].split()
+
+        self.pid = pid
+        self.name = stat_line[stat_line.index("(") + 1:comm_end]
+        self.zombie = fields[_STAT_STATE] == "Z"
+        self.ppid = int(fields[_STAT_PPID])
+        # CPU time includes that of any children which have been waited for,
+        # so that the total CPU time of a process tree does not decrease as
+        # processes within it exit.
+        self.cpu_time = sum([int(fields[i]) for i in [
+            _STAT_UTIME, _STAT_STIME, _STAT_CUTIME, _STAT_CSTIME]]) / \
+            clock_ticks
+        self.threads = int(fields[_STAT_NUM_THREADS])
+        self.start_time = int(fields[_STAT_START_TIME])
+        self.memory = int(fields[_STAT_RSS]) * page_size_kb
+        self.peak_memory = self.memory
+        self.io_counts = None
+
+
+def _read_process_statuses(clock_ticks, page_size_kb):
+    statuses = {}
+    for entry in os.listdir(_PROC_DIR):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(_PROC_DIR, entry, "stat")) as stat_file:
+                stat_line = stat_file.read()
+            statuses[int(entry)] = _ProcessStatus(
+                int(entry), stat_line, clock_ticks, page_size_kb)
+        except (IOError, OSError, ValueError, IndexError):
+            # The process exited while its status was being read
+            pass
+    return statuses
+
+
+def _read_peak_memory(pid):
+    # Return the peak resident memory of a process in kilobytes, or None if
+    # it cannot be determined
+    try:
+        with open(os.path.join(_PROC_DIR, str(pid), "status")) as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _read_io_counts(io_file):
+    # Return a list of the I/O counts recorded in a /proc I/O accounting file,
+    # or None if they cannot be read (e.g. if the kernel does not support I/O
+    # accounting)
+    try:
+        with open(io_file) as in_file:
+            counts = dict([(f.strip(), int(v)) for f, v in
+                           [l.split(":") for l in in_file if ":" in l]])
+        return [counts[f] for f in _IO_FIELDS]
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+
+def _get_process_io_file(pid):
+    return os.path.join(_PROC_DIR, str(pid), "io")
+
+
+def _get_thread_io_file(pid):
+    return os.path.join(_PROC_DIR, str(pid), "task", str(pid), "io")
+
+
+def _get_process_tree(root_pid, statuses):
+    children = {}
+    for status in statuses.values():
+        children.setdefault(status.ppid, []).append(status.pid)
+
+    tree = []
+    pids = [root_pid] if root_pid in statuses else []
+    while pids:
+        pid = pids.pop()
+        tree.append(statuses[pid])
+        pids.extend(children.get(pid, []))
+    return tree
+
+
+class _ProcessPeakUsage(object):
+    def __init__(self, status, sample_time):
+        self.pid = status.pid
+        self.name = status.name
+        self.start = sample_time
+        self.end = sample_time
+        self.max_memory = 0
+        self.max_threads = 0
+        self.cpu_time = 0
+        self.io_counts = [0] * len(_IO_FIELDS)
+
+    def update(self, status, sample_time):
+        self.name = status.name
+        self.end = sample_time
+        self.max_memory = max(self.max_memory, status.peak_memory)
+        self.max_threads = max(self.max_threads, status.threads)
+        self.cpu_time = max(self.cpu_time, status.cpu_time)
+        if status.io_counts is not None:
+            self.io_counts = [max(c, s) for c, s in
+                              zip(self.io_counts, status.io_counts)]
+
+    def get_cpu_utilisation(self):
+        elapsed = self.end - self.start
+        return self.cpu_time / elapsed if elapsed > 0 else 0
+
+
+class ProcessTreeMonitor(object):
+    """
+    Samples the memory, CPU and thread usage of a process and its children.
+
+    Each sample records the elapsed time since monitoring began, the total
+    resident memory (in kilobytes), total CPU time (in seconds), CPU
+    utilisation since the previous sample (in CPU-seconds per second), and
+    the numbers of processes and threads and bytes read from and written to
+    storage by the process tree. The peak resident memory and thread count,
+    and CPU time and I/O (including that of any waited-for children), of each
+    process in the tree are also recorded.
+    """
+    def __init__(self, root_pid):
+        self.root_pid = root_pid
+        self.start = time.time()
+        self.samples = []
+        self.processes = {}
+
+        self._clock_ticks = _get_clock_ticks()
+        self._page_size_kb = _get_page_size_kb()
+        self._last_cpu_time = 0
+        self._last_io_counts = [0] * len(_IO_FIELDS)
+        self._last_sample_time = 0
+
+    def sample(self):
+        """Record the current resource usage of the process tree."""
+        if not os.path.isdir(_PROC_DIR):
+            return
+
+        sample_time = time.time() - self.start
+        # Processes which have exited, but not yet been waited for, are
+        # ignored
+        tree = [s for s in _get_process_tree(
+            self.root_pid,
+            _read_process_statuses(self._clock_ticks, self._page_size_kb))
+            if not s.zombie]
+        if not tree:
+            return
+
+        for status in tree:
+            # The peak resident memory of each process is read in addition to
+            # its current resident memory, so that peaks occurring between
+            # samples are not missed
+            peak_memory = _read_peak_memory(status.pid)
+            if peak_memory is not None:
+                status.peak_memory = max(peak_memory, status.memory)
+            status.io_counts = _read_io_counts(
+                _get_process_io_file(status.pid))
+
+            key = (status.pid, status.start_time)
+            if key not in self.processes:
+                self.processes[key] = _ProcessPeakUsage(status, sample_time)
+            self.processes[key].update(status, sample_time)
+
+        # The CPU time of a live process is only added to that of its parent
+        # when it exits and is waited for, so the sum over the live tree does
+        # not count the CPU time of any process twice
+        cpu_time = max(sum([s.cpu_time for s in tree]), self._last_cpu_time)
+        # Likewise for I/O counts
+        io_counts = [sum(counts) for counts in zip(*[
+            s.io_counts for s in tree if s.io_counts is not None])]
+        io_counts = [max(c, l) for c, l in zip(
+            io_counts or self._last_io_counts, self._last_io_counts)]
+
+        elapsed = sample_time - self._last_sample_time
+        utilisation = (cpu_time - self._last_cpu_time) / elapsed \
+            if elapsed > 0 else 0
+
+        self.samples.append([
+            sample_time, sum([s.memory for s in tree]), cpu_time,
+            utilisation, len(tree), sum([s.threads for s in tree])] +
+            io_counts[:2])
+
+        self._last_cpu_time = cpu_time
+        self._last_io_counts = io_counts
+        self._last_sample_time = sample_time
+
+    def get_max_memory(self):
+        """
+        Return the maximum peak resident memory of any process in the tree.
+
+        Return the maximum peak resident memory, in kilobytes, of any process
+        sampled, or None if no process was sampled.
+        """
+        if not self.processes:
+            return None
+        return max([p.max_memory for p in self.processes.values()])
+
+    def get_io_counts(self):
+        """
+        Return the I/O counts of the process tree at the last sample.
+
+        Return a list of the bytes read from and written to storage, and of
+        read and write system calls, by the process tree.
+        """
+        return self._last_io_counts
+
+    def write_timeseries(self, timeseries_file, command_index):
+        """
+        Append the samples of resource usage to a CSV file.
+
+        timeseries_file: The CSV file to append to; a header is written if
+        the file does not already exist.
+        command_index: The index of the monitored command in the associated
+        resource usage file.
+        """
+        _append_rows(
+            timeseries_file, ru.TIMESERIES_COLUMNS,
+            [[command_index, "{t:.2f}".format(t=t), int(mem),
+              "{c:.2f}".format(c=cpu), "{u:.2f}".format(u=util), procs, thrds,
+              rbytes, wbytes]
+             for t, mem, cpu, util, procs, thrds, rbytes, wbytes
+             in self.samples])
+
+    def write_processes(self, processes_file, command_index):
+        """
+        Append the peak resource usage of each monitored process to a CSV file.
+
+        processes_file: The CSV file to append to; a header is written if the
+        file does not already exist.
+        command_index: The index of the monitored command in the associated
+        resource usage file.
+        """
+        processes = sorted(self.processes.values(), key=lambda p: p.start)
+        _append_rows(
+            processes_file, ru.PROCESSES_COLUMNS,
+            [[command_index, p.pid, p.name, "{s:.2f}".format(s=p.start),
+              "{e:.2f}".format(e=p.end), int(p.max_memory), p.max_threads,
+              "{c:.2f}".format(c=p.cpu_time),
+              "{u:.2f}".format(u=p.get_cpu_utilisation())] + p.io_counts
+             for p in processes])
+
+
+def _append_rows(file_name, columns, rows):
+    write_header = not os.path.exists(file_name)
+    with open(file_name, "a") as out_file:
+        writer = csv.writer(out_file, lineterminator="\n")
+        if write_header:
+            writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def _get_num_commands(usage_file):
+    if not os.path.exists(usage_file):
+        return 0
+    with open(usage_file) as in_file:
+        return len([l for l in in_file if l.strip()])
+
+
+def _get_exit_status(status):
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _get_command_io_counts(start_io_counts, end_io_counts):
+    # Return the I/O counts of the waited-for command, i.e. the change in the
+    # I/O counts of this process, less those of its own thread
+    if None in start_io_counts + end_io_counts:
+        return None
+    (start_process, start_thread), (end_process, end_thread) = \
+        start_io_counts, end_io_counts
+    return [(ep - sp) - (et - st) for sp, st, ep, et in zip(
+        start_process, start_thread, end_process, end_thread)]
+
+
+def monitor_command(command, usage_file, interval=1, trial=1):
+    """
+    Run a command, monitoring the resource usage of its process tree.
+
+    Run a command, sampling its resource usage at the specified interval, and
+    append a summary of its resource usage to a CSV file, together with a
+    time series of samples and the peak usage of each of its processes (see
+    resource_usage.get_timeseries_file() and
+    resource_usage.get_processes_file()). Return the exit status of the
+    command.
+
+    command: The command to run, a list of the program and its arguments.
+    usage_file: The CSV file to which a summary of resource usage is appended.
+    interval: The interval between samples of resource usage, in seconds.
+    trial: The number of the timing trial of which the command is part.
+    """
+    command_index = _get_num_commands(usage_file)
+
+    # The I/O counts of this process include those of its children once they
+    # have been waited for; those of its own thread do not
+    io_files = [_get_process_io_file(os.getpid()),
+                _get_thread_io_file(os.getpid())]
+    start_io_counts = [_read_io_counts(f) for f in io_files]
+
+    start = time.time()
+    process = subprocess.Popen(command)
+    monitor = ProcessTreeMonitor(process.pid)
+
+    # The command is waited for in a separate thread, so that its exit, and
+    # hence its end time, is detected as soon as it occurs rather than at the
+    # next sample
+    exit_info = {}
+    exited = threading.Event()
+
+    def _wait_for_command():
+        exit_info["status"] = os.wait4(process.pid, 0)
+        exit_info["end"] = time.time()
+        exited.set()
+
+    waiter = threading.Thread(target=_wait_for_command)
+    waiter.daemon = True
+    waiter.start()
+
+    # Usage is sampled straight away, so that short-lived commands are
+    # sampled at least once
+    monitor.sample()
+    while not exited.wait(interval):
+        monitor.sample()
+    waiter.join()
+
+    _, status, rusage = exit_info["status"]
+    end = exit_info["end"]
+    real_time = end - start
+    process.returncode = _get_exit_status(status)
+
+    # The maximum resident memory reported for the child process by the
+    # kernel includes that of this process, copied when forking the child, and
+    # so is not used; if the command exited before it could be sampled, its
+    # maximum memory is recorded as missing
+    max_memory = monitor.get_max_memory()
+
+    io_counts = _get_command_io_counts(
+        start_io_counts, [_read_io_counts(f) for f in io_files])
+    if io_counts is None:
+        io_counts = monitor.get_io_counts()
+
+    with open(usage_file, "a") as out_file:
+        writer = csv.writer(out_file, lineterminator="\n",
+                            quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow([" ".join(command)] + [
+            float("{t:.2f}".format(t=t)) for t in
+            [real_time, rusage.ru_utime, rusage.ru_stime]] +
+            ["" if max_memory is None else int(max_memory)] + io_counts +
+            [float("{t:.2f}".format(t=t)) for t in [start, end]] +
+            [int(trial)])
+
+    monitor.write_timeseries(
+        ru.get_timeseries_file(usage_file), command_index)
+    monitor.write_processes(
+        ru.get_processes_file(usage_file), command_index)
+
+    return process.returncode
+
+
+def monitor_resource_usage(args):
+    # Read in command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args, options_first=True,
+        version="monitor_resource_usage v" + __version__)
+
+    # Validate and process command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Run the command, recording its resource usage
+    logger.debug("Monitoring command: " + " ".join(options[COMMAND]))
+    exit_status = monitor_command(
+        options[COMMAND], options[USAGE_FILE], options[INTERVAL],
+        options[TRIAL])
+    logger.debug("Command exited with status {s}".format(s=exit_status))
+
+    sys.exit(exit_status)
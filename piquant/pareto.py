@@ -0,0 +1,218 @@
+"""
+Functions for assessing the trade-off between the accuracy with which
+quantification methods estimate transcript abundances and the resources they
+consume in doing so. Exports:
+
+get_accuracy_measures: Return the statistics describing accuracy.
+get_cost_measures: Return the resource usage costs of quantification.
+get_dominated: Determine which of a set of runs are dominated by another.
+get_accuracy_costs: Join accuracy statistics with costs for each run.
+get_pareto_stats: Determine the Pareto frontier for each set of reads.
+write_pareto_stats: Write Pareto frontier statistics to a CSV file.
+read_pareto_stats: Read Pareto frontier statistics from a CSV file.
+
+For each set of simulated reads, and for each pair of an accuracy statistic
+and a resource usage cost, a quantification run (i.e. a quantification method
+using a particular number of threads) is "dominated" if some other run on the
+same reads is at least as accurate and no more costly, and is either more
+accurate or less costly. The runs which are not dominated form the Pareto
+frontier: no other run improves on one of them in accuracy without costing
+more, or in cost without being less accurate.
+"""
+
+import numpy as np
+import os.path
+import pandas as pd
+
+from . import piquant_options as po
+from . import statistics
+
+PARETO_STATS_FILE = "pareto.csv"
+
+ACCURACY_STATISTIC = "accuracy-statistic"
+ACCURACY = "accuracy"
+COST_STATISTIC = "cost-statistic"
+COST = "cost"
+DOMINATED = "dominated"
+
+
+class _AccuracyMeasure(object):
+    # Describes an accuracy statistic calculated over all transcripts for a
+    # quantification run, and whether higher values indicate greater accuracy.
+    def __init__(self, name, title, higher_is_better):
+        self.name = name
+        self.title = title
+        self.higher_is_better = higher_is_better
+
+
+class _CostMeasure(object):
+    # Describes a resource usage cost of a quantification run, how it is
+    # calculated from the run's resource usage summary, and whether it should
+    # be plotted on a logarithmic scale.
+    def __init__(self, name, title, units, value_calculator, log_scale):
+        self.name = name
+        self.title = title
+        self.units = units
+        self.value_calculator = value_calculator
+        self.log_scale = log_scale
+
+    def get_axis_label(self):
+        return "{t} ({u})".format(t=self.title, u=self.units)
+
+
+_ACCURACY_MEASURES = [
+    _AccuracyMeasure("tp-log-tpm-rho", "Spearman's rho", True),
+    _AccuracyMeasure("tp-error-frac", "True positive error fraction", False)
+]
+
+
+def _get_cpu_time(usage):
+    # Resource usage summaries record times as log10 totals
+    return 10 ** usage["user-time"] + 10 ** usage["sys-time"]
+
+
+def _get_max_memory(usage):
+    return usage["max-memory"]
+
+
+_COST_MEASURES = [
+    _CostMeasure(
+        "cpu-time", "Total CPU time", "s", _get_cpu_time, True),
+    _CostMeasure(
+        "max-memory", "Maximum resident memory", "Gb", _get_max_memory, False)
+]
+
+
+def get_accuracy_measures():
+    """Return a list of the statistics describing accuracy."""
+    return list(_ACCURACY_MEASURES)
+
+
+def get_cost_measures():
+    """Return a list of the resource usage costs of quantification."""
+    return list(_COST_MEASURES)
+
+
+def get_dominated(accuracy, cost, higher_is_better=True):
+    """
+    Determine which of a set of runs are dominated by another.
+
+    Return a boolean numpy array, indicating for each run whether some other
+    run is at least as accurate and no more costly, and is either more
+    accurate or less costly.
+
+    accuracy: An array of the accuracy of each run.
+    cost: An array of the cost of each run.
+    higher_is_better: True if higher accuracy values indicate greater
+    accuracy.
+    """
+    accuracy = np.asarray(accuracy, dtype=np.float64)
+    cost = np.asarray(cost, dtype=np.float64)
+    if not higher_is_better:
+        accuracy = -accuracy
+
+    # Element [i, j] compares run j with run i
+    no_worse = (accuracy[np.newaxis, :] >= accuracy[:, np.newaxis]) & \
+        (cost[np.newaxis, :] <= cost[:, np.newaxis])
+    better = (accuracy[np.newaxis, :] > accuracy[:, np.newaxis]) | \
+        (cost[np.newaxis, :] < cost[:, np.newaxis])
+    return (no_worse & better).any(axis=1)
+
+
+def _get_option_columns(data_frame, quant_only):
+    options = [o for o in po.get_multiple_quant_run_options()
+               if o.quant_only == quant_only and o.name in data_frame.columns]
+    return [o.name for o in sorted(options, key=lambda o: o.index)]
+
+
+def get_accuracy_costs(overall_stats, usage):
+    """
+    Join accuracy statistics with costs for each quantification run.
+
+    Return a pandas DataFrame with a row for each quantification run for
+    which both accuracy statistics and resource usage were recorded,
+    containing the values of options describing the run, and the value of
+    each accuracy statistic and resource usage cost.
+
+    overall_stats: A pandas DataFrame of statistics calculated over all
+    transcripts for each quantification run.
+    usage: A pandas DataFrame of resource usage summaries for each
+    quantification run.
+    """
+    option_columns = [c for c in _get_option_columns(overall_stats, False) +
+                      _get_option_columns(overall_stats, True)
+                      if c in usage.columns]
+
+    accuracy = overall_stats[
+        option_columns + [m.name for m in _ACCURACY_MEASURES]]
+
+    costs = usage[option_columns].copy()
+    for measure in _COST_MEASURES:
+        costs[measure.name] = measure.value_calculator(usage)
+
+    return pd.merge(accuracy, costs, on=option_columns)
+
+
+def get_pareto_stats(accuracy_costs):
+    """
+    Determine the Pareto frontier for each set of simulated reads.
+
+    Return a pandas DataFrame with a row for each quantification run on each
+    set of simulated reads, for each pair of accuracy statistic and resource
+    usage cost, containing the values of options describing the run, the
+    names and values of the accuracy statistic and cost, and whether the run
+    is dominated by another run on the same reads. Runs for which either
+    value is missing are omitted. Return None if there are no such runs.
+
+    accuracy_costs: A pandas DataFrame, as returned by get_accuracy_costs().
+    """
+    reads_columns = _get_option_columns(accuracy_costs, False)
+    run_columns = reads_columns + _get_option_columns(accuracy_costs, True)
+
+    groups = accuracy_costs.groupby(reads_columns) if reads_columns \
+        else [(None, accuracy_costs)]
+
+    stats = []
+    for _, runs in groups:
+        for accuracy, cost in [(a, c) for a in _ACCURACY_MEASURES
+                               for c in _COST_MEASURES]:
+            measured = runs[runs[accuracy.name].notnull().values &
+                            runs[cost.name].notnull().values]
+            if len(measured) == 0:
+                continue
+
+            run_stats = measured[run_columns].copy()
+            run_stats[ACCURACY_STATISTIC] = accuracy.name
+            run_stats[ACCURACY] = measured[accuracy.name].values
+            run_stats[COST_STATISTIC] = cost.name
+            run_stats[COST] = measured[cost.name].values
+            run_stats[DOMINATED] = get_dominated(
+                run_stats[ACCURACY], run_stats[COST],
+                accuracy.higher_is_better)
+            stats.append(run_stats)
+
+    return pd.concat(stats, ignore_index=True) if stats else None
+
+
+def write_pareto_stats(stats_dir, stats):
+    """
+    Write Pareto frontier statistics to a CSV file.
+
+    stats_dir: The directory in which to write the statistics file.
+    stats: A pandas DataFrame, as returned by get_pareto_stats().
+    """
+    statistics.write_stats_data(
+        os.path.join(stats_dir, PARETO_STATS_FILE), stats, index=False)
+
+
+def read_pareto_stats(stats_dir):
+    """
+    Read Pareto frontier statistics from a CSV file.
+
+    Return a pandas DataFrame, as written by write_pareto_stats(), or None if
+    no Pareto frontier statistics were written.
+
+    stats_dir: The directory containing the statistics file.
+    """
+    stats_file = os.path.join(stats_dir, PARETO_STATS_FILE)
+    return pd.read_csv(stats_file) if os.path.exists(stats_file) else None
@@ -1,4 +1,5 @@
 import docopt
+import itertools
 import os
 import os.path
 import pandas as pd
@@ -6,18 +7,27 @@ import schema
 import sys
 import time
 
+from . import concordance
 from . import flux_simulator as fs
 from . import options as opt
+from . import pareto
 from . import piquant_commands as pc
 from . import piquant_options as po
 from . import plot
+from . import plot_cache
+from . import plot_selection
 from . import prepare_quantification_run as prq
 from . import prepare_read_simulation as prs
 from . import process
+from . import report
 from . import resource_usage as ru
 from . import statistics
 from . import stats_data
+from . import sweeps
+from . import tpm_matrix
+from . import tpm_store
 from . import tpms
+from . import usage_comparison
 from .__init__ import __version__
 
 
@@ -37,8 +47,10 @@ def _get_options_dir(run_dir, options, **qr_options):
     instances to option values.
     """
     qr_options = dict(qr_options)
-    if not run_dir and po.QUANT_METHOD.name in qr_options:
-        del qr_options[po.QUANT_METHOD.name]
+    if not run_dir:
+        for option in po.get_multiple_quant_run_options():
+            if option.quant_only and option.name in qr_options:
+                del qr_options[option.name]
 
     dir_option = po.QUANT_OUTPUT_DIR if run_dir else po.READS_OUTPUT_DIR
 
@@ -218,30 +230,77 @@ class _StatsAccumulator(object):
 class _ResourceUsageAccumulator(object):
     ACCUMULATORS = []
 
-    def __init__(self, resource_type):
+    def __init__(self, resource_type, per_command=False):
         self.resource_usage_df = pd.DataFrame()
         self.resource_type = resource_type
+        # If True, the resource usage of each command executed, rather than
+        # the summary of resource usage for each run, is accumulated
+        self.per_command = per_command
         _ResourceUsageAccumulator.ACCUMULATORS.append(self)
 
+    def _get_usage_file(self, prefix, directory):
+        file_getter = ru.get_command_usage_file if self.per_command \
+            else ru.get_resource_usage_file
+        return file_getter(
+            self.resource_type, prefix=prefix, directory=directory)
+
     def __call__(self, logger, options, **qr_options):
         run_name = po.get_run_name(qr_options)
         run_dir = _get_options_dir(True, options, **qr_options)
 
-        usage_file = ru.get_resource_usage_file(
-            self.resource_type, prefix=run_name, directory=run_dir)
+        usage_file = self._get_usage_file(run_name, run_dir)
 
         if os.path.exists(usage_file):
             usage_df = pd.read_csv(usage_file)
             self.resource_usage_df = self.resource_usage_df.append(usage_df)
 
     def write_accumulated_data(self, stats_dir):
-        usage_file_name = ru.get_resource_usage_file(
-            self.resource_type, prefix=ru.OVERALL_USAGE_PREFIX,
-            directory=stats_dir)
-        ru.write_usage_summary(usage_file_name, self.resource_usage_df)
+        # Per-command resource usage is not recorded by older versions of
+        # piquant
+        if self.per_command and len(self.resource_usage_df) == 0:
+            return
+
+        # The speedup of each quantification run is calculated relative to
+        # the run of the same quantifier on the same reads using the fewest
+        # threads
+        usage = self.resource_usage_df
+        if self.resource_type == ru.QUANT_RESOURCE_TYPE and \
+                not self.per_command:
+            usage = ru.add_speedup(
+                usage, po.NUM_THREADS.name,
+                [o.name for o in po.get_multiple_quant_run_options()
+                 if o != po.NUM_THREADS])
+
+        usage_file_name = self._get_usage_file(
+            ru.OVERALL_USAGE_PREFIX, stats_dir)
+        ru.write_usage_summary(usage_file_name, usage)
+
+
+class _TpmMatrixAccumulator(object):
+    ACCUMULATORS = []
+
+    def __init__(self):
+        self.run_stores = []
+        _TpmMatrixAccumulator.ACCUMULATORS.append(self)
+
+    def __call__(self, logger, options, **qr_options):
+        run_dir = _get_options_dir(True, options, **qr_options)
+        store_dir = os.path.join(run_dir, prq.TPMS_STORE)
+
+        if tpm_store.is_tpm_store(store_dir):
+            self.run_stores.append((qr_options, store_dir))
+        else:
+            logger.warning("No TPM store found for run " +
+                           po.get_run_name(qr_options))
+
+    def write_accumulated_data(self, stats_dir):
+        if self.run_stores:
+            tpm_matrix.write_tpm_matrix(
+                os.path.join(stats_dir, tpm_matrix.MATRIX_DIRECTORY),
+                self.run_stores)
 
 
-def _set_executables_for_commands(record_usage):
+def _set_executables_for_commands(record_usage, threshold_sweep):
     pc.PREPARE_READ_DIRS.executables = [
         _reads_directory_checker(False),
         _prepare_read_simulation]
@@ -270,12 +329,23 @@ def _set_executables_for_commands(record_usage):
         _StatsAccumulator(tpms.TRANSCRIPT),
         _StatsAccumulator(tpms.GENE)] + \
         [_StatsAccumulator(tpms.TRANSCRIPT, classifier=clsfr, ascending=asc)
-            for clsfr, asc in statistics.get_stratified_stats_types()]
+            for clsfr, asc in statistics.get_stratified_stats_types()] + \
+        [_TpmMatrixAccumulator()]
+
+    if threshold_sweep:
+        pc.ANALYSE_RUNS.executables += \
+            [_StatsAccumulator(tpm_level, classifier=sweep)
+             for sweep, tpm_level in itertools.product(
+                 sweeps.get_sweeps(), [tpms.TRANSCRIPT, tpms.GENE])]
 
     if record_usage:
         pc.ANALYSE_RUNS.executables += [
             _ResourceUsageAccumulator(ru.PREQUANT_RESOURCE_TYPE),
             _ResourceUsageAccumulator(ru.QUANT_RESOURCE_TYPE),
+            _ResourceUsageAccumulator(
+                ru.PREQUANT_RESOURCE_TYPE, per_command=True),
+            _ResourceUsageAccumulator(
+                ru.QUANT_RESOURCE_TYPE, per_command=True),
         ]
 
 
@@ -284,7 +354,8 @@ def _write_accumulated_stats_and_usage(options):
     if not os.path.exists(stats_dir):
         os.mkdir(stats_dir)
     for acc in _StatsAccumulator.ACCUMULATORS + \
-            _ResourceUsageAccumulator.ACCUMULATORS:
+            _ResourceUsageAccumulator.ACCUMULATORS + \
+            _TpmMatrixAccumulator.ACCUMULATORS:
         acc.write_accumulated_data(stats_dir)
 
 
@@ -302,84 +373,295 @@ def _get_overall_usage(options, resource_type):
     return pd.read_csv(overall_usage_file)
 
 
+def _get_overall_command_usage(options, resource_type):
+    overall_usage_file = ru.get_command_usage_file(
+        resource_type, prefix=ru.OVERALL_USAGE_PREFIX,
+        directory=options[po.STATS_DIRECTORY.name])
+    return pd.read_csv(overall_usage_file) \
+        if os.path.exists(overall_usage_file) else None
+
+
 def _draw_overall_stats_graphs(
         logger, plot_format, stats_dir, overall_stats,
-        option_values_set, tpm_level):
+        option_values_set, tpm_level, selection):
 
     logger.info("Drawing graphs derived from statistics calculated for the " +
                 "whole set of {tpm_level} TPMs...".format(tpm_level=tpm_level))
     plot.draw_overall_stats_graphs(
-        plot_format, stats_dir, overall_stats, option_values_set, tpm_level)
+        plot_format, stats_dir, overall_stats, option_values_set, tpm_level,
+        selection)
 
 
 def _draw_usage_graphs(
-        logger, plot_format, stats_dir,
-        usage_prequant, usage_quant, option_values_set):
+        logger, plot_format, stats_dir, usage_prequant, usage_quant,
+        command_usage_prequant, command_usage_quant, option_values_set,
+        selection):
 
     logger.info("Draw graphs of time and memory resource usage...")
     plot.draw_prequant_res_usage_graphs(
-        plot_format, stats_dir, usage_prequant)
+        plot_format, stats_dir, usage_prequant, selection,
+        command_usage=command_usage_prequant)
     plot.draw_quant_res_usage_graphs(
-        plot_format, stats_dir, usage_quant, option_values_set)
+        plot_format, stats_dir, usage_quant, option_values_set, selection,
+        command_usage=command_usage_quant)
 
 
 def _draw_grouped_stats_graphs(
-        logger, plot_format, stats_dir, grouped_threshold, option_values_set):
+        logger, plot_format, stats_dir, grouped_threshold, option_values_set,
+        selection):
 
     logger.info("Drawing graphs derived from statistics calculated on " +
                 "subsets of transcript TPMs...")
     plot.draw_grouped_stats_graphs(
-        plot_format, stats_dir, option_values_set, grouped_threshold)
+        plot_format, stats_dir, option_values_set, grouped_threshold,
+        selection)
 
 
 def _draw_distribution_graphs(
-        logger, plot_format, stats_dir, stats_option_values):
+        logger, plot_format, stats_dir, stats_option_values, selection):
 
     logger.info("Drawing distribution plots...")
     plot.draw_distribution_graphs(
-        plot_format, stats_dir, stats_option_values)
+        plot_format, stats_dir, stats_option_values, selection)
 
 
-def _analyse_runs(logger, record_usage, options):
-    _write_accumulated_stats_and_usage(options)
+def _draw_threshold_sweep_graphs(
+        logger, plot_format, stats_dir, stats_option_values, selection):
 
-    overall_transcript_stats = _get_overall_stats(options, tpms.TRANSCRIPT)
-    overall_gene_stats = _get_overall_stats(options, tpms.GENE)
+    logger.info("Drawing threshold sweep curves...")
+    plot.draw_threshold_sweep_graphs(
+        plot_format, stats_dir, stats_option_values, selection)
 
-    option_values_set = stats_data.OptionValuesSets(overall_transcript_stats)
 
-    plot_format = options[po.PLOT_FORMAT.name]
+def _draw_concordance_graphs(
+        logger, plot_format, stats_dir, option_values_set, selection):
+
+    concordance_stats = concordance.read_concordance_stats(stats_dir)
+    if concordance_stats is None:
+        return
+
+    logger.info("Drawing heatmaps of agreement between quantification " +
+                "methods...")
+    plot.draw_concordance_graphs(
+        plot_format, stats_dir, concordance_stats, option_values_set,
+        selection)
+
+
+def _draw_pareto_graphs(
+        logger, plot_format, stats_dir, option_values_set, selection):
+
+    pareto_stats = pareto.read_pareto_stats(stats_dir)
+    if pareto_stats is None:
+        return
+
+    logger.info("Drawing graphs of accuracy against resource usage...")
+    plot.draw_pareto_graphs(
+        plot_format, stats_dir, pareto_stats, option_values_set, selection)
+
+
+def _analyse_concordance(logger, stats_dir, not_present_cutoff):
+    matrix_dir = os.path.join(stats_dir, tpm_matrix.MATRIX_DIRECTORY)
+    if not os.path.exists(matrix_dir):
+        return
+
+    logger.info("Calculating agreement between quantification methods...")
+    concordance_stats = concordance.get_concordance_stats(
+        tpm_matrix.read_tpm_matrix(matrix_dir), not_present_cutoff)
+
+    # Agreement statistics from a previous analysis must not be graphed if
+    # they no longer apply
+    stats_file = os.path.join(stats_dir, concordance.CONCORDANCE_STATS_FILE)
+    if concordance_stats is not None:
+        concordance.write_concordance_stats(stats_dir, concordance_stats)
+    elif os.path.exists(stats_file):
+        os.remove(stats_file)
+
+
+def _analyse_pareto(logger, stats_dir):
+    usage_file = ru.get_resource_usage_file(
+        ru.QUANT_RESOURCE_TYPE, prefix=ru.OVERALL_USAGE_PREFIX,
+        directory=stats_dir)
+
+    pareto_stats = None
+    if os.path.exists(usage_file):
+        logger.info("Determining the Pareto frontier of accuracy against " +
+                    "resource usage...")
+        overall_stats = pd.read_csv(statistics.get_stats_file(
+            stats_dir, statistics.OVERALL_STATS_PREFIX, tpms.TRANSCRIPT))
+        pareto_stats = pareto.get_pareto_stats(pareto.get_accuracy_costs(
+            overall_stats, pd.read_csv(usage_file)))
+
+    # Pareto frontier statistics from a previous analysis must not be graphed
+    # if they no longer apply
+    stats_file = os.path.join(stats_dir, pareto.PARETO_STATS_FILE)
+    if pareto_stats is not None:
+        pareto.write_pareto_stats(stats_dir, pareto_stats)
+    elif os.path.exists(stats_file):
+        os.remove(stats_file)
+
+
+def _write_html_report(logger, stats_dir, grouped_threshold, record_usage):
+    logger.info("Writing HTML report...")
+    report.write_html_report(
+        os.path.join(stats_dir, report.REPORT_FILE),
+        report.get_report_tables(stats_dir, grouped_threshold, record_usage))
+
+
+def _get_plot_selection(options):
+    try:
+        return plot_selection.get_plot_selection(options[po.PLOTS.name])
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _draw_graphs(logger, record_usage, threshold_sweep, selection, options):
+    if not selection.families:
+        logger.info("No graphs selected to be drawn.")
+        return
+
     stats_dir = options[po.STATS_DIRECTORY.name]
+    plot_format = options[po.PLOT_FORMAT.name]
 
-    _draw_overall_stats_graphs(
-        logger, plot_format, stats_dir, overall_transcript_stats,
-        option_values_set, tpms.TRANSCRIPT)
-    _draw_overall_stats_graphs(
-        logger, plot_format, stats_dir, overall_gene_stats,
-        option_values_set, tpms.GENE)
-    _draw_grouped_stats_graphs(
-        logger, plot_format, stats_dir, options[po.GROUPED_THRESHOLD.name],
-        option_values_set)
-    _draw_distribution_graphs(
-        logger, plot_format, stats_dir, option_values_set)
+    if not os.path.exists(statistics.get_stats_file(
+            stats_dir, statistics.OVERALL_STATS_PREFIX, tpms.TRANSCRIPT)):
+        exit("Exiting. No overall statistics found in " + stats_dir +
+             "; the analyse_runs command must be run first.")
+
+    overall_transcript_stats = selection.select_runs(
+        _get_overall_stats(options, tpms.TRANSCRIPT))
+    overall_gene_stats = selection.select_runs(
+        _get_overall_stats(options, tpms.GENE))
+
+    option_values_set = stats_data.OptionValuesSets(overall_transcript_stats)
+
+    # Plots are drawn in parallel once all have been requested, skipping those
+    # whose data and parameters are unchanged since they were last drawn
+    with plot.drawing_plots_in_parallel(
+            options[po.ANALYSIS_PROCESSES.name],
+            os.path.join(stats_dir, plot_cache.INDEX_FILE)):
+        if selection.includes(plot_selection.OVERALL):
+            for stats, tpm_level in [
+                    (overall_transcript_stats, tpms.TRANSCRIPT),
+                    (overall_gene_stats, tpms.GENE)]:
+                _draw_overall_stats_graphs(
+                    logger, plot_format, stats_dir, stats,
+                    option_values_set, tpm_level, selection)
+
+        if selection.includes(plot_selection.GROUPED):
+            _draw_grouped_stats_graphs(
+                logger, plot_format, stats_dir,
+                options[po.GROUPED_THRESHOLD.name], option_values_set,
+                selection)
+
+        if selection.includes(plot_selection.DISTRIBUTION):
+            _draw_distribution_graphs(
+                logger, plot_format, stats_dir, option_values_set, selection)
+
+        if threshold_sweep and selection.includes(plot_selection.SWEEP):
+            _draw_threshold_sweep_graphs(
+                logger, plot_format, stats_dir, option_values_set, selection)
+
+        if selection.includes(plot_selection.CONCORDANCE):
+            _draw_concordance_graphs(
+                logger, plot_format, stats_dir, option_values_set, selection)
+
+        if record_usage and selection.includes(plot_selection.USAGE):
+            usage_quant = _get_overall_usage(
+                options, ru.QUANT_RESOURCE_TYPE)
+            usage_prequant = _get_overall_usage(
+                options, ru.PREQUANT_RESOURCE_TYPE)
+            command_usage_quant = _get_overall_command_usage(
+                options, ru.QUANT_RESOURCE_TYPE)
+            command_usage_prequant = _get_overall_command_usage(
+                options, ru.PREQUANT_RESOURCE_TYPE)
+            _draw_usage_graphs(
+                logger, plot_format, stats_dir, usage_prequant, usage_quant,
+                command_usage_prequant, command_usage_quant,
+                option_values_set, selection)
+
+        if record_usage and selection.includes(plot_selection.PARETO):
+            _draw_pareto_graphs(
+                logger, plot_format, stats_dir, option_values_set, selection)
+
+
+def _analyse_runs(logger, record_usage, threshold_sweep, selection, options):
+    _write_accumulated_stats_and_usage(options)
+
+    stats_dir = options[po.STATS_DIRECTORY.name]
+    _analyse_concordance(
+        logger, stats_dir, options[po.NOT_PRESENT_CUTOFF.name])
 
     if record_usage:
-        usage_quant = _get_overall_usage(options, ru.QUANT_RESOURCE_TYPE)
-        usage_prequant = _get_overall_usage(options, ru.PREQUANT_RESOURCE_TYPE)
-        _draw_usage_graphs(
-            logger, plot_format, stats_dir,
-            usage_prequant, usage_quant, option_values_set)
+        _analyse_pareto(logger, stats_dir)
+
+    if options.get(po.HTML_REPORT.name):
+        _write_html_report(
+            logger, stats_dir, options[po.GROUPED_THRESHOLD.name],
+            record_usage)
+
+    _draw_graphs(logger, record_usage, threshold_sweep, selection, options)
+
+
+def _compare_usage(logger, options):
+    if po.BASELINE_STATS_DIRECTORY.name not in options:
+        exit("Exiting. Baseline stats directory must be specified.")
+
+    stats_dir = options[po.STATS_DIRECTORY.name]
+    baseline_stats_dir = options[po.BASELINE_STATS_DIRECTORY.name]
+
+    logger.info("Comparing resource usage with that of baseline runs...")
+    usage = {}
+    for usage_dir in [baseline_stats_dir, stats_dir]:
+        usage[usage_dir] = usage_comparison.get_trial_usage(usage_dir)
+        if usage[usage_dir] is None:
+            exit("Exiting. No quantification resource usage found in " +
+                 usage_dir)
+
+    comparison = usage_comparison.compare_usage(
+        usage[baseline_stats_dir], usage[stats_dir],
+        options[po.REGRESSION_THRESHOLD.name],
+        options[po.SIGNIFICANCE_LEVEL.name])
+    if comparison is None:
+        exit("Exiting. No quantification runs match those of the baseline.")
+
+    usage_comparison.write_usage_comparison(stats_dir, comparison)
+
+    regressions = usage_comparison.get_regressions(comparison)
+    for _, regression in regressions.iterrows():
+        logger.warning(
+            "Resource usage regression for run {r}: {s} {b:.2f} -> {n:.2f} "
+            "({c:+.1f}%)".format(
+                r=po.get_run_name(regression),
+                s=regression[usage_comparison.STATISTIC],
+                b=regression[usage_comparison.BASELINE],
+                n=regression[usage_comparison.NEW],
+                c=regression[usage_comparison.PERCENT_CHANGE]))
+
+    if len(regressions) > 0:
+        exit("Exiting. {n} resource usage regression(s) found.".format(
+            n=len(regressions)))
 
 
 def _run_piquant_command(logger, piquant_command, options, qr_options):
     record_usage = (po.NO_USAGE.name not in options) or \
         (not options[po.NO_USAGE.name])
-    _set_executables_for_commands(record_usage)
+    threshold_sweep = options.get(po.THRESHOLD_SWEEP.name, False)
+    _set_executables_for_commands(record_usage, threshold_sweep)
+
+    # Check the graphs to be drawn are validly specified before gathering
+    # any data
+    if piquant_command in [pc.ANALYSE_RUNS, pc.PLOT]:
+        selection = _get_plot_selection(options)
 
     po.execute_for_mqr_option_sets(piquant_command, logger, options, qr_options)
 
     if piquant_command == pc.ANALYSE_RUNS:
-        _analyse_runs(logger, record_usage, options)
+        _analyse_runs(
+            logger, record_usage, threshold_sweep, selection, options)
+    elif piquant_command == pc.PLOT:
+        _draw_graphs(logger, record_usage, threshold_sweep, selection, options)
+    elif piquant_command == pc.COMPARE_USAGE:
+        _compare_usage(logger, options)
 
 
 def piquant(args):
@@ -62,10 +62,11 @@ PREPARE_READ_DIRS = _PiquantCommand(
     "'error', 'bias', 'stranded' and 'noise-perc', and each directory is " +
     "named according to its particular set of sequencing parameters. A " +
     "run_simulation.sh bash script is written to each directory which, when " +
-    "executed, will use the FluxSimulator RNA-seq read simulator to " +
-    "simulate reads for the appropriate combination of sequencing parameters.",
+    "executed, will use the FluxSimulator RNA-seq read simulator (or, if " +
+    "specified, piquant's built-in simulator) to simulate reads for the " +
+    "appropriate combination of sequencing parameters.",
     [po.READS_OUTPUT_DIR, po.NUM_MOLECULES, po.NUM_NOISE_MOLECULES,
-     po.NO_CLEANUP, po.OPTIONS_FILE, po.READ_LENGTH, po.READ_DEPTH,
+     po.SIMULATOR, po.NO_CLEANUP, po.OPTIONS_FILE, po.READ_LENGTH, po.READ_DEPTH,
      po.PAIRED_END, po.ERRORS, po.BIAS, po.STRANDED, po.NOISE_DEPTH_PERCENT,
      po.TRANSCRIPT_GTF, po.NOISE_TRANSCRIPT_GTF, po.GENOME_FASTA_DIR])
 
@@ -102,18 +103,22 @@ PREPARE_QUANT_DIRS = _PiquantCommand(
     "transcript quantification will take place. One such directory is " +
     "created for each possible combination of sequencing and quantification " +
     "parameters determined by the options 'read-length', 'read-depth', " +
-    "'paired-end', 'error', 'bias', 'stranded', 'noise-perc' and " +
-    "'quant-method', and each directory is named according to its " +
-    "particular set of parameters. A run_quantification.sh bash script is " +
+    "'paired-end', 'error', 'bias', 'stranded', 'noise-perc', " +
+    "'quant-method' and 'num-threads', and each directory is named " +
+    "according to its particular set of parameters. A " +
+    "run_quantification.sh bash script is " +
     "written to each directory which, when executed, will use the " +
     "appropriate tool and simulated RNA-seq reads to quantify transcript " +
     "expression.",
     [po.READS_OUTPUT_DIR, po.QUANT_OUTPUT_DIR, po.NO_CLEANUP, po.NO_USAGE,
-     po.NUM_THREADS, po.OPTIONS_FILE, po.READ_LENGTH, po.READ_DEPTH,
-     po.PAIRED_END, po.ERRORS, po.BIAS, po.STRANDED, po.QUANT_METHOD,
-     po.NOISE_DEPTH_PERCENT, po.TRANSCRIPT_GTF, po.GENOME_FASTA_DIR,
+     po.TPM_CSV, po.NUM_THREADS, po.USAGE_INTERVAL, po.USAGE_TRIALS,
+     po.CACHE_STATE, po.KMER_LENGTH, po.OPTIONS_FILE,
+     po.READ_LENGTH, po.READ_DEPTH, po.PAIRED_END, po.ERRORS, po.BIAS,
+     po.STRANDED, po.QUANT_METHOD, po.NOISE_DEPTH_PERCENT, po.TRANSCRIPT_GTF,
+     po.GENOME_FASTA_DIR,
      po.PLOT_FORMAT, po.GROUPED_THRESHOLD, po.ERROR_FRACTION_THRESHOLD,
-     po.NOT_PRESENT_CUTOFF])
+     po.NOT_PRESENT_CUTOFF, po.BOOTSTRAP_RESAMPLES, po.ANALYSIS_PROCESSES,
+     po.THRESHOLD_SWEEP])
 
 PREQUANTIFY = _PiquantCommand(
     "prequantify",
@@ -126,7 +131,7 @@ PREQUANTIFY = _PiquantCommand(
     "index for the genome, or creating transcript FASTA sequences",
     [po.QUANT_OUTPUT_DIR, po.OPTIONS_FILE, po.READ_LENGTH, po.READ_DEPTH,
      po.PAIRED_END, po.ERRORS, po.BIAS, po.STRANDED, po.QUANT_METHOD,
-     po.NOISE_DEPTH_PERCENT])
+     po.NOISE_DEPTH_PERCENT, po.NUM_THREADS])
 
 QUANTIFY = _PiquantCommand(
     "quantify",
@@ -134,13 +139,14 @@ QUANTIFY = _PiquantCommand(
     "run_quantification.sh scripts that have been written by the " +
     "prepare_quant_dirs command. For each possible combination of " +
     "parameters determined by the options 'read-length', 'read-depth', " +
-    "'paired-end', 'error', 'bias', 'stranded', noise-perc', and " +
-    "'quant-method', the appropriate run_quantification.sh script is " +
-    "launched as a background process, ignoring hangup signals (via the " +
+    "'paired-end', 'error', 'bias', 'stranded', noise-perc', " +
+    "'quant-method' and 'num-threads', the appropriate " +
+    "run_quantification.sh script is launched as a background process, " +
+    "ignoring hangup signals (via the " +
     "nohup command). After launching the scripts, piquant exits.",
     [po.READS_OUTPUT_DIR, po.QUANT_OUTPUT_DIR, po.OPTIONS_FILE, po.READ_LENGTH,
      po.READ_DEPTH, po.PAIRED_END, po.ERRORS, po.BIAS, po.STRANDED,
-     po.QUANT_METHOD, po.NOISE_DEPTH_PERCENT])
+     po.QUANT_METHOD, po.NOISE_DEPTH_PERCENT, po.NUM_THREADS])
 
 CHECK_QUANTIFICATION = _PiquantCommand(
     "check_quant",
@@ -148,8 +154,8 @@ CHECK_QUANTIFICATION = _PiquantCommand(
     "expression via run_quantification.sh scripts successfully completed. " +
     "For each possible combination of parameters determined by the " +
     "options 'read-length', 'read-depth', 'paired-end', 'error', 'bias', " +
-    "'stranded', 'noise-perc' and 'quant-method', the relevant " +
-    "quantification directory is checked for the existence of the " +
+    "'stranded', 'noise-perc', 'quant-method' and 'num-threads', the " +
+    "relevant quantification directory is checked for the existence of the " +
     "appropriate output files of the quantification tool that will " +
     "subsequently be used for assessing quantification accuracy. A " +
     "message is printed to standard error for those combinations of " +
@@ -157,7 +163,7 @@ CHECK_QUANTIFICATION = _PiquantCommand(
     "which quantification terminated unsuccessfully.",
     [po.QUANT_OUTPUT_DIR, po.OPTIONS_FILE, po.READ_LENGTH, po.READ_DEPTH,
      po.PAIRED_END, po.ERRORS, po.BIAS, po.STRANDED, po.QUANT_METHOD,
-     po.NOISE_DEPTH_PERCENT])
+     po.NOISE_DEPTH_PERCENT, po.NUM_THREADS])
 
 ANALYSE_RUNS = _PiquantCommand(
     "analyse_runs",
@@ -166,11 +172,42 @@ ANALYSE_RUNS = _PiquantCommand(
     "expression. Statistics are calculated, and graphs drawn, for those " +
     "combinations of quantification tools and sequencing parameters " +
     "determined by the options 'read-length', 'read-depth', 'paired-end', " +
-    "'error', 'bias', 'stranded', 'noise-perc' and 'quant-method'.",
+    "'error', 'bias', 'stranded', 'noise-perc', 'quant-method' and " +
+    "'num-threads'.",
     [po.QUANT_OUTPUT_DIR, po.STATS_DIRECTORY, po.OPTIONS_FILE,
      po.READ_LENGTH, po.READ_DEPTH, po.PAIRED_END, po.ERRORS, po.BIAS,
-     po.STRANDED, po.QUANT_METHOD, po.NOISE_DEPTH_PERCENT,
-     po.PLOT_FORMAT, po.GROUPED_THRESHOLD, po.NO_USAGE])
+     po.STRANDED, po.QUANT_METHOD, po.NOISE_DEPTH_PERCENT, po.NUM_THREADS,
+     po.PLOT_FORMAT, po.GROUPED_THRESHOLD, po.NOT_PRESENT_CUTOFF, po.NO_USAGE,
+     po.THRESHOLD_SWEEP, po.ANALYSIS_PROCESSES, po.HTML_REPORT, po.PLOTS])
+
+PLOT = _PiquantCommand(
+    "plot",
+    "plot draws graphs from the statistics previously gathered and " +
+    "calculated by the analyse_runs command, which are read from the " +
+    "statistics directory. Graphs are drawn exactly as by analyse_runs, " +
+    "but only those graphs specified by the option 'plots' are drawn, and " +
+    "quantification directories are not read. Graphs may thus be drawn on " +
+    "demand, after statistics for a large number of quantification runs " +
+    "have been calculated by running analyse_runs with '--plots=none'.",
+    [po.STATS_DIRECTORY, po.OPTIONS_FILE, po.PLOT_FORMAT,
+     po.GROUPED_THRESHOLD, po.NO_USAGE, po.THRESHOLD_SWEEP,
+     po.ANALYSIS_PROCESSES, po.PLOTS])
+
+
+COMPARE_USAGE = _PiquantCommand(
+    "compare_usage",
+    "compare_usage compares the resource usage of quantification runs, " +
+    "previously gathered by the analyse_runs command into the statistics " +
+    "directory, with that of a baseline set of quantification runs (for " +
+    "example, those of an earlier version of a quantification tool). Runs " +
+    "are matched by the values of the options describing them, and the " +
+    "relative change in elapsed real time, CPU time and maximum resident " +
+    "memory of each run is written to the statistics directory. If any " +
+    "of these increases by more than the regression threshold (and, if " +
+    "runs were executed in more than one timing trial, the increase is " +
+    "significant), piquant exits with a non-zero exit status.",
+    [po.STATS_DIRECTORY, po.BASELINE_STATS_DIRECTORY, po.OPTIONS_FILE,
+     po.REGRESSION_THRESHOLD, po.SIGNIFICANCE_LEVEL])
 
 
 def get_command_names():
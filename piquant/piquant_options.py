@@ -12,7 +12,9 @@ import os.path
 import schema
 import textwrap
 
+from . import calculate_unique_kmers as cuk
 from . import options as opt
+from . import prepare_read_simulation as prs
 from . import quantifiers
 
 _INDENT = "    "
@@ -20,11 +22,18 @@ _INDENT = "    "
 
 class _OptionValue(object):
     def __init__(self, default_value=0, validator=lambda x: x,
-                 value_namer=lambda x: x, file_namer=None):
+                 value_namer=lambda x: x, file_namer=None, is_list=False):
         self.default_value = default_value
         self.validator = validator
         self.value_namer = value_namer
         self.file_namer = file_namer if file_namer else self.value_namer
+        # If True, the validator validates a whole comma-separated list of
+        # values, rather than each value of the list in turn
+        self.is_list = is_list
+
+
+def _get_option(name):
+    return [o for o in _PiquantOption.OPTIONS if o.name == name][0]
 
 
 class _PiquantOption(object):
@@ -48,6 +57,11 @@ class _PiquantOption(object):
     def __str__(self):
         return "{n} ({on})".format(n=self.name, on=self.get_option_name())
 
+    def __reduce__(self):
+        # Options are pickled (e.g. when passed to other processes) by name,
+        # as their value validators and namers cannot themselves be pickled.
+        return (_get_option, (self.name,))
+
     def get_usage_string(self):
         ret = self.get_option_name()
         if self.has_value():
@@ -108,16 +122,24 @@ class _PiquantOption(object):
         new_value = self._get_validated_vals(values_dict)[0] \
             if self.has_value() else values_dict[self.get_option_name()]
 
+        # The values of list options are validated as lists, and so are
+        # compared with the validated default value
+        default_value = self.validator()(self.default_value()) \
+            if self.has_value() and self.option_value.is_list \
+            else self.default_value()
+
         if self.name not in options_dict \
-                or new_value != self.default_value():
+                or new_value != default_value:
             options_dict[self.name] = new_value
 
     def _get_validated_vals(self, values_dict):
         validated_vals = None
         if self.has_value():
-            validated_vals = opt.validate_options_list(
-                values_dict[self.get_option_name()],
-                self.validator(), self.name)
+            value = values_dict[self.get_option_name()]
+            validated_vals = [self.validator()(value)] \
+                if self.option_value.is_list \
+                else opt.validate_options_list(
+                    value, self.validator(), self.name)
 
         return validated_vals
 
@@ -156,20 +178,28 @@ class _MultiQuantRunOption(_QuantRunOption):
     OPTIONS = []
 
     def __init__(self, name, description, option_value=None,
-                 title=None, is_numeric=False, units=None):
+                 title=None, is_numeric=False, units=None, quant_only=False):
 
         _QuantRunOption.__init__(
             self, name, description, option_value, title, is_numeric)
 
         self.units = units
+        # If True, the option describes only quantification, and not the
+        # simulated reads that are quantified
+        self.quant_only = quant_only
 
         _MultiQuantRunOption.OPTIONS.append(self)
 
     def _set_new_values(self, values_dict, option_values,
                         quant_run_option_values):
 
-        quant_run_option_values[self.name] = \
-            set(self._get_validated_vals(values_dict))
+        # A default value specified on the command line does not override
+        # values specified in an options file
+        new_values = set(self._get_validated_vals(values_dict))
+        if self.name not in quant_run_option_values or \
+                not self.default_value() or \
+                new_values != set([self.default_value()]):
+            quant_run_option_values[self.name] = new_values
 
     def get_axis_label(self):
         label = self.title
@@ -202,6 +232,36 @@ STATS_DIRECTORY = _PiquantOption(
     "Directory to output assembled stats and graphs to",
     option_value=_OptionValue(default_value="output/analysis"))
 
+BASELINE_STATS_DIRECTORY = _PiquantOption(
+    "baseline_stats_dir",
+    "Directory containing assembled stats of a baseline set of " +
+    "quantification runs, with whose resource usage that of the runs in the " +
+    "stats directory will be compared",
+    option_value=_OptionValue(
+        validator=lambda x: opt.validate_dir_option(
+            x, "Baseline stats directory does not exist")))
+
+REGRESSION_THRESHOLD = _PiquantOption(
+    "regression_threshold",
+    "Percentage increase in elapsed real time, CPU time or maximum " +
+    "resident memory of a quantification run, compared with the matching " +
+    "baseline run, above which a resource usage regression is reported",
+    option_value=_OptionValue(
+        default_value=10,
+        validator=lambda x: opt.validate_float_option(
+            x, "Regression threshold percentage must be non-negative",
+            min_val=0)))
+
+SIGNIFICANCE_LEVEL = _PiquantOption(
+    "significance_level",
+    "If quantification runs were executed in more than one timing trial, " +
+    "an increase in resource usage is only reported as a regression if " +
+    "significant at this level",
+    option_value=_OptionValue(
+        default_value=0.05,
+        validator=lambda x: opt.validate_float_option(
+            x, "Significance level must be non-negative", min_val=0)))
+
 NUM_MOLECULES = _QuantRunOption(
     "num_molecules",
     "Flux Simulator parameters will be set for the main simulation to start " +
@@ -221,6 +281,17 @@ NUM_NOISE_MOLECULES = _QuantRunOption(
             x, "Number of noise molecules must be a positive integer",
             min_val=1)))
 
+SIMULATOR = _QuantRunOption(
+    "simulator",
+    "Read simulator used to create expression profiles and simulate reads: " +
+    "either 'flux_simulator', or 'numpy' for piquant's built-in simulator, " +
+    "which reads the same parameters and writes the same files as Flux " +
+    "Simulator, but is considerably faster",
+    option_value=_OptionValue(
+        default_value=prs.FLUX_SIMULATOR,
+        validator=lambda x: opt.validate_list_option(
+            x, list(prs.get_read_simulators()), "Invalid read simulator")))
+
 NO_CLEANUP = _PiquantOption(
     "nocleanup",
     "If not specified, files non-essential for subsequent quantification " +
@@ -233,18 +304,58 @@ NO_USAGE = _PiquantOption(
     "gathered for prequantification and quantification, and resource usage " +
     "plots produced.")
 
-NUM_THREADS = _QuantRunOption(
-    "num_threads",
-    "Number of threads to be used by multi-threaded quantification methods",
+TPM_CSV = _PiquantOption(
+    "tpm_csv",
+    "If specified, real and calculated TPMs for each quantification run " +
+    "will be written to a CSV file, in addition to the columnar TPM store " +
+    "used for analysis")
+
+USAGE_INTERVAL = _QuantRunOption(
+    "usage_interval",
+    "Interval in seconds at which the memory and CPU usage of " +
+    "prequantification and quantification commands is sampled, if resource " +
+    "usage statistics are gathered",
+    option_value=_OptionValue(
+        default_value=1,
+        validator=lambda x: opt.validate_float_option(
+            x, "Resource usage sampling interval must be a positive number",
+            min_val=0.01)))
+
+USAGE_TRIALS = _QuantRunOption(
+    "usage_trials",
+    "Number of times the quantification commands of each run are executed, " +
+    "if resource usage statistics are gathered, so that the variability of " +
+    "their resource usage can be measured",
     option_value=_OptionValue(
         default_value=1,
         validator=lambda x: opt.validate_int_option(
-            x, "Number of threads must be a positive integer", min_val=1)))
+            x, "Number of timing trials must be a positive integer",
+            min_val=1)))
+
+CACHE_STATE = _QuantRunOption(
+    "cache_state",
+    "If 'cold', simulated reads and prequantification files will be " +
+    "evicted from the operating system page cache before each execution " +
+    "of quantification commands; if 'warm', they will be read into the page " +
+    "cache beforehand; if 'none', the page cache is left as it is",
+    option_value=_OptionValue(
+        default_value="none",
+        validator=lambda x: opt.validate_list_option(
+            x, ["none", "cold", "warm"], "Invalid cache state")))
+
+KMER_LENGTH = _QuantRunOption(
+    "kmer_length",
+    "Length of the k-mers used to calculate the fraction of each " +
+    "transcript's k-mers which occur in no other transcript, by which " +
+    "transcripts are classified when assessing quantification accuracy",
+    option_value=_OptionValue(
+        default_value=cuk.MAX_KMER_LENGTH,
+        validator=cuk.validate_kmer_length))
 
 QUANT_METHOD = _MultiQuantRunOption(
     "quant_method",
     "Comma-separated list of quantification methods to run",
-    title="Quantifier",
+    title="Quantifier", quant_only=True,
     option_value=_OptionValue(
         validator=lambda x: quantifiers.get_quantification_methods()[x],
         value_namer=str))
@@ -319,6 +430,23 @@ NOISE_DEPTH_PERCENT = _MultiQuantRunOption(
         value_namer=lambda x:
         "no_noise" if x == 0 else "noise-{d}x".format(d=x)))
 
+NUM_THREADS = _MultiQuantRunOption(
+    "num_threads",
+    "Comma-separated list of numbers of threads to be used by " +
+    "multi-threaded quantification methods; quantification runs for " +
+    "different numbers of threads share the same simulated reads and " +
+    "prequantification",
+    title="Threads", is_numeric=True, quant_only=True,
+    option_value=_OptionValue(
+        default_value=1,
+        validator=lambda x: opt.validate_int_option(
+            x, "Number of threads must be a positive integer", min_val=1),
+        value_namer=lambda x: "{n} thread{s}".format(
+            n=x, s="" if x == 1 else "s"),
+        # Runs using a single thread are named as by earlier versions of
+        # piquant
+        file_namer=lambda x: "" if x == 1 else "{n}t".format(n=x)))
+
 TRANSCRIPT_GTF = _QuantRunOption(
     "transcript_gtf",
     "GTF formatted file describing the transcripts to be simulated",
@@ -344,11 +472,15 @@ GENOME_FASTA_DIR = _QuantRunOption(
 PLOT_FORMATS = ["pdf", "svg", "png"]
 PLOT_FORMAT = _PiquantOption(
     "plot_format",
-    "Output format for graphs (one of {plot_formats})",
+    "Comma-separated list of output formats for graphs (each one of " +
+    "{plot_formats}); each graph is drawn once and saved in every format",
     option_value=_OptionValue(
         default_value="pdf",
-        validator=lambda x: opt.validate_list_option(
-            x, PLOT_FORMATS, "Invalid plot format")))
+        validator=lambda x: opt.validate_options_list(
+            x, lambda f: opt.validate_list_option(
+                f, PLOT_FORMATS, "Invalid plot format"),
+            "plot format"),
+        is_list=True))
 
 GROUPED_THRESHOLD = _PiquantOption(
     "grouped_threshold",
@@ -380,6 +512,50 @@ NOT_PRESENT_CUTOFF = _PiquantOption(
         validator=lambda x: opt.validate_float_option(
             x, "Cutoff value must be non-negative", min_val=0)))
 
+BOOTSTRAP_RESAMPLES = _PiquantOption(
+    "bootstrap",
+    "Number of bootstrap resamples used to calculate confidence intervals " +
+    "for statistics (if zero, confidence intervals are not calculated)",
+    option_value=_OptionValue(
+        default_value=0,
+        validator=lambda x: opt.validate_int_option(
+            x, "Number of bootstrap resamples must be non-negative",
+            min_val=0)))
+
+ANALYSIS_PROCESSES = _PiquantOption(
+    "analysis_processes",
+    "Number of processes to be used when analysing a quantification run",
+    option_value=_OptionValue(
+        default_value=1,
+        validator=lambda x: opt.validate_int_option(
+            x, "Number of analysis processes must be a positive integer",
+            min_val=1)))
+
+THRESHOLD_SWEEP = _PiquantOption(
+    "threshold_sweep",
+    "If specified, statistics will additionally be calculated over a range " +
+    "of values of the \"not present\" cut-off and the error fraction " +
+    "threshold, and ROC, precision-recall and error fraction curves plotted")
+
+HTML_REPORT = _PiquantOption(
+    "html_report",
+    "If specified, a self-contained HTML report will be written to the " +
+    "statistics directory, embedding overall statistics and drawing graphs " +
+    "of them in the browser")
+
+PLOTS = _PiquantOption(
+    "plots",
+    "Comma-separated list of selectors determining the graphs to be drawn: " +
+    "any of the graph families 'overall', 'grouped', 'distribution', " +
+    "'sweep', 'concordance', 'usage' and 'pareto' (or 'all' or 'none'), " +
+    "and 'statistic=<name>', 'classifier=<name>' or '<option>=<value>' to " +
+    "restrict graphs to particular statistics, classifiers, or " +
+    "quantification runs",
+    option_value=_OptionValue(
+        default_value="all",
+        validator=lambda x: x.split(","),
+        is_list=True))
+
 
 def validate_options(logger, command, cl_options):
     options_to_check = _get_options_to_check(command, cl_options)
@@ -442,7 +618,8 @@ def _validate_option_values(logger, cl_options, file_options, options_to_check):
 
 
 def _fix_paths_for_dir_options(option_values):
-    for option in [READS_OUTPUT_DIR, QUANT_OUTPUT_DIR, STATS_DIRECTORY]:
+    for option in [READS_OUTPUT_DIR, QUANT_OUTPUT_DIR, STATS_DIRECTORY,
+                   BASELINE_STATS_DIRECTORY]:
         if option.name in option_values:
             option_values[option.name] = \
                 os.path.abspath(option_values[option.name])
@@ -456,6 +633,10 @@ def get_numerical_mqr_options():
     return [o for o in get_multiple_quant_run_options() if o.is_numeric]
 
 
+def get_reads_mqr_options():
+    return [o for o in get_multiple_quant_run_options() if not o.quant_only]
+
+
 def get_run_name(qr_options):
     """
     Get the name of a read simulation or quantification run.
@@ -473,7 +654,7 @@ def get_run_name(qr_options):
         if option.name in qr_options:
             value = qr_options[option.name]
             elements.append(option.get_file_name_part(value))
-    return "_".join(elements)
+    return "_".join([e for e in elements if e])
 
 
 def get_value_names(mqr_options):
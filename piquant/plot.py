@@ -1,6 +1,8 @@
 import contextlib
+import functools
 import itertools
 import matplotlib.pyplot as plt
+import multiprocessing
 import numpy as np
 import os.path
 import pandas as pd
@@ -8,13 +10,21 @@ import seaborn as sb
 import sys
 
 from . import classifiers
+from . import concordance
+from . import pareto
 from . import piquant_options as po
+from . import plot_cache
+from . import plot_selection as ps
 from . import resource_usage as ru
 from . import statistics
+from . import sweeps
 from . import tpms as t
 
 RESOURCE_USAGE_DIR = "resource_usage_graphs"
 
+_DENSITY_PLOT_THRESHOLD = 10000
+_DENSITY_PLOT_GRID_SIZE = 100
+
 # Don't embed characters as paths when outputting SVG - assume fonts are
 # installed on machine where SVG will be viewed (see
 # http://matplotlib.org/users/customizing.html)
@@ -61,15 +71,144 @@ class _GroupedPlotInfo(object):
         self.title = title
 
 
+class _PlotJobs(object):
+    # Holds the plots requested while plots are being collected to be drawn
+    # in parallel; while not collecting, plots are drawn when requested.
+    def __init__(self):
+        self.jobs = None
+
+    def is_collecting(self):
+        return self.jobs is not None
+
+
+_PLOT_JOBS = _PlotJobs()
+_PLOT_FUNCTIONS = {}
+_SAVED_PLOT_FILES = []
+_WORKER_STATE = {}
+
+
+def _plot_job(func):
+    # Mark a function as drawing a single plot, independently of any other.
+    # When plots are being drawn in parallel, calls to the function are
+    # recorded, by function name and arguments, as jobs to be executed later
+    # in a pool of processes.
+    _PLOT_FUNCTIONS[func.__name__] = func
+
+    @functools.wraps(func)
+    def draw_or_collect(*args, **kwargs):
+        if _PLOT_JOBS.is_collecting():
+            _PLOT_JOBS.jobs.append((func.__name__, args, kwargs))
+        else:
+            func(*args, **kwargs)
+
+    return draw_or_collect
+
+
+def _draw_plot_job(job):
+    # Draw the plot for a job, returning the names of the files written.
+    func_name, args, kwargs = job
+    del _SAVED_PLOT_FILES[:]
+    _PLOT_FUNCTIONS[func_name](*args, **kwargs)
+    return list(_SAVED_PLOT_FILES)
+
+
+def _initialise_worker(jobs):
+    plt.switch_backend("Agg")
+    _WORKER_STATE["jobs"] = jobs
+
+
+def _draw_plot_in_worker(job_index):
+    return _draw_plot_job(_WORKER_STATE["jobs"][job_index])
+
+
+def _draw_plots(jobs, processes):
+    if processes > 1 and len(jobs) > 1:
+        # Job data are passed once to each worker process (and are simply
+        # inherited where processes are forked); plots are then farmed out by
+        # index, in chunks.
+        chunk_size = max(1, len(jobs) // (4 * processes))
+        pool = multiprocessing.Pool(processes, _initialise_worker, (jobs,))
+        try:
+            return pool.map(
+                _draw_plot_in_worker, range(len(jobs)), chunk_size)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        return [_draw_plot_job(job) for job in jobs]
+
+
+def _draw_uncached_plots(jobs, processes, cache_index_file):
+    # Draw only those plots whose data and parameters have changed since they
+    # were last drawn, and record the plots drawn in the cache index.
+    cache = plot_cache.PlotCache(cache_index_file)
+
+    keys = [plot_cache.get_job_key(*job) for job in jobs]
+    uncached = [i for i, key in enumerate(keys) if not cache.is_drawn(key)]
+
+    files = _draw_plots([jobs[i] for i in uncached], processes)
+    for i, job_files in zip(uncached, files):
+        cache.add(keys[i], job_files)
+
+    cache.write()
+
+
+@contextlib.contextmanager
+def drawing_plots_in_parallel(processes, cache_index_file=None):
+    """
+    Draw plots in parallel across a pool of processes.
+
+    Plots requested within the managed block are not drawn immediately, but
+    are recorded as independent jobs, each comprising the subset of data to be
+    plotted and the plot specification. On leaving the block, these jobs are
+    drawn by a pool of processes using the non-interactive Agg backend. Plot
+    file names are determined entirely by each job's arguments, and so do not
+    depend on the order in which plots are drawn.
+
+    processes: The number of processes over which to spread plot drawing; if
+    one, and no cache index file is specified, plots are drawn immediately in
+    the current process.
+    cache_index_file: If specified, a file indexing plots previously drawn by
+    the content of their data and parameters (see plot_cache.PlotCache); only
+    plots not already drawn from identical data and parameters are drawn.
+    """
+    if (processes <= 1 and cache_index_file is None) or \
+            _PLOT_JOBS.is_collecting():
+        yield
+        return
+
+    _PLOT_JOBS.jobs = []
+    try:
+        yield
+        jobs = _PLOT_JOBS.jobs
+    finally:
+        _PLOT_JOBS.jobs = None
+
+    if cache_index_file is None:
+        _draw_plots(jobs, processes)
+    else:
+        _draw_uncached_plots(jobs, processes, cache_index_file)
+
+
+def _get_plot_formats(fformat):
+    # Plots may be saved in a single format, or in a list of formats.
+    return [fformat] if isinstance(fformat, (type(""), type(u""))) \
+        else fformat
+
+
 @contextlib.contextmanager
 def _saving_new_plot(fformat, file_name_elements):
     plt.figure()
     try:
         yield
     finally:
+        # The figure is drawn once, then saved in each requested format
         file_name = "_".join([str(el) for el in file_name_elements])
         file_name = file_name.replace(' ', '_')
-        plt.savefig(file_name + "." + fformat, format=fformat)
+        for plot_format in _get_plot_formats(fformat):
+            format_file_name = file_name + "." + plot_format
+            plt.savefig(format_file_name, format=plot_format)
+            _SAVED_PLOT_FILES.append(format_file_name)
         plt.close()
 
 
@@ -124,9 +263,39 @@ def _get_group_mqr_option_values(stats_df, group_mqr_option):
     return group_mqr_option_vals
 
 
+def _get_range_plot_bounds_setter(xrange, yrange):
+    def _set_range_plot_bounds(xmin, xmax, ymin, ymax):
+        del xmin, xmax, ymin, ymax
+        plt.xlim(xmin=xrange[0], xmax=xrange[1])
+        plt.ylim(ymin=yrange[0], ymax=yrange[1])
+
+    return _set_range_plot_bounds
+
+
+def _plot_statistic(stats, xcol, ycol, line_format='-o', **kwargs):
+    # Plot values of a statistic, drawing error bars if the data contain
+    # interval bounds (e.g. bootstrap confidence intervals) for it. Returns the
+    # minimum and maximum extents of the plotted values.
+    xvals = stats[xcol]
+    yvals = stats[ycol]
+
+    lower_col, upper_col = statistics.get_interval_columns(ycol)
+    if lower_col not in stats.columns or upper_col not in stats.columns:
+        plt.plot(xvals, yvals, line_format, **kwargs)
+        return yvals.min(), yvals.max()
+
+    lower = stats[lower_col]
+    upper = stats[upper_col]
+    yerr = [np.maximum(0, (yvals - lower).values),
+            np.maximum(0, (upper - yvals).values)]
+    plt.errorbar(xvals.values, yvals.values, yerr=yerr, fmt=line_format,
+                 capsize=3, **kwargs)
+    return min(yvals.min(), lower.min()), max(yvals.max(), upper.max())
+
+
 def _plot_grouped_statistic(
         stats_df, plot_info, xcol, ycol, xlabel, ylabel,
-        plot_bounds_setter):
+        plot_bounds_setter, sort_col=None, line_format='-o'):
 
     group_mqr_option_vals = _get_group_mqr_option_values(
         stats_df, plot_info.group_mqr_option)
@@ -137,18 +306,17 @@ def _plot_grouped_statistic(
     for group_mqr_option_value in group_mqr_option_vals:
         group_stats = stats_df[
             stats_df[plot_info.group_mqr_option.name] == group_mqr_option_value]
-        group_stats.sort(columns=xcol, axis=0, inplace=True)
+        group_stats.sort(columns=sort_col if sort_col else xcol,
+                         axis=0, inplace=True)
         xvals = group_stats[xcol]
-        yvals = group_stats[ycol]
-        plt.plot(xvals, yvals, '-o',
-                 label=plot_info.group_mqr_option.get_value_name(
-                     group_mqr_option_value))
+        group_ymin, group_ymax = _plot_statistic(
+            group_stats, xcol, ycol, line_format=line_format,
+            label=plot_info.group_mqr_option.get_value_name(
+                group_mqr_option_value))
 
-        group_ymin = yvals.min()
         if group_ymin < ymin:
             ymin = group_ymin
 
-        group_ymax = yvals.max()
         if group_ymax > ymax:
             ymax = group_ymax
 
@@ -170,6 +338,7 @@ def _plot_grouped_statistic(
     return (ymin, ymax)
 
 
+@_plot_job
 def _plot_grouped_stat_vs_mqr_opt(
         fformat, stats, base_name, statistic, group_mqr_option,
         varying_mqr_option, fixed_mqr_option_values):
@@ -189,6 +358,7 @@ def _plot_grouped_stat_vs_mqr_opt(
             _get_plot_bounds_setter(statistic))
 
 
+@_plot_job
 def _plot_grouped_stat_vs_clsfr(
         fformat, stats, base_name, statistic, group_mqr_option,
         classifier, fixed_mqr_option_values):
@@ -215,6 +385,7 @@ def _plot_grouped_stat_vs_clsfr(
             np.arange(min_xval, max_xval + 1), classifier)
 
 
+@_plot_job
 def _plot_grouped_cumulative_dist(
         fformat, stats, base_name, group_mqr_option,
         classifier, ascending, fixed_mqr_option_values):
@@ -235,6 +406,26 @@ def _plot_grouped_cumulative_dist(
             _set_distribution_plot_bounds)
 
 
+@_plot_job
+def _plot_grouped_sweep_curve(
+        fformat, stats, base_name, sweep, curve, group_mqr_option,
+        fixed_mqr_option_values):
+
+    fixed_mqr_option_info = po.get_value_names(fixed_mqr_option_values)
+
+    plot_info = _GroupedPlotInfo(group_mqr_option, fixed_mqr_option_info)
+    name_elements = plot_info.get_filename_parts(base_name, curve.name)
+
+    with _saving_new_plot(fformat, name_elements):
+        plot_info.set_plot_title(curve.title)
+        _plot_grouped_statistic(
+            stats, plot_info, curve.xcol, curve.ycol,
+            curve.xlabel, curve.ylabel,
+            _get_range_plot_bounds_setter(*curve.get_plot_range()),
+            sort_col=sweep.get_column_name(), line_format='-')
+
+
+@_plot_job
 def _draw_prequant_time_usage_graph(fformat, graph_file_basename, usage_data):
     with _saving_new_plot(fformat, [graph_file_basename, "time_usage"]):
         n_groups = len(usage_data.index)
@@ -264,6 +455,7 @@ def _draw_prequant_time_usage_graph(fformat, graph_file_basename, usage_data):
         axes.legend(loc=6, bbox_to_anchor=(1, 0.5))
 
 
+@_plot_job
 def _draw_prequant_mem_usage_graph(fformat, graph_file_basename, usage_data):
     with _saving_new_plot(fformat, [graph_file_basename, "memory_usage"]):
         n_groups = len(usage_data.index)
@@ -286,13 +478,145 @@ def _draw_prequant_mem_usage_graph(fformat, graph_file_basename, usage_data):
                    usage_data["quant_method"].values)
 
 
+@_plot_job
+def _draw_prequant_io_usage_graph(fformat, graph_file_basename, usage_data):
+    with _saving_new_plot(fformat, [graph_file_basename, "io_usage"]):
+        n_groups = len(usage_data.index)
+        index = np.arange(n_groups)
+
+        io_usage_stats = [rus for rus in ru.get_io_usage_statistics()
+                          if rus.units == "Gb"]
+        gap_width = 0.1
+        bar_width = (1 - gap_width) / len(io_usage_stats)
+
+        dummy, axes = plt.subplots()
+        color_cycle = axes._get_lines.color_cycle
+
+        for i, usage_stat in enumerate(io_usage_stats):
+            plt.bar(index + i * bar_width,
+                    usage_data[usage_stat.name].values,
+                    bar_width, color=color_cycle.next(),
+                    label=_capitalized(usage_stat.name.replace('-', ' ')))
+
+        plt.xlabel('Quantification method')
+        plt.ylabel('Total data (Gb)')
+        plt.title('Data read and written during prequantification')
+        plt.xticks(index + ((1 - gap_width) / 2),
+                   usage_data["quant_method"].values)
+
+        box = axes.get_position()
+        axes.set_position([box.x0, box.y0, box.width * 0.9, box.height])
+        axes.legend(loc=6, bbox_to_anchor=(1, 0.5))
+
+
+def _get_step_colour(step):
+    step_colours = plt.get_cmap("Set2")
+    return step_colours((step - 1) % step_colours.N)
+
+
+def _get_step_label(command_usage):
+    return ["{s}: {n}".format(s=step, n=name) for step, name in zip(
+        command_usage[ru.STEP].values, command_usage[ru.STEP_NAME].values)]
+
+
+@_plot_job
+def _draw_time_usage_by_step_graph(
+        fformat, graph_file_basename, command_usage, stage):
+
+    # The elapsed real time of each step is averaged over all runs of each
+    # quantification method, and the steps stacked in the order executed
+    step_times = command_usage.groupby(
+        [po.QUANT_METHOD.name, ru.STEP, ru.STEP_NAME])["real-time"].\
+        mean().reset_index()
+    quant_methods = sorted(set(step_times[po.QUANT_METHOD.name].values))
+    bar_width = 0.8
+
+    # Only steps taking a noticeable fraction of the time are labelled
+    max_total_time = step_times.groupby(
+        po.QUANT_METHOD.name)["real-time"].sum().max()
+    min_labelled_time = max_total_time / 25.0
+
+    with _saving_new_plot(fformat, [graph_file_basename, "time_by_step"]):
+        for i, quant_method in enumerate(quant_methods):
+            # Grouped values are ordered by step within each method
+            method_times = step_times[
+                step_times[po.QUANT_METHOD.name] == quant_method]
+
+            bottom = 0
+            for step, label, real_time in zip(
+                    method_times[ru.STEP].values,
+                    _get_step_label(method_times),
+                    method_times["real-time"].values):
+                plt.bar(i, real_time, bar_width, bottom=bottom,
+                        color=_get_step_colour(step), edgecolor="white",
+                        align="center")
+                if real_time >= min_labelled_time:
+                    plt.text(i, bottom + real_time / 2.0, label,
+                             ha="center", va="center", fontsize="x-small")
+                bottom += real_time
+
+        plt.xlabel("Quantification method")
+        plt.ylabel("Mean elapsed real time (s)")
+        plt.title("Time taken by each {s} step".format(s=stage.lower()))
+        plt.xticks(np.arange(len(quant_methods)), quant_methods)
+        plt.xlim(-0.5, len(quant_methods) - 0.5)
+        plt.ylim(0, max_total_time * 1.05 + 0.01)
+
+
+@_plot_job
+def resource_usage_timeline(fformat, command_usage, base_name, stage):
+    """
+    Draw a timeline of the commands executed in a quantification run.
+
+    Each command is drawn as a horizontal bar extending from its start to its
+    end time, labelled with its step number and name and its elapsed time.
+
+    fformat: The plot format, or list of formats.
+    command_usage: A pandas DataFrame of per-command resource usage, as
+    returned by resource_usage.get_command_usage().
+    base_name: The base name of the plot file.
+    stage: The stage of quantification (e.g. "Quantification"), used in the
+    plot title.
+    """
+    with _saving_new_plot(fformat, [base_name, "timeline"]):
+        steps = command_usage[ru.STEP].values
+        starts = command_usage[ru.START_TIME].values
+        durations = command_usage[ru.END_TIME].values - starts
+
+        plt.barh(steps, durations, 0.8, left=starts, align="center",
+                 color=[_get_step_colour(s) for s in steps])
+        for step, start, duration in zip(steps, starts, durations):
+            plt.text(start + duration, step, " {d:.1f}s".format(d=duration),
+                     va="center", fontsize="small")
+
+        plt.yticks(steps, _get_step_label(command_usage))
+        plt.ylim(steps.max() + 0.5, steps.min() - 0.5)
+        plt.xlim(0, (starts + durations).max() * 1.15 + 0.01)
+        plt.xlabel("Elapsed real time (s)")
+        plt.title(stage + " timeline")
+        plt.tight_layout()
+
+
+@_plot_job
 def log_tpm_scatter_plot(
         fformat, tpms, base_name, tpm_label, not_present_cutoff):
 
+    xvals = tpms[t.LOG10_REAL_TPM].values
+    yvals = tpms[t.LOG10_CALCULATED_TPM].values
+
     with _saving_new_plot(fformat, [base_name, tpm_label, "log10 scatter"]):
-        plt.scatter(tpms[t.LOG10_REAL_TPM].values,
-                    tpms[t.LOG10_CALCULATED_TPM].values,
-                    c="lightblue", alpha=0.4)
+        # Above a certain number of TPMs, individual points can't usefully be
+        # distinguished and make vector-format plots very large, so the
+        # density of points is shown instead. In either case, the plotted
+        # data are rasterized in vector formats.
+        if len(xvals) > _DENSITY_PLOT_THRESHOLD:
+            plt.hexbin(xvals, yvals, gridsize=_DENSITY_PLOT_GRID_SIZE,
+                       bins="log", mincnt=1, cmap="Blues", rasterized=True)
+            colour_bar = plt.colorbar()
+            colour_bar.set_label("Log10 number of TPMs")
+        else:
+            plt.scatter(xvals, yvals, c="lightblue", alpha=0.4,
+                        rasterized=True)
 
         plt.suptitle("Scatter plot of log calculated vs real TPMs: " +
                      tpm_label)
@@ -304,18 +628,32 @@ def log_tpm_scatter_plot(
         plt.ylim(ymin=min_val)
 
 
+@_plot_job
 def log_ratio_boxplot(
-        fformat, tpms, base_name, tpm_label, classifier, threshold):
+        fformat, boxplot_stats, base_name, tpm_label, classifier, threshold):
 
     grouping_column = classifier.get_column_name()
-    grouped_tpms = tpms.groupby(grouping_column)
-    tpms = grouped_tpms.filter(
-        lambda x: len(x[t.REAL_TPM]) > threshold)
+    boxplot_stats = boxplot_stats[
+        boxplot_stats[t.BOXPLOT_COUNT] > threshold]
+
+    # Boxes are drawn from precomputed summary statistics (as calculated by
+    # tpms.get_boxplot_stats()), rather than from per-transcript log ratios.
+    boxes = [{"whislo": row[t.BOXPLOT_LOWER_WHISKER],
+              "q1": row[t.BOXPLOT_LOWER_QUARTILE],
+              "med": row[t.BOXPLOT_MEDIAN],
+              "q3": row[t.BOXPLOT_UPPER_QUARTILE],
+              "whishi": row[t.BOXPLOT_UPPER_WHISKER],
+              "fliers": t.get_boxplot_outliers(row[t.BOXPLOT_OUTLIERS]),
+              "label": group}
+             for group, row in boxplot_stats.iterrows()]
 
     with _saving_new_plot(
             fformat, [base_name, grouping_column, tpm_label, "boxplot"]):
-        sb.boxplot(tpms[t.LOG10_RATIO], groupby=tpms[grouping_column],
-                   sym='', color='lightblue')
+        plt.gca().bxp(
+            boxes, positions=range(len(boxes)), patch_artist=True,
+            boxprops={"facecolor": "lightblue"},
+            medianprops={"color": "black"},
+            flierprops={"marker": ".", "markersize": 2, "alpha": 0.5})
 
         plt.suptitle("Log ratios of calculated to real TPMs: " + tpm_label)
         plt.xlabel(_capitalized(grouping_column))
@@ -324,6 +662,7 @@ def log_ratio_boxplot(
         _set_ticks_for_classifier_plot(plt.xticks()[0], classifier)
 
 
+@_plot_job
 def plot_statistic_vs_classifier(
         fformat, stats, base_name, statistic, classifier, threshold):
 
@@ -334,12 +673,11 @@ def plot_statistic_vs_classifier(
         xvals = stats[clsfr_col]
         min_xval = xvals.min()
         max_xval = xvals.max()
-        yvals = stats[statistic.name]
 
-        plt.plot(xvals, yvals, '-o')
+        min_yval, max_yval = _plot_statistic(stats, clsfr_col, statistic.name)
 
         _get_plot_bounds_setter(statistic)(
-            min_xval, max_xval, yvals.min(), yvals.max())
+            min_xval, max_xval, min_yval, max_yval)
 
         plt.xlabel(_capitalized(classifier.get_axis_label()))
         plt.ylabel(statistic.title)
@@ -349,6 +687,7 @@ def plot_statistic_vs_classifier(
             np.arange(min_xval, max_xval + 1), classifier)
 
 
+@_plot_job
 def plot_transcript_cumul_dist(
         fformat, tpms, base_name, tpm_label, classifier, ascending):
 
@@ -368,6 +707,95 @@ def plot_transcript_cumul_dist(
         plt.suptitle(_capitalized(clsfr_col) + " threshold: " + tpm_label)
 
 
+@_plot_job
+def plot_threshold_sweep_curve(fformat, stats, base_name, sweep, curve):
+    with _saving_new_plot(fformat, [base_name, curve.name]):
+        plt.plot(stats[curve.xcol], stats[curve.ycol], '-')
+
+        _get_range_plot_bounds_setter(*curve.get_plot_range())(
+            None, None, None, None)
+
+        plt.xlabel(curve.xlabel)
+        plt.ylabel(curve.ylabel)
+        plt.suptitle(curve.title + " (varying " +
+                     sweep.get_column_name() + ")")
+
+
+@_plot_job
+def plot_concordance_heatmap(
+        fformat, stats, base_name, measure, fixed_mqr_option_values):
+
+    fixed_mqr_option_info = po.get_value_names(fixed_mqr_option_values)
+    values = stats.pivot(
+        index=po.QUANT_METHOD.name, columns=concordance.OTHER_QUANT_METHOD,
+        values=measure.name)
+
+    with _saving_new_plot(
+            fformat, [base_name, measure.name] + fixed_mqr_option_info):
+        vmin, vmax = measure.value_range
+        plt.imshow(values.values, interpolation="nearest",
+                   cmap=measure.colour_map, vmin=vmin, vmax=vmax)
+        plt.colorbar()
+
+        locations = np.arange(len(values.index))
+        plt.xticks(locations, values.columns.tolist(), rotation=90)
+        plt.yticks(locations, values.index.tolist())
+
+        title = measure.title
+        if len(fixed_mqr_option_info) > 0:
+            title += ": " + ", ".join(fixed_mqr_option_info)
+        plt.suptitle(title)
+
+
+@_plot_job
+def plot_pareto_frontier(
+        fformat, stats, base_name, accuracy, cost, fixed_mqr_option_values):
+
+    fixed_mqr_option_info = po.get_value_names(fixed_mqr_option_values)
+
+    # Runs are labelled by the values of those quantification options (e.g.
+    # quantification method) which vary between them
+    run_options = sorted(
+        [o for o in po.get_multiple_quant_run_options()
+         if o.quant_only and o.name in stats.columns and
+         len(stats[o.name].unique()) > 1],
+        key=lambda o: o.index)
+
+    dominated = stats[pareto.DOMINATED].astype(bool).values
+    frontier = stats[~dominated]
+    frontier = frontier.iloc[np.argsort(frontier[pareto.COST].values)]
+
+    with _saving_new_plot(
+            fformat, [base_name, accuracy.name, "vs", cost.name] +
+            fixed_mqr_option_info):
+        plt.plot(frontier[pareto.COST].values,
+                 frontier[pareto.ACCURACY].values, '-o',
+                 label="Pareto frontier")
+        if dominated.any():
+            plt.plot(stats[pareto.COST].values[dominated],
+                     stats[pareto.ACCURACY].values[dominated], 'o',
+                     color="grey", markerfacecolor="none", label="Dominated")
+
+        for _, run in stats.iterrows():
+            label = ", ".join(po.get_value_names(
+                {o: run[o.name] for o in run_options}))
+            plt.annotate(label, (run[pareto.COST], run[pareto.ACCURACY]),
+                         xytext=(4, 4), textcoords="offset points",
+                         fontsize="small")
+
+        if cost.log_scale:
+            plt.xscale("log")
+
+        plt.xlabel(cost.get_axis_label())
+        plt.ylabel(accuracy.title)
+        plt.legend(loc="best", fontsize="small")
+
+        title = accuracy.title + " vs " + _decapitalized(cost.title)
+        if len(fixed_mqr_option_info) > 0:
+            title += ": " + ", ".join(fixed_mqr_option_info)
+        plt.suptitle(title)
+
+
 # Making plots over multiple sets of sequencing and quantification run options
 
 
@@ -418,24 +846,55 @@ def _draw_stats_graphs(
                 [option, num_opt], data_frame)
 
 
+def _get_recorded_usage_statistics(usage_data):
+    # Resource usage statistics (e.g. of I/O) may not have been recorded by
+    # older versions of piquant
+    return [rus for rus in ru.get_resource_usage_statistics()
+            if rus.name in usage_data and usage_data[rus.name].notnull().any()]
+
+
 def draw_quant_res_usage_graphs(
-        fformat, stats_dir, usage_data, opt_vals_set):
+        fformat, stats_dir, usage_data, opt_vals_set, selection=ps.ALL_PLOTS,
+        command_usage=None):
 
     _draw_stats_graphs(
-        fformat, stats_dir, RESOURCE_USAGE_DIR, usage_data, opt_vals_set,
-        ru.get_resource_usage_statistics(), statistics.OVERALL_STATS_PREFIX)
+        fformat, stats_dir, RESOURCE_USAGE_DIR,
+        selection.select_runs(usage_data), opt_vals_set,
+        selection.select_statistics(
+            _get_recorded_usage_statistics(usage_data)),
+        statistics.OVERALL_STATS_PREFIX)
+
+    if command_usage is not None and len(command_usage) > 0:
+        plot_dir = _get_plot_subdir(stats_dir, RESOURCE_USAGE_DIR)
+        _draw_time_usage_by_step_graph(
+            fformat, os.path.join(plot_dir, "quant"),
+            selection.select_runs(command_usage), "Quantification")
 
 
-def draw_prequant_res_usage_graphs(fformat, stats_dir, usage_data):
+def draw_prequant_res_usage_graphs(
+        fformat, stats_dir, usage_data, selection=ps.ALL_PLOTS,
+        command_usage=None):
+
     plot_dir = _get_plot_subdir(stats_dir, RESOURCE_USAGE_DIR)
     graph_file_basename = os.path.join(plot_dir, "prequant")
+    usage_data = selection.select_runs(usage_data)
+
+    if command_usage is not None and len(command_usage) > 0:
+        _draw_time_usage_by_step_graph(
+            fformat, graph_file_basename,
+            selection.select_runs(command_usage), "Prequantification")
 
     _draw_prequant_time_usage_graph(fformat, graph_file_basename, usage_data)
     _draw_prequant_mem_usage_graph(fformat, graph_file_basename, usage_data)
+    if all([rus in _get_recorded_usage_statistics(usage_data)
+            for rus in ru.get_io_usage_statistics()]):
+        _draw_prequant_io_usage_graph(
+            fformat, graph_file_basename, usage_data)
 
 
 def draw_overall_stats_graphs(
-        fformat, stats_dir, overall_stats, opt_vals_set, tpm_level):
+        fformat, stats_dir, overall_stats, opt_vals_set, tpm_level,
+        selection=ps.ALL_PLOTS):
 
     # Draw graphs derived from statistics calculated for the whole set of TPMs.
     # e.g. the Spearman correlation of calculated and real TPMs graphed as
@@ -443,17 +902,19 @@ def draw_overall_stats_graphs(
     # paired-end reads with errors and bias.
     sub_dir = "overall_{l}_stats_graphs".format(l=tpm_level)
     _draw_stats_graphs(
-        fformat, stats_dir, sub_dir, overall_stats, opt_vals_set,
-        statistics.get_graphable_statistics(), "usage")
+        fformat, stats_dir, sub_dir, selection.select_runs(overall_stats),
+        opt_vals_set,
+        selection.select_statistics(statistics.get_graphable_statistics()),
+        "usage")
 
 
 def grouped_stats_graph_drawer(
-        plot_dir, fformat, grp_option, clsfr, num_tpms_filter):
+        plot_dir, fformat, grp_option, clsfr, num_tpms_filter, stats):
 
     option_stats_dir = _get_plot_subdir(plot_dir, "per", grp_option.name)
 
     def drawer(df, fixed_option_values):
-        for stat in statistics.get_graphable_statistics():
+        for stat in stats:
             statistic_dir = _get_plot_subdir(option_stats_dir, stat.name)
             graph_file_basename = os.path.join(statistic_dir, "grouped")
 
@@ -465,7 +926,8 @@ def grouped_stats_graph_drawer(
     return drawer
 
 
-def draw_grouped_stats_graphs(fformat, stats_dir, opt_vals_set, threshold):
+def draw_grouped_stats_graphs(fformat, stats_dir, opt_vals_set, threshold,
+                              selection=ps.ALL_PLOTS):
     # Draw graphs derived from statistics calculated on groups of TPMs that
     # have been stratified into sets based on some classifier of transcripts.
     # e.g. the median percentage error of calculated vs real TPMs graphed as
@@ -476,13 +938,14 @@ def draw_grouped_stats_graphs(fformat, stats_dir, opt_vals_set, threshold):
 
     num_tpms_filter = lambda x: x[statistics.TP_NUM_TPMS] > threshold
 
-    clsfrs = classifiers.get_classifiers()
+    clsfrs = selection.select_classifiers(classifiers.get_classifiers())
     grp_clsfrs = [c for c in clsfrs if c.produces_grouped_stats()]
+    stats = selection.select_statistics(statistics.get_graphable_statistics())
 
     for clsfr in grp_clsfrs:
         stats_file = statistics.get_stats_file(
             stats_dir, statistics.OVERALL_STATS_PREFIX, t.TRANSCRIPT, clsfr)
-        clsfr_stats = pd.read_csv(stats_file)
+        clsfr_stats = selection.select_runs(pd.read_csv(stats_file))
 
         clsfr_dir = _get_plot_subdir(
             grouped_stats_dir, "grouped_by", clsfr.get_column_name())
@@ -490,10 +953,48 @@ def draw_grouped_stats_graphs(fformat, stats_dir, opt_vals_set, threshold):
         for option in opt_vals_set.get_non_degenerate_options():
             opt_vals_set.exec_for_fixed_option_values_sets(
                 grouped_stats_graph_drawer(
-                    clsfr_dir, fformat, option, clsfr, num_tpms_filter),
+                    clsfr_dir, fformat, option, clsfr, num_tpms_filter,
+                    stats),
                 option, clsfr_stats)
 
 
+def threshold_sweep_graph_drawer(plot_dir, fformat, grp_option, sweep):
+    option_stats_dir = _get_plot_subdir(plot_dir, "per", grp_option.name)
+    graph_file_basename = os.path.join(option_stats_dir, "sweep")
+
+    def drawer(df, fixed_option_values):
+        for curve in sweep.curves:
+            _plot_grouped_sweep_curve(
+                fformat, df, graph_file_basename, sweep, curve,
+                grp_option, fixed_option_values)
+
+    return drawer
+
+
+def draw_threshold_sweep_graphs(fformat, stats_dir, opt_vals_set,
+                                selection=ps.ALL_PLOTS):
+    # Draw curves showing how statistics vary over a range of threshold
+    # values, e.g. ROC curves of the detection of transcripts as "present" as
+    # the "not present" cut-off varies, for each quantification method, in the
+    # case of paired-end reads with errors and bias.
+    sweep_stats_dir = _get_plot_subdir(stats_dir, "threshold_sweep_graphs")
+
+    for sweep, tpm_level in itertools.product(
+            sweeps.get_sweeps(), [t.TRANSCRIPT, t.GENE]):
+        stats_file = statistics.get_stats_file(
+            stats_dir, statistics.OVERALL_STATS_PREFIX, tpm_level, sweep)
+        sweep_stats = selection.select_runs(pd.read_csv(stats_file))
+
+        sweep_dir = _get_plot_subdir(
+            sweep_stats_dir, tpm_level, sweep.get_column_name())
+
+        for option in opt_vals_set.get_non_degenerate_options():
+            opt_vals_set.exec_for_fixed_option_values_sets(
+                threshold_sweep_graph_drawer(
+                    sweep_dir, fformat, option, sweep),
+                option, sweep_stats)
+
+
 def distribution_stats_graph_drawer(
         plot_dir, fformat, grp_option, clsfr, asc):
 
@@ -508,7 +1009,8 @@ def distribution_stats_graph_drawer(
     return drawer
 
 
-def draw_distribution_graphs(fformat, stats_dir, opt_vals_set):
+def draw_distribution_graphs(fformat, stats_dir, opt_vals_set,
+                             selection=ps.ALL_PLOTS):
     # Draw distributions illustrating the percentage of TPMs above or below
     # some threshold as that threshold changes. e.g. the percentage of TPMs
     # whose absolute percentage error in calculated TPM, as compared to real
@@ -516,14 +1018,14 @@ def draw_distribution_graphs(fformat, stats_dir, opt_vals_set):
     distribution_stats_dir = _get_plot_subdir(
         stats_dir, "distribution_stats_graphs")
 
-    clsfrs = classifiers.get_classifiers()
+    clsfrs = selection.select_classifiers(classifiers.get_classifiers())
     dist_clsfrs = [c for c in clsfrs if c.produces_distribution_plots()]
 
     for clsfr, asc in itertools.product(dist_clsfrs, [True, False]):
         stats_file = statistics.get_stats_file(
             stats_dir, statistics.OVERALL_STATS_PREFIX,
             t.TRANSCRIPT, clsfr, asc)
-        clsfr_stats = pd.read_csv(stats_file)
+        clsfr_stats = selection.select_runs(pd.read_csv(stats_file))
 
         clsfr_dir = _get_plot_subdir(
             distribution_stats_dir, clsfr.get_column_name(), "distribution")
@@ -533,3 +1035,70 @@ def draw_distribution_graphs(fformat, stats_dir, opt_vals_set):
                 distribution_stats_graph_drawer(
                     clsfr_dir, fformat, option, clsfr, asc),
                 option, clsfr_stats)
+
+
+def concordance_graph_drawer(plot_dir, fformat, measures):
+    graph_file_basename = os.path.join(plot_dir, "concordance")
+
+    def drawer(df, fixed_option_values):
+        for measure in measures:
+            plot_concordance_heatmap(
+                fformat, df, graph_file_basename, measure,
+                fixed_option_values)
+
+    return drawer
+
+
+def draw_concordance_graphs(fformat, stats_dir, concordance_stats,
+                            opt_vals_set, selection=ps.ALL_PLOTS):
+    # Draw heatmaps of the agreement between calculated TPMs for each pair of
+    # quantification methods run on the same set of simulated reads, e.g. the
+    # Spearman correlation between the TPMs calculated by each pair of
+    # methods, in the case of paired-end reads with errors and bias, at a
+    # particular read length and depth.
+    plot_dir = _get_plot_subdir(stats_dir, "concordance_graphs")
+    measures = selection.select_statistics(
+        concordance.get_concordance_measures())
+    opt_vals_set.exec_for_fixed_option_values_sets(
+        concordance_graph_drawer(plot_dir, fformat, measures),
+        po.QUANT_METHOD, selection.select_runs(concordance_stats))
+
+
+def pareto_graph_drawer(plot_dir, fformat, measure_pairs):
+    graph_file_basename = os.path.join(plot_dir, "pareto")
+
+    def drawer(df, fixed_option_values):
+        for accuracy, cost in measure_pairs:
+            measure_stats = df[
+                (df[pareto.ACCURACY_STATISTIC] == accuracy.name).values &
+                (df[pareto.COST_STATISTIC] == cost.name).values]
+            if len(measure_stats) == 0:
+                continue
+
+            plot_pareto_frontier(
+                fformat, measure_stats, graph_file_basename, accuracy, cost,
+                fixed_option_values)
+
+    return drawer
+
+
+def draw_pareto_graphs(fformat, stats_dir, pareto_stats, opt_vals_set,
+                       selection=ps.ALL_PLOTS):
+    # Draw scatter plots of the accuracy of each quantification run against
+    # its resource usage, highlighting the Pareto frontier of runs not
+    # dominated by any other, e.g. Spearman's rho against total CPU time for
+    # each quantification method, in the case of paired-end reads with errors
+    # and bias, at a particular read length and depth. A graph is drawn for
+    # each pair of accuracy statistic and cost of which either is selected.
+    plot_dir = _get_plot_subdir(stats_dir, "pareto_graphs")
+
+    accuracies = selection.select_statistics(pareto.get_accuracy_measures())
+    costs = selection.select_statistics(pareto.get_cost_measures())
+    measure_pairs = [(a, c) for a in pareto.get_accuracy_measures()
+                     for c in pareto.get_cost_measures()
+                     if a in accuracies or c in costs]
+
+    opt_vals_set.exec_for_fixed_option_values_sets(
+        pareto_graph_drawer(plot_dir, fformat, measure_pairs),
+        [o for o in po.get_multiple_quant_run_options() if o.quant_only],
+        selection.select_runs(pareto_stats))
@@ -0,0 +1,155 @@
+"""
+Functions and classes for recording the plots drawn from particular data, so
+that plots whose data and parameters have not changed need not be redrawn.
+Exports:
+
+get_job_key: Return a key identifying the inputs to a plot job.
+PlotCache: An index of the plot jobs previously drawn, and their files.
+"""
+
+import hashlib
+import json
+import numbers
+import numpy as np
+import os.path
+import pandas as pd
+
+from .__init__ import __version__
+
+INDEX_FILE = "plot_cache.json"
+
+
+def _update_with_text(digest, text):
+    digest.update(text.encode("utf-8"))
+
+
+def _update_with_array(digest, array):
+    array = np.asarray(array)
+    if array.dtype == object:
+        _update_with_text(digest, "\0".join([repr(v) for v in array]))
+    else:
+        _update_with_text(digest, str(array.dtype) + str(array.shape))
+        digest.update(np.ascontiguousarray(array).tobytes())
+
+
+def _has_custom_reduce(value):
+    return type(value).__reduce__ is not object.__reduce__
+
+
+def _update_digest(digest, value):
+    # Update a digest with a canonical representation of a value, such that
+    # equal values (e.g. data frames with the same contents, or dictionaries
+    # with the same items) always produce the same digest, in any process.
+    _update_with_text(digest, type(value).__name__ + ":")
+
+    if value is None or isinstance(value, (bool, numbers.Number)) or \
+            isinstance(value, type("")) or isinstance(value, type(u"")):
+        _update_with_text(digest, repr(value))
+    elif isinstance(value, np.generic):
+        _update_with_text(digest, repr(value.item()))
+    elif isinstance(value, (list, tuple)):
+        for element in value:
+            _update_digest(digest, element)
+    elif isinstance(value, dict):
+        items = []
+        for key, item in value.items():
+            key_digest = hashlib.sha1()
+            _update_digest(key_digest, key)
+            items.append((key_digest.hexdigest(), item))
+        for key, item in sorted(items, key=lambda x: x[0]):
+            _update_with_text(digest, key)
+            _update_digest(digest, item)
+    elif isinstance(value, pd.DataFrame):
+        _update_digest(digest, [str(c) for c in value.columns])
+        for column in value.columns:
+            _update_with_array(digest, value[column].values)
+    elif isinstance(value, (pd.Series, np.ndarray)):
+        _update_with_array(digest, value)
+    elif callable(value):
+        _update_with_text(digest, getattr(value, "__name__", ""))
+    elif _has_custom_reduce(value):
+        # Objects pickled by name (e.g. options and classifiers) are
+        # identified by the same name.
+        _update_digest(digest, list(value.__reduce__()[1]))
+    else:
+        _update_digest(digest, {k: v for k, v in vars(value).items()
+                                if not callable(v)})
+
+
+def get_job_key(func_name, args, kwargs):
+    """
+    Return a key identifying the inputs to a plot job.
+
+    Return a string which depends only on the piquant version, the name of
+    the plotting function, and the contents of the data and plot parameters
+    passed to it.
+
+    func_name: The name of the plotting function.
+    args: The positional arguments passed to the plotting function.
+    kwargs: The keyword arguments passed to the plotting function.
+    """
+    digest = hashlib.sha1()
+    _update_digest(digest, [__version__, func_name, list(args), kwargs])
+    return digest.hexdigest()
+
+
+class PlotCache(object):
+    """
+    An index of the plot jobs previously drawn, and their files.
+
+    The index maps from the key of each plot job drawn to the list of plot
+    files written by that job, and is stored as a JSON file. When it is
+    written, jobs drawn, or found to be already drawn, since the index was
+    read are recorded together with any previously drawn jobs which were not
+    requested this time (e.g. because only a selection of plots was drawn),
+    provided their files still exist and have not since been overwritten by
+    another job.
+    """
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.previous_jobs = {}
+        self.current_jobs = {}
+
+        if os.path.exists(index_file):
+            with open(index_file) as in_file:
+                self.previous_jobs = json.load(in_file)
+
+    def is_drawn(self, key):
+        """
+        Determine if a plot job has already been drawn.
+
+        Return True if a job with the same key was previously drawn, and all
+        the files it wrote still exist.
+
+        key: The key of the plot job, as returned by get_job_key().
+        """
+        files = self.previous_jobs.get(key)
+        if files is None or not all([os.path.exists(f) for f in files]):
+            return False
+
+        self.current_jobs[key] = files
+        return True
+
+    def add(self, key, files):
+        """
+        Record that a plot job has been drawn.
+
+        key: The key of the plot job, as returned by get_job_key().
+        files: A list of the plot files written by the job.
+        """
+        self.current_jobs[key] = files
+
+    def write(self):
+        """Write the index of plot jobs drawn to its JSON file."""
+        current_files = set(
+            [f for files in self.current_jobs.values() for f in files])
+
+        jobs = {}
+        for key, files in self.previous_jobs.items():
+            if all([os.path.exists(f) and f not in current_files
+                    for f in files]):
+                jobs[key] = files
+        jobs.update(self.current_jobs)
+
+        with open(self.index_file, "w") as out_file:
+            json.dump(jobs, out_file, indent=1, sort_keys=True)
@@ -0,0 +1,204 @@
+"""
+Functions and classes for selecting which graphs are drawn from the
+statistics calculated for a set of quantification runs. Exports:
+
+get_plot_selection: Return the selection of graphs described by selectors.
+PlotSelection: A selection of the graphs to be drawn.
+ALL_PLOTS: A selection of all graphs.
+
+Graphs are selected by family (e.g. "grouped", for graphs of statistics
+calculated for groups of transcripts determined by a classifier), by the
+statistics or classifiers they depict, and by the values of options
+describing the quantification runs from whose statistics they are drawn.
+"""
+
+import numpy as np
+import schema
+
+from . import classifiers
+from . import concordance
+from . import pareto
+from . import piquant_options as po
+from . import resource_usage as ru
+from . import statistics
+
+OVERALL = "overall"
+GROUPED = "grouped"
+DISTRIBUTION = "distribution"
+SWEEP = "sweep"
+CONCORDANCE = "concordance"
+USAGE = "usage"
+PARETO = "pareto"
+FAMILIES = [OVERALL, GROUPED, DISTRIBUTION, SWEEP, CONCORDANCE, USAGE, PARETO]
+
+ALL = "all"
+NONE = "none"
+STATISTIC = "statistic"
+CLASSIFIER = "classifier"
+
+
+def _get_classifier_name(name):
+    return name.replace(' ', '_')
+
+
+class PlotSelection(object):
+    """
+    A selection of the graphs to be drawn.
+
+    families: The names of the families of graphs to be drawn (a subset of
+    FAMILIES).
+    statistic_names: The names of the statistics, resource usage statistics
+    (or costs), or measures of agreement between quantification methods to be
+    graphed, or None if all are to be graphed.
+    classifier_names: The column names of the classifiers for which graphs
+    are to be drawn (with spaces replaced by underscores), or None if graphs
+    are to be drawn for all classifiers.
+    option_values: A dictionary mapping from options (instances of
+    piquant_options._MultiQuantRunOption) to sets of string representations
+    of option values; graphs are drawn only from the statistics of
+    quantification runs with one of the specified values for each option.
+    """
+    def __init__(self, families, statistic_names=None,
+                 classifier_names=None, option_values=None):
+        self.families = set(families)
+        self.statistic_names = statistic_names
+        self.classifier_names = classifier_names
+        self.option_values = option_values if option_values else {}
+
+    def includes(self, family):
+        """Return True if graphs of a particular family are to be drawn."""
+        return family in self.families
+
+    def select_statistics(self, stats):
+        """
+        Return the statistics to be graphed.
+
+        stats: A collection of objects with a 'name' attribute, e.g.
+        statistics, resource usage statistics, or measures of agreement
+        between quantification methods.
+        """
+        if self.statistic_names is None:
+            return stats
+        return [s for s in stats if s.name in self.statistic_names]
+
+    def select_classifiers(self, clsfrs):
+        """
+        Return the classifiers for which graphs are to be drawn.
+
+        clsfrs: A collection of classifiers.
+        """
+        if self.classifier_names is None:
+            return clsfrs
+        return [c for c in clsfrs if _get_classifier_name(
+            c.get_column_name()) in self.classifier_names]
+
+    def select_runs(self, data_frame):
+        """
+        Return the statistics of quantification runs to be graphed.
+
+        Return the subset of rows of a pandas DataFrame for which each
+        selected option takes one of its selected values. Options for which
+        the data frame has no column are ignored.
+
+        data_frame: A pandas DataFrame of statistics, with columns for the
+        values of options describing each quantification run.
+        """
+        selected = np.ones(len(data_frame), dtype=bool)
+        for option, values in self.option_values.items():
+            if option.name in data_frame.columns:
+                selected &= data_frame[option.name].astype(str).\
+                    isin(values).values
+        return data_frame[selected]
+
+
+ALL_PLOTS = PlotSelection(FAMILIES)
+
+
+def _get_statistic_names():
+    stats = list(statistics.get_statistics()) + \
+        list(ru.get_resource_usage_statistics()) + \
+        concordance.get_concordance_measures() + \
+        pareto.get_cost_measures()
+    return set([s.name for s in stats])
+
+
+def _get_classifier_names():
+    return set([_get_classifier_name(c.get_column_name())
+                for c in classifiers.get_classifiers()])
+
+
+def _get_option_value(option_name, value):
+    options = [o for o in po.get_multiple_quant_run_options()
+               if o.name == option_name]
+    if not options:
+        raise schema.SchemaError(
+            None, "Unknown plot selector '{n}'.".format(n=option_name))
+
+    # Values are validated as for the option itself, and compared with
+    # values in statistics files by their string representation (e.g.
+    # quantification methods by name).
+    option = options[0]
+    try:
+        return option, str(option.validator()(value))
+    except Exception:
+        raise schema.SchemaError(
+            None, "Invalid value '{v}' for plot selector '{n}'.".format(
+                v=value, n=option_name))
+
+
+def _check_name(name, valid_names, selector_type):
+    if name not in valid_names:
+        raise schema.SchemaError(
+            None, "Unknown {t} '{n}' in plot selection.".format(
+                t=selector_type, n=name))
+
+
+def get_plot_selection(selectors):
+    """
+    Return the selection of graphs described by a list of selectors.
+
+    Each selector is either the name of a family of graphs (one of
+    FAMILIES), "all" or "none"; or takes the form
+    "statistic=<name>", "classifier=<name>" or "<option>=<value>", where
+    <option> is the name of an option describing quantification runs (e.g.
+    "read_depth"). If no family is specified, graphs of all families are
+    drawn. Multiple statistics, classifiers or values of the same option may
+    be selected. A SchemaError is raised if any selector is invalid.
+
+    selectors: A list of plot selector strings.
+    """
+    families = set()
+    family_specified = False
+    statistic_names = None
+    classifier_names = None
+    option_values = {}
+
+    for selector in selectors:
+        selector = selector.strip()
+        if "=" in selector:
+            key, value = [s.strip() for s in selector.split("=", 1)]
+            if key == STATISTIC:
+                _check_name(value, _get_statistic_names(), STATISTIC)
+                statistic_names = (statistic_names or set()) | set([value])
+            elif key == CLASSIFIER:
+                value = _get_classifier_name(value)
+                _check_name(value, _get_classifier_names(), CLASSIFIER)
+                classifier_names = (classifier_names or set()) | set([value])
+            else:
+                option, value = _get_option_value(key, value)
+                option_values.setdefault(option, set()).add(value)
+        elif selector in [ALL, NONE] + FAMILIES:
+            family_specified = True
+            if selector == ALL:
+                families.update(FAMILIES)
+            elif selector != NONE:
+                families.add(selector)
+        else:
+            raise schema.SchemaError(
+                None, "Unknown plot selector '{s}'.".format(s=selector))
+
+    if not family_specified:
+        families.update(FAMILIES)
+
+    return PlotSelection(
+        families, statistic_names, classifier_names, option_values)
@@ -10,16 +10,28 @@ RUN_SCRIPT = "run_quantification.sh"
 
 TRANSCRIPT_COUNTS_SCRIPT = "count_transcripts_for_genes"
 UNIQUE_SEQUENCE_SCRIPT = "calculate_unique_transcript_sequence"
+TRANSCRIPT_COMPOSITION_SCRIPT = "calculate_transcript_composition"
+UNIQUE_KMERS_SCRIPT = "calculate_unique_kmers"
 ASSEMBLE_DATA_SCRIPT = "assemble_quantification_data"
 ANALYSE_DATA_SCRIPT = "analyse_quantification_run"
+SET_CACHE_STATE_SCRIPT = "set_cache_state"
 
 RUN_PREQUANTIFICATION_VARIABLE = "RUN_PREQUANTIFICATION"
 QUANTIFY_TRANSCRIPTS_VARIABLE = "QUANTIFY_TRANSCRIPTS"
 ANALYSE_RESULTS_VARIABLE = "ANALYSE_RESULTS"
 
 TPMS_FILE = "tpms.csv"
+TPMS_STORE = "tpms"
 TRANSCRIPT_COUNTS_FILE = "transcript_counts.csv"
 UNIQUE_SEQUENCE_FILE = "unique_sequence.csv"
+TRANSCRIPT_COMPOSITION_FILE = "transcript_composition.csv"
+UNIQUE_KMERS_FILE = "unique_{k}mers.csv"
+
+
+def _get_option_value(options, option):
+    # Options whose default value is false-like are not present in the
+    # options dictionary unless explicitly specified.
+    return options.get(option.name, option.default_value())
 
 
 def _get_transcript_counts_file(quantifier_dir):
@@ -30,9 +42,20 @@ def _get_unique_sequence_file(quantifier_dir):
     return os.path.join(quantifier_dir, UNIQUE_SEQUENCE_FILE)
 
 
+def _get_transcript_composition_file(quantifier_dir):
+    return os.path.join(quantifier_dir, TRANSCRIPT_COMPOSITION_FILE)
+
+
+def _get_unique_kmers_file(quantifier_dir, kmer_length):
+    # Unique k-mers are recorded separately for each k-mer length, so that
+    # runs using different lengths do not share them
+    return os.path.join(
+        quantifier_dir, UNIQUE_KMERS_FILE.format(k=kmer_length))
+
+
 def _add_run_prequantification(
         writer, quant_method, quant_params, quantifier_dir,
-        transcript_gtf_file, record_usage):
+        transcript_gtf_file, genome_fasta_dir, kmer_length, record_usage):
 
     with writer.if_block("-n \"$RUN_PREQUANTIFICATION\""):
         # Perform preparatory tasks required by a particular quantification
@@ -46,19 +69,75 @@ def _add_run_prequantification(
         with writer.section():
             _add_calc_uniq_seq_length(
                 writer, quantifier_dir, transcript_gtf_file)
+        with writer.section():
+            _add_calc_transcript_composition(
+                writer, quantifier_dir, transcript_gtf_file, genome_fasta_dir)
+        with writer.section():
+            _add_calc_unique_kmers(
+                writer, quantifier_dir, transcript_gtf_file, genome_fasta_dir,
+                kmer_length)
+
+
+def _get_cache_paths(quant_method, quant_params):
+    # The page cache state is set for the simulated reads, and for those files
+    # written during prequantification (e.g. indexes of transcript sequences)
+    # which are read by the quantification method; files used by other
+    # methods, which may be being run concurrently, are left alone
+    reads_params = [qs.SIMULATED_READS, qs.LEFT_SIMULATED_READS,
+                    qs.RIGHT_SIMULATED_READS]
+    return [quant_params[p] for p in reads_params if p in quant_params] + \
+        quant_method.get_quantification_inputs(quant_params)
+
+
+def _add_set_cache_state(writer, quant_method, quant_params, cache_state):
+    writer.add_comment(
+        ("Evict simulated reads and prequantification files from the page " +
+         "cache." if cache_state == "cold" else
+         "Read simulated reads and prequantification files into the page " +
+         "cache."))
+    writer.add_line("{command} {state} {paths}".format(
+        command=SET_CACHE_STATE_SCRIPT, state=cache_state,
+        paths=" ".join(_get_cache_paths(quant_method, quant_params))))
+
+
+def _add_quantification_commands(
+        writer, quant_method, quant_params, record_usage, cache_state):
+
+    if cache_state != "none":
+        with writer.section():
+            _add_set_cache_state(
+                writer, quant_method, quant_params, cache_state)
+
+    writer.add_comment(
+        "Use {method} to calculate per-transcript TPMs.".format(
+            method=quant_method))
+    quant_method.write_quantification_commands(
+        writer, record_usage, quant_params)
 
 
 def _add_quantify_transcripts(
-        writer, quant_method, quant_params, cleanup, record_usage):
+        writer, quant_method, quant_params, cleanup, record_usage,
+        usage_trials, cache_state):
 
-    # Use the specified quantification method to calculate per-transcript TPMs
+    # Use the specified quantification method to calculate per-transcript
+    # TPMs. If resource usage statistics are gathered, quantification may be
+    # repeated in several timing trials, so that the variability of resource
+    # usage can be measured.
     with writer.if_block("-n \"$QUANTIFY_TRANSCRIPTS\""):
         with writer.section():
-            writer.add_comment(
-                "Use {method} to calculate per-transcript TPMs.".format(
-                    method=quant_method))
-            quant_method.write_quantification_commands(
-                writer, record_usage, quant_params)
+            if record_usage and usage_trials > 1:
+                writer.add_comment(
+                    "Execute quantification in {n} timing trials.".format(
+                        n=usage_trials))
+                with writer.for_block("{var} in $(seq 1 {n})".format(
+                        var=ru.TRIAL_VARIABLE, n=usage_trials)):
+                    _add_quantification_commands(
+                        writer, quant_method, quant_params, record_usage,
+                        cache_state)
+            else:
+                _add_quantification_commands(
+                    writer, quant_method, quant_params, record_usage,
+                    cache_state)
 
         if cleanup:
             writer.add_comment(
@@ -93,26 +172,75 @@ def _add_calc_uniq_seq_length(writer, quantifier_dir, transcript_gtf_file):
                 unique_seq_file=unique_seq_file))
 
 
-def _add_assemble_quant_data(writer, quantifier_dir, fs_pro_file, quant_method):
+def _add_calc_transcript_composition(
+        writer, quantifier_dir, transcript_gtf_file, genome_fasta_dir):
+    # Calculate the GC and homopolymer content of each transcript's sequence
+    # and write to a file.
+    writer.add_comment(
+        "Calculate the sequence composition of each transcript.")
+
+    composition_file = _get_transcript_composition_file(quantifier_dir)
+    with writer.if_block("! -f " + composition_file):
+        writer.add_line(
+            ("{command} {transcript_gtf} {genome_fasta_dir} > " +
+             "{composition_file}").format(
+                command=TRANSCRIPT_COMPOSITION_SCRIPT,
+                transcript_gtf=transcript_gtf_file,
+                genome_fasta_dir=genome_fasta_dir,
+                composition_file=composition_file))
+
+
+def _add_calc_unique_kmers(
+        writer, quantifier_dir, transcript_gtf_file, genome_fasta_dir,
+        kmer_length):
+    # Calculate the number of k-mers of each transcript which occur in no
+    # other transcript and write to a file.
+    writer.add_comment(
+        "Calculate the number of k-mers unique to each transcript.")
+
+    unique_kmers_file = _get_unique_kmers_file(quantifier_dir, kmer_length)
+    with writer.if_block("! -f " + unique_kmers_file):
+        writer.add_line(
+            ("{command} --kmer-length={kmer_length} {transcript_gtf} " +
+             "{genome_fasta_dir} > {unique_kmers_file}").format(
+                command=UNIQUE_KMERS_SCRIPT,
+                kmer_length=kmer_length,
+                transcript_gtf=transcript_gtf_file,
+                genome_fasta_dir=genome_fasta_dir,
+                unique_kmers_file=unique_kmers_file))
+
+
+def _add_assemble_quant_data(
+        writer, quantifier_dir, fs_pro_file, quant_method, kmer_length,
+        write_csv):
+
     # Now assemble data required for analysis of quantification performance
-    # into one file
+    # into one TPM store (and, optionally, a CSV file)
     writer.add_comment(
         "Assemble data required for analysis of quantification performance " +
-        "into one file")
+        "into one TPM store")
 
     writer.add_line(
-        ("{command} --method={method} --out={out_file} {fs_pro_file} " +
-         "{counts_file} {unique_seq_file}").format(
+        ("{command} --method={method} --store={store} " +
+         "--annotation-dir={quantifier_dir} {csv_spec}{fs_pro_file} " +
+         "{counts_file} {unique_seq_file} {composition_file} " +
+         "{unique_kmers_file}").format(
             command=ASSEMBLE_DATA_SCRIPT,
             method=quant_method,
-            out_file=TPMS_FILE,
+            store=TPMS_STORE,
+            quantifier_dir=quantifier_dir,
+            csv_spec="--out={f} ".format(f=TPMS_FILE) if write_csv else "",
             fs_pro_file=fs_pro_file,
             counts_file=_get_transcript_counts_file(quantifier_dir),
-            unique_seq_file=_get_unique_sequence_file(quantifier_dir)))
+            unique_seq_file=_get_unique_sequence_file(quantifier_dir),
+            composition_file=_get_transcript_composition_file(
+                quantifier_dir),
+            unique_kmers_file=_get_unique_kmers_file(
+                quantifier_dir, kmer_length)))
 
 
 def _add_analyse_quant_results(
-        writer, run_dir, record_usage, options, **mqr_options):
+        writer, reads_dir, run_dir, record_usage, options, **mqr_options):
 
     # Finally perform analysis on the calculated TPMs
     writer.add_comment("Perform analysis on calculated TPMs.")
@@ -136,23 +264,30 @@ def _add_analyse_quant_results(
     resource_usage_spec = ""
     if record_usage:
         resource_usage_spec = \
-            "--prequant-usage-file={pquf} --quant-usage-file={quf}".format(
-                pquf=prequant_usage_file_name, quf=quant_usage_file_name)
+            ("--prequant-usage-file={pquf} --quant-usage-file={quf} " +
+             "--num-reads-file={nrf}").format(
+                pquf=prequant_usage_file_name, quf=quant_usage_file_name,
+                nrf=os.path.join(reads_dir, fs.NUM_READS_FILE))
 
     writer.add_line(
         ("{command} --plot-format={format} " +
          "--grouped-threshold={gp_threshold} " +
          "--error-fraction-threshold={ef_threshold} " +
          "--not-present-cutoff={cutoff} " +
-         "{ru_spec} {mqr_options_spec} {tpms_file} " +
+         "--bootstrap={resamples} --analysis-processes={processes} " +
+         "{sweep_spec}{ru_spec} {mqr_options_spec} {tpms_file} " +
          "{output_basename}").format(
             command=ANALYSE_DATA_SCRIPT,
-            format=options[po.PLOT_FORMAT.name],
+            format=",".join(options[po.PLOT_FORMAT.name]),
             gp_threshold=options[po.GROUPED_THRESHOLD.name],
             ef_threshold=options[po.ERROR_FRACTION_THRESHOLD.name],
             cutoff=options[po.NOT_PRESENT_CUTOFF.name],
+            resamples=_get_option_value(options, po.BOOTSTRAP_RESAMPLES),
+            processes=_get_option_value(options, po.ANALYSIS_PROCESSES),
+            sweep_spec="--threshold-sweep "
+            if options.get(po.THRESHOLD_SWEEP.name) else "",
             ru_spec=resource_usage_spec, mqr_options_spec=mqr_options_spec,
-            tpms_file=TPMS_FILE, output_basename=run_name))
+            tpms_file=TPMS_STORE, output_basename=run_name))
 
     if record_usage:
         writer.add_line("rm -f " + prequant_usage_file_name)
@@ -181,10 +316,19 @@ def _add_process_command_line_options(writer):
                 writer.add_line("echo \"Invalid option: -$OPTARG\" >&2")
 
 
+def _add_set_usage_sample_interval(writer, usage_interval):
+    # Set the interval at which the resource usage of prequantification and
+    # quantification commands is sampled, and the default timing trial number
+    writer.add_comment(
+        "Set the interval in seconds at which resource usage is sampled.")
+    writer.set_variable(ru.SAMPLE_INTERVAL_VARIABLE, usage_interval)
+    writer.set_variable(ru.TRIAL_VARIABLE, 1)
+
+
 def _add_analyse_results(
-        writer, reads_dir, run_dir, quantifier_dir, record_usage, options,
-        quant_method, read_length, read_depth, paired_end, errors,
-        bias, stranded, noise_perc):
+        writer, reads_dir, run_dir, quantifier_dir, record_usage, num_threads,
+        options, quant_method, read_length, read_depth, paired_end, errors,
+        bias, stranded, noise_perc, kmer_length):
 
     fs_pro_file = os.path.join(
         reads_dir, fs.get_expression_profile_file(fs.MAIN_TRANSCRIPTS))
@@ -192,13 +336,15 @@ def _add_analyse_results(
     with writer.if_block("-n \"$ANALYSE_RESULTS\""):
         with writer.section():
             _add_assemble_quant_data(
-                writer, quantifier_dir, fs_pro_file, quant_method)
+                writer, quantifier_dir, fs_pro_file, quant_method,
+                kmer_length, options.get(po.TPM_CSV.name, False))
         _add_analyse_quant_results(
-            writer, run_dir, record_usage, options,
+            writer, reads_dir, run_dir, record_usage, options,
             quant_method=quant_method,
             read_length=read_length, read_depth=read_depth,
             paired_end=paired_end, errors=errors, bias=bias,
-            stranded=stranded, noise_perc=noise_perc)
+            stranded=stranded, noise_perc=noise_perc,
+            num_threads=num_threads)
 
 
 def _get_quant_params(reads_dir, quantifier_dir, transcript_gtf, genome_fasta,
@@ -232,7 +378,9 @@ def write_script(
         quant_method=None, read_length=50, read_depth=10,
         paired_end=False, errors=False, bias=False,
         stranded=False, noise_perc=0,
-        transcript_gtf=None, genome_fasta=None, num_threads=1):
+        transcript_gtf=None, genome_fasta=None, num_threads=1,
+        usage_interval=1, usage_trials=1, cache_state="none",
+        kmer_length=31):
 
     os.mkdir(run_dir)
 
@@ -241,6 +389,12 @@ def write_script(
         with writer.section():
             _add_process_command_line_options(writer)
 
+        record_usage = not options[po.NO_USAGE.name]
+
+        if record_usage:
+            with writer.section():
+                _add_set_usage_sample_interval(writer, usage_interval)
+
         quantifier_dir = os.path.join(
             options[po.QUANT_OUTPUT_DIR.name],
             "quantifier_scratch")
@@ -249,19 +403,19 @@ def write_script(
             reads_dir, quantifier_dir, transcript_gtf, genome_fasta,
             num_threads, paired_end, errors, stranded)
 
-        record_usage = not options[po.NO_USAGE.name]
-
         with writer.section():
             _add_run_prequantification(
                 writer, quant_method, quant_params,
-                quantifier_dir, transcript_gtf, record_usage)
+                quantifier_dir, transcript_gtf, genome_fasta, kmer_length,
+                record_usage)
 
         with writer.section():
             cleanup = not options[po.NO_CLEANUP.name]
             _add_quantify_transcripts(
-                writer, quant_method, quant_params, cleanup, record_usage)
+                writer, quant_method, quant_params, cleanup, record_usage,
+                usage_trials, cache_state)
 
         _add_analyse_results(
-            writer, reads_dir, run_dir, quantifier_dir, record_usage, options,
-            quant_method, read_length, read_depth, paired_end, errors,
-            bias, stranded, noise_perc)
+            writer, reads_dir, run_dir, quantifier_dir, record_usage,
+            num_threads, options, quant_method, read_length, read_depth,
+            paired_end, errors, bias, stranded, noise_perc, kmer_length)
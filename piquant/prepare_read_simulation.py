@@ -5,10 +5,14 @@ from . import flux_simulator as fs
 
 RUN_SCRIPT = "run_simulation.sh"
 
+FLUX_SIMULATOR = "flux_simulator"
+NUMPY_SIMULATOR = "numpy"
+
 CALC_READ_DEPTH_SCRIPT = "calculate_reads_for_depth"
 SIMULATE_BIAS_SCRIPT = "simulate_read_bias"
 FIX_ANTISENSE_READS_SCRIPT = "fix_antisense_reads"
 RANDOMISE_READ_STRANDS_SCRIPT = "randomise_read_strands"
+SIMULATE_READS_SCRIPT = "simulate_reads"
 BIAS_PWM_FILE = "bias_motif.pwm"
 
 TMP_READS_FILE = "reads.tmp"
@@ -16,24 +20,113 @@ TMP_LEFT_READS_FILE = "lr.tmp"
 TMP_RIGHT_READS_FILE = "rr.tmp"
 
 
-def _add_create_fs_temp_dir(writer):
-    writer.add_comment("Create temporary directory for FluxSimulator")
-    writer.add_line("mkdir " + fs.TEMPORARY_DIRECTORY)
+_SIMULATORS = {}
 
 
-def _add_create_expression_profile(writer, transcript_set):
-    writer.add_line(
-        "flux-simulator -t simulator -x -p " +
-        fs.get_expression_params_file(transcript_set))
+def get_read_simulators():
+    return _SIMULATORS
+
+
+def _simulator(cls):
+    _SIMULATORS[cls.get_name()] = cls()
+    return cls
+
+
+class _SimulatorBase(object):
+    # A read simulator creates expression profiles and simulates reads from
+    # them, as directed by the FluxSimulator parameters files written to each
+    # read simulation directory, writing FluxSimulator-format .pro and
+    # FASTA/Q reads files.
+    @classmethod
+    def get_name(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def get_title(cls):
+        raise NotImplementedError
+
+    def add_setup_commands(self, writer):
+        pass
+
+    def add_create_expression_profile(self, writer, transcript_set):
+        raise NotImplementedError
+
+    def add_simulate_reads(self, writer, transcript_set):
+        raise NotImplementedError
+
+    def add_teardown_commands(self, writer):
+        pass
+
+    def get_intermediate_files(self):
+        return []
+
+
+@_simulator
+class _FluxSimulator(_SimulatorBase):
+    @classmethod
+    def get_name(cls):
+        return FLUX_SIMULATOR
+
+    @classmethod
+    def get_title(cls):
+        return "Flux Simulator"
+
+    def add_setup_commands(self, writer):
+        writer.add_comment("Create temporary directory for FluxSimulator")
+        writer.add_line("mkdir " + fs.TEMPORARY_DIRECTORY)
+
+    def add_create_expression_profile(self, writer, transcript_set):
+        writer.add_line(
+            "flux-simulator -t simulator -x -p " +
+            fs.get_expression_params_file(transcript_set))
+
+    def add_simulate_reads(self, writer, transcript_set):
+        writer.add_line(
+            "flux-simulator -t simulator -l -s -p " +
+            fs.get_simulation_params_file(transcript_set))
+
+    def add_teardown_commands(self, writer):
+        # I can't see why we'd ever want to retain FluxSimulator's temporary
+        # files, but if that became necessary, these lines could be moved to
+        # _add_cleanup_intermediate_files()
+        writer.add_line("rm -rf " + fs.TEMPORARY_DIRECTORY)
 
+    def get_intermediate_files(self):
+        return ["*.lib", "*.bed"]
 
-def _add_create_expression_profiles(writer, noise_perc):
+
+@_simulator
+class _NumpySimulator(_SimulatorBase):
+    @classmethod
+    def get_name(cls):
+        return NUMPY_SIMULATOR
+
+    @classmethod
+    def get_title(cls):
+        return "piquant's built-in simulator"
+
+    def add_create_expression_profile(self, writer, transcript_set):
+        writer.add_line(
+            "{command} --expression {params_file}".format(
+                command=SIMULATE_READS_SCRIPT,
+                params_file=fs.get_expression_params_file(transcript_set)))
+
+    def add_simulate_reads(self, writer, transcript_set):
+        writer.add_line(
+            "{command} --sequence {params_file}".format(
+                command=SIMULATE_READS_SCRIPT,
+                params_file=fs.get_simulation_params_file(transcript_set)))
+
+
+def _add_create_expression_profiles(writer, simulator, noise_perc):
     writer.add_comment(
-        "First run Flux Simulator to create expression profiles.")
-    _add_create_expression_profile(writer, fs.MAIN_TRANSCRIPTS)
+        "First run {s} to create expression profiles.".format(
+            s=simulator.get_title()))
+    simulator.add_create_expression_profile(writer, fs.MAIN_TRANSCRIPTS)
 
     if noise_perc != 0:
-        _add_create_expression_profile(writer, fs.NOISE_TRANSCRIPTS)
+        simulator.add_create_expression_profile(
+            writer, fs.NOISE_TRANSCRIPTS)
 
 
 def _get_read_number_variable(final, transcript_set=None):
@@ -114,24 +207,16 @@ def _add_update_fs_params(writer, noise_perc):
             writer, fs.NOISE_TRANSCRIPTS)
 
 
-def _add_simulate_reads(writer, transcript_set):
-    writer.add_line(
-        "flux-simulator -t simulator -l -s -p " +
-        fs.get_simulation_params_file(transcript_set))
-
-
-def _add_simulate_reads_lines(writer, noise_perc):
-    # Now use Flux Simulator to simulate reads
-    writer.add_comment("Now use Flux Simulator to simulate reads.")
-    _add_simulate_reads(writer, fs.MAIN_TRANSCRIPTS)
+def _add_simulate_reads_lines(writer, simulator, noise_perc):
+    # Now use the read simulator to simulate reads
+    writer.add_comment("Now use {s} to simulate reads.".format(
+        s=simulator.get_title()))
+    simulator.add_simulate_reads(writer, fs.MAIN_TRANSCRIPTS)
 
     if noise_perc != 0:
-        _add_simulate_reads(writer, fs.NOISE_TRANSCRIPTS)
+        simulator.add_simulate_reads(writer, fs.NOISE_TRANSCRIPTS)
 
-    # I can't see why we'd ever want to retain FluxSimulator's temporary files,
-    # but if that became necessary, these lines could be moved to
-    # _add_cleanup_intermediate_files()
-    writer.add_line("rm -rf " + fs.TEMPORARY_DIRECTORY)
+    simulator.add_teardown_commands(writer)
 
 
 def _add_check_num_reads(
@@ -214,7 +299,7 @@ def _add_shuffle_simulated_reads(writer, paired_end, errors):
 
     writer.add_comment(
         "Some isoform quantifiers require reads to be presented in a " +
-        "random order, hence we shuffle the reads output by Flux Simulator.")
+        "random order, hence we shuffle the reads output by the simulator.")
 
     reads_file = fs.get_reads_file(errors, intermediate=True)
     writer.add_pipe(
@@ -303,7 +388,7 @@ def _create_final_reads_files(writer, paired_end, errors):
         # If we've specified paired end reads, split the FASTA/Q file output by
         # Flux Simulator into separate files for forward and reverse reads
         writer.add_comment(
-            "We've produced paired-end reads - split the Flux Simulator " +
+            "We've produced paired-end reads - split the simulator " +
             "output into files containing left and right reads.")
 
         writer.add_pipe(
@@ -335,14 +420,31 @@ def _create_final_reads_files(writer, paired_end, errors):
             reads_file=fs.get_reads_file(errors)))
 
 
+def _add_record_num_reads(writer, paired_end, errors):
+    # Record the number of reads (or read pairs) that were finally produced,
+    # so that the throughput of quantification methods can be calculated
+    lines_per_read = 4 if errors else 2
+    reads_file = fs.get_reads_file(
+        errors, paired_end=(fs.LEFT_READS if paired_end else None))
+
+    writer.add_comment(
+        "Record the number of " + ("read pairs" if paired_end else "reads") +
+        " produced.")
+    writer.add_line(
+        ("echo \"$(wc -l {reads_file} | awk '{{print $1}}') / " +
+         "{lines_per_read}\" | bc > {num_reads_file}").format(
+            reads_file=reads_file, lines_per_read=lines_per_read,
+            num_reads_file=fs.NUM_READS_FILE))
+
+
 def _add_create_reads(
-        writer, read_length, read_depth, paired_end,
+        writer, simulator, read_length, read_depth, paired_end,
         errors, bias, stranded, noise_perc):
 
     with writer.section():
-        _add_create_fs_temp_dir(writer)
+        simulator.add_setup_commands(writer)
     with writer.section():
-        _add_create_expression_profiles(writer, noise_perc)
+        _add_create_expression_profiles(writer, simulator, noise_perc)
 
     _add_calc_required_read_depths(
         writer, read_length, read_depth, bias, noise_perc)
@@ -350,7 +452,7 @@ def _add_create_reads(
     with writer.section():
         _add_update_fs_params(writer, noise_perc)
     with writer.section():
-        _add_simulate_reads_lines(writer, noise_perc)
+        _add_simulate_reads_lines(writer, simulator, noise_perc)
 
     _add_num_read_checks(writer, errors, noise_perc)
 
@@ -373,14 +475,20 @@ def _add_create_reads(
 
     with writer.section():
         _create_final_reads_files(writer, paired_end, errors)
+    with writer.section():
+        _add_record_num_reads(writer, paired_end, errors)
+
 
+def _add_cleanup_intermediate_files(writer, simulator):
+    intermediate_files = simulator.get_intermediate_files()
+    if not intermediate_files:
+        return
 
-def _add_cleanup_intermediate_files(writer):
     with writer.section():
         writer.add_comment(
             "Remove intermediate files not necessary for quantification.")
-        writer.add_line("rm *.lib")
-        writer.add_line("rm *.bed")
+        for intermediate_file in intermediate_files:
+            writer.add_line("rm " + intermediate_file)
 
 
 def _create_fs_param_files(
@@ -396,28 +504,30 @@ def _create_fs_param_files(
 
 
 def _write_read_simulation_script(
-        reads_dir, read_length, read_depth, paired_end,
+        reads_dir, simulator, read_length, read_depth, paired_end,
         errors, bias, stranded, noise_perc, cleanup):
 
     with fw.writing_to_file(
             fw.BashScriptWriter, reads_dir, RUN_SCRIPT) as writer:
 
-        _add_create_reads(writer, read_length, read_depth,
+        _add_create_reads(writer, simulator, read_length, read_depth,
                           paired_end, errors, bias, stranded, noise_perc)
 
         if cleanup:
-            _add_cleanup_intermediate_files(writer)
+            _add_cleanup_intermediate_files(writer, simulator)
 
 
 def create_simulation_files(
         reads_dir, cleanup, read_length=30, read_depth=10,
         paired_end=False, errors=False, bias=False, stranded=False,
         noise_perc=0, transcript_gtf=None, noise_transcript_gtf=None,
-        genome_fasta=None, num_molecules=30000000, num_noise_molecules=2000000):
+        genome_fasta=None, num_molecules=30000000, num_noise_molecules=2000000,
+        simulator=FLUX_SIMULATOR):
 
     os.mkdir(reads_dir)
 
-    # Write Flux Simulator parameters files
+    # Write Flux Simulator parameters files; these also direct piquant's
+    # built-in read simulator
     _create_fs_param_files(
         reads_dir, transcript_gtf, genome_fasta,
         num_molecules, read_length, paired_end, errors,
@@ -425,5 +535,5 @@ def create_simulation_files(
 
     # Write shell script to run read simulation
     _write_read_simulation_script(
-        reads_dir, read_length, read_depth, paired_end,
+        reads_dir, _SIMULATORS[simulator], read_length, read_depth, paired_end,
         errors, bias, stranded, noise_perc, cleanup)
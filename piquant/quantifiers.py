@@ -38,6 +38,13 @@ class _QuantifierBase(object):
     def __str__(self):
         return self.__class__.get_name()
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        # Return the files and directories, other than the simulated reads,
+        # that are read by quantification commands; paths may contain shell
+        # wildcards
+        raise NotImplementedError
+
     @classmethod
     def _add_timed_line(cls, writer, record_usage, resource_type, line):
         writer.add_line(
@@ -141,6 +148,14 @@ class _Cufflinks(_QuantifierBase):
                     cls.CONSTRUCT_BOWTIE_REF_FASTA.format(
                         bowtie_index=bowtie_index))
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        # TopHat reads the bowtie index, and Cufflinks the genome sequence
+        # reconstructed from it, which is written alongside the index
+        return [os.path.dirname(
+            cls._get_bowtie_index(params[QUANTIFIER_DIRECTORY])),
+            params[TRANSCRIPT_GTF_FILE]]
+
     @classmethod
     def write_quantification_commands(cls, writer, record_usage, params):
         bowtie_index = cls._get_bowtie_index(params[QUANTIFIER_DIRECTORY])
@@ -202,6 +217,9 @@ class _TranscriptomeBasedQuantifierBase(_QuantifierBase):
     PREPARE_TRANSCRIPT_REF = \
         "rsem-prepare-reference --gtf {transcript_gtf} " + \
         "{bowtie_spec} {genome_fasta_dir} {ref_name}"
+    EXTRACT_TRANSCRIPT_SEQUENCES = \
+        "extract_transcript_sequences --processes={num_threads} " + \
+        "{transcript_gtf} {genome_fasta_dir} {ref_name}.transcripts.fa"
 
     @classmethod
     def _get_ref_name(cls, quantifier_dir):
@@ -211,14 +229,36 @@ class _TranscriptomeBasedQuantifierBase(_QuantifierBase):
     @classmethod
     def write_preparatory_commands(cls, writer, record_usage, params):
         with writer.section():
-            writer.add_comment(
-                "Prepare the transcript reference if it doesn't already " +
-                "exist. We create the transcript reference using a tool " +
-                "from the RSEM package. Note that this step only needs to " +
-                "be done once for a particular set of transcripts.")
-
             ref_name = cls._get_ref_name(params[QUANTIFIER_DIRECTORY])
-            bowtie_spec = "--bowtie" if cls._needs_bowtie_index() else ""
+
+            if cls._needs_rsem_reference():
+                writer.add_comment(
+                    "Prepare the transcript reference if it doesn't " +
+                    "already exist. We create the transcript reference " +
+                    "using a tool from the RSEM package. Note that this " +
+                    "step only needs to be done once for a particular set " +
+                    "of transcripts.")
+
+                prepare_command = cls.PREPARE_TRANSCRIPT_REF.format(
+                    transcript_gtf=params[TRANSCRIPT_GTF_FILE],
+                    genome_fasta_dir=params[GENOME_FASTA_DIR],
+                    ref_name=ref_name,
+                    bowtie_spec="--bowtie" if cls._needs_bowtie_index()
+                    else "")
+            else:
+                writer.add_comment(
+                    "Extract transcript sequences if they don't already " +
+                    "exist. Only transcript sequences are needed, so these " +
+                    "are extracted directly from the genome rather than " +
+                    "by preparing an RSEM reference. Note that this step " +
+                    "only needs to be done once for a particular set of " +
+                    "transcripts.")
+
+                prepare_command = cls.EXTRACT_TRANSCRIPT_SEQUENCES.format(
+                    transcript_gtf=params[TRANSCRIPT_GTF_FILE],
+                    genome_fasta_dir=params[GENOME_FASTA_DIR],
+                    ref_name=ref_name,
+                    num_threads=params[NUM_THREADS])
 
             writer.add_line(
                 cls.CALC_TRANSCRIPT_REF_DIR.format(
@@ -228,12 +268,13 @@ class _TranscriptomeBasedQuantifierBase(_QuantifierBase):
                     cls.TRANSCRIPT_REF_DIR_EXISTS):
                 writer.add_line(cls.MAKE_TRANSCRIPT_REF_DIR)
                 cls._add_timed_prequantification_command(
-                    writer, record_usage,
-                    cls.PREPARE_TRANSCRIPT_REF.format(
-                        transcript_gtf=params[TRANSCRIPT_GTF_FILE],
-                        genome_fasta_dir=params[GENOME_FASTA_DIR],
-                        ref_name=ref_name,
-                        bowtie_spec=bowtie_spec))
+                    writer, record_usage, prepare_command)
+
+    @classmethod
+    def _needs_rsem_reference(cls):
+        # Quantifiers which only index transcript sequences do not need a
+        # full RSEM reference to be prepared
+        return True
 
     @classmethod
     def _needs_bowtie_index(cls):
@@ -259,6 +300,11 @@ class _RSEM(_TranscriptomeBasedQuantifierBase):
     def _needs_bowtie_index(cls):
         return True
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        # RSEM reads the transcript reference files and their bowtie index
+        return [cls._get_ref_name(params[QUANTIFIER_DIRECTORY]) + ".*"]
+
     @classmethod
     def write_quantification_commands(cls, writer, record_usage, params):
         qualities_spec = "" if params[FASTQ_READS] else "--no-qualities"
@@ -318,6 +364,13 @@ class _Express(_TranscriptomeBasedQuantifierBase):
     def _needs_bowtie_index(cls):
         return True
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        # Reads are mapped with the bowtie index of the transcript reference,
+        # and eXpress reads the transcript sequences
+        ref_name = cls._get_ref_name(params[QUANTIFIER_DIRECTORY])
+        return [ref_name + ".*.ebwt", ref_name + ".transcripts.fa"]
+
     @classmethod
     def write_quantification_commands(cls, writer, record_usage, params):
         ref_name = cls._get_ref_name(params[QUANTIFIER_DIRECTORY])
@@ -388,6 +441,10 @@ class _Sailfish(_TranscriptomeBasedQuantifierBase):
     def get_name(cls):
         return "Sailfish"
 
+    @classmethod
+    def _needs_rsem_reference(cls):
+        return False
+
     @classmethod
     def _needs_bowtie_index(cls):
         return False
@@ -398,8 +455,7 @@ class _Sailfish(_TranscriptomeBasedQuantifierBase):
 
     @classmethod
     def write_preparatory_commands(cls, writer, record_usage, params):
-        # For convenience, we use a tool from the RSEM package to create the
-        # transcript reference
+        # Extract transcript sequences from which to create the index
         super(_Sailfish, cls).write_preparatory_commands(
             writer, record_usage, params)
 
@@ -417,6 +473,10 @@ class _Sailfish(_TranscriptomeBasedQuantifierBase):
                     ref_name=ref_name, index_dir=index_dir,
                     num_threads=params[NUM_THREADS]))
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        return [cls._get_index_dir(params[QUANTIFIER_DIRECTORY])]
+
     @classmethod
     def write_quantification_commands(cls, writer, record_usage, params):
         index_dir = cls._get_index_dir(params[QUANTIFIER_DIRECTORY])
@@ -476,6 +536,10 @@ class _Salmon(_TranscriptomeBasedQuantifierBase):
     def get_name(cls):
         return "Salmon"
 
+    @classmethod
+    def _needs_rsem_reference(cls):
+        return False
+
     @classmethod
     def _needs_bowtie_index(cls):
         return False
@@ -486,8 +550,7 @@ class _Salmon(_TranscriptomeBasedQuantifierBase):
 
     @classmethod
     def write_preparatory_commands(cls, writer, record_usage, params):
-        # We again use a tool from the RSEM package to create the transcript
-        # reference sequences
+        # Extract transcript sequences from which to create the index
         super(_Salmon, cls).write_preparatory_commands(
             writer, record_usage, params)
 
@@ -504,6 +567,10 @@ class _Salmon(_TranscriptomeBasedQuantifierBase):
                     cls.CREATE_SALMON_TRANSCRIPT_INDEX.format(
                         ref_name=ref_name, index_dir=index_dir))
 
+    @classmethod
+    def get_quantification_inputs(cls, params):
+        return [cls._get_index_dir(params[QUANTIFIER_DIRECTORY])]
+
     @classmethod
     def write_quantification_commands(cls, writer, record_usage, params):
         index_dir = cls._get_index_dir(params[QUANTIFIER_DIRECTORY])
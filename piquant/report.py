@@ -0,0 +1,500 @@
+"""
+Functions for writing a self-contained HTML report of the statistics
+calculated for a set of quantification runs. Exports:
+
+get_report_tables: Gather statistics tables for inclusion in a report.
+write_html_report: Write a self-contained HTML report of statistics tables.
+
+Statistics are embedded in the report as compact, column-oriented JSON, and
+graphs of them are drawn in the browser when the report is viewed, so that
+the size of the report and the time taken to write it depend only on the
+amount of statistical data, not on the number of graphs that may be drawn
+from it.
+"""
+
+import json
+import numpy as np
+import os.path
+import pandas as pd
+
+from . import classifiers
+from . import piquant_options as po
+from . import resource_usage as ru
+from . import statistics
+from . import tpms as t
+from .__init__ import __version__
+
+REPORT_FILE = "report.html"
+
+_DATA_PLACEHOLDER = "%REPORT_DATA%"
+_VERSION_PLACEHOLDER = "%PIQUANT_VERSION%"
+
+
+def _get_mqr_options(stats):
+    options = [o for o in po.get_multiple_quant_run_options()
+               if o.name in stats.columns]
+    return sorted(options, key=lambda o: o.index)
+
+
+def _get_column_values(values):
+    # Numeric values are rounded as in statistics CSV files, with missing
+    # values represented as null; other values are recorded as strings.
+    if values.dtype.kind in "iuf":
+        return [None if np.isnan(v) else round(float(v), 5) for v in values]
+    return [str(v) for v in values]
+
+
+def _get_table(title, stats, x_columns, y_columns):
+    options = _get_mqr_options(stats)
+    columns = [o.name for o in options] + \
+        [c for c, _ in x_columns] + [c for c, _ in y_columns]
+
+    return {
+        "title": title,
+        "options": [{"name": o.name, "title": o.title} for o in options],
+        "x": [list(c) for c in x_columns],
+        "y": [list(c) for c in y_columns],
+        "data": {c: _get_column_values(stats[c].values)
+                 for c in set(columns)}
+    }
+
+
+def _read_stats(stats_file):
+    return pd.read_csv(stats_file) if os.path.exists(stats_file) else None
+
+
+def _get_numeric_option_columns(stats):
+    return [(o.name, o.get_axis_label()) for o in _get_mqr_options(stats)
+            if o.is_numeric]
+
+
+def _get_statistic_columns(stats):
+    stats_to_include = [s for s in statistics.get_graphable_statistics()
+                        if s.name in stats.columns]
+    return [(s.name, s.title)
+            for s in sorted(stats_to_include, key=lambda s: s.title)]
+
+
+def _get_overall_stats_tables(stats_dir):
+    tables = []
+    for tpm_level in [t.TRANSCRIPT, t.GENE]:
+        stats = _read_stats(statistics.get_stats_file(
+            stats_dir, statistics.OVERALL_STATS_PREFIX, tpm_level))
+        if stats is not None:
+            tables.append(_get_table(
+                "Statistics for all {l}s".format(l=tpm_level), stats,
+                _get_numeric_option_columns(stats),
+                _get_statistic_columns(stats)))
+    return tables
+
+
+def _get_grouped_stats_tables(stats_dir, grouped_threshold):
+    tables = []
+    for clsfr in classifiers.get_classifiers():
+        if not clsfr.produces_grouped_stats():
+            continue
+
+        stats = _read_stats(statistics.get_stats_file(
+            stats_dir, statistics.OVERALL_STATS_PREFIX, t.TRANSCRIPT, clsfr))
+        if stats is None:
+            continue
+
+        stats = stats[stats[statistics.TP_NUM_TPMS] > grouped_threshold]
+        tables.append(_get_table(
+            "Transcript statistics by " + clsfr.get_column_name(), stats,
+            [(clsfr.get_column_name(), clsfr.get_axis_label())],
+            _get_statistic_columns(stats)))
+    return tables
+
+
+def _get_distribution_tables(stats_dir):
+    tables = []
+    for clsfr in classifiers.get_classifiers():
+        if not clsfr.produces_distribution_plots():
+            continue
+
+        for ascending in [True, False]:
+            stats = _read_stats(statistics.get_stats_file(
+                stats_dir, statistics.OVERALL_STATS_PREFIX, t.TRANSCRIPT,
+                clsfr, ascending))
+            if stats is None:
+                continue
+
+            direction = "less" if ascending else "greater"
+            tables.append(_get_table(
+                "Percentage of transcripts with {c} {d} than threshold".
+                format(c=clsfr.get_column_name(), d=direction), stats,
+                [(clsfr.get_column_name(), clsfr.get_axis_label())],
+                [(t.NON_ZERO_PERCENTAGE, "Non-zero real TPMs (%)"),
+                 (t.TRUE_POSITIVE_PERCENTAGE, "True positive TPMs (%)")]))
+    return tables
+
+
+def _get_usage_tables(stats_dir):
+    tables = []
+    for resource_type, title in [
+            (ru.QUANT_RESOURCE_TYPE, "Quantification resource usage"),
+            (ru.PREQUANT_RESOURCE_TYPE, "Prequantification resource usage")]:
+        usage = _read_stats(ru.get_resource_usage_file(
+            resource_type, prefix=ru.OVERALL_USAGE_PREFIX,
+            directory=stats_dir))
+        if usage is None or len(usage) == 0:
+            continue
+
+        # Prequantification usage is recorded only per quantification method
+        x_columns = _get_numeric_option_columns(usage) or \
+            [(po.QUANT_METHOD.name, po.QUANT_METHOD.title)]
+
+        usage_stats = sorted([s for s in ru.get_resource_usage_statistics()
+                              if s.name in usage.columns],
+                             key=lambda s: s.name)
+        tables.append(_get_table(
+            title, usage, x_columns,
+            [(s.name, s.get_axis_label()) for s in usage_stats]))
+    return tables
+
+
+def get_report_tables(stats_dir, grouped_threshold, record_usage):
+    """
+    Gather statistics tables for inclusion in an HTML report.
+
+    Return a list of dictionaries, each describing a table of statistics read
+    from the overall statistics CSV files written to the statistics directory
+    by analyse_runs, in terms of its title, the options distinguishing
+    quantification runs, the columns which may be plotted on the x and y axes
+    of a graph, and the table's data (a dictionary mapping from column names to
+    lists of values).
+
+    stats_dir: The directory to which overall statistics files were written.
+    grouped_threshold: Groups of transcripts determined by a classifier are
+    only included if they contain more than this number of true positive
+    transcripts.
+    record_usage: If True, tables of resource usage statistics are included.
+    """
+    tables = _get_overall_stats_tables(stats_dir) + \
+        _get_grouped_stats_tables(stats_dir, grouped_threshold) + \
+        _get_distribution_tables(stats_dir)
+    if record_usage:
+        tables += _get_usage_tables(stats_dir)
+    return [table for table in tables if table["x"] and table["y"]]
+
+
+def write_html_report(report_file, tables):
+    """
+    Write a self-contained HTML report of statistics tables.
+
+    The report contains no external references; statistics are embedded as
+    JSON, and line graphs of any statistic against any numeric option or
+    classifier value, for any fixed values of the remaining options, are drawn
+    by embedded JavaScript.
+
+    report_file: The path of the HTML file to be written.
+    tables: A list of statistics tables, as returned by get_report_tables().
+    """
+    report_data = json.dumps(
+        {"tables": tables}, separators=(",", ":"), sort_keys=True)
+    # Ensure the embedded data cannot terminate the enclosing script element
+    report_data = report_data.replace("</", "<\\/")
+
+    report = _REPORT_TEMPLATE.replace(_VERSION_PLACEHOLDER, __version__).\
+        replace(_DATA_PLACEHOLDER, report_data)
+
+    with open(report_file, "w") as out_file:
+        out_file.write(report)
+
+
+_REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>piquant report</title>
+<style>
+body { font-family: sans-serif; margin: 1em 2em; color: #222; }
+#controls label, #filters label {
+  display: inline-block; margin: 0 1.5em 0.5em 0;
+}
+#filters { margin-bottom: 1em; }
+.axis { stroke: #444; }
+.grid { stroke: #ddd; }
+svg text { font-size: 12px; }
+</style>
+</head>
+<body>
+<h1>piquant report</h1>
+<p>Written by piquant %PIQUANT_VERSION%.</p>
+<div id="controls"></div>
+<div id="filters"></div>
+<svg id="chart" width="960" height="540"></svg>
+<script>
+var REPORT = %REPORT_DATA%;
+
+var SVG_NS = "http://www.w3.org/2000/svg";
+var COLOURS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+               "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"];
+var MARGIN = {left: 70, right: 230, top: 20, bottom: 50};
+var state = {};
+
+function compare(a, b) {
+  return a < b ? -1 : (a > b ? 1 : 0);
+}
+
+function distinct(values) {
+  var seen = {}, result = [];
+  values.forEach(function (v) {
+    if (v !== null && !(String(v) in seen)) {
+      seen[String(v)] = true;
+      result.push(v);
+    }
+  });
+  return result.sort(compare);
+}
+
+function currentTable() {
+  return REPORT.tables[state.table];
+}
+
+function varyingOptions(table) {
+  return table.options.filter(function (o) {
+    return o.name !== state.x && distinct(table.data[o.name]).length > 1;
+  });
+}
+
+function addSelect(parent, label, choices, selected, onChange) {
+  var element = document.createElement("label");
+  var select = document.createElement("select");
+  element.appendChild(document.createTextNode(label + ": "));
+  choices.forEach(function (choice) {
+    var option = document.createElement("option");
+    option.value = String(choice[0]);
+    option.textContent = choice[1];
+    option.selected = String(choice[0]) === String(selected);
+    select.appendChild(option);
+  });
+  select.onchange = function () { onChange(select.value); };
+  element.appendChild(select);
+  parent.appendChild(element);
+}
+
+function resetOptions() {
+  var table = currentTable();
+  var options = varyingOptions(table);
+  state.series = options.length > 0 ? options[0].name : "";
+  state.filters = {};
+  options.forEach(function (o) {
+    state.filters[o.name] = String(distinct(table.data[o.name])[0]);
+  });
+}
+
+function selectTable(index) {
+  state.table = Number(index);
+  state.x = currentTable().x[0][0];
+  state.y = currentTable().y[0][0];
+  resetOptions();
+}
+
+function renderControls() {
+  var table = currentTable();
+  var controls = document.getElementById("controls");
+  var filters = document.getElementById("filters");
+  controls.innerHTML = "";
+  filters.innerHTML = "";
+
+  addSelect(controls, "Statistics",
+            REPORT.tables.map(function (t, i) { return [i, t.title]; }),
+            state.table, function (v) { selectTable(v); render(); });
+  addSelect(controls, "Plot", table.y, state.y,
+            function (v) { state.y = v; render(); });
+  addSelect(controls, "against", table.x, state.x,
+            function (v) { state.x = v; resetOptions(); render(); });
+
+  var options = varyingOptions(table);
+  addSelect(controls, "Lines for each",
+            [["", "(none)"]].concat(options.map(function (o) {
+              return [o.name, o.title];
+            })),
+            state.series, function (v) { state.series = v; render(); });
+
+  options.forEach(function (o) {
+    if (o.name === state.series) {
+      return;
+    }
+    addSelect(filters, o.title, distinct(table.data[o.name]).map(
+      function (v) { return [v, String(v)]; }),
+      state.filters[o.name],
+      function (v) { state.filters[o.name] = v; render(); });
+  });
+}
+
+function getCategories() {
+  // Non-numeric values (e.g. quantification methods) are plotted at evenly
+  // spaced positions along the x axis.
+  var values = currentTable().data[state.x];
+  return typeof values[0] === "string" ? distinct(values) : null;
+}
+
+function getSeries(categories) {
+  var data = currentTable().data;
+  var series = {}, names = [];
+  for (var i = 0; i < data[state.x].length; i++) {
+    var x = data[state.x][i], y = data[state.y][i], selected = true;
+    for (var name in state.filters) {
+      if (name !== state.series &&
+          String(data[name][i]) !== state.filters[name]) {
+        selected = false;
+      }
+    }
+    if (!selected || x === null || y === null) {
+      continue;
+    }
+    var key = state.series ? String(data[state.series][i]) : "";
+    if (!(key in series)) {
+      series[key] = [];
+      names.push(key);
+    }
+    series[key].push([categories ? categories.indexOf(x) : x, y]);
+  }
+  names.sort(compare);
+  return names.map(function (n) {
+    return {name: n, points: series[n].sort(function (a, b) {
+      return compare(a[0], b[0]);
+    })};
+  });
+}
+
+function getTicks(min, max) {
+  var step = Math.pow(10, Math.floor(Math.log(max - min) / Math.LN10));
+  if ((max - min) / step < 3) {
+    step /= 5;
+  } else if ((max - min) / step < 6) {
+    step /= 2;
+  }
+  var ticks = [];
+  for (var tick = Math.ceil(min / step) * step; tick <= max + step * 1e-6;
+       tick += step) {
+    ticks.push(Number(tick.toPrecision(10)));
+  }
+  return ticks;
+}
+
+function getRange(values) {
+  var min = Math.min.apply(null, values), max = Math.max.apply(null, values);
+  if (min === max) {
+    return [min - 1, max + 1];
+  }
+  var padding = 0.05 * (max - min);
+  return [min - padding, max + padding];
+}
+
+function addElement(parent, name, attributes, text) {
+  var element = document.createElementNS(SVG_NS, name);
+  for (var attribute in attributes) {
+    element.setAttribute(attribute, attributes[attribute]);
+  }
+  if (text !== undefined) {
+    element.textContent = text;
+  }
+  parent.appendChild(element);
+  return element;
+}
+
+function label(columns, name) {
+  return columns.filter(function (c) { return c[0] === name; })[0][1];
+}
+
+function renderChart() {
+  var table = currentTable(), chart = document.getElementById("chart");
+  while (chart.firstChild) {
+    chart.removeChild(chart.firstChild);
+  }
+
+  var categories = getCategories();
+  var series = getSeries(categories);
+  var points = [].concat.apply(
+    [], series.map(function (s) { return s.points; }));
+  if (points.length === 0) {
+    addElement(chart, "text", {x: MARGIN.left, y: MARGIN.top + 20},
+               "No data for the selected options.");
+    return;
+  }
+
+  var width = chart.getAttribute("width") - MARGIN.left - MARGIN.right;
+  var height = chart.getAttribute("height") - MARGIN.top - MARGIN.bottom;
+  var xRange = getRange(points.map(function (p) { return p[0]; }));
+  var yRange = getRange(points.map(function (p) { return p[1]; }));
+  var xScale = function (x) {
+    return MARGIN.left + width * (x - xRange[0]) / (xRange[1] - xRange[0]);
+  };
+  var yScale = function (y) {
+    return MARGIN.top + height * (yRange[1] - y) / (yRange[1] - yRange[0]);
+  };
+
+  var xTicks = categories ? categories.map(function (c, i) { return i; })
+      : getTicks(xRange[0], xRange[1]);
+  xTicks.forEach(function (tick) {
+    addElement(chart, "line", {"class": "grid",
+                               x1: xScale(tick), x2: xScale(tick),
+                               y1: MARGIN.top, y2: MARGIN.top + height});
+    addElement(chart, "text", {x: xScale(tick), y: MARGIN.top + height + 16,
+                               "text-anchor": "middle"},
+               categories ? categories[tick] : String(tick));
+  });
+  getTicks(yRange[0], yRange[1]).forEach(function (tick) {
+    addElement(chart, "line", {"class": "grid",
+                               x1: MARGIN.left, x2: MARGIN.left + width,
+                               y1: yScale(tick), y2: yScale(tick)});
+    addElement(chart, "text", {x: MARGIN.left - 6, y: yScale(tick) + 4,
+                               "text-anchor": "end"}, String(tick));
+  });
+  addElement(chart, "rect", {x: MARGIN.left, y: MARGIN.top, width: width,
+                             height: height, fill: "none", "class": "axis"});
+  addElement(chart, "text", {x: MARGIN.left + width / 2,
+                             y: MARGIN.top + height + 40,
+                             "text-anchor": "middle"}, label(table.x, state.x));
+  addElement(chart, "text", {x: 0, y: 0, "text-anchor": "middle",
+                             transform: "translate(16," +
+                               (MARGIN.top + height / 2) + ") rotate(-90)"},
+             label(table.y, state.y));
+
+  series.forEach(function (s, i) {
+    var colour = COLOURS[i % COLOURS.length];
+    if (!categories) {
+      addElement(chart, "polyline", {
+        fill: "none", stroke: colour, "stroke-width": 2,
+        points: s.points.map(function (p) {
+          return xScale(p[0]) + "," + yScale(p[1]);
+        }).join(" ")});
+    }
+    s.points.forEach(function (p) {
+      addElement(chart, "circle", {cx: xScale(p[0]), cy: yScale(p[1]), r: 3,
+                                   fill: colour}).appendChild(
+        document.createElementNS(SVG_NS, "title")).textContent =
+        (s.name ? s.name + ": " : "") +
+        (categories ? categories[p[0]] : p[0]) + ", " + p[1];
+    });
+    if (s.name) {
+      var legendY = MARGIN.top + 10 + 18 * i;
+      addElement(chart, "line", {x1: MARGIN.left + width + 15,
+                                 x2: MARGIN.left + width + 35,
+                                 y1: legendY, y2: legendY, stroke: colour,
+                                 "stroke-width": 2});
+      addElement(chart, "text", {x: MARGIN.left + width + 40, y: legendY + 4},
+                 s.name);
+    }
+  });
+}
+
+function render() {
+  renderControls();
+  renderChart();
+}
+
+if (REPORT.tables.length > 0) {
+  selectTable(0);
+  render();
+} else {
+  document.getElementById("controls").textContent = "No statistics available.";
+}
+</script>
+</body>
+</html>
+"""
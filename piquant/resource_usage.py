@@ -7,15 +7,44 @@ QUANT_RESOURCE_TYPE = "quant_usage"
 OVERALL_USAGE_PREFIX = "overall"
 TIME_USAGE_TYPE = "time"
 MEMORY_USAGE_TYPE = "memory"
+IO_USAGE_TYPE = "io"
+EFFICIENCY_USAGE_TYPE = "efficiency"
+SCALING_USAGE_TYPE = "scaling"
+
+COMMAND = "command"
+STEP = "step"
+STEP_NAME = "step-name"
+START_TIME = "start"
+END_TIME = "end"
+TRIAL = "trial"
+TRIALS = "trials"
+
+MONITOR_SCRIPT = "monitor_resource_usage"
+SAMPLE_INTERVAL_VARIABLE = "USAGE_SAMPLE_INTERVAL"
+TRIAL_VARIABLE = "USAGE_TRIAL"
+
+_MIN_SUFFIX = "-min"
+_IQR_SUFFIX = "-iqr"
+# Quartiles of values over repeated timing trials are named as for the bounds
+# of bootstrap confidence intervals (see statistics.get_interval_columns), so
+# that the interquartile range is drawn as error bars on graphs
+_LOWER_QUARTILE_SUFFIX = "-lower"
+_UPPER_QUARTILE_SUFFIX = "-upper"
+
+TIMESERIES_COLUMNS = [
+    "command", "time", "memory", "cpu-time", "cpu-utilisation",
+    "processes", "threads", "read-bytes", "write-bytes"]
+PROCESSES_COLUMNS = [
+    "command", "pid", "name", "start", "end", "max-memory", "max-threads",
+    "cpu-time", "cpu-utilisation", "read-bytes", "write-bytes",
+    "read-syscalls", "write-syscalls"]
 
 
 class _ResourceUsageStatistic(object):
-    def __init__(self, name, usage_type, title,
-                 format_string, units, value_extractor):
+    def __init__(self, name, usage_type, title, units, value_extractor):
         self.name = name
         self.usage_type = usage_type
         self.title = title
-        self.format_string = format_string
         self.units = units
         self.value_extractor = value_extractor
 
@@ -30,31 +59,113 @@ class _ResourceUsageStatistic(object):
         return "{t} ({u})".format(t=self.title, u=self.units)
 
 
+def _log10_total(values):
+    # Times are recorded to a resolution of 0.01s, so very short commands may
+    # have been recorded as taking no time at all
+    return math.log10(max(values.sum(), 0.01))
+
+
+def _sum_if_recorded(values, scale):
+    # I/O usage is not recorded in resource usage files written by older
+    # versions of piquant
+    if not values.notnull().any():
+        return float("nan")
+    return values.sum() / scale
+
+
 _RESOURCE_USAGE_STATS = []
 
 _RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
     "real-time", TIME_USAGE_TYPE,
-    "Log10 total elapsed real time", "%e", "s",
-    lambda x: math.log10(x.sum())))
+    "Log10 total elapsed real time", "s",
+    _log10_total))
 
 _RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
     "user-time", TIME_USAGE_TYPE,
-    "Log10 total user mode time", "%U", "s",
-    lambda x: math.log10(x.sum())))
+    "Log10 total user mode time", "s",
+    _log10_total))
 
 _RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
     "sys-time", TIME_USAGE_TYPE,
-    "Log10 total kernel mode time", "%S", "s",
-    lambda x: math.log10(x.sum())))
+    "Log10 total kernel mode time", "s",
+    _log10_total))
 
 _RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
     "max-memory", MEMORY_USAGE_TYPE,
-    "Maximum resident memory", "%M", "Gb",
+    "Maximum resident memory", "Gb",
     lambda x: x.max() / 1048576.0))
 
+_RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
+    "read-bytes", IO_USAGE_TYPE,
+    "Total data read from storage", "Gb",
+    lambda x: _sum_if_recorded(x, 1073741824.0)))
+
+_RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
+    "write-bytes", IO_USAGE_TYPE,
+    "Total data written to storage", "Gb",
+    lambda x: _sum_if_recorded(x, 1073741824.0)))
+
+_RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
+    "read-syscalls", IO_USAGE_TYPE,
+    "Total read system calls", "millions",
+    lambda x: _sum_if_recorded(x, 1000000.0)))
+
+_RESOURCE_USAGE_STATS.append(_ResourceUsageStatistic(
+    "write-syscalls", IO_USAGE_TYPE,
+    "Total write system calls", "millions",
+    lambda x: _sum_if_recorded(x, 1000000.0)))
+
+
+class _EfficiencyStatistic(_ResourceUsageStatistic):
+    def __init__(self, name, title, units, value_calculator):
+        _ResourceUsageStatistic.__init__(
+            self, name, EFFICIENCY_USAGE_TYPE, title, units, value_calculator)
+
+    def get_value(self, usage_df, num_reads, num_threads):
+        if num_reads <= 0:
+            return float("nan")
+
+        # Times are recorded to a resolution of 0.01s
+        real_time = max(usage_df["real-time"].sum(), 0.01)
+        cpu_time = usage_df["user-time"].sum() + usage_df["sys-time"].sum()
+        max_memory = usage_df["max-memory"].max() / 1048576.0
+
+        return self.value_extractor(
+            real_time, cpu_time, max_memory, num_reads, num_threads)
+
+
+_EFFICIENCY_STATS = []
+
+_EFFICIENCY_STATS.append(_EfficiencyStatistic(
+    "reads-per-second", "Throughput", "reads/s",
+    lambda real, cpu, mem, reads, threads: reads / real))
+
+_EFFICIENCY_STATS.append(_EfficiencyStatistic(
+    "cpu-time-per-million-reads", "CPU time per million reads", "s",
+    lambda real, cpu, mem, reads, threads: cpu / (reads / 1000000.0)))
+
+_EFFICIENCY_STATS.append(_EfficiencyStatistic(
+    "memory-per-million-reads", "Maximum resident memory per million reads",
+    "Gb",
+    lambda real, cpu, mem, reads, threads: mem / (reads / 1000000.0)))
+
+_EFFICIENCY_STATS.append(_EfficiencyStatistic(
+    "cpu-utilisation", "CPU utilisation", "CPU time / thread time",
+    lambda real, cpu, mem, reads, threads: cpu / (real * threads)))
+
+
+_SPEEDUP = _ResourceUsageStatistic(
+    "speedup", SCALING_USAGE_TYPE,
+    "Speedup", "relative to fewest threads", None)
+
+_PARALLEL_EFFICIENCY = _ResourceUsageStatistic(
+    "parallel-efficiency", SCALING_USAGE_TYPE,
+    "Parallel efficiency", "speedup / relative threads", None)
+
 
 def get_resource_usage_statistics():
-    return set(_RESOURCE_USAGE_STATS)
+    return set(_RESOURCE_USAGE_STATS + _EFFICIENCY_STATS +
+               [_SPEEDUP, _PARALLEL_EFFICIENCY])
 
 
 def get_time_usage_statistics():
@@ -67,23 +178,194 @@ def get_memory_usage_statistics():
             if rus.usage_type == MEMORY_USAGE_TYPE]
 
 
+def get_io_usage_statistics():
+    return [rus for rus in _RESOURCE_USAGE_STATS
+            if rus.usage_type == IO_USAGE_TYPE]
+
+
+def get_efficiency_statistics():
+    return list(_EFFICIENCY_STATS)
+
+
+def add_speedup(usage_data, threads_column, run_columns):
+    """
+    Add the speedup of quantification runs using multiple threads.
+
+    Return a copy of a pandas DataFrame of resource usage summaries for
+    multiple quantification runs, with an additional column containing the
+    speedup of each run: the elapsed real time of the run using the fewest
+    threads, amongst those runs with the same values in 'run_columns' (i.e.
+    the same quantification method and simulated reads), divided by the
+    elapsed real time of the run itself. A further column contains the
+    parallel efficiency of each run: its speedup divided by the ratio of the
+    number of threads it used to the fewest threads used. If the number of
+    threads used was not recorded, the DataFrame is returned unchanged.
+
+    usage_data: A pandas DataFrame of resource usage summaries.
+    threads_column: The column recording the number of threads each run used.
+    run_columns: Columns whose values identify the runs to be compared.
+    """
+    if threads_column not in usage_data or len(usage_data) == 0:
+        return usage_data
+
+    usage_data = usage_data.reset_index(drop=True)
+    usage_data[_SPEEDUP.name] = float("nan")
+    usage_data[_PARALLEL_EFFICIENCY.name] = float("nan")
+
+    run_columns = [c for c in run_columns if c in usage_data]
+    groups = usage_data.groupby(run_columns) if run_columns \
+        else [(None, usage_data)]
+
+    for _, runs in groups:
+        min_threads = runs[threads_column].min()
+        fewest_threads = runs[threads_column] == min_threads
+        base_time = runs["real-time"][fewest_threads].mean()
+        # Real times are recorded as log10 totals
+        speedup = 10 ** (base_time - runs["real-time"])
+        usage_data.loc[runs.index, _SPEEDUP.name] = speedup
+        usage_data.loc[runs.index, _PARALLEL_EFFICIENCY.name] = \
+            speedup / (runs[threads_column] / float(min_threads))
+
+    return usage_data
+
+
 def get_time_command(resource_type):
+    # Commands are run via a script which samples the resource usage of the
+    # command's process tree, at an interval determined by a variable of the
+    # quantification run script. Quantification commands may be executed
+    # repeatedly, in which case the trial number is held in another variable.
     output_file = get_resource_usage_file(resource_type)
-    format_string = ",".join(
-        [rus.format_string for rus in _RESOURCE_USAGE_STATS])
-    return ("/usr/bin/time -f \"\\\"%C\\\",{format_string}\" " +
-            "-o {output_file} -a ").format(
-        format_string=format_string, output_file=output_file)
+    trial_spec = "--trial=${var} ".format(var=TRIAL_VARIABLE) \
+        if resource_type == QUANT_RESOURCE_TYPE else ""
+    return "{script} --interval=${var} {trial_spec}{output_file} ".format(
+        script=MONITOR_SCRIPT, var=SAMPLE_INTERVAL_VARIABLE,
+        trial_spec=trial_spec, output_file=output_file)
+
+
+def get_usage_file_columns():
+    # Columns of the resource usage files written by monitor_resource_usage,
+    # which are not themselves headed
+    return [COMMAND] + [rus.name for rus in _RESOURCE_USAGE_STATS] + \
+        [START_TIME, END_TIME, TRIAL]
 
 
-def get_usage_summary(usage_file):
+def _read_usage_file(usage_file):
     usage_info = pd.read_csv(
-        usage_file, header=None,
-        names=["command"] + [rus.name for rus in _RESOURCE_USAGE_STATS])
+        usage_file, header=None, names=get_usage_file_columns())
+
+    # Trial numbers are not recorded by older versions of piquant, nor for
+    # prequantification commands
+    usage_info[TRIAL] = usage_info[TRIAL].fillna(1).astype(int)
+    return usage_info
+
+
+def get_trial_variability_columns(column_name):
+    """
+    Return names of columns describing variability over timing trials.
+
+    Return a tuple containing the names of the columns which hold the minimum,
+    interquartile range, lower quartile and upper quartile of the values of a
+    resource usage statistic over repeated timing trials.
+
+    column_name: The name of the column holding the median value of the
+    statistic.
+    """
+    return tuple([column_name + suffix for suffix in [
+        _MIN_SUFFIX, _IQR_SUFFIX,
+        _LOWER_QUARTILE_SUFFIX, _UPPER_QUARTILE_SUFFIX]])
+
+
+def _summarise_trials(trial_summaries):
+    # The median of each statistic over all trials is taken as its value, and
+    # its minimum, interquartile range and quartiles are also recorded
+    summary = {TRIALS: len(trial_summaries)}
+    for column in trial_summaries.columns:
+        values = trial_summaries[column]
+        lower, upper = values.quantile(0.25), values.quantile(0.75)
+        min_col, iqr_col, lower_col, upper_col = \
+            get_trial_variability_columns(column)
+
+        summary[column] = values.median()
+        summary[min_col] = values.min()
+        summary[iqr_col] = upper - lower
+        summary[lower_col] = lower
+        summary[upper_col] = upper
+
+    return pd.DataFrame([summary])
+
+
+def get_usage_summary(usage_file, num_reads=None, num_threads=1):
+    """
+    Return a summary of the resource usage recorded in a usage file.
+
+    Return a pandas DataFrame with a single row, containing the value of each
+    resource usage statistic calculated over all the commands recorded in the
+    file. If the number of reads processed by the commands is given,
+    statistics describing the throughput and efficiency of the commands are
+    also calculated. If the commands were executed in more than one timing
+    trial, each statistic is calculated for each trial, and the median value
+    over all trials is returned, along with the minimum, interquartile range
+    and quartiles of its values (see get_trial_variability_columns()) and the
+    number of trials.
+
+    usage_file: A resource usage file written by monitor_resource_usage.
+    num_reads: The number of reads (or read pairs) processed by the commands.
+    num_threads: The number of threads the commands were asked to use.
+    """
+    usage_info = _read_usage_file(usage_file)
+
+    trial_summaries = []
+    for _, trial_info in usage_info.groupby(TRIAL):
+        trial_summary = {rus.name: rus.get_value(trial_info)
+                         for rus in _RESOURCE_USAGE_STATS}
+
+        if num_reads is not None:
+            for es in _EFFICIENCY_STATS:
+                trial_summary[es.name] = es.get_value(
+                    trial_info, num_reads, num_threads)
 
-    return pd.DataFrame([
-        {rus.name: rus.get_value(usage_info) for rus in _RESOURCE_USAGE_STATS}
-    ])
+        trial_summaries.append(trial_summary)
+
+    trial_summaries = pd.DataFrame(trial_summaries)
+    if len(trial_summaries) == 1:
+        return trial_summaries
+
+    return _summarise_trials(trial_summaries)
+
+
+def _get_step_name(command):
+    # Pipes of commands are executed via "bash -c"
+    words = [w.strip("\"'") for w in str(command).split()]
+    if words[:2] == ["bash", "-c"]:
+        words = words[2:]
+    return os.path.basename(words[0]) if words else ""
+
+
+def get_command_usage(usage_file):
+    """
+    Return the resource usage of each command recorded in a usage file.
+
+    Return a pandas DataFrame with a row for each command, in the order in
+    which they were executed, with fields for the resource usage recorded for
+    the command (in the units in which they were recorded, i.e. seconds,
+    kilobytes, bytes and numbers of system calls), the timing trial in which
+    it was executed, its step number within that trial (starting from 1) and
+    name (the name of the program executed), and its start and end times in
+    seconds relative to the start of the first command (which are missing if
+    not recorded by the version of piquant that wrote the file).
+
+    usage_file: A resource usage file written by monitor_resource_usage.
+    """
+    usage_info = _read_usage_file(usage_file)
+
+    usage_info[STEP] = usage_info.groupby(TRIAL).cumcount().values + 1
+    usage_info[STEP_NAME] = [_get_step_name(c) for c in usage_info[COMMAND]]
+
+    first_start = usage_info[START_TIME].min()
+    for col in [START_TIME, END_TIME]:
+        usage_info[col] = usage_info[col] - first_start
+
+    return usage_info
 
 
 def get_resource_usage_file(resource_type, prefix=None, directory=None):
@@ -95,6 +377,24 @@ def get_resource_usage_file(resource_type, prefix=None, directory=None):
     return file_name
 
 
+def get_command_usage_file(resource_type, prefix=None, directory=None):
+    return get_resource_usage_file(
+        resource_type + "_commands", prefix=prefix, directory=directory)
+
+
+def _get_monitor_file(usage_file, suffix):
+    stem, ext = os.path.splitext(usage_file)
+    return stem + "_" + suffix + ext
+
+
+def get_timeseries_file(usage_file):
+    return _get_monitor_file(usage_file, "timeseries")
+
+
+def get_processes_file(usage_file):
+    return _get_monitor_file(usage_file, "processes")
+
+
 def write_usage_summary(usage_file_name, usage_summary):
     with open(usage_file_name, "w") as out_file:
         usage_summary.to_csv(out_file, index=False)
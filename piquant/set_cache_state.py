@@ -0,0 +1,128 @@
+"""
+Usage:
+    set_cache_state [{log_option_spec}] <cache-state> <path>...
+
+Options:
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+<cache-state>
+    One of "cold" or "warm": the state in which the page cache should be left
+    with respect to the specified files.
+<path>
+    A file, or a directory whose files (and those of any sub-directories)
+    are to be treated.
+
+Set the state of the operating system page cache with respect to a set of
+files, so that the resource usage of commands reading those files may be
+measured consistently. If the cache state is "cold", the pages of each file
+are evicted from the page cache via posix_fadvise(POSIX_FADV_DONTNEED); if
+"warm", each file is read in its entirety, so that its pages are resident in
+the page cache.
+"""
+
+import docopt
+import os
+import os.path
+import schema
+
+from . import options as opt
+from .__init__ import __version__
+
+CACHE_STATE = "<cache-state>"
+PATHS = "<path>"
+
+COLD = "cold"
+WARM = "warm"
+CACHE_STATES = [COLD, WARM]
+
+_READ_SIZE = 1048576
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        opt.validate_list_option(
+            options[CACHE_STATE], CACHE_STATES, "Invalid cache state")
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _get_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, file_names in os.walk(path):
+                for file_name in sorted(file_names):
+                    yield os.path.join(dirpath, file_name)
+        elif os.path.isfile(path):
+            yield path
+
+
+def _evict_file(file_name):
+    # Dirty pages are not evicted, so any pending writes are flushed first
+    fd = os.open(file_name, os.O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _read_file(file_name):
+    with open(file_name, "rb") as in_file:
+        while in_file.read(_READ_SIZE):
+            pass
+
+
+def set_page_cache_state(cache_state, paths, logger=None):
+    """
+    Set the state of the page cache with respect to a set of files.
+
+    Return the number of files treated. If the cache state is COLD but pages
+    cannot be evicted from the page cache (i.e. posix_fadvise is not
+    available), no files are treated.
+
+    cache_state: One of COLD or WARM.
+    paths: A list of files, or directories containing files.
+    logger: If specified, logs messages to standard error.
+    """
+    if cache_state == COLD and not hasattr(os, "posix_fadvise"):
+        if logger:
+            logger.warning(
+                "Pages cannot be evicted from the page cache on this system.")
+        return 0
+
+    treat_file = _evict_file if cache_state == COLD else _read_file
+
+    num_files = 0
+    for file_name in _get_files(paths):
+        if logger:
+            logger.debug("Setting cache state of {f} to {s}".format(
+                f=file_name, s=cache_state))
+        treat_file(file_name)
+        num_files += 1
+
+    return num_files
+
+
+def set_cache_state(args):
+    # Read in command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args,
+        version="set_cache_state v" + __version__)
+
+    # Validate command-line options
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    # Evict the files from, or read them into, the page cache
+    num_files = set_page_cache_state(
+        options[CACHE_STATE], options[PATHS], logger)
+    logger.info("Set cache state of {n} files to {s}".format(
+        n=num_files, s=options[CACHE_STATE]))
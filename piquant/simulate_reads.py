@@ -0,0 +1,399 @@
+"""
+Usage:
+    simulate_reads [{log_option_spec} --seed=<seed>]
+        (--expression | --sequence) <params-file>
+
+Options:
+{help_option_spec}
+    {help_option_description}
+{ver_option_spec}
+    {ver_option_description}
+{log_option_spec}
+    {log_option_description}
+-x --expression
+    Create an expression profile for the transcripts described by the
+    parameters file.
+-s --sequence
+    Simulate reads from a previously created expression profile.
+--seed=<seed>
+    Seed for the random number generator.
+<params-file>
+    FluxSimulator-format parameters file, as written by the piquant command
+    prepare_read_dirs.
+
+Simulate RNA-seq reads without FluxSimulator. The same parameters files are
+read, and the same expression profile (.pro) and FASTA or FASTQ reads files
+written as would be by FluxSimulator. When creating an expression profile, the
+molecules of the initial transcript population are distributed between
+transcripts according to FluxSimulator's model of expression by rank. When
+simulating reads, fragments are drawn from transcripts in proportion to their
+number of molecules and length, and reads taken from the ends of each
+fragment, in vectorized batches.
+"""
+
+import docopt
+import numpy as np
+import os.path
+import pandas as pd
+import schema
+
+from . import flux_simulator as fs
+from . import genome
+from . import gtf
+from . import options as opt
+from .__init__ import __version__
+
+EXPRESSION = "--expression"
+SEQUENCE = "--sequence"
+SEED = "--seed"
+PARAMS_FILE = "<params-file>"
+
+SENSE = "S"
+ANTISENSE = "A"
+
+# Parameters of FluxSimulator's model of expression by rank (see
+# http://sammeth.net/confluence/display/SIM/4.1.1+-+Gene+Expression+Profile)
+_EXPRESSION_K = -0.6
+_EXPRESSION_X0 = 5e7
+_EXPRESSION_X1 = 9500
+
+_FRAGMENT_LENGTH_MEAN = 250
+_FRAGMENT_LENGTH_SD = 50
+
+_ERROR_RATE_START = 0.001
+_ERROR_RATE_END = 0.02
+
+_BATCH_SIZE = 100000
+
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+_COMPLEMENT = np.arange(256, dtype=np.uint8)
+_COMPLEMENT[np.frombuffer(b"ACGTN", dtype=np.uint8)] = \
+    np.frombuffer(b"TGCAN", dtype=np.uint8)
+
+_BASE_INDEX = np.full(256, -1, dtype=np.int8)
+_BASE_INDEX[_BASES] = np.arange(4)
+
+
+def _validate_command_line_options(options):
+    try:
+        opt.validate_log_level(options)
+        opt.validate_file_option(
+            options[PARAMS_FILE], "Could not open parameters file")
+        options[SEED] = opt.validate_int_option(
+            options[SEED], "Random seed must be a non-negative integer",
+            min_val=0, nullable=True)
+    except schema.SchemaError as exc:
+        exit("Exiting. " + exc.code)
+
+
+def _read_params(params_file):
+    params = {}
+    with open(params_file) as in_file:
+        for line in in_file:
+            name, value = line.split(None, 1)
+            params[name] = value.strip()
+    return params
+
+
+def _get_loci(transcripts):
+    return ["{c}:{s}-{e}{st}".format(
+            c=c, s=s, e=e, st=("W" if st == "+" else "C"))
+            for c, s, e, st in zip(
+                transcripts.chromosomes, transcripts.starts,
+                transcripts.ends, transcripts.strands)]
+
+
+def draw_molecule_numbers(num_transcripts, num_molecules, random_state):
+    """
+    Distribute the molecules of a transcript population between transcripts.
+
+    Return an array of the number of molecules of each transcript. Each
+    transcript is randomly assigned a rank, and the molecules distributed
+    between transcripts with probability proportional to the FluxSimulator
+    expression model value for that rank.
+
+    num_transcripts: The number of transcripts.
+    num_molecules: The number of molecules in the transcript population.
+    random_state: A numpy.random.RandomState instance.
+    """
+    ranks = random_state.permutation(num_transcripts) + 1.0
+    expression = (ranks / _EXPRESSION_X0) ** _EXPRESSION_K * \
+        np.exp(-ranks / _EXPRESSION_X1 * (1 + ranks / _EXPRESSION_X1))
+    return random_state.multinomial(
+        num_molecules, expression / expression.sum())
+
+
+def get_expression_profile(transcripts, molecules):
+    """
+    Return a FluxSimulator-format expression profile.
+
+    Return a pandas DataFrame with the columns of a FluxSimulator .pro file
+    created by the expression step of simulation, containing a row for each
+    transcript.
+
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    molecules: An array of the number of molecules of each transcript.
+    """
+    profile = pd.DataFrame({
+        0: _get_loci(transcripts),
+        fs.PRO_FILE_TRANSCRIPT_ID_COL: transcripts.ids,
+        2: np.where(transcripts.coding, "CDS", "NC"),
+        fs.PRO_FILE_LENGTH_COL: transcripts.lengths,
+        fs.PRO_FILE_FRAC_COL: molecules / float(max(molecules.sum(), 1)),
+        fs.PRO_FILE_NUM_COL: molecules
+    })
+    return profile[sorted(profile.columns)]
+
+
+def _add_sequencing_to_profile(profile, fragments, reads):
+    # Columns recording the fragments in the library and the reads sequenced
+    # from each transcript; FluxSimulator also records coverage statistics,
+    # which are not calculated here
+    profile[6] = fragments / float(max(fragments.sum(), 1))
+    profile[7] = fragments
+    profile[8] = reads / float(max(reads.sum(), 1))
+    profile[9] = reads
+    for column in [10, 11, 12]:
+        profile[column] = float("nan")
+
+
+def _write_expression_profile(profile, pro_file):
+    profile.to_csv(
+        pro_file, sep="\t", header=False, index=False, na_rep="NaN")
+
+
+def _get_error_rates(read_length):
+    positions = np.arange(read_length) / float(max(read_length - 1, 1))
+    return _ERROR_RATE_START + \
+        (_ERROR_RATE_END - _ERROR_RATE_START) * positions ** 2
+
+
+def _get_qualities(read_length):
+    phred = np.minimum(
+        40, np.round(-10 * np.log10(_get_error_rates(read_length))))
+    return "".join(chr(33 + int(q)) for q in phred)
+
+
+def _add_errors(reads, random_state):
+    # Substitute bases with a probability which increases along each read
+    errors = (random_state.random_sample(reads.shape) <
+              _get_error_rates(reads.shape[1])) & \
+        (_BASE_INDEX[reads] >= 0)
+    substitutions = random_state.randint(1, 4, size=errors.sum())
+    reads[errors] = _BASES[(_BASE_INDEX[reads[errors]] + substitutions) % 4]
+
+
+def _get_sense_reads(sequences, starts, read_length):
+    return sequences[starts[:, np.newaxis] + np.arange(read_length)]
+
+
+def _get_antisense_reads(sequences, ends, read_length):
+    return _COMPLEMENT[
+        sequences[ends[:, np.newaxis] - 1 - np.arange(read_length)]]
+
+
+def _get_read_strings(reads, errors, random_state):
+    if errors:
+        _add_errors(reads, random_state)
+
+    read_length = reads.shape[1]
+    sequences = reads.tobytes().decode("ascii")
+    return [sequences[i:i + read_length]
+            for i in range(0, len(sequences), read_length)]
+
+
+def _format_read(name, sequence, qualities):
+    if qualities:
+        return "@{n}\n{s}\n+\n{q}\n".format(
+            n=name, s=sequence, q=qualities)
+    return ">{n}\n{s}\n".format(n=name, s=sequence)
+
+
+def _draw_fragment_lengths(transcript_lengths, read_length, random_state):
+    lengths = np.round(random_state.normal(
+        _FRAGMENT_LENGTH_MEAN, _FRAGMENT_LENGTH_SD,
+        len(transcript_lengths))).astype(np.int64)
+    return np.minimum(np.maximum(lengths, read_length), transcript_lengths)
+
+
+def _simulate_batch(out_file, transcripts, loci, sequences, offsets,
+                    fragment_transcripts, first_fragment, read_length,
+                    paired_end, errors, random_state):
+
+    transcript_lengths = transcripts.lengths[fragment_transcripts]
+    fragment_lengths = _draw_fragment_lengths(
+        transcript_lengths, read_length, random_state)
+    fragment_starts = np.floor(
+        random_state.random_sample(len(fragment_transcripts)) *
+        (transcript_lengths - fragment_lengths + 1)).astype(np.int64)
+    fragment_ends = fragment_starts + fragment_lengths
+
+    names = ["{l}:{t}:{n}:{tl}:{s}:{e}".format(
+             l=loci[t], t=transcripts.ids[t], n=first_fragment + i,
+             tl=tl, s=s + 1, e=e)
+             for i, (t, tl, s, e) in enumerate(zip(
+                 fragment_transcripts, transcript_lengths,
+                 fragment_starts, fragment_ends))]
+
+    sequence_offsets = offsets[fragment_transcripts]
+    sense_reads = _get_sense_reads(
+        sequences, sequence_offsets + fragment_starts, read_length)
+    antisense_reads = _get_antisense_reads(
+        sequences, sequence_offsets + fragment_ends, read_length)
+    qualities = _get_qualities(read_length) if errors else None
+
+    if paired_end:
+        # The first read of each pair is from the sense strand, and the
+        # second from the antisense strand; read names are identical but for
+        # the '/1' and '/2' suffixes
+        reads = zip(names,
+                    _get_read_strings(sense_reads, errors, random_state),
+                    _get_read_strings(antisense_reads, errors, random_state))
+        lines = [_format_read(n + "/1", s, qualities) +
+                 _format_read(n + "/2", a, qualities) for n, s, a in reads]
+    else:
+        # Single-end reads are taken from either end of each fragment, with
+        # the originating strand recorded at the end of the read name
+        sense = random_state.random_sample(len(names)) < 0.5
+        reads = _get_read_strings(
+            np.where(sense[:, np.newaxis], sense_reads, antisense_reads),
+            errors, random_state)
+        lines = [_format_read(
+                 n + ":" + (SENSE if se else ANTISENSE), r, qualities)
+                 for n, se, r in zip(names, sense, reads)]
+
+    out_file.write("".join(lines))
+
+
+def write_simulated_reads(
+        reads_file, transcripts, molecules, genome_dir, num_reads,
+        read_length, paired_end, errors, random_state, logger=None):
+    """
+    Simulate reads from a transcript population and write them to a file.
+
+    Return a tuple of arrays of the number of fragments and of reads
+    simulated from each transcript. Fragments are drawn from transcripts at
+    least as long as the reads, with probability proportional to the number
+    of molecules and length of each transcript; fragment lengths are normally
+    distributed, and fragment positions uniformly distributed along each
+    transcript.
+
+    reads_file: Path to the FASTA (or, if errors are simulated, FASTQ) file
+    to be written.
+    transcripts: A gtf.Transcripts named tuple, as returned by
+    gtf.read_transcripts().
+    molecules: An array of the number of molecules of each transcript.
+    genome_dir: Path to a directory containing per-chromosome genome
+    sequences as FASTA files.
+    num_reads: The number of reads to simulate (for paired-end reads, both
+    reads of each pair are counted).
+    read_length: The length of reads to simulate.
+    paired_end: Whether single- or paired-end reads should be simulated.
+    errors: Whether reads should be simulated with errors or not.
+    random_state: A numpy.random.RandomState instance.
+    logger: Optionally, logs messages to standard error.
+    """
+    num_fragments = num_reads // 2 if paired_end else num_reads
+
+    weights = molecules * transcripts.lengths * \
+        (transcripts.lengths >= read_length)
+    fragments = random_state.multinomial(
+        num_fragments, weights / float(weights.sum())) \
+        if weights.sum() > 0 else np.zeros(len(weights), dtype=np.int64)
+
+    expressed = np.flatnonzero(fragments)
+    if logger:
+        logger.info("Extracting sequences of {n} transcripts...".format(
+            n=len(expressed)))
+    sequences, offsets = genome.get_transcript_sequences(
+        genome.Genome(genome_dir), transcripts, expressed)
+
+    loci = _get_loci(transcripts)
+    fragment_transcripts = np.repeat(expressed, fragments[expressed])
+
+    with open(reads_file, "w") as out_file:
+        for first in range(0, len(fragment_transcripts), _BATCH_SIZE):
+            batch = fragment_transcripts[first:first + _BATCH_SIZE]
+            _simulate_batch(
+                out_file, transcripts, loci, sequences, offsets, batch,
+                first, read_length, paired_end, errors, random_state)
+            if logger:
+                logger.info("...simulated {n} fragments.".format(
+                    n=first + len(batch)))
+
+    return fragments, fragments * (2 if paired_end else 1)
+
+
+def _get_molecules(transcripts, profile):
+    molecules = np.zeros(len(transcripts.ids), dtype=np.int64)
+    indices = pd.Index(transcripts.ids).get_indexer(
+        profile[fs.PRO_FILE_TRANSCRIPT_ID_COL].values)
+    molecules[indices[indices >= 0]] = \
+        profile[fs.PRO_FILE_NUM_COL].values[indices >= 0]
+    return molecules
+
+
+def _create_expression_profile(logger, params_file, params, random_state):
+    transcripts = gtf.read_transcripts(params["REF_FILE_NAME"])
+    logger.info("Read {n} transcripts.".format(n=len(transcripts.ids)))
+
+    molecules = draw_molecule_numbers(
+        len(transcripts.ids), int(params["NB_MOLECULES"]), random_state)
+
+    # As for FluxSimulator, the profile is named after the parameters file
+    pro_file = os.path.splitext(params_file)[0] + ".pro"
+    logger.info("Writing expression profile to '{f}'.".format(f=pro_file))
+    _write_expression_profile(
+        get_expression_profile(transcripts, molecules), pro_file)
+
+
+def _simulate_sequencing(logger, params, random_state):
+    transcripts = gtf.read_transcripts(params["REF_FILE_NAME"])
+    logger.info("Read {n} transcripts.".format(n=len(transcripts.ids)))
+
+    pro_file = params["PRO_FILE_NAME"]
+    molecules = _get_molecules(
+        transcripts, fs.read_expression_profiles(pro_file))
+
+    errors = "ERR_FILE" in params
+    reads_file = os.path.splitext(params["SEQ_FILE_NAME"])[0] + \
+        (".fastq" if errors else ".fasta")
+
+    logger.info("Simulating {n} reads to '{f}'...".format(
+        n=params["READ_NUMBER"], f=reads_file))
+    try:
+        fragments, reads = write_simulated_reads(
+            reads_file, transcripts, molecules, params["GEN_DIR"],
+            int(params["READ_NUMBER"]), int(params["READ_LENGTH"]),
+            params.get("PAIRED_END") == "YES", errors, random_state, logger)
+    except (IOError, ValueError) as exc:
+        exit("Exiting. " + str(exc))
+
+    # Record the simulated fragments and reads for each transcript in the
+    # expression profile, as FluxSimulator does
+    profile = get_expression_profile(transcripts, molecules)
+    _add_sequencing_to_profile(profile, fragments, reads)
+    _write_expression_profile(profile, pro_file)
+
+
+def simulate_reads(args):
+    # Read in and validate command-line options
+    docstring = opt.substitute_common_options_into_usage(__doc__)
+    options = docopt.docopt(
+        docstring, argv=args, version="simulate_reads v" + __version__)
+
+    _validate_command_line_options(options)
+
+    # Set up logger
+    logger = opt.get_logger_for_options(options)
+
+    params = _read_params(options[PARAMS_FILE])
+    random_state = np.random.RandomState(options[SEED])
+
+    if options[EXPRESSION]:
+        _create_expression_profile(
+            logger, options[PARAMS_FILE], params, random_state)
+    else:
+        _simulate_sequencing(logger, params, random_state)
@@ -4,10 +4,12 @@ transcript quantification run. Exports:
 
 get_statistics: Return all statistic instances.
 get_graphable_statistics: Return statistic instances suitable for graphing.
+get_interval_columns: Return names of columns holding interval bounds.
 """
 
 import itertools
 import math
+import numpy as np
 import os.path
 
 from . import classifiers
@@ -21,6 +23,9 @@ _SUMMARY_COUNT = "count"
 _SUMMARY_MEDIAN = "50%"
 _ZERO_TO_ONE_STAT_RANGE = (-0.025, 1.025)
 
+_INTERVAL_LOWER_SUFFIX = "-lower"
+_INTERVAL_UPPER_SUFFIX = "-upper"
+
 _STATISTICS = []
 
 
@@ -63,11 +68,95 @@ def get_stats_file(directory, prefix, tpm_level,
             if classifier else "_stats") + ".csv"
 
 
+def get_boxplot_stats_file(directory, prefix, tpm_level, tpm_subset,
+                           classifier):
+
+    return os.path.join(directory, "_".join(
+        [prefix, tpm_level, tpm_subset, "boxplot"])) + \
+        "_by_" + classifier.get_column_name().replace(' ', '_') + ".csv"
+
+
 def write_stats_data(filename, data_frame, **kwargs):
     with open(filename, "w") as out_file:
         data_frame.to_csv(out_file, float_format="%.5f", **kwargs)
 
 
+def get_interval_columns(column_name):
+    """Return names of columns holding the bounds of an interval.
+
+    Return a tuple containing the names of the columns which hold the lower
+    and upper bounds of an interval (e.g. a bootstrap confidence interval)
+    around the values in a particular column of a statistics data frame.
+    column_name: The name of the column holding the values themselves.
+    """
+    return (column_name + _INTERVAL_LOWER_SUFFIX,
+            column_name + _INTERVAL_UPPER_SUFFIX)
+
+
+def _weighted_sum(values, weights):
+    # Sum boolean or numeric values over each row of a matrix of weights.
+    return np.dot(weights, values.astype(float))
+
+
+def _weighted_fraction(numerator, denominator, weights, default):
+    # Calculate the weighted fraction of elements satisfying the 'numerator'
+    # condition amongst those satisfying the 'denominator' condition.
+    num = _weighted_sum(numerator, weights)
+    denom = _weighted_sum(denominator, weights)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = num / denom
+    fraction[denom == 0] = default
+    return fraction
+
+
+def _weighted_ranks(sorted_weights, sorted_values):
+    # Calculate the ranks of values, given a matrix of weights for those values
+    # in sorted order, where in each row of the matrix each value occurs the
+    # number of times given by its weight. Tied values are assigned the average
+    # of the ranks they span, and ranks are returned in sorted order.
+    if len(sorted_values.starts) == len(sorted_values.values):
+        return np.cumsum(sorted_weights, axis=1) - (sorted_weights - 1) / 2.0
+
+    group_totals = np.add.reduceat(sorted_weights, sorted_values.starts, axis=1)
+    group_ranks = np.cumsum(group_totals, axis=1) - (group_totals - 1) / 2.0
+    return group_ranks[:, sorted_values.groups]
+
+
+def _weighted_correlation(xvals, yvals, weights):
+    # Calculate the Pearson correlation of two sets of values within each row
+    # of a matrix of weights.
+    total = weights.sum(axis=1)
+    x_sum = np.einsum("ij,ij->i", weights, xvals)
+    y_sum = np.einsum("ij,ij->i", weights, yvals)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = np.einsum("ij,ij,ij->i", weights, xvals, yvals) - \
+            x_sum * y_sum / total
+        x_variance = np.einsum("ij,ij,ij->i", weights, xvals, xvals) - \
+            x_sum * x_sum / total
+        y_variance = np.einsum("ij,ij,ij->i", weights, yvals, yvals) - \
+            y_sum * y_sum / total
+        return covariance / np.sqrt(x_variance * y_variance)
+
+
+def _weighted_median(sorted_weights, sorted_values):
+    # Calculate the median of values, given a matrix of weights for those
+    # values in sorted order, where in each row of the matrix each value occurs
+    # the number of times given by its weight.
+    cumulative = np.cumsum(sorted_weights, axis=1)
+    total = cumulative[:, -1]
+
+    # The value at (zero-based) position 'pos' in each row is the first
+    # whose cumulative weight exceeds 'pos'; positions are found for all rows
+    # at once. Rows with no weight have no such value, and no median.
+    lower = (cumulative > ((total - 1) // 2)[:, None]).argmax(axis=1)
+    upper = (cumulative > (total // 2)[:, None]).argmax(axis=1)
+
+    medians = (sorted_values.values[lower] + sorted_values.values[upper]) / 2.0
+    medians[total == 0] = np.nan
+    return medians
+
+
 def _statistic(cls):
     # Mark a class as capable of calculate a statistic for the results of a
     # quantification run.
@@ -123,6 +212,20 @@ class _BaseStatistic(object):
         """
         raise NotImplementedError
 
+    def calculate_resampled(self, data, weights):
+        """Calculate the statistic for a batch of bootstrap resamples.
+
+        Calculate statistic values for each of a number of bootstrap resamples
+        of the results of a quantification run, returning a numpy array with
+        one value per resample, or None if the statistic is not subject to
+        sampling error.
+        data: A bootstrap.ResamplingData instance describing the results of a
+        quantification run.
+        weights: A two-dimensional numpy array; each row gives the number of
+        times each transcript TPM was drawn in a single resample.
+        """
+        return None
+
 
 @_statistic
 class _NumberOfTPMs(_BaseStatistic):
@@ -154,6 +257,9 @@ class _NumberOfTruePositiveTPMs(_BaseStatistic):
     def calculate(self, tpms, tp_tpms):
         return len(tp_tpms)
 
+    def calculate_resampled(self, data, weights):
+        return weights[:, :data.num_true_pos].sum(axis=1)
+
     def calculate_grouped(
             self, grouped, grp_summary, tp_grouped, tp_grp_summary):
         stats = tp_grp_summary[t.REAL_TPM].unstack()
@@ -186,6 +292,23 @@ class _SpearmanCorrelation(_BaseStatistic):
             self, grouped, grp_summary, tp_grouped, tp_grp_summary):
         return tp_grouped.apply(_SpearmanCorrelation._calculate)
 
+    def calculate_resampled(self, data, weights):
+        if data.num_true_pos == 0:
+            return np.repeat(np.nan, len(weights))
+
+        # Weights for true positive TPMs are held in order of real TPM; these
+        # are reordered, along with the ranks of real TPMs, in order of
+        # calculated TPM.
+        tp_weights = weights[:, :data.num_true_pos]
+        real_ranks = _weighted_ranks(tp_weights, data.tp_real_tpms)
+
+        calc_order = data.tp_calc_tpms.order
+        calc_weights = tp_weights[:, calc_order]
+        calc_ranks = _weighted_ranks(calc_weights, data.tp_calc_tpms)
+
+        return _weighted_correlation(
+            real_ranks[:, calc_order], calc_ranks, calc_weights)
+
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
         return (min_val - 0.01, 1.01)
@@ -223,6 +346,15 @@ class _TruePositiveErrorFraction(_BaseStatistic):
             _TruePositiveErrorFraction._calculate,
             _TruePositiveErrorFraction.ERROR_FRACTION_THRESHOLD)
 
+    def calculate_resampled(self, data, weights):
+        errors = np.zeros(data.num_true_pos, dtype=bool)
+        errors[data.tp_percent_errors.order] = \
+            abs(data.tp_percent_errors.values) > \
+            _TruePositiveErrorFraction.ERROR_FRACTION_THRESHOLD
+        return _weighted_fraction(
+            errors, np.ones(data.num_true_pos, dtype=bool),
+            weights[:, :data.num_true_pos], np.nan)
+
     def stat_range(self, vals_range):
         del vals_range
         return _ZERO_TO_ONE_STAT_RANGE
@@ -246,6 +378,13 @@ class _MedianPercentError(_BaseStatistic):
         stats = tp_grp_summary[t.PERCENT_ERROR].unstack()
         return stats[_SUMMARY_MEDIAN]
 
+    def calculate_resampled(self, data, weights):
+        if data.num_true_pos == 0:
+            return np.repeat(np.nan, len(weights))
+
+        return _weighted_median(
+            weights[:, data.tp_percent_errors.order], data.tp_percent_errors)
+
     def stat_range(self, vals_range):
         division = 5.0
         closest_div = lambda x: math.floor(x / division) * division
@@ -283,6 +422,10 @@ class _Sensitivity(_BaseStatistic):
             self, grouped, grp_summary, tp_grouped, tp_grp_summary):
         return grouped.apply(_Sensitivity._calculate)
 
+    def calculate_resampled(self, data, weights):
+        return _weighted_fraction(
+            data.true_pos, data.true_pos | data.false_neg, weights, 1)
+
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
         return (min_val - 0.01, 1.01)
@@ -313,6 +456,10 @@ class _Specificity(_BaseStatistic):
             self, grouped, grp_summary, tp_grouped, tp_grp_summary):
         return grouped.apply(_Specificity._calculate)
 
+    def calculate_resampled(self, data, weights):
+        return _weighted_fraction(
+            data.true_neg, data.true_neg | data.false_pos, weights, 1)
+
     def stat_range(self, vals_range):
         min_val = math.floor(vals_range[0] * 5) / 5.0
         return (min_val - 0.01, 1.01)
@@ -5,8 +5,12 @@ from . import piquant_options as po
 
 class OptionValuesSets(object):
     def __init__(self, stats_df):
+        # Options may not have been recorded by older versions of piquant
+        # (e.g. the number of threads used for quantification)
         self.values = {o: stats_df[o.name].value_counts().index.tolist()
+                       if o.name in stats_df else []
                        for o in po.get_multiple_quant_run_options()}
+        self.groups = {}
 
     def _is_degenerate_option(self, option):
         return len(self.values[option]) <= 1
@@ -34,16 +38,37 @@ class OptionValuesSets(object):
             options = self._remove_from(options, opts_to_remove)
         return [o for o in options if not self._is_degenerate_option(o)]
 
+    def _get_groups(self, data, fixed_options):
+        # Index data once by the values of a set of fixed options, returning a
+        # dictionary mapping from tuples of option values to the subsets of
+        # data with those values. Indexed data are retained for subsequent
+        # calls (and are stored alongside the index, so that an index is never
+        # reused for other data occupying the same memory).
+        option_names = tuple([o.name for o in fixed_options])
+        cache_key = (id(data), option_names)
+
+        if cache_key not in self.groups:
+            if len(option_names) == 0:
+                groups = {(): data}
+            else:
+                groups = {}
+                for values, subset in data.groupby(list(option_names)):
+                    if not isinstance(values, tuple):
+                        values = (values,)
+                    groups[values] = subset
+            self.groups[cache_key] = (data, groups)
+
+        return self.groups[cache_key][1]
+
     def exec_for_fixed_option_values_sets(self, func, non_fixed_options, data):
         fixed_options, fo_values_sets = \
             self._get_fixed_options(non_fixed_options)
+        groups = self._get_groups(data, fixed_options)
 
         for fo_values_set in fo_values_sets:
-            fixed_option_values = {}
-            data_subset = data
-            for i, fixed_o in enumerate(fixed_options):
-                fo_value = fo_values_set[i]
-                data_subset = data_subset[data_subset[fixed_o.name] == fo_value]
-                fixed_option_values[fixed_o] = fo_value
+            data_subset = groups.get(tuple(fo_values_set))
+            if data_subset is None:
+                continue
 
+            fixed_option_values = dict(zip(fixed_options, fo_values_set))
             func(data_subset, fixed_option_values)
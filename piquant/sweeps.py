@@ -0,0 +1,177 @@
+"""
+Classes for calculating statistics over a range of threshold values from the
+results of a transcript quantification run, in a single pass over the sorted
+data. Exports:
+
+get_sweeps: Return all threshold sweep instances.
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import tpms as t
+
+SENSITIVITY = "sensitivity"
+SPECIFICITY = "specificity"
+FALSE_POSITIVE_RATE = "false-pos-rate"
+PRECISION = "precision"
+ERROR_FRACTION = "tp-error-frac"
+
+_NUM_THRESHOLDS = 200
+_ZERO_TO_ONE_RANGE = (-0.025, 1.025)
+
+_SWEEPS = []
+
+
+def get_sweeps():
+    """Return a list of all threshold sweep instances.
+
+    Return a list of objects each of which can calculate statistics over a
+    range of values of a threshold used in assessing the results of a
+    transcript quantification run.
+    """
+    return list(_SWEEPS)
+
+
+def _sweep(cls):
+    # Mark a class as capable of calculating statistics over a range of
+    # threshold values for the results of a quantification run.
+    _SWEEPS.append(cls())
+    return cls
+
+
+def _get_fractions(numerators, denominators, default):
+    # Calculate fractions for arrays of counts, substituting a default value
+    # where the denominator is zero.
+    fractions = np.repeat(float(default), len(numerators))
+    non_zero = denominators > 0
+    fractions[non_zero] = \
+        numerators[non_zero] / denominators[non_zero].astype(float)
+    return fractions
+
+
+def _count_greater(sorted_values, thresholds):
+    # For each threshold, count the values greater than that threshold.
+    return len(sorted_values) - \
+        np.searchsorted(sorted_values, thresholds, side="right")
+
+
+class _Curve(object):
+    # Describes a curve to be plotted from the results of a threshold sweep.
+    def __init__(self, name, title, xcol, ycol, xlabel, ylabel, xrange):
+        self.name = name
+        self.title = title
+        self.xcol = xcol
+        self.ycol = ycol
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.xrange = xrange
+
+    def get_plot_range(self):
+        return self.xrange, _ZERO_TO_ONE_RANGE
+
+
+class _BaseSweep(object):
+    # Base for classes capable of calculating statistics over a range of
+    # threshold values.
+    def __init__(self, column_name, curves):
+        self.column_name = column_name
+        self.curves = curves
+
+    def get_column_name(self):
+        return self.column_name
+
+    def get_stats_file_suffix(self, ascending=False):
+        del ascending
+        return "_sweep_by_" + self.column_name.replace(' ', '_')
+
+    def get_thresholds(self):
+        raise NotImplementedError
+
+    def calculate(self, tpms, tp_tpms):
+        """Calculate statistics over a range of threshold values.
+
+        Return a pandas DataFrame containing a row for each threshold value,
+        with a column for the threshold and for each statistic calculated.
+        tpms: A pandas DataFrame describing the result of a quantification
+        run.
+        tp_tpms: A pandas DataFrame describing those results of a
+        quantification run for which both real and calculated TPMs were above
+        a threshold value indicating "presence" of the transcript.
+        """
+        raise NotImplementedError
+
+
+@_sweep
+class _NotPresentCutoffSweep(_BaseSweep):
+    # Calculates the sensitivity, specificity, false positive rate and
+    # precision of the detection of transcripts as "present" as the cut-off
+    # TPM value below which transcripts are considered to be "not present"
+    # varies. A transcript is counted as a true positive at a particular
+    # cut-off if the smaller of its real and calculated TPMs lies above that
+    # cut-off, so that all counts follow from the sorted real, calculated and
+    # minimum TPMs.
+
+    LOG10_CUTOFF_RANGE = (-3, 3)
+
+    def __init__(self):
+        _BaseSweep.__init__(self, "not present cutoff", [
+            _Curve("roc", "ROC curve", FALSE_POSITIVE_RATE, SENSITIVITY,
+                   "False positive rate", "Sensitivity", _ZERO_TO_ONE_RANGE),
+            _Curve("precision_recall", "Precision-recall curve", SENSITIVITY,
+                   PRECISION, "Recall", "Precision", _ZERO_TO_ONE_RANGE)])
+
+    def get_thresholds(self):
+        return np.logspace(self.LOG10_CUTOFF_RANGE[0],
+                           self.LOG10_CUTOFF_RANGE[1], _NUM_THRESHOLDS)
+
+    def calculate(self, tpms, tp_tpms):
+        real_tpms = tpms[t.REAL_TPM].values
+        calc_tpms = tpms[t.CALCULATED_TPM].values
+        thresholds = self.get_thresholds()
+
+        real_pos = _count_greater(np.sort(real_tpms), thresholds)
+        calc_pos = _count_greater(np.sort(calc_tpms), thresholds)
+        true_pos = _count_greater(
+            np.sort(np.minimum(real_tpms, calc_tpms)), thresholds)
+
+        false_pos = calc_pos - true_pos
+        true_neg = len(tpms) - real_pos - false_pos
+        specificity = _get_fractions(true_neg, true_neg + false_pos, 1)
+
+        return pd.DataFrame.from_dict({
+            self.column_name: thresholds,
+            SENSITIVITY: _get_fractions(true_pos, real_pos, 1),
+            SPECIFICITY: specificity,
+            FALSE_POSITIVE_RATE: 1 - specificity,
+            PRECISION: _get_fractions(true_pos, calc_pos, 1)})
+
+
+@_sweep
+class _ErrorFractionThresholdSweep(_BaseSweep):
+    # Calculates the fraction of 'true positive' transcript TPMs whose
+    # calculated TPM was greater than a certain percentage above or below the
+    # real TPM, as that percentage varies.
+
+    MAX_ERROR_PERCENT = 100
+
+    def __init__(self):
+        _BaseSweep.__init__(self, "error fraction threshold", [
+            _Curve("error_fraction", "True positive error fraction",
+                   "error fraction threshold", ERROR_FRACTION,
+                   "Error fraction threshold (%)",
+                   "True positive error fraction",
+                   (-2.5, self.MAX_ERROR_PERCENT + 2.5))])
+
+    def get_thresholds(self):
+        return np.linspace(0, self.MAX_ERROR_PERCENT, _NUM_THRESHOLDS + 1)
+
+    def calculate(self, tpms, tp_tpms):
+        errors = np.sort(np.abs(tp_tpms[t.PERCENT_ERROR].values))
+        thresholds = self.get_thresholds()
+
+        return pd.DataFrame.from_dict({
+            self.column_name: thresholds,
+            ERROR_FRACTION: _get_fractions(
+                _count_greater(errors, thresholds),
+                np.repeat(len(errors), len(thresholds)), np.nan)})
@@ -0,0 +1,192 @@
+"""
+Functions and classes for writing and reading a matrix of the real and
+calculated TPMs of all quantification runs, for cross-run analysis. Exports:
+
+write_tpm_matrix: Write a matrix of TPMs for a set of quantification runs.
+read_tpm_matrix: Read a matrix of TPMs for a set of quantification runs.
+TpmMatrix: Memory-mapped TPMs for a set of quantification runs.
+
+A TPM matrix is a directory containing NumPy array files of real and
+calculated TPMs, each with one row per quantification run and one column per
+transcript, together with the identifiers of transcripts in column order and a
+CSV file describing the quantification run corresponding to each row, in
+terms of the values of each option that is an instance of
+piquant_options._MultiQuantRunOption. TPMs for transcripts not quantified in a
+particular run are missing (NaN) in that run's row.
+"""
+
+import numpy as np
+import os
+import os.path
+import pandas as pd
+
+from . import piquant_options as po
+from . import tpm_store
+from . import tpms as t
+
+MATRIX_DIRECTORY = "tpm_matrix"
+RUNS_FILE = "runs.csv"
+RUN_NAME = "run"
+RUN_INDEX = "row"
+
+_TRANSCRIPTS_FILE = "transcripts.npy"
+_REAL_TPMS_FILE = "real-tpms.npy"
+_CALCULATED_TPMS_FILE = "calculated-tpms.npy"
+_TPM_DTYPE = np.float32
+
+
+def _get_mqr_options():
+    return sorted(po.get_multiple_quant_run_options(), key=lambda o: o.index)
+
+
+def _get_csv_value(value):
+    # Quantification methods are recorded by name, as in statistics files.
+    return value if isinstance(value, (bool, int, float)) else str(value)
+
+
+def _get_runs(run_stores):
+    options = [o for o in _get_mqr_options() if o.name in run_stores[0][0]]
+    runs = pd.DataFrame(
+        [[_get_csv_value(qr_options[o.name]) for o in options]
+         for qr_options, _ in run_stores],
+        columns=[o.name for o in options])
+    runs.insert(0, RUN_NAME,
+                [po.get_run_name(qr_options) for qr_options, _ in run_stores])
+    runs.insert(0, RUN_INDEX, np.arange(len(run_stores)))
+    return runs
+
+
+def _get_store_transcripts(store_dirs):
+    # Read transcript identifiers once for each distinct set of annotation
+    # data; runs performed on the same transcripts share annotation data.
+    store_transcripts = {}
+    annotation_transcripts = {}
+    for store_dir in store_dirs:
+        annotation_dir = tpm_store.get_annotation_dir(store_dir)
+        if annotation_dir not in annotation_transcripts:
+            annotation_transcripts[annotation_dir] = np.array(
+                tpm_store.read_tpm_columns(store_dir)[t.TRANSCRIPT])
+        store_transcripts[store_dir] = annotation_transcripts[annotation_dir]
+
+    transcripts = list(annotation_transcripts.values())
+    all_transcripts = transcripts[0] if len(transcripts) == 1 \
+        else np.unique(np.concatenate(transcripts))
+
+    return all_transcripts, store_transcripts
+
+
+def write_tpm_matrix(matrix_dir, run_stores):
+    """
+    Write a matrix of TPMs for a set of quantification runs.
+
+    Write the real and calculated TPMs held in the columnar TPM stores of a
+    set of quantification runs to a TPM matrix, with columns for the union of
+    all transcripts quantified, in order of transcript identifier. Rows are
+    filled one run at a time, so that the whole matrix need never be held in
+    memory.
+
+    matrix_dir: The path of the TPM matrix directory to be written.
+    run_stores: A list of (qr_options, store_dir) pairs, in which qr_options
+    is a dictionary mapping from quantification run option names to values,
+    describing a quantification run, and store_dir is the path of the
+    columnar TPM store written for that run.
+    """
+    if not os.path.exists(matrix_dir):
+        os.mkdir(matrix_dir)
+
+    store_dirs = [store_dir for _, store_dir in run_stores]
+    transcripts, store_transcripts = _get_store_transcripts(store_dirs)
+    np.save(os.path.join(matrix_dir, _TRANSCRIPTS_FILE), transcripts)
+
+    shape = (len(store_dirs), len(transcripts))
+    matrices = {
+        column: np.lib.format.open_memmap(
+            os.path.join(matrix_dir, file_name), mode="w+",
+            dtype=_TPM_DTYPE, shape=shape)
+        for column, file_name in [(t.REAL_TPM, _REAL_TPMS_FILE),
+                                  (t.CALCULATED_TPM, _CALCULATED_TPMS_FILE)]}
+
+    for row, store_dir in enumerate(store_dirs):
+        columns = tpm_store.read_tpm_columns(store_dir)
+        run_transcripts = store_transcripts[store_dir]
+        aligned = run_transcripts is transcripts
+        indices = None if aligned \
+            else np.searchsorted(transcripts, run_transcripts)
+
+        for column, matrix in matrices.items():
+            if aligned:
+                matrix[row] = columns[column]
+            else:
+                matrix[row] = np.nan
+                matrix[row, indices] = columns[column]
+
+    for matrix in matrices.values():
+        matrix.flush()
+
+    _get_runs(run_stores).to_csv(
+        os.path.join(matrix_dir, RUNS_FILE), index=False)
+
+
+class TpmMatrix(object):
+    """
+    Memory-mapped TPMs for a set of quantification runs.
+
+    runs: A pandas DataFrame describing the quantification run corresponding
+    to each matrix row, with a column for the row index, the run name, and the
+    value of each option that is an instance of
+    piquant_options._MultiQuantRunOption.
+    transcripts: An array of transcript identifiers, in matrix column order.
+    real_tpms: A memory-mapped (runs x transcripts) array of real TPMs.
+    calculated_tpms: A memory-mapped (runs x transcripts) array of calculated
+    TPMs.
+    """
+    def __init__(self, runs, transcripts, real_tpms, calculated_tpms):
+        self.runs = runs
+        self.transcripts = transcripts
+        self.real_tpms = real_tpms
+        self.calculated_tpms = calculated_tpms
+
+    def get_runs(self, fixed_option_values):
+        """
+        Select the runs with particular option values.
+
+        Return a pandas DataFrame describing those runs, in matrix row order,
+        for which each of a set of options takes a specified value.
+
+        fixed_option_values: A dictionary mapping from options (instances of
+        piquant_options._MultiQuantRunOption) to option values.
+        """
+        selected = np.ones(len(self.runs), dtype=bool)
+        for option, value in fixed_option_values.items():
+            selected &= (self.runs[option.name] == value).values
+        return self.runs[selected]
+
+    def get_tpms(self, runs, column=t.CALCULATED_TPM):
+        """
+        Return a (runs x transcripts) array of TPMs for a subset of runs.
+
+        runs: A pandas DataFrame describing a subset of runs, as returned by
+        get_runs().
+        column: The TPMs to return, either tpms.REAL_TPM or
+        tpms.CALCULATED_TPM.
+        """
+        matrix = self.real_tpms if column == t.REAL_TPM \
+            else self.calculated_tpms
+        return matrix[runs[RUN_INDEX].values]
+
+
+def read_tpm_matrix(matrix_dir):
+    """
+    Read a matrix of TPMs for a set of quantification runs.
+
+    Return a TpmMatrix instance; real and calculated TPMs are memory-mapped
+    rather than read into memory.
+
+    matrix_dir: The path of the TPM matrix directory.
+    """
+    return TpmMatrix(
+        pd.read_csv(os.path.join(matrix_dir, RUNS_FILE)),
+        np.load(os.path.join(matrix_dir, _TRANSCRIPTS_FILE)),
+        np.load(os.path.join(matrix_dir, _REAL_TPMS_FILE), mmap_mode="r"),
+        np.load(os.path.join(matrix_dir, _CALCULATED_TPMS_FILE),
+                mmap_mode="r"))
@@ -0,0 +1,276 @@
+"""
+Functions for writing and reading the real and calculated TPMs of a
+quantification run in a compact, memory-mappable columnar format. Exports:
+
+write_tpms: Write TPMs to a columnar TPM store.
+is_tpm_store: Determine if a path is a columnar TPM store.
+get_annotation_dir: Get the annotation data directory of a TPM store.
+read_tpm_columns: Memory-map the columns of a columnar TPM store.
+read_tpms: Read TPMs from a columnar TPM store or a CSV file.
+
+A TPM store is a directory containing one NumPy array file per column of
+per-run data (real and calculated TPMs), together with a file pointing to a
+directory of transcript annotation data (transcript and gene identifiers,
+sequence lengths and transcripts per gene, and optionally sequence
+composition and k-mer uniqueness). TPMs are stored as 64-bit floats, exactly
+as they are read from CSV files, so that their classification with respect
+to thresholds such as the not-present cutoff does not depend on where they
+were read from. Annotation data are
+identical for all quantification runs performed on the same set of
+transcripts, and so are written once and shared between runs. Within both
+per-run and annotation data, transcripts are held in order of their
+identifiers, so that TPMs from different runs are aligned.
+"""
+
+import hashlib
+import numpy as np
+import os
+import os.path
+import pandas as pd
+import shutil
+import tempfile
+
+from . import tpms as t
+
+ANNOTATION_POINTER_FILE = "annotation"
+
+_ANNOTATION_DIR_PREFIX = "tpm_annotation_"
+_GENE_NAMES = "gene-names"
+_GENE_CODES = "gene-codes"
+_ARRAY_FILE_EXTENSION = ".npy"
+
+_TPM_COLUMNS = [t.REAL_TPM, t.CALCULATED_TPM]
+_TPM_DTYPE = np.float64
+
+_ANNOTATION_COLUMNS = [t.LENGTH, t.UNIQUE_SEQ_LENGTH, t.TRANSCRIPT_COUNT]
+_ANNOTATION_DTYPE = np.int32
+
+# Annotation columns not present in TPM stores written before transcript
+# sequence composition and k-mer uniqueness were calculated
+_OPTIONAL_ANNOTATION_COLUMNS = [t.GC_LENGTH, t.HOMOPOLYMER_LENGTH,
+                                t.KMER_COUNT, t.UNIQUE_KMER_COUNT]
+
+# Value stored for transcripts for which an optional annotation column was
+# not calculated
+_MISSING_ANNOTATION = -1
+
+_CSV_COLUMNS = [t.TRANSCRIPT, t.GENE, t.LENGTH, t.UNIQUE_SEQ_LENGTH,
+                t.TRANSCRIPT_COUNT, t.REAL_TPM, t.CALCULATED_TPM]
+
+
+def _get_array_file(directory, column):
+    return os.path.join(directory, column + _ARRAY_FILE_EXTENSION)
+
+
+def _encode_ids(ids):
+    return np.array([str(i).encode("utf-8") for i in ids])
+
+
+def _decode_ids(ids):
+    return np.array([i.decode("utf-8") for i in ids], dtype=object)
+
+
+def _write_arrays(directory, arrays):
+    for column, array in arrays.items():
+        np.save(_get_array_file(directory, column), array)
+
+
+def _replace_directory(new_dir, existing_dir):
+    # Move a newly written directory into place, replacing any existing
+    # directory of the same name. The existing directory is first renamed
+    # aside, and only deleted once the new one is in place, so that readers
+    # never see a partially deleted directory; the path is missing only
+    # between the two renames. Files of the existing directory which are
+    # already open (e.g. memory-mapped arrays) remain readable.
+    if not os.path.exists(existing_dir):
+        os.rename(new_dir, existing_dir)
+        return
+
+    old_parent_dir = tempfile.mkdtemp(dir=os.path.dirname(existing_dir))
+    old_dir = os.path.join(old_parent_dir, "old")
+    try:
+        os.rename(existing_dir, old_dir)
+        try:
+            os.rename(new_dir, existing_dir)
+        except OSError:
+            os.rename(old_dir, existing_dir)
+            raise
+    finally:
+        shutil.rmtree(old_parent_dir)
+
+
+def _get_annotation_arrays(tpms):
+    transcripts = _encode_ids(tpms[t.TRANSCRIPT].values)
+    gene_names, gene_codes = np.unique(
+        _encode_ids(tpms[t.GENE].values), return_inverse=True)
+
+    arrays = {
+        t.TRANSCRIPT: transcripts,
+        _GENE_NAMES: gene_names,
+        _GENE_CODES: gene_codes.astype(np.int32)
+    }
+    for column in _ANNOTATION_COLUMNS:
+        arrays[column] = tpms[column].values.astype(_ANNOTATION_DTYPE)
+    for column in [c for c in _OPTIONAL_ANNOTATION_COLUMNS
+                   if c in tpms.columns]:
+        arrays[column] = tpms[column].fillna(
+            _MISSING_ANNOTATION).values.astype(_ANNOTATION_DTYPE)
+
+    return arrays
+
+
+def _get_annotation_dir_name(annotation_arrays):
+    # Annotation directories are named by a digest of their contents, so that
+    # runs performed on the same set of transcripts share annotation data,
+    # while runs on different transcript sets never do.
+    digest = hashlib.sha1()
+    for column in sorted(annotation_arrays.keys()):
+        digest.update(column.encode("utf-8"))
+        digest.update(annotation_arrays[column].tobytes())
+    return _ANNOTATION_DIR_PREFIX + digest.hexdigest()[:16]
+
+
+def _write_annotation(annotation_parent_dir, annotation_arrays):
+    annotation_dir = os.path.join(
+        annotation_parent_dir, _get_annotation_dir_name(annotation_arrays))
+
+    # Several quantification runs may be analysed simultaneously; annotation
+    # data are written to a temporary directory which is then renamed, so
+    # that readers never see partially written data.
+    if not os.path.exists(annotation_dir):
+        temp_dir = tempfile.mkdtemp(dir=annotation_parent_dir)
+        _write_arrays(temp_dir, annotation_arrays)
+        try:
+            os.rename(temp_dir, annotation_dir)
+        except OSError:
+            shutil.rmtree(temp_dir)
+
+    return annotation_dir
+
+
+def write_tpms(store_dir, tpms, annotation_parent_dir=None):
+    """
+    Write TPMs to a columnar TPM store.
+
+    Write the real and calculated TPMs of a quantification run to a columnar
+    TPM store, writing transcript annotation data alongside other runs'
+    annotation data if they are not already present.
+
+    store_dir: The path of the TPM store directory to be written; any
+    existing store at this path is replaced.
+    tpms: A pandas DataFrame with the columns of an assembled tpms.csv file.
+    annotation_parent_dir: The directory in which to store annotation data
+    shared between quantification runs; if not specified, annotation data
+    are written alongside the TPM store.
+    """
+    store_dir = os.path.abspath(store_dir)
+    store_parent_dir = os.path.dirname(store_dir)
+    if annotation_parent_dir is None:
+        annotation_parent_dir = store_parent_dir
+
+    order = np.argsort(
+        _encode_ids(tpms[t.TRANSCRIPT].values), kind="mergesort")
+    tpms = tpms.iloc[order]
+
+    annotation_dir = _write_annotation(
+        annotation_parent_dir, _get_annotation_arrays(tpms))
+
+    temp_dir = tempfile.mkdtemp(dir=store_parent_dir)
+    _write_arrays(temp_dir, {column: tpms[column].values.astype(_TPM_DTYPE)
+                             for column in _TPM_COLUMNS})
+    with open(os.path.join(temp_dir, ANNOTATION_POINTER_FILE), "w") as out:
+        out.write(os.path.relpath(annotation_dir, store_dir) + "\n")
+
+    _replace_directory(temp_dir, store_dir)
+
+
+def is_tpm_store(path):
+    """
+    Determine if a path is a columnar TPM store.
+
+    path: The path to check.
+    """
+    return os.path.isfile(os.path.join(path, ANNOTATION_POINTER_FILE))
+
+
+def get_annotation_dir(store_dir):
+    """
+    Get the annotation data directory of a TPM store.
+
+    Return the path of the directory containing the transcript annotation data
+    used by a columnar TPM store; TPM stores sharing the same annotation data
+    directory hold TPMs for the same transcripts, in the same order.
+
+    store_dir: The path of the TPM store directory.
+    """
+    with open(os.path.join(store_dir, ANNOTATION_POINTER_FILE)) as in_file:
+        return os.path.normpath(
+            os.path.join(store_dir, in_file.read().strip()))
+
+
+def _load_array(directory, column):
+    return np.load(_get_array_file(directory, column), mmap_mode="r")
+
+
+def read_tpm_columns(store_dir):
+    """
+    Memory-map the columns of a columnar TPM store.
+
+    Return a dictionary mapping column names (as in an assembled tpms.csv
+    file) to NumPy arrays of column values. Real and calculated TPMs, and
+    numeric annotation columns, are memory-mapped rather than read into
+    memory. Transcript and gene identifiers are returned as byte strings.
+    Sequence composition and k-mer uniqueness columns are only present if
+    they were written; in these, transcripts for which values were not
+    calculated have the value -1.
+
+    store_dir: The path of the TPM store directory.
+    """
+    annotation_dir = get_annotation_dir(store_dir)
+
+    columns = {column: _load_array(store_dir, column)
+               for column in _TPM_COLUMNS}
+    for column in [t.TRANSCRIPT] + _ANNOTATION_COLUMNS:
+        columns[column] = _load_array(annotation_dir, column)
+    for column in _OPTIONAL_ANNOTATION_COLUMNS:
+        if os.path.exists(_get_array_file(annotation_dir, column)):
+            columns[column] = _load_array(annotation_dir, column)
+
+    gene_names = _load_array(annotation_dir, _GENE_NAMES)
+    columns[t.GENE] = gene_names[_load_array(annotation_dir, _GENE_CODES)]
+
+    return columns
+
+
+def read_tpms(path):
+    """
+    Read TPMs from a columnar TPM store or a CSV file.
+
+    Return a pandas DataFrame with the columns of an assembled tpms.csv file,
+    read from either a columnar TPM store or such a CSV file.
+
+    path: The path of the TPM store directory or CSV file.
+    """
+    if not is_tpm_store(path):
+        return pd.read_csv(path)
+
+    columns = read_tpm_columns(path)
+    csv_columns = _CSV_COLUMNS + \
+        [c for c in _OPTIONAL_ANNOTATION_COLUMNS if c in columns]
+
+    data = {}
+    for column in csv_columns:
+        values = columns[column]
+        if column in [t.TRANSCRIPT, t.GENE]:
+            values = _decode_ids(values)
+        elif column in _TPM_COLUMNS:
+            values = values.astype(np.float64)
+        elif column in _OPTIONAL_ANNOTATION_COLUMNS:
+            values = np.where(values == _MISSING_ANNOTATION,
+                              float("nan"), values)
+        else:
+            values = np.array(values)
+        data[column] = values
+
+    return pd.DataFrame(data, columns=csv_columns)
+
@@ -6,6 +6,10 @@ GENE = "gene"
 TRANSCRIPT_COUNT = "num-transcripts"
 LENGTH = "length"
 UNIQUE_SEQ_LENGTH = "unique-length"
+GC_LENGTH = "gc-length"
+HOMOPOLYMER_LENGTH = "homopolymer-length"
+KMER_COUNT = "kmers"
+UNIQUE_KMER_COUNT = "unique-kmers"
 REAL_TPM = "real-tpm"
 CALCULATED_TPM = "calc-tpm"
 PERCENT_ERROR = "percent-error"
@@ -15,12 +19,22 @@ LOG10_RATIO = "log-ratio"
 NON_ZERO_PERCENTAGE = "non-zero-perc"
 TRUE_POSITIVE_PERCENTAGE = "tp-perc"
 
+BOXPLOT_COUNT = "count"
+BOXPLOT_LOWER_WHISKER = "lower-whisker"
+BOXPLOT_LOWER_QUARTILE = "lower-quartile"
+BOXPLOT_MEDIAN = "median"
+BOXPLOT_UPPER_QUARTILE = "upper-quartile"
+BOXPLOT_UPPER_WHISKER = "upper-whisker"
+BOXPLOT_OUTLIERS = "outliers"
+
 FALSE_POSITIVE = "false-pos"
 FALSE_NEGATIVE = "false-neg"
 TRUE_POSITIVE = "true-pos"
 TRUE_NEGATIVE = "true-neg"
 
 CUMULATIVE_DISTRIBUTION_POINTS = 20
+MAX_BOXPLOT_OUTLIERS = 50
+BOXPLOT_WHISKER_RANGE = 1.5
 
 
 def mark_positives_and_negatives(not_present_cutoff, *tpm_sets):
@@ -113,3 +127,82 @@ def get_distribution_stats(non_zero_tpms, tp_tpms, classifier, ascending):
     stats_dict[TRUE_POSITIVE_PERCENTAGE] = tp_yvals
 
     return pd.DataFrame.from_dict(stats_dict)
+
+
+def _get_sorted_quantiles(values, starts, counts, quantile):
+    # Linearly interpolate quantiles (as numpy.percentile does) within each
+    # group of a value array sorted by group, then by value.
+    position = starts + quantile * (counts - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.ceil(position).astype(int)
+    return values[lower] + (position - lower) * (values[upper] - values[lower])
+
+
+def _get_outlier_subsample(values, groups, num_groups, max_outliers):
+    # Retain at most max_outliers outliers per group, evenly spaced through
+    # each group's sorted outliers.
+    counts = np.bincount(groups, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+    ranks = np.arange(len(values)) - starts[groups]
+    keep = (ranks * max_outliers) % np.maximum(counts[groups], 1) < \
+        max_outliers
+
+    kept = values[keep]
+    kept_counts = np.bincount(groups[keep], minlength=num_groups)
+    kept_starts = np.cumsum(kept_counts) - kept_counts
+    return [" ".join(["{v:.5f}".format(v=v) for v in kept[s:s + c]])
+            for s, c in zip(kept_starts, kept_counts)]
+
+
+def get_boxplot_stats(tpms, column_name, value_column=LOG10_RATIO,
+                      max_outliers=MAX_BOXPLOT_OUTLIERS):
+    values = tpms[value_column].values.astype(np.float64)
+    valid = np.isfinite(values) & pd.notnull(tpms[column_name].values)
+    group_values, groups = np.unique(
+        tpms[column_name].values[valid], return_inverse=True)
+    values = values[valid]
+
+    # Sort values once by group, then by value; all summary statistics are
+    # then obtained for every group at once.
+    order = np.lexsort((values, groups))
+    values = values[order]
+    groups = groups[order]
+
+    counts = np.bincount(groups, minlength=len(group_values))
+    starts = np.cumsum(counts) - counts
+
+    lower_quartiles, medians, upper_quartiles = [
+        _get_sorted_quantiles(values, starts, counts, q)
+        for q in [0.25, 0.5, 0.75]]
+
+    whisker_range = BOXPLOT_WHISKER_RANGE * \
+        (upper_quartiles - lower_quartiles)
+    within_whiskers = \
+        (values >= (lower_quartiles - whisker_range)[groups]) & \
+        (values <= (upper_quartiles + whisker_range)[groups])
+
+    stats = pd.DataFrame.from_dict({
+        column_name: group_values,
+        BOXPLOT_COUNT: counts,
+        BOXPLOT_LOWER_WHISKER: np.minimum.reduceat(
+            np.where(within_whiskers, values, np.inf), starts),
+        BOXPLOT_LOWER_QUARTILE: lower_quartiles,
+        BOXPLOT_MEDIAN: medians,
+        BOXPLOT_UPPER_QUARTILE: upper_quartiles,
+        BOXPLOT_UPPER_WHISKER: np.maximum.reduceat(
+            np.where(within_whiskers, values, -np.inf), starts),
+        BOXPLOT_OUTLIERS: _get_outlier_subsample(
+            values[~within_whiskers], groups[~within_whiskers],
+            len(group_values), max_outliers)
+    })
+
+    return stats.set_index(column_name)[[
+        BOXPLOT_COUNT, BOXPLOT_LOWER_WHISKER, BOXPLOT_LOWER_QUARTILE,
+        BOXPLOT_MEDIAN, BOXPLOT_UPPER_QUARTILE, BOXPLOT_UPPER_WHISKER,
+        BOXPLOT_OUTLIERS]]
+
+
+def get_boxplot_outliers(outliers):
+    if pd.isnull(outliers) or not outliers:
+        return np.empty(0)
+    return np.array(outliers.split(), dtype=np.float64)
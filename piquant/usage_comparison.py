@@ -0,0 +1,229 @@
+"""
+Functions for comparing the resource usage of quantification runs with that
+of a baseline set of quantification runs, so that performance regressions
+(e.g. after upgrading a quantification tool) may be detected. Exports:
+
+get_compared_statistics: Return the names of the statistics compared.
+get_trial_usage: Read the resource usage of each timing trial of each run.
+compare_usage: Compare the resource usage of matching quantification runs.
+get_regressions: Return comparisons which indicate a performance regression.
+write_usage_comparison: Write a resource usage comparison to a CSV file.
+
+Quantification runs are matched by the values of the options describing them
+(e.g. quantification method and read depth). For each pair of matching runs,
+the relative change in total elapsed real time, total CPU time and maximum
+resident memory is calculated between the median values over the timing
+trials of each run. Where both runs were executed in more than one timing
+trial, a one-sided Welch's t-test is used to determine whether resource usage
+has significantly increased.
+"""
+
+import numpy as np
+import os.path
+import pandas as pd
+import scipy.stats
+
+from . import piquant_options as po
+from . import resource_usage as ru
+from . import statistics
+
+USAGE_COMPARISON_FILE = "quant_usage_comparison.csv"
+
+REAL_TIME = "real-time"
+CPU_TIME = "cpu-time"
+MAX_MEMORY = "max-memory"
+
+STATISTIC = "statistic"
+BASELINE = "baseline"
+NEW = "new"
+PERCENT_CHANGE = "percent-change"
+P_VALUE = "p-value"
+BASELINE_TRIALS = "baseline-trials"
+NEW_TRIALS = "new-trials"
+REGRESSION = "regression"
+
+_COMPARED_STATS = [REAL_TIME, CPU_TIME, MAX_MEMORY]
+
+
+def get_compared_statistics():
+    """Return the names of the resource usage statistics compared."""
+    return list(_COMPARED_STATS)
+
+
+def _get_run_columns(usage):
+    options = sorted(
+        po.get_multiple_quant_run_options(), key=lambda o: o.index)
+    return [o.name for o in options if o.name in usage.columns]
+
+
+def _get_trial_usage_from_commands(command_usage):
+    # Per-command resource usage is recorded in the units in which it was
+    # measured, i.e. seconds and kilobytes
+    if ru.TRIAL not in command_usage.columns:
+        command_usage[ru.TRIAL] = 1
+
+    command_usage[CPU_TIME] = \
+        command_usage["user-time"] + command_usage["sys-time"]
+
+    trials = command_usage.groupby(
+        _get_run_columns(command_usage) + [ru.TRIAL])
+
+    trial_usage = pd.DataFrame({
+        REAL_TIME: trials[REAL_TIME].sum(),
+        CPU_TIME: trials[CPU_TIME].sum(),
+        MAX_MEMORY: trials[MAX_MEMORY].max() / 1048576.0
+    })
+    return trial_usage.reset_index()
+
+
+def _get_trial_usage_from_summary(usage_summary):
+    # Resource usage summaries record times as log10 totals and memory in
+    # gigabytes; if runs were executed in more than one timing trial, only
+    # the median values over all trials are available
+    trial_usage = usage_summary[_get_run_columns(usage_summary)].copy()
+    trial_usage[REAL_TIME] = 10 ** usage_summary["real-time"]
+    trial_usage[CPU_TIME] = \
+        10 ** usage_summary["user-time"] + 10 ** usage_summary["sys-time"]
+    trial_usage[MAX_MEMORY] = usage_summary["max-memory"]
+    return trial_usage
+
+
+def get_trial_usage(stats_dir):
+    """
+    Read the resource usage of each timing trial of each quantification run.
+
+    Return a pandas DataFrame with a row for each timing trial of each
+    quantification run whose resource usage was gathered by the piquant
+    command analyse_runs, containing the values of options describing the
+    run, and the total elapsed real time and CPU time (in seconds) and maximum
+    resident memory (in gigabytes) of the quantification commands executed.
+    If per-command resource usage was not recorded (i.e. by earlier versions
+    of piquant), a single row is returned for each run, derived from its
+    resource usage summary. Return None if no resource usage was found.
+
+    stats_dir: The statistics directory written by analyse_runs.
+    """
+    command_usage_file = ru.get_command_usage_file(
+        ru.QUANT_RESOURCE_TYPE, prefix=ru.OVERALL_USAGE_PREFIX,
+        directory=stats_dir)
+    if os.path.exists(command_usage_file):
+        return _get_trial_usage_from_commands(pd.read_csv(command_usage_file))
+
+    usage_file = ru.get_resource_usage_file(
+        ru.QUANT_RESOURCE_TYPE, prefix=ru.OVERALL_USAGE_PREFIX,
+        directory=stats_dir)
+    if os.path.exists(usage_file):
+        return _get_trial_usage_from_summary(pd.read_csv(usage_file))
+
+    return None
+
+
+def _get_p_value(baseline_values, new_values):
+    # One-sided Welch's t-test of whether resource usage has increased, which
+    # requires at least two trials of each run
+    if len(baseline_values) < 2 or len(new_values) < 2:
+        return float("nan")
+
+    if baseline_values.std() == 0 and new_values.std() == 0:
+        return 0.0 if new_values.mean() > baseline_values.mean() else 1.0
+
+    t_stat, p_value = scipy.stats.ttest_ind(
+        new_values, baseline_values, equal_var=False)
+    return p_value / 2 if t_stat > 0 else 1 - p_value / 2
+
+
+def _get_percent_change(baseline_value, new_value):
+    if baseline_value == 0:
+        return 0.0 if new_value == 0 else float("inf")
+    return 100.0 * (new_value - baseline_value) / baseline_value
+
+
+def compare_usage(baseline_usage, new_usage, threshold, significance_level):
+    """
+    Compare the resource usage of matching quantification runs.
+
+    Return a pandas DataFrame with a row for each compared resource usage
+    statistic of each quantification run in 'new_usage' for which there is a
+    run in 'baseline_usage' with the same option values (only options
+    recorded for both sets of runs are considered). Each row contains the
+    option values, the name of the statistic, its median value over all
+    trials of the baseline and new runs, the percentage change between these,
+    the p-value of a one-sided test of whether the statistic has increased
+    (or NaN if either run has only one trial), the numbers of trials, and
+    whether the change is a regression: an increase of more than 'threshold'
+    percent which, if a p-value could be calculated, is also significant.
+    Return None if no runs match.
+
+    baseline_usage: A pandas DataFrame of per-trial resource usage of the
+    baseline runs, as returned by get_trial_usage().
+    new_usage: A pandas DataFrame of per-trial resource usage of the runs to
+    be compared with the baseline.
+    threshold: The percentage increase above which a change is a regression.
+    significance_level: The p-value below which an increase is significant.
+    """
+    run_columns = [c for c in _get_run_columns(new_usage)
+                   if c in baseline_usage.columns]
+
+    comparisons = []
+    for run_values, new_trials in new_usage.groupby(run_columns):
+        if not isinstance(run_values, tuple):
+            run_values = (run_values,)
+
+        matching = np.ones(len(baseline_usage), dtype=bool)
+        for column, value in zip(run_columns, run_values):
+            matching &= (baseline_usage[column] == value).values
+        baseline_trials = baseline_usage[matching]
+
+        if len(baseline_trials) == 0:
+            continue
+
+        for stat in _COMPARED_STATS:
+            baseline_values = baseline_trials[stat].dropna()
+            new_values = new_trials[stat].dropna()
+            if len(baseline_values) == 0 or len(new_values) == 0:
+                continue
+
+            comparison = dict(zip(run_columns, run_values))
+            comparison[STATISTIC] = stat
+            comparison[BASELINE] = baseline_values.median()
+            comparison[NEW] = new_values.median()
+            comparison[PERCENT_CHANGE] = _get_percent_change(
+                comparison[BASELINE], comparison[NEW])
+            comparison[P_VALUE] = _get_p_value(baseline_values, new_values)
+            comparison[BASELINE_TRIALS] = len(baseline_values)
+            comparison[NEW_TRIALS] = len(new_values)
+            comparison[REGRESSION] = \
+                comparison[PERCENT_CHANGE] > threshold and \
+                (np.isnan(comparison[P_VALUE]) or
+                 comparison[P_VALUE] < significance_level)
+
+            comparisons.append(comparison)
+
+    if not comparisons:
+        return None
+
+    columns = run_columns + [
+        STATISTIC, BASELINE, NEW, PERCENT_CHANGE, P_VALUE,
+        BASELINE_TRIALS, NEW_TRIALS, REGRESSION]
+    return pd.DataFrame(comparisons)[columns]
+
+
+def get_regressions(comparison):
+    """
+    Return comparisons which indicate a performance regression.
+
+    comparison: A pandas DataFrame, as returned by compare_usage().
+    """
+    return comparison[comparison[REGRESSION].astype(bool).values]
+
+
+def write_usage_comparison(stats_dir, comparison):
+    """
+    Write a resource usage comparison to a CSV file.
+
+    stats_dir: The directory in which to write the comparison file.
+    comparison: A pandas DataFrame, as returned by compare_usage().
+    """
+    statistics.write_stats_data(
+        os.path.join(stats_dir, USAGE_COMPARISON_FILE), comparison,
+        index=False)
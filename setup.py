@@ -37,12 +37,18 @@ setup(
         'bin/analyse_quantification_run',
         'bin/assemble_quantification_data',
         'bin/calculate_reads_for_depth',
+        'bin/calculate_transcript_composition',
+        'bin/calculate_unique_kmers',
         'bin/calculate_unique_transcript_sequence',
         'bin/count_transcripts_for_genes',
+        'bin/extract_transcript_sequences',
         'bin/fix_antisense_reads',
+        'bin/monitor_resource_usage',
         'bin/piquant',
         'bin/randomise_read_strands',
-        'bin/simulate_read_bias'
+        'bin/set_cache_state',
+        'bin/simulate_read_bias',
+        'bin/simulate_reads'
     ],
     package_data={
         'piquant': ['bias_motif.pwm'],
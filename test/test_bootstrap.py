@@ -0,0 +1,154 @@
+import piquant.bootstrap as bootstrap
+import piquant.statistics as statistics
+import piquant.tpms as t
+import numpy as np
+import pandas as pd
+import test_tpms
+
+NUM_RESAMPLES = 200
+
+
+def _get_test_tpms():
+    tpms = pd.DataFrame.from_dict({
+        t.REAL_TPM: test_tpms.REAL_TPMS_VALS,
+        t.CALCULATED_TPM: test_tpms.CALC_TPMS_VALS,
+        test_tpms.GROUP_TEST_COL: test_tpms.GROUPS
+    })
+
+    t.calculate_log_ratios(tpms)
+    t.calculate_percent_error(tpms)
+    t.mark_positives_and_negatives(0.1, tpms)
+
+    return tpms
+
+
+def _get_statistic(name):
+    return [s for s in statistics.get_statistics() if s.name == name][0]
+
+
+def _get_unit_weights(tpms):
+    return np.ones((1, len(tpms)), dtype=int)
+
+
+def _get_random_weights(tpms, seed=1):
+    random_state = np.random.RandomState(seed)
+    indices = random_state.randint(0, len(tpms), (1, len(tpms)))
+    return bootstrap._get_resample_weights(indices, len(tpms))
+
+
+def _get_resampled_tpms(tpms, weights):
+    data = bootstrap.ResamplingData(tpms)
+    return tpms.iloc[np.repeat(data.order, weights[0])]
+
+
+def _check_resampled_statistic(stat_name, weights_func):
+    tpms = _get_test_tpms()
+    weights = weights_func(tpms)
+    resampled_tpms = _get_resampled_tpms(tpms, weights)
+
+    stat = _get_statistic(stat_name)
+    value = stat.calculate_resampled(
+        bootstrap.ResamplingData(tpms), weights)[0]
+    correct_value = stat.calculate(
+        resampled_tpms, t.get_true_positives(resampled_tpms))
+
+    assert np.isclose(value, correct_value)
+
+
+def test_sorted_values_identifies_runs_of_tied_values():
+    sorted_values = bootstrap.SortedValues(np.array([3, 1, 3, 2, 1]))
+    assert list(sorted_values.values) == [1, 1, 2, 3, 3]
+    assert list(sorted_values.starts) == [0, 2, 3]
+    assert list(sorted_values.groups) == [0, 0, 1, 2, 2]
+
+
+def test_get_resample_weights_counts_drawn_indices():
+    indices = np.array([[0, 0, 2], [1, 2, 1]])
+    weights = bootstrap._get_resample_weights(indices, 3)
+    assert weights.tolist() == [[2, 0, 1], [0, 2, 1]]
+
+
+def test_get_batches_covers_all_resamples():
+    batches = bootstrap._get_batches(
+        bootstrap._MAX_BATCH_ELEMENTS // 10, 25)
+    assert sum([size for seed, size in batches]) == 25
+    assert len(set([seed for seed, size in batches])) == len(batches)
+
+
+def test_resampled_spearman_correlation_matches_unweighted_value():
+    _check_resampled_statistic("tp-log-tpm-rho", _get_unit_weights)
+
+
+def test_resampled_spearman_correlation_matches_resampled_value():
+    _check_resampled_statistic("tp-log-tpm-rho", _get_random_weights)
+
+
+def test_resampled_median_percent_error_matches_unweighted_value():
+    _check_resampled_statistic("tp-median-percent-error", _get_unit_weights)
+
+
+def test_resampled_median_percent_error_matches_resampled_value():
+    _check_resampled_statistic("tp-median-percent-error", _get_random_weights)
+
+
+def test_resampled_error_fraction_matches_resampled_value():
+    _check_resampled_statistic("tp-error-frac", _get_random_weights)
+
+
+def test_resampled_sensitivity_matches_resampled_value():
+    _check_resampled_statistic("sensitivity", _get_random_weights)
+
+
+def test_resampled_specificity_matches_resampled_value():
+    _check_resampled_statistic("specificity", _get_random_weights)
+
+
+def test_resampled_num_true_positives_matches_resampled_value():
+    _check_resampled_statistic(statistics.TP_NUM_TPMS, _get_random_weights)
+
+
+def test_get_confidence_intervals_brackets_statistic():
+    tpms = _get_test_tpms()
+    stats = statistics.get_statistics()
+    intervals = bootstrap.get_confidence_intervals(
+        tpms, stats, NUM_RESAMPLES)
+
+    for stat in [_get_statistic("sensitivity"),
+                 _get_statistic("specificity")]:
+        lower_col, upper_col = statistics.get_interval_columns(stat.name)
+        value = stat.calculate(tpms, t.get_true_positives(tpms))
+        assert intervals[lower_col] <= value <= intervals[upper_col]
+
+
+def test_get_confidence_intervals_omits_fixed_statistics():
+    tpms = _get_test_tpms()
+    intervals = bootstrap.get_confidence_intervals(
+        tpms, statistics.get_statistics(), NUM_RESAMPLES)
+
+    lower_col, upper_col = statistics.get_interval_columns("num-tpms")
+    assert lower_col not in intervals
+    assert upper_col not in intervals
+
+
+def test_get_confidence_intervals_is_reproducible():
+    tpms = _get_test_tpms()
+    stats = statistics.get_statistics()
+    assert bootstrap.get_confidence_intervals(tpms, stats, NUM_RESAMPLES) == \
+        bootstrap.get_confidence_intervals(tpms, stats, NUM_RESAMPLES)
+
+
+def test_get_grouped_confidence_intervals_returns_intervals_per_group():
+    tpms = _get_test_tpms()
+    intervals = bootstrap.get_grouped_confidence_intervals(
+        tpms, test_tpms.GROUP_TEST_COL, statistics.get_statistics(),
+        NUM_RESAMPLES)
+
+    assert sorted(intervals.index.tolist()) == sorted(set(test_tpms.GROUPS))
+    lower_col, upper_col = statistics.get_interval_columns("sensitivity")
+    assert (intervals[lower_col] <= intervals[upper_col]).all()
+
+
+def test_weighted_ranks_averages_ranks_of_tied_values():
+    sorted_values = bootstrap.SortedValues(np.array([1, 1, 2]))
+    ranks = statistics._weighted_ranks(np.array([[1, 2, 1]]), sorted_values)
+    assert ranks.tolist() == [[2, 2, 4]]
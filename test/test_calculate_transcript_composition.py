@@ -0,0 +1,64 @@
+import piquant.calculate_transcript_composition as ctc
+import piquant.genome as genome
+import piquant.gtf as gtf
+import piquant.tpms as t
+import numpy as np
+import os
+import os.path
+import utils
+
+
+def _get_composition(sequences, min_homopolymer_length=4):
+    concatenated = np.frombuffer(
+        "".join(sequences).encode("ascii"), dtype=np.uint8)
+    return ctc.get_sequence_composition(
+        concatenated, [len(s) for s in sequences], min_homopolymer_length)
+
+
+def test_gc_bases_are_counted_for_each_sequence():
+    gc_lengths, _ = _get_composition(["ACGT", "GGCC", "AATT"])
+    assert list(gc_lengths) == [2, 4, 0]
+
+
+def test_homopolymer_bases_are_counted_for_each_sequence():
+    _, homopolymer_lengths = _get_composition(
+        ["AAAAACGT", "ACGTTTT", "ACCCGT"])
+    assert list(homopolymer_lengths) == [5, 4, 0]
+
+
+def test_homopolymers_do_not_span_sequences():
+    _, homopolymer_lengths = _get_composition(["ACGTT", "TTACG"])
+    assert list(homopolymer_lengths) == [0, 0]
+
+
+def test_runs_of_unknown_bases_are_not_homopolymers():
+    _, homopolymer_lengths = _get_composition(["ACNNNNNNGT"])
+    assert list(homopolymer_lengths) == [0]
+
+
+def test_transcript_composition_is_calculated_from_genome():
+    with utils.temp_dir_created() as dir_name:
+        genome_dir = os.path.join(dir_name, "genome")
+        os.mkdir(genome_dir)
+        with open(os.path.join(genome_dir, "chr1.fa"), "w") as out_file:
+            out_file.write(">chr1\nacgtaaaaaa\nccgggtttac\n")
+
+        gtf_file = os.path.join(dir_name, "transcripts.gtf")
+        with open(gtf_file, "w") as out_file:
+            for transcript, start, end, strand in [
+                    ("T1", 1, 4, "+"), ("T1", 11, 15, "+"),
+                    ("T2", 5, 12, "-")]:
+                out_file.write("\t".join([
+                    "chr1", "test", "exon", str(start), str(end), ".",
+                    strand, ".", "gene_id \"G1\"; " +
+                    "transcript_id \"{t}\"; exon_number \"1\"".format(
+                        t=transcript)]) + "\n")
+
+        composition = ctc.get_transcript_composition(
+            genome.Genome(genome_dir), gtf.read_transcripts(gtf_file), 6)
+
+    composition = composition.set_index(t.TRANSCRIPT)
+    assert composition.loc["T1"][t.GC_LENGTH] == 7
+    assert composition.loc["T1"][t.HOMOPOLYMER_LENGTH] == 0
+    assert composition.loc["T2"][t.GC_LENGTH] == 2
+    assert composition.loc["T2"][t.HOMOPOLYMER_LENGTH] == 6
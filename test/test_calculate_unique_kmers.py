@@ -0,0 +1,100 @@
+import piquant.calculate_unique_kmers as cuk
+import piquant.genome as genome
+import piquant.gtf as gtf
+import piquant.tpms as t
+import numpy as np
+import os
+import os.path
+import schema
+import utils
+
+
+def _get_kmers(sequences, kmer_length):
+    concatenated = np.frombuffer(
+        "".join(sequences).encode("ascii"), dtype=np.uint8)
+    return cuk.get_kmers(
+        concatenated, [len(s) for s in sequences], kmer_length)
+
+
+def _encode(kmer):
+    return sum("ACGT".index(base) << 2 * (len(kmer) - i - 1)
+               for i, base in enumerate(kmer))
+
+
+def test_kmers_are_two_bit_encoded_in_canonical_form():
+    kmers, _ = _get_kmers(["ACGTA"], 3)
+    # CGT is represented by its reverse complement, ACG
+    assert list(kmers) == [_encode("ACG"), _encode("ACG"), _encode("GTA")]
+
+
+def test_kmers_do_not_span_sequences():
+    kmers, indices = _get_kmers(["AACC", "GGTT"], 3)
+    # GGT and GTT are the reverse complements of ACC and AAC
+    assert list(kmers) == [_encode("AAC"), _encode("ACC"),
+                           _encode("ACC"), _encode("AAC")]
+    assert list(indices) == [0, 0, 1, 1]
+
+
+def test_kmers_containing_unknown_bases_are_omitted():
+    kmers, _ = _get_kmers(["AACNAAC"], 3)
+    assert list(kmers) == [_encode("AAC"), _encode("AAC")]
+
+
+def test_sequences_shorter_than_kmers_have_no_kmers():
+    kmers, indices = _get_kmers(["AC"], 3)
+    assert len(kmers) == 0 and len(indices) == 0
+
+
+def test_distinct_kmers_record_owning_sequence():
+    kmers, owners, counts = cuk.get_distinct_kmers(
+        *(_get_kmers(["AAAAC", "AACGG", "TTT"], 3) + (3,)))
+    owned = dict(zip(kmers, owners))
+
+    assert list(counts) == [2, 3, 1]
+    assert owned[_encode("AAA")] == -1
+    assert owned[_encode("AAC")] == -1
+    assert owned[_encode("ACG")] == 1
+
+
+def test_kmer_length_must_be_at_most_31():
+    assert cuk.validate_kmer_length("31") == 31
+    try:
+        cuk.validate_kmer_length("32")
+        assert False
+    except schema.SchemaError:
+        pass
+
+
+def test_unique_kmers_are_counted_across_chromosomes_and_chunks():
+    with utils.temp_dir_created() as dir_name:
+        for chromosome, sequence in [("chr1", "ACGTTGCAAG"),
+                                     ("chr2", "TTGCAGGATC")]:
+            with open(os.path.join(dir_name, chromosome + ".fa"), "w") as out:
+                out.write(">{c}\n{s}\n".format(c=chromosome, s=sequence))
+
+        gtf_file = os.path.join(dir_name, "transcripts.gtf")
+        with open(gtf_file, "w") as out_file:
+            for chromosome, transcript, start, end in [
+                    ("chr1", "T1", 1, 6), ("chr2", "T2", 1, 5),
+                    ("chr1", "T3", 7, 10)]:
+                out_file.write("\t".join([
+                    chromosome, "test", "exon", str(start), str(end), ".",
+                    "+", ".", "gene_id \"G1\"; " +
+                    "transcript_id \"{t}\"; exon_number \"1\"".format(
+                        t=transcript)]) + "\n")
+
+        max_chunk_bases = cuk._MAX_CHUNK_BASES
+        cuk._MAX_CHUNK_BASES = 5
+        try:
+            unique_kmers = cuk.get_unique_kmers(
+                genome.Genome(dir_name), gtf.read_transcripts(gtf_file), 3)
+        finally:
+            cuk._MAX_CHUNK_BASES = max_chunk_bases
+
+    # T1 (ACGTTG) has canonical k-mers ACG, AAC and CAA, T2 (TTGCA) has CAA
+    # and GCA, and T3 (CAAG) has CAA and AAG
+    unique_kmers = unique_kmers.set_index(t.TRANSCRIPT)
+    assert list(unique_kmers.loc[["T1", "T2", "T3"]][t.KMER_COUNT]) == \
+        [3, 2, 2]
+    assert list(unique_kmers.loc[["T1", "T2", "T3"]][t.UNIQUE_KMER_COUNT]) \
+        == [2, 1, 1]
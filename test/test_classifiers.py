@@ -1,4 +1,5 @@
 import pandas as pd
+import pickle
 import piquant.classifiers as classifiers
 
 
@@ -109,3 +110,34 @@ def test_levels_classifier_get_value_labels_returns_correct_labels_for_open_clas
         ["<= 10", "<= 20", "<= 30", "<= 40"]
     assert c.get_value_labels(len(levels) - 1) == \
         ["<= 10", "<= 20", "<= 30"]
+
+
+def test_classifiers_can_be_pickled():
+    for clsfr in classifiers.get_classifiers():
+        assert pickle.loads(pickle.dumps(clsfr)) is clsfr
+
+
+def test_levels_classifier_does_not_classify_missing_values():
+    c = _get_test_levels_classifier()
+    assert pd.isnull(c.get_classification_value(float("nan")))
+
+
+def test_gc_classifier_skips_missing_composition():
+    c = classifiers._get_classifier("GC content percentage")
+    row = pd.Series({"length": 1000})
+    assert pd.isnull(c.get_classification_value(row))
+
+    row = pd.Series({"length": 1000, "gc-length": 480})
+    assert c.get_classification_value(row) == 2
+
+
+def test_unique_kmer_classifier_classifies_by_percentage_of_kmers():
+    c = classifiers._get_classifier("unique k-mer percentage")
+    row = pd.Series({"length": 1000, "kmers": 500, "unique-kmers": 150})
+    assert c.get_classification_value(row) == 1
+
+
+def test_unique_kmer_classifier_skips_transcripts_without_kmers():
+    c = classifiers._get_classifier("unique k-mer percentage")
+    row = pd.Series({"length": 20, "kmers": 0, "unique-kmers": 0})
+    assert pd.isnull(c.get_classification_value(row))
@@ -0,0 +1,90 @@
+import piquant.concordance as concordance
+import piquant.piquant_options as po
+import piquant.tpm_matrix as tpm_matrix
+import piquant.tpms as t
+import numpy as np
+import pandas as pd
+import scipy.stats
+
+NOT_PRESENT_CUTOFF = 0.1
+
+TPMS = np.array([
+    [0, 1, 5, 20, 3, 0.05, 100, 8],
+    [0.2, 2, 4, 25, 3, 0, 90, 1],
+    [0, 0, 6, 10, 30, 1, 80, 8]])
+
+
+def _get_test_matrix():
+    runs = pd.DataFrame.from_dict({
+        tpm_matrix.RUN_INDEX: [0, 1, 2, 3, 4],
+        po.QUANT_METHOD.name: ["A", "B", "C", "A", "B"],
+        po.READ_DEPTH.name: [10, 10, 10, 20, 20]
+    })
+    calc_tpms = np.vstack([TPMS, TPMS[:2]])
+    return tpm_matrix.TpmMatrix(runs, None, None, calc_tpms)
+
+
+def test_concordance_spearman_matches_pairwise_value():
+    values = concordance.get_concordance(TPMS, NOT_PRESENT_CUTOFF)
+    for i in range(len(TPMS)):
+        for j in range(len(TPMS)):
+            correct_value = scipy.stats.spearmanr(TPMS[i], TPMS[j])[0]
+            assert np.isclose(values[concordance.SPEARMAN][i, j],
+                              correct_value)
+
+
+def test_concordance_discordant_calls_matches_pairwise_value():
+    values = concordance.get_concordance(TPMS, NOT_PRESENT_CUTOFF)
+    present = TPMS > NOT_PRESENT_CUTOFF
+    for i in range(len(TPMS)):
+        for j in range(len(TPMS)):
+            correct_value = (present[i] != present[j]).sum()
+            assert values[concordance.DISCORDANT_CALLS][i, j] == correct_value
+            assert np.isclose(
+                values[concordance.DISCORDANT_FRACTION][i, j],
+                correct_value / float(TPMS.shape[1]))
+
+
+def test_concordance_mean_abs_log_ratio_matches_pairwise_value():
+    values = concordance.get_concordance(TPMS, NOT_PRESENT_CUTOFF)
+    present = TPMS > NOT_PRESENT_CUTOFF
+    for i in range(len(TPMS)):
+        for j in range(len(TPMS)):
+            both_present = present[i] & present[j]
+            correct_value = np.abs(
+                np.log10(TPMS[i, both_present]) -
+                np.log10(TPMS[j, both_present])).mean()
+            assert np.isclose(
+                values[concordance.MEAN_ABS_LOG_RATIO][i, j], correct_value)
+
+
+def test_concordance_ignores_transcripts_with_missing_tpms():
+    tpms = np.hstack([TPMS, [[np.nan], [5], [5]]])
+    values = concordance.get_concordance(tpms, NOT_PRESENT_CUTOFF)
+    correct_values = concordance.get_concordance(TPMS, NOT_PRESENT_CUTOFF)
+    for measure in values:
+        assert np.allclose(values[measure], correct_values[measure])
+
+
+def test_concordance_stats_has_row_per_pair_of_methods_per_reads():
+    stats = concordance.get_concordance_stats(
+        _get_test_matrix(), NOT_PRESENT_CUTOFF)
+
+    depth_10_stats = stats[stats[po.READ_DEPTH.name] == 10]
+    depth_20_stats = stats[stats[po.READ_DEPTH.name] == 20]
+    assert len(depth_10_stats) == 9
+    assert len(depth_20_stats) == 4
+
+
+def test_concordance_stats_holds_values_for_each_pair_of_methods():
+    stats = concordance.get_concordance_stats(
+        _get_test_matrix(), NOT_PRESENT_CUTOFF)
+    values = concordance.get_concordance(TPMS, NOT_PRESENT_CUTOFF)
+
+    methods = ["A", "B", "C"]
+    depth_10_stats = stats[stats[po.READ_DEPTH.name] == 10]
+    for _, row in depth_10_stats.iterrows():
+        i = methods.index(row[po.QUANT_METHOD.name])
+        j = methods.index(row[concordance.OTHER_QUANT_METHOD])
+        assert np.isclose(row[concordance.SPEARMAN],
+                          values[concordance.SPEARMAN][i, j])
@@ -0,0 +1,116 @@
+import piquant.extract_transcript_sequences as ets
+import piquant.file_writer as fw
+import piquant.gtf as gtf
+import piquant.quantifiers as qs
+import io
+import os
+import os.path
+import random
+import utils
+
+COMPLEMENT = {"A": "T", "C": "G", "G": "C", "T": "A"}
+
+EXONS = [
+    ("chr2", "T1", 101, 200, "+"),
+    ("chr2", "T1", 301, 350, "+"),
+    ("chr1", "T2", 51, 150, "-"),
+    ("chr1", "T2", 201, 260, "-"),
+    ("chr2", "T3", 401, 480, "-"),
+    ("chr1", "T4", 11, 40, "+")
+]
+
+
+def _reverse_complement(sequence):
+    return "".join(COMPLEMENT[base] for base in reversed(sequence))
+
+
+def _write_test_files(dir_name):
+    rand = random.Random(1)
+    chromosomes = {}
+    for chromosome in ["chr1", "chr2"]:
+        sequence = "".join(rand.choice("ACGT") for _ in range(500))
+        with open(os.path.join(dir_name, chromosome + ".fa"), "w") as out:
+            out.write(">" + chromosome + "\n")
+            for i in range(0, len(sequence), 70):
+                out.write(sequence[i:i + 70] + "\n")
+        chromosomes[chromosome] = sequence
+
+    gtf_file = os.path.join(dir_name, "transcripts.gtf")
+    with open(gtf_file, "w") as out_file:
+        for chromosome, transcript, start, end, strand in EXONS:
+            out_file.write("\t".join([
+                chromosome, "test", "exon", str(start), str(end), ".",
+                strand, ".", "gene_id \"G{t}\"; transcript_id \"{t}\"; ".
+                format(t=transcript) + "exon_number \"1\""]) + "\n")
+
+    return chromosomes, gtf_file
+
+
+def _get_transcript_sequences(chromosomes):
+    chr1 = chromosomes["chr1"]
+    chr2 = chromosomes["chr2"]
+    return {
+        "T1": chr2[100:200] + chr2[300:350],
+        "T2": _reverse_complement(chr1[50:150] + chr1[200:260]),
+        "T3": _reverse_complement(chr2[400:480]),
+        "T4": chr1[10:40]
+    }
+
+
+def _write_transcript_sequences(processes):
+    with utils.temp_dir_created() as dir_name:
+        chromosomes, gtf_file = _write_test_files(dir_name)
+        out_file = io.BytesIO()
+        ets.write_transcript_sequences(
+            out_file, dir_name, gtf.read_transcripts(gtf_file), processes)
+
+    return chromosomes, out_file.getvalue().decode("ascii").splitlines()
+
+
+def _get_preparatory_commands(quantifier):
+    writer = fw.BashScriptWriter()
+    quantifier.write_preparatory_commands(writer, False, {
+        qs.TRANSCRIPT_GTF_FILE: "transcripts.gtf",
+        qs.GENOME_FASTA_DIR: "genome",
+        qs.QUANTIFIER_DIRECTORY: "quantifier_scratch",
+        qs.NUM_THREADS: 4
+    })
+    return "\n".join(writer.lines)
+
+
+def test_fasta_records_are_written_for_each_transcript():
+    chromosomes, lines = _write_transcript_sequences(1)
+    expected = _get_transcript_sequences(chromosomes)
+
+    assert len(lines) == 8
+    for name, sequence in zip(lines[::2], lines[1::2]):
+        assert name.startswith(">")
+        assert sequence == expected[name[1:]]
+
+
+def test_transcripts_are_written_grouped_by_chromosome_in_gtf_order():
+    _, lines = _write_transcript_sequences(1)
+    assert lines[::2] == [">T1", ">T3", ">T2", ">T4"]
+
+
+def test_parallel_extraction_writes_same_sequences():
+    _, serial_lines = _write_transcript_sequences(1)
+    _, parallel_lines = _write_transcript_sequences(2)
+    assert parallel_lines == serial_lines
+
+
+def test_index_only_quantifiers_extract_transcript_sequences():
+    for quantifier in ["Sailfish", "Salmon"]:
+        commands = _get_preparatory_commands(
+            qs.get_quantification_methods()[quantifier])
+        assert "rsem-prepare-reference" not in commands
+        assert "extract_transcript_sequences --processes=4 " + \
+            "transcripts.gtf genome " in commands
+
+
+def test_rsem_based_quantifiers_prepare_rsem_reference():
+    for quantifier in ["RSEM", "Express"]:
+        commands = _get_preparatory_commands(
+            qs.get_quantification_methods()[quantifier])
+        assert "rsem-prepare-reference" in commands
+        assert "extract_transcript_sequences" not in commands
@@ -105,3 +105,11 @@ def test_write_flux_simulator_params_files_writes_correct_params_when_paired_end
         d = _get_simulation_params_dict(dirname)
         assert d["PAIRED_END"] == "YES"
         assert d["UNIQUE_IDS"] == "YES"
+
+
+def test_read_num_reads_returns_number_of_reads_recorded():
+    with temp_dir_created() as dirname:
+        num_reads_file = os.path.join(dirname, fs.NUM_READS_FILE)
+        with open(num_reads_file, "w") as f:
+            f.write("123456\n")
+        assert fs.read_num_reads(num_reads_file) == 123456
@@ -0,0 +1,144 @@
+import piquant.genome as genome
+import numpy as np
+import os
+import os.path
+import random
+import utils
+
+LINE_LENGTH = 60
+SEQUENCE_LENGTH = 1000
+
+
+def _get_test_sequence(length=SEQUENCE_LENGTH):
+    rand = random.Random(1)
+    return "".join(rand.choice("ACGT") for _ in range(length))
+
+
+def _write_fasta_file(dir_name, name, sequence, line_length=LINE_LENGTH):
+    fasta_file = os.path.join(dir_name, name + ".fa")
+    with open(fasta_file, "w") as out_file:
+        out_file.write(">" + name + " description\n")
+        for i in range(0, len(sequence), line_length):
+            out_file.write(sequence[i:i + line_length] + "\n")
+    return fasta_file
+
+
+def _get_sequence_string(sequence):
+    return np.asarray(sequence).tobytes().decode("ascii")
+
+
+def test_fasta_index_describes_sequence_layout():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = _write_fasta_file(dir_name, "chr1", _get_test_sequence())
+        index = genome.build_fasta_index(fasta_file)
+
+    assert index == [genome.FastaIndexEntry(
+        "chr1", SEQUENCE_LENGTH, len(">chr1 description\n"),
+        LINE_LENGTH, LINE_LENGTH + 1)]
+
+
+def test_fasta_index_cannot_be_built_for_uneven_lines():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = os.path.join(dir_name, "chr1.fa")
+        with open(fasta_file, "w") as out_file:
+            out_file.write(">chr1\nACGT\nAC\nACGT\n")
+
+        try:
+            genome.build_fasta_index(fasta_file)
+            assert False
+        except ValueError:
+            pass
+
+
+def test_fasta_index_cannot_be_built_for_blank_lines_within_sequence():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = os.path.join(dir_name, "chr1.fa")
+        with open(fasta_file, "w") as out_file:
+            out_file.write(">chr1\nACGTACGTAC\n\nGGGGGCCCCC\nAC\n")
+
+        try:
+            genome.build_fasta_index(fasta_file)
+            assert False
+        except ValueError:
+            pass
+
+
+def test_fasta_index_allows_blank_lines_at_end_of_sequence():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = os.path.join(dir_name, "chr1.fa")
+        with open(fasta_file, "w") as out_file:
+            out_file.write(">chr1\nACGT\nAC\n\n>chr2\nACGT\n\n")
+        index = genome.build_fasta_index(fasta_file)
+
+    assert [(e.name, e.length) for e in index] == [("chr1", 6), ("chr2", 4)]
+
+
+def test_fasta_index_is_cached_alongside_fasta_file():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = _write_fasta_file(dir_name, "chr1", _get_test_sequence())
+        index = genome.get_fasta_index(fasta_file)
+
+        index_file = fasta_file + genome.FASTA_INDEX_SUFFIX
+        assert os.path.exists(index_file)
+        assert genome.read_fasta_index(index_file) == index
+
+
+def test_stale_fasta_index_is_rebuilt():
+    with utils.temp_dir_created() as dir_name:
+        fasta_file = _write_fasta_file(dir_name, "chr1", _get_test_sequence())
+        genome.get_fasta_index(fasta_file)
+
+        index_file = fasta_file + genome.FASTA_INDEX_SUFFIX
+        mtime = os.path.getmtime(fasta_file)
+        os.utime(index_file, (mtime - 10, mtime - 10))
+
+        _write_fasta_file(dir_name, "chr1", _get_test_sequence(100))
+        assert genome.get_fasta_index(fasta_file)[0].length == 100
+
+
+def test_region_within_line_is_not_copied():
+    sequence = _get_test_sequence()
+    with utils.temp_dir_created() as dir_name:
+        _write_fasta_file(dir_name, "chr1", sequence)
+        region = genome.Genome(dir_name).get_sequence("chr1", 65, 110)
+
+        assert isinstance(region, np.memmap)
+        assert _get_sequence_string(region) == sequence[65:110]
+
+
+def test_region_spanning_lines_excludes_line_terminators():
+    sequence = _get_test_sequence()
+    with utils.temp_dir_created() as dir_name:
+        _write_fasta_file(dir_name, "chr1", sequence)
+        region = genome.Genome(dir_name).get_sequence("chr1", 50, 500)
+        assert _get_sequence_string(region) == sequence[50:500]
+
+
+def test_region_outside_sequence_cannot_be_retrieved():
+    with utils.temp_dir_created() as dir_name:
+        _write_fasta_file(dir_name, "chr1", _get_test_sequence())
+        try:
+            genome.Genome(dir_name).get_sequence(
+                "chr1", 900, SEQUENCE_LENGTH + 1)
+            assert False
+        except IndexError:
+            pass
+
+
+def test_sequences_of_regions_are_concatenated_in_upper_case():
+    sequence = _get_test_sequence()
+    with utils.temp_dir_created() as dir_name:
+        _write_fasta_file(dir_name, "chr1", sequence.lower())
+        sequences = genome.Genome(dir_name).get_sequences(
+            "chr1", [10, 700], [100, 20])
+        assert _get_sequence_string(sequences) == \
+            sequence[10:110] + sequence[700:720]
+
+
+def test_missing_chromosome_file_raises_io_error():
+    with utils.temp_dir_created() as dir_name:
+        try:
+            genome.Genome(dir_name).get_length("chr2")
+            assert False
+        except IOError:
+            pass
@@ -0,0 +1,113 @@
+import piquant.monitor_resource_usage as mru
+import piquant.resource_usage as ru
+import os.path
+import pandas as pd
+import sys
+import utils
+
+SLEEP_COMMAND = "import time; time.sleep(0.5)"
+CHILD_COMMAND = "import subprocess, sys; " + \
+    "subprocess.call([sys.executable, '-c', 'import time; time.sleep(0.5)'])"
+
+
+def _monitor_command(dir_name, python_command, exit_status=0, trial=1):
+    usage_file = os.path.join(dir_name, ru.get_resource_usage_file(
+        ru.QUANT_RESOURCE_TYPE))
+    python_command += "; import sys; sys.exit({s})".format(s=exit_status)
+    status = mru.monitor_command(
+        [sys.executable, "-c", python_command], usage_file, interval=0.05,
+        trial=trial)
+    return usage_file, status
+
+
+def test_monitor_command_returns_exit_status_of_command():
+    with utils.temp_dir_created() as dir_name:
+        _, status = _monitor_command(dir_name, SLEEP_COMMAND, exit_status=3)
+        assert status == 3
+
+
+def test_monitor_command_appends_usage_summary_rows():
+    with utils.temp_dir_created() as dir_name:
+        _monitor_command(dir_name, SLEEP_COMMAND)
+        usage_file, _ = _monitor_command(dir_name, SLEEP_COMMAND)
+
+        usage = pd.read_csv(usage_file, header=None,
+                            names=ru.get_usage_file_columns())
+        assert len(usage) == 2
+        assert usage["real-time"].min() >= 0.5
+        assert usage["max-memory"].min() > 0
+        assert (usage[ru.END_TIME] - usage[ru.START_TIME]).min() >= 0.5
+        assert usage[ru.START_TIME][1] >= usage[ru.END_TIME][0]
+
+
+def test_monitor_command_records_trial_number():
+    with utils.temp_dir_created() as dir_name:
+        _monitor_command(dir_name, SLEEP_COMMAND, trial=1)
+        usage_file, _ = _monitor_command(dir_name, SLEEP_COMMAND, trial=2)
+
+        usage = pd.read_csv(usage_file, header=None,
+                            names=ru.get_usage_file_columns())
+        assert list(usage[ru.TRIAL]) == [1, 2]
+
+
+def test_monitor_command_writes_timeseries_for_each_command():
+    with utils.temp_dir_created() as dir_name:
+        _monitor_command(dir_name, SLEEP_COMMAND)
+        usage_file, _ = _monitor_command(dir_name, SLEEP_COMMAND)
+
+        timeseries = pd.read_csv(ru.get_timeseries_file(usage_file))
+        assert list(timeseries.columns) == ru.TIMESERIES_COLUMNS
+        assert set(timeseries["command"]) == set([0, 1])
+        assert len(timeseries) > 4
+        assert timeseries["memory"].min() > 0
+
+
+def test_monitor_command_records_usage_of_child_processes():
+    with utils.temp_dir_created() as dir_name:
+        usage_file, _ = _monitor_command(dir_name, CHILD_COMMAND)
+
+        processes = pd.read_csv(ru.get_processes_file(usage_file))
+        assert list(processes.columns) == ru.PROCESSES_COLUMNS
+        assert len(processes) == 2
+        assert processes["max-memory"].min() > 0
+        assert processes["max-threads"].min() >= 1
+
+        timeseries = pd.read_csv(ru.get_timeseries_file(usage_file))
+        assert timeseries["processes"].max() == 2
+
+
+def test_monitor_command_records_io_of_command():
+    with utils.temp_dir_created() as dir_name:
+        write_command = "f = open({f}, 'w')\nfor i in range(20):\n" + \
+            "    f.write('x'); f.flush()\nf.close()"
+        usage_file, _ = _monitor_command(dir_name, write_command.format(
+            f=repr(os.path.join(dir_name, "out.txt"))))
+
+        usage = pd.read_csv(usage_file, header=None,
+                            names=ru.get_usage_file_columns())
+        assert usage["write-syscalls"][0] >= 20
+
+
+def test_monitor_command_real_time_is_not_rounded_up_to_interval():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = os.path.join(dir_name, ru.get_resource_usage_file(
+            ru.QUANT_RESOURCE_TYPE))
+        mru.monitor_command(
+            [sys.executable, "-c", "import time; time.sleep(0.2)"],
+            usage_file, interval=5)
+
+        usage = pd.read_csv(usage_file, header=None,
+                            names=ru.get_usage_file_columns())
+        assert 0.2 <= usage["real-time"][0] < 2
+
+
+def test_monitor_command_records_unsampled_memory_as_missing():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = os.path.join(dir_name, ru.get_resource_usage_file(
+            ru.QUANT_RESOURCE_TYPE))
+        mru.monitor_command(["true"], usage_file, interval=0.05)
+
+        usage = pd.read_csv(usage_file, header=None,
+                            names=ru.get_usage_file_columns())
+        max_memory = usage["max-memory"][0]
+        assert pd.isnull(max_memory) or max_memory < 10000
@@ -0,0 +1,99 @@
+import piquant.pareto as pareto
+import piquant.piquant_options as po
+import numpy as np
+import pandas as pd
+
+RHO = "tp-log-tpm-rho"
+ERROR_FRACTION = "tp-error-frac"
+
+
+def _get_test_stats():
+    return pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["A", "B", "C", "A", "B"],
+        po.READ_DEPTH.name: [10, 10, 10, 20, 20],
+        RHO: [0.9, 0.8, 0.7, 0.95, 0.95],
+        ERROR_FRACTION: [0.1, 0.2, 0.3, 0.05, 0.05],
+        "num-tpms": [100] * 5
+    })
+
+
+def _get_test_usage():
+    return pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["A", "B", "C", "A", "B"],
+        po.READ_DEPTH.name: [10, 10, 10, 20, 20],
+        "user-time": [2.0, 1.0, 2.5, 2.0, 1.0],
+        "sys-time": [0.0, 0.0, 0.0, 0.0, 0.0],
+        "max-memory": [4.0, 2.0, 1.0, 4.0, 2.0]
+    })
+
+
+def _get_pareto_stats(accuracy, cost):
+    stats = pareto.get_pareto_stats(pareto.get_accuracy_costs(
+        _get_test_stats(), _get_test_usage()))
+    return stats[(stats[pareto.ACCURACY_STATISTIC] == accuracy).values &
+                 (stats[pareto.COST_STATISTIC] == cost).values]
+
+
+def _get_dominated_methods(stats, read_depth):
+    runs = stats[stats[po.READ_DEPTH.name] == read_depth]
+    return set(runs[po.QUANT_METHOD.name][runs[pareto.DOMINATED]])
+
+
+def test_run_is_dominated_by_more_accurate_and_cheaper_run():
+    dominated = pareto.get_dominated([0.9, 0.8], [1.0, 2.0])
+    assert list(dominated) == [False, True]
+
+
+def test_runs_trading_accuracy_for_cost_are_not_dominated():
+    dominated = pareto.get_dominated([0.9, 0.8, 0.7], [3.0, 2.0, 1.0])
+    assert not dominated.any()
+
+
+def test_identical_runs_do_not_dominate_each_other():
+    dominated = pareto.get_dominated([0.9, 0.9], [1.0, 1.0])
+    assert not dominated.any()
+
+
+def test_lower_values_are_better_if_specified():
+    dominated = pareto.get_dominated(
+        [0.1, 0.2], [1.0, 1.0], higher_is_better=False)
+    assert list(dominated) == [False, True]
+
+
+def test_accuracy_costs_joins_stats_with_usage_for_each_run():
+    accuracy_costs = pareto.get_accuracy_costs(
+        _get_test_stats(), _get_test_usage())
+    assert len(accuracy_costs) == 5
+
+    run = accuracy_costs[
+        (accuracy_costs[po.QUANT_METHOD.name] == "C").values].iloc[0]
+    assert run[RHO] == 0.7
+    assert np.isclose(run["cpu-time"], 10 ** 2.5 + 1)
+    assert run["max-memory"] == 1.0
+
+
+def test_pareto_frontier_is_determined_for_each_set_of_reads():
+    stats = _get_pareto_stats(RHO, "cpu-time")
+    assert len(stats) == 5
+    assert _get_dominated_methods(stats, 10) == set(["C"])
+    assert _get_dominated_methods(stats, 20) == set(["A"])
+
+
+def test_pareto_frontier_depends_on_cost():
+    stats = _get_pareto_stats(RHO, "max-memory")
+    assert _get_dominated_methods(stats, 10) == set()
+    assert _get_dominated_methods(stats, 20) == set(["A"])
+
+
+def test_pareto_frontier_accounts_for_direction_of_accuracy():
+    stats = _get_pareto_stats(ERROR_FRACTION, "cpu-time")
+    assert _get_dominated_methods(stats, 10) == set(["C"])
+
+
+def test_pareto_stats_omit_runs_with_missing_values():
+    stats = _get_test_stats()
+    stats.loc[0, RHO] = float("nan")
+    pareto_stats = pareto.get_pareto_stats(
+        pareto.get_accuracy_costs(stats, _get_test_usage()))
+    rho_stats = pareto_stats[pareto_stats[pareto.ACCURACY_STATISTIC] == RHO]
+    assert len(rho_stats) == 8
@@ -16,7 +16,7 @@ def _get_test_options(output_dir):
         po.QUANT_OUTPUT_DIR.name: output_dir,
         po.NO_CLEANUP.name: True,
         po.NO_USAGE.name: True,
-        po.PLOT_FORMAT.name: "pdf",
+        po.PLOT_FORMAT.name: ["pdf"],
         po.GROUPED_THRESHOLD.name: 3000,
         po.ERROR_FRACTION_THRESHOLD.name: 10,
         po.NOT_PRESENT_CUTOFF.name: 0.1
@@ -62,6 +62,19 @@ def test_get_options_dir_returns_correct_path_for_run_directory():
         output_dir + os.path.sep + quant_method + "_30x_50b_pe_no_bias"
 
 
+def test_get_options_dir_shares_reads_directory_between_numbers_of_threads():
+    output_dir = "dummy"
+    qr_options = get_test_qr_options(quant_method="quant")
+    qr_options[po.NUM_THREADS.name] = 4
+
+    assert piq._get_options_dir(
+        False, _get_test_options(output_dir), **qr_options) == \
+        output_dir + os.path.sep + "30x_50b_pe_no_bias"
+    assert piq._get_options_dir(
+        True, _get_test_options(output_dir), **qr_options) == \
+        output_dir + os.path.sep + "quant_30x_50b_pe_no_bias_4t"
+
+
 def test_read_directory_checker_returns_correct_checker_if_directory_should_exist_and_does_exist():
     with utils.temp_dir_created() as temp_dir:
         test_options = _get_test_options(temp_dir)
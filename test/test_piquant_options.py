@@ -1,6 +1,7 @@
 import piquant.log as log
 import piquant.piquant_options as po
 import piquant.piquant_commands as pc
+import pickle
 import pytest
 import schema
 import tempfile
@@ -59,7 +60,10 @@ def _get_ignore_options():
         po.GENOME_FASTA_DIR,
         po.NUM_MOLECULES,
         po.NUM_NOISE_MOLECULES,
-        po.NUM_THREADS
+        po.NUM_THREADS,
+        po.USAGE_INTERVAL,
+        po.USAGE_TRIALS,
+        po.CACHE_STATE
     ]
 
 
@@ -350,6 +354,57 @@ def test_get_run_name_returns_correct_name():
     assert po.get_run_name(qr_options) == "30x_50b_pe_no_bias"
 
 
+def test_get_run_name_includes_number_of_threads_only_if_more_than_one():
+    qr_options = {
+        po.READ_DEPTH.name: 30,
+        po.QUANT_METHOD.name: "Salmon",
+        po.NUM_THREADS.name: 1
+    }
+    assert po.get_run_name(qr_options) == "Salmon_30x"
+
+    qr_options[po.NUM_THREADS.name] = 4
+    assert po.get_run_name(qr_options) == "Salmon_30x_4t"
+
+
+def test_default_num_threads_does_not_override_values_from_options_file():
+    option_name = po.NUM_THREADS.get_option_name()
+    _, qr_opt_vals = po._validate_option_values(
+        _get_logger(), {option_name: "1"}, {option_name: "1,2,4"},
+        [po.NUM_THREADS])
+    assert qr_opt_vals[po.NUM_THREADS.name] == set([1, 2, 4])
+
+
+def test_default_plot_format_does_not_override_value_from_options_file():
+    option_name = po.PLOT_FORMAT.get_option_name()
+    opt_vals, _ = po._validate_option_values(
+        _get_logger(), {option_name: "pdf"}, {option_name: "png,svg"},
+        [po.PLOT_FORMAT])
+    assert opt_vals[po.PLOT_FORMAT.name] == ["png", "svg"]
+
+
+def test_default_plots_does_not_override_value_from_options_file():
+    option_name = po.PLOTS.get_option_name()
+    opt_vals, _ = po._validate_option_values(
+        _get_logger(), {option_name: "all"}, {option_name: "overall"},
+        [po.PLOTS])
+    assert opt_vals[po.PLOTS.name] == ["overall"]
+
+
+def test_plot_format_from_command_line_overrides_options_file():
+    option_name = po.PLOT_FORMAT.get_option_name()
+    opt_vals, _ = po._validate_option_values(
+        _get_logger(), {option_name: "svg"}, {option_name: "png"},
+        [po.PLOT_FORMAT])
+    assert opt_vals[po.PLOT_FORMAT.name] == ["svg"]
+
+
+def test_get_reads_mqr_options_excludes_quantification_options():
+    opts = po.get_reads_mqr_options()
+    assert po.READ_DEPTH in opts
+    assert po.QUANT_METHOD not in opts
+    assert po.NUM_THREADS not in opts
+
+
 def test_get_value_names_returns_correct_translated_values():
     mqr_options = {
         po.READ_LENGTH: 50,
@@ -449,3 +504,26 @@ def test_execute_for_mqr_option_sets_executes_for_correct_sets_of_piquant_option
     assert set([piquant_options1[0], piquant_options2[1]]) in execute_record
     assert set([piquant_options1[1], piquant_options2[0]]) in execute_record
     assert set([piquant_options1[1], piquant_options2[1]]) in execute_record
+
+
+def test_options_can_be_pickled():
+    for option in po._PiquantOption.OPTIONS:
+        assert pickle.loads(pickle.dumps(option)) is option
+
+
+def test_plot_format_option_accepts_multiple_formats():
+    assert po.PLOT_FORMAT.validator()("pdf,png") == ["pdf", "png"]
+
+
+def test_plot_format_option_rejects_invalid_format():
+    with pytest.raises(schema.SchemaError):
+        po.PLOT_FORMAT.validator()("pdf,gif")
+
+
+def test_validate_option_values_returns_all_plot_formats():
+    options = {po.PLOT_FORMAT.get_option_name(): "pdf,png"}
+
+    opt_vals, qr_opt_vals = po._validate_option_values(
+        _get_logger(), options, {}, [po.PLOT_FORMAT])
+
+    assert opt_vals[po.PLOT_FORMAT.name] == ["pdf", "png"]
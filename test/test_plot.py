@@ -0,0 +1,183 @@
+import matplotlib
+matplotlib.use("Agg")
+
+import piquant.classifiers as classifiers
+import piquant.pareto as pareto
+import piquant.piquant_options as po
+import piquant.plot as plot
+import piquant.plot_cache as plot_cache
+import piquant.resource_usage as ru
+import piquant.sweeps as sweeps
+import piquant.tpms as t
+import numpy as np
+import os
+import os.path
+import pandas as pd
+import utils
+
+
+def _get_sweep_stats(sweep):
+    columns = [sweep.get_column_name()] + \
+        [col for curve in sweep.curves for col in [curve.xcol, curve.ycol]]
+    return pd.DataFrame({col: [0.0, 0.5, 1.0] for col in columns})
+
+
+def _request_plots(dir_name, num_plots):
+    sweep = sweeps.get_sweeps()[0]
+    stats = _get_sweep_stats(sweep)
+    for i in range(num_plots):
+        plot.plot_threshold_sweep_curve(
+            "png", stats, os.path.join(dir_name, "plot" + str(i)),
+            sweep, sweep.curves[0])
+
+
+def _get_plot_files(dir_name):
+    return sorted(os.listdir(dir_name))
+
+
+def test_plots_are_drawn_immediately_without_parallel_drawing():
+    with utils.temp_dir_created() as dir_name:
+        _request_plots(dir_name, 2)
+        assert len(_get_plot_files(dir_name)) == 2
+
+
+def test_plots_are_drawn_immediately_with_one_process():
+    with utils.temp_dir_created() as dir_name:
+        with plot.drawing_plots_in_parallel(1):
+            _request_plots(dir_name, 2)
+            assert len(_get_plot_files(dir_name)) == 2
+
+
+def test_parallel_plots_are_drawn_on_leaving_block():
+    with utils.temp_dir_created() as dir_name:
+        with plot.drawing_plots_in_parallel(2):
+            _request_plots(dir_name, 3)
+            assert len(_get_plot_files(dir_name)) == 0
+        assert len(_get_plot_files(dir_name)) == 3
+
+
+def test_parallel_plots_have_same_names_as_serial_plots():
+    with utils.temp_dir_created() as serial_dir:
+        _request_plots(serial_dir, 3)
+        with utils.temp_dir_created() as parallel_dir:
+            with plot.drawing_plots_in_parallel(2):
+                _request_plots(parallel_dir, 3)
+            assert _get_plot_files(serial_dir) == \
+                _get_plot_files(parallel_dir)
+
+
+def _get_plot_modification_times(dir_name):
+    return {f: os.path.getmtime(os.path.join(dir_name, f))
+            for f in _get_plot_files(dir_name)}
+
+
+def test_cached_plots_are_not_redrawn():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, plot_cache.INDEX_FILE)
+        plot_dir = os.path.join(dir_name, "plots")
+        os.mkdir(plot_dir)
+
+        with plot.drawing_plots_in_parallel(1, index_file):
+            _request_plots(plot_dir, 2)
+        times = _get_plot_modification_times(plot_dir)
+        os.remove(os.path.join(plot_dir, _get_plot_files(plot_dir)[0]))
+
+        with plot.drawing_plots_in_parallel(1, index_file):
+            _request_plots(plot_dir, 2)
+        new_times = _get_plot_modification_times(plot_dir)
+
+        assert len(new_times) == 2
+        redrawn = [f for f in new_times if times.get(f) != new_times[f]]
+        assert redrawn == [sorted(times)[0]]
+
+
+def _get_scatter_plot_file_size(num_tpms):
+    random_state = np.random.RandomState(0)
+    tpms = pd.DataFrame.from_dict({
+        t.LOG10_REAL_TPM: random_state.normal(1, 1, num_tpms),
+        t.LOG10_CALCULATED_TPM: random_state.normal(1, 1, num_tpms)
+    })
+
+    with utils.temp_dir_created() as dir_name:
+        plot.log_tpm_scatter_plot(
+            "svg", tpms, os.path.join(dir_name, "plot"), "transcript", 0.1)
+        plot_files = _get_plot_files(dir_name)
+        assert len(plot_files) == 1
+        return os.path.getsize(os.path.join(dir_name, plot_files[0]))
+
+
+def test_scatter_plot_size_is_bounded_for_many_tpms():
+    many_tpms = 10 * plot._DENSITY_PLOT_THRESHOLD
+    assert _get_scatter_plot_file_size(many_tpms) < \
+        10 * _get_scatter_plot_file_size(plot._DENSITY_PLOT_THRESHOLD // 10)
+
+
+def test_log_ratio_boxplot_is_drawn_from_summary_stats():
+    classifier = [c for c in classifiers.get_classifiers()
+                  if c.produces_grouped_stats()][0]
+    random_state = np.random.RandomState(0)
+    tpms = pd.DataFrame.from_dict({
+        classifier.get_column_name(): random_state.randint(1, 4, 1000),
+        t.LOG10_RATIO: random_state.normal(0, 1, 1000)
+    })
+    stats = t.get_boxplot_stats(tpms, classifier.get_column_name())
+
+    with utils.temp_dir_created() as dir_name:
+        plot.log_ratio_boxplot(
+            "png", stats, os.path.join(dir_name, "plot"),
+            "TPMs", classifier, 10)
+        assert len(_get_plot_files(dir_name)) == 1
+
+
+def test_plots_are_saved_in_each_requested_format():
+    sweep = sweeps.get_sweeps()[0]
+    with utils.temp_dir_created() as dir_name:
+        plot.plot_threshold_sweep_curve(
+            ["pdf", "png"], _get_sweep_stats(sweep),
+            os.path.join(dir_name, "plot"), sweep, sweep.curves[0])
+        plot_files = _get_plot_files(dir_name)
+        assert [os.path.splitext(f)[1] for f in plot_files] == \
+            [".pdf", ".png"]
+        assert len(set([os.path.splitext(f)[0] for f in plot_files])) == 1
+
+
+def test_resource_usage_timeline_is_drawn_from_command_usage():
+    command_usage = pd.DataFrame.from_dict({
+        ru.STEP: [1, 2],
+        ru.STEP_NAME: ["bowtie", "express"],
+        ru.START_TIME: [0.0, 10.0],
+        ru.END_TIME: [10.0, 15.0]
+    })
+
+    with utils.temp_dir_created() as dir_name:
+        plot.resource_usage_timeline(
+            "png", command_usage, os.path.join(dir_name, "plot"),
+            "Quantification")
+        assert _get_plot_files(dir_name) == ["plot_timeline.png"]
+
+
+def test_pareto_frontier_graph_is_drawn_for_each_set_of_reads():
+    accuracy_costs = pareto.get_accuracy_costs(
+        pd.DataFrame.from_dict({
+            po.QUANT_METHOD.name: ["A", "B", "C"],
+            po.READ_DEPTH.name: [10, 10, 10],
+            "tp-log-tpm-rho": [0.9, 0.8, 0.7],
+            "tp-error-frac": [0.1, 0.2, 0.3]}),
+        pd.DataFrame.from_dict({
+            po.QUANT_METHOD.name: ["A", "B", "C"],
+            po.READ_DEPTH.name: [10, 10, 10],
+            "user-time": [2.0, 1.0, 2.5],
+            "sys-time": [0.0, 0.0, 0.0],
+            "max-memory": [4.0, 2.0, 1.0]}))
+    stats = pareto.get_pareto_stats(accuracy_costs)
+    accuracy = pareto.get_accuracy_measures()[0]
+    cost = pareto.get_cost_measures()[0]
+    stats = stats[(stats[pareto.ACCURACY_STATISTIC] == accuracy.name).values &
+                  (stats[pareto.COST_STATISTIC] == cost.name).values]
+
+    with utils.temp_dir_created() as dir_name:
+        plot.plot_pareto_frontier(
+            "png", stats, os.path.join(dir_name, "pareto"), accuracy, cost,
+            {po.READ_DEPTH: 10})
+        assert _get_plot_files(dir_name) == \
+            ["pareto_tp-log-tpm-rho_vs_cpu-time_10x.png"]
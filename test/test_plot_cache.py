@@ -0,0 +1,143 @@
+import piquant.classifiers as classifiers
+import piquant.piquant_options as po
+import piquant.plot_cache as plot_cache
+import piquant.statistics as statistics
+import os.path
+import pandas as pd
+import utils
+
+
+def _get_test_stats(values=[1, 2, 3]):
+    return pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["A", "B", "C"],
+        "stat": values
+    })
+
+
+def _get_key(*args, **kwargs):
+    return plot_cache.get_job_key("plot_function", args, kwargs)
+
+
+def test_job_key_is_same_for_equal_data():
+    assert _get_key(_get_test_stats(), "pdf") == \
+        _get_key(_get_test_stats(), "pdf")
+
+
+def test_job_key_changes_when_data_change():
+    assert _get_key(_get_test_stats(), "pdf") != \
+        _get_key(_get_test_stats(values=[1, 2, 4]), "pdf")
+
+
+def test_job_key_changes_when_parameters_change():
+    assert _get_key(_get_test_stats(), "pdf") != \
+        _get_key(_get_test_stats(), "svg")
+
+
+def test_job_key_changes_when_function_changes():
+    args = (_get_test_stats(), "pdf")
+    assert plot_cache.get_job_key("plot_function", args, {}) != \
+        plot_cache.get_job_key("other_plot_function", args, {})
+
+
+def test_job_key_does_not_depend_on_dictionary_order():
+    assert _get_key({po.READ_DEPTH: 10, po.READ_LENGTH: 50}) == \
+        _get_key({po.READ_LENGTH: 50, po.READ_DEPTH: 10})
+
+
+def test_job_key_distinguishes_piquant_objects():
+    for objects in [list(classifiers.get_classifiers()),
+                    statistics.get_statistics(),
+                    [po.READ_DEPTH, po.READ_LENGTH]]:
+        keys = set([_get_key(o) for o in objects])
+        assert len(keys) == len(objects)
+
+
+def test_plot_cache_job_is_not_drawn_if_not_previously_added():
+    with utils.temp_dir_created() as dir_name:
+        cache = plot_cache.PlotCache(os.path.join(dir_name, "index.json"))
+        assert not cache.is_drawn("key")
+
+
+def test_plot_cache_job_is_drawn_if_previously_added():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, "index.json")
+        plot_file = os.path.join(dir_name, "plot.pdf")
+        open(plot_file, "w").close()
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("key", [plot_file])
+        cache.write()
+
+        assert plot_cache.PlotCache(index_file).is_drawn("key")
+
+
+def test_plot_cache_job_is_not_drawn_if_file_deleted():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, "index.json")
+        plot_file = os.path.join(dir_name, "plot.pdf")
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("key", [plot_file])
+        cache.write()
+
+        assert not plot_cache.PlotCache(index_file).is_drawn("key")
+
+
+def _write_plot_files(dir_name, *names):
+    plot_files = [os.path.join(dir_name, n) for n in names]
+    for plot_file in plot_files:
+        open(plot_file, "w").close()
+    return plot_files
+
+
+def test_plot_cache_index_retains_jobs_not_requested():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, "index.json")
+        old_file, new_file = _write_plot_files(
+            dir_name, "old.pdf", "new.pdf")
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("old_key", [old_file])
+        cache.write()
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("new_key", [new_file])
+        cache.write()
+
+        cache = plot_cache.PlotCache(index_file)
+        assert cache.is_drawn("old_key")
+        assert cache.is_drawn("new_key")
+
+
+def test_plot_cache_index_drops_jobs_whose_files_are_redrawn():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, "index.json")
+        plot_files = _write_plot_files(dir_name, "plot.pdf")
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("old_key", plot_files)
+        cache.write()
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("new_key", plot_files)
+        cache.write()
+
+        cache = plot_cache.PlotCache(index_file)
+        assert not cache.is_drawn("old_key")
+        assert cache.is_drawn("new_key")
+
+
+def test_plot_cache_index_drops_jobs_whose_files_are_deleted():
+    with utils.temp_dir_created() as dir_name:
+        index_file = os.path.join(dir_name, "index.json")
+        plot_files = _write_plot_files(dir_name, "plot.pdf")
+
+        cache = plot_cache.PlotCache(index_file)
+        cache.add("key", plot_files)
+        cache.write()
+
+        os.remove(plot_files[0])
+        plot_cache.PlotCache(index_file).write()
+
+        _write_plot_files(dir_name, "plot.pdf")
+        assert not plot_cache.PlotCache(index_file).is_drawn("key")
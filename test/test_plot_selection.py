@@ -0,0 +1,80 @@
+import piquant.classifiers as classifiers
+import piquant.piquant_options as po
+import piquant.plot_selection as ps
+import piquant.statistics as statistics
+import pandas as pd
+import pytest
+import schema
+
+
+def _get_statistics():
+    return sorted(statistics.get_graphable_statistics(), key=lambda s: s.name)
+
+
+def _get_test_stats():
+    return pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["Cufflinks", "Cufflinks", "Salmon", "Salmon"],
+        po.READ_DEPTH.name: [10, 20, 10, 20],
+        po.PAIRED_END.name: [False, True, False, True]
+    })
+
+
+def test_all_families_are_selected_by_default():
+    selection = ps.get_plot_selection(["all"])
+    assert all([selection.includes(f) for f in ps.FAMILIES])
+
+
+def test_only_specified_families_are_selected():
+    selection = ps.get_plot_selection([ps.OVERALL, ps.USAGE])
+    assert selection.families == set([ps.OVERALL, ps.USAGE])
+
+
+def test_no_families_are_selected_for_none():
+    assert len(ps.get_plot_selection(["none"]).families) == 0
+
+
+def test_all_families_are_selected_if_only_filters_specified():
+    statistic = _get_statistics()[0]
+    selection = ps.get_plot_selection(["statistic=" + statistic.name])
+    assert selection.families == set(ps.FAMILIES)
+
+
+def test_statistics_are_selected_by_name():
+    stats = _get_statistics()
+    selection = ps.get_plot_selection(
+        ["statistic=" + stats[0].name, "statistic=" + stats[1].name])
+    assert selection.select_statistics(stats) == stats[:2]
+
+
+def test_all_statistics_are_selected_if_none_specified():
+    stats = _get_statistics()
+    assert ps.ALL_PLOTS.select_statistics(stats) == stats
+
+
+def test_classifiers_are_selected_by_name_with_underscores():
+    clsfrs = sorted(classifiers.get_classifiers(),
+                    key=lambda c: c.get_column_name())
+    selection = ps.get_plot_selection(
+        ["classifier=" + clsfrs[0].get_column_name().replace(' ', '_')])
+    assert selection.select_classifiers(clsfrs) == [clsfrs[0]]
+
+
+def test_runs_are_selected_by_option_values():
+    selection = ps.get_plot_selection(
+        ["read_depth=10", "quant_method=Salmon", "quant_method=Cufflinks"])
+    selected = selection.select_runs(_get_test_stats())
+    assert list(selected[po.READ_DEPTH.name]) == [10, 10]
+
+
+def test_runs_are_selected_by_boolean_option_values():
+    selection = ps.get_plot_selection(["paired_end=yes"])
+    selected = selection.select_runs(_get_test_stats())
+    assert list(selected[po.READ_DEPTH.name]) == [20, 20]
+
+
+def test_invalid_selectors_raise_exception():
+    for selector in ["some_family", "statistic=no-such-stat",
+                     "classifier=no_such_classifier", "no_such_option=10",
+                     "read_depth=minus"]:
+        with pytest.raises(schema.SchemaError):
+            ps.get_plot_selection([selector])
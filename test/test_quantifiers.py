@@ -0,0 +1,36 @@
+import piquant.quantifiers as qs
+import os.path
+
+PARAMS = {
+    qs.TRANSCRIPT_GTF_FILE: "transcripts.gtf",
+    qs.GENOME_FASTA_DIR: "genome",
+    qs.QUANTIFIER_DIRECTORY: "quantifier_scratch",
+}
+
+
+def _get_quantification_inputs(quantifier):
+    return qs.get_quantification_methods()[quantifier].\
+        get_quantification_inputs(PARAMS)
+
+
+def test_quantification_inputs_are_specific_to_quantifier():
+    for quantifier in qs.get_quantification_methods():
+        inputs = _get_quantification_inputs(quantifier)
+        assert len(inputs) > 0
+        assert PARAMS[qs.QUANTIFIER_DIRECTORY] not in inputs
+
+
+def test_index_only_quantifiers_read_their_index():
+    for quantifier in ["Sailfish", "Salmon"]:
+        assert _get_quantification_inputs(quantifier) == [os.path.join(
+            "quantifier_scratch", quantifier.lower(), "index")]
+
+
+def test_rsem_reads_its_transcript_reference():
+    assert _get_quantification_inputs("RSEM") == [
+        os.path.join("quantifier_scratch", "rsem", "rsem.*")]
+
+
+def test_cufflinks_reads_bowtie_index_and_transcript_gtf():
+    assert _get_quantification_inputs("Cufflinks") == [
+        os.path.join("quantifier_scratch", "bowtie-index"), "transcripts.gtf"]
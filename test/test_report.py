@@ -0,0 +1,62 @@
+import piquant.piquant_options as po
+import piquant.report as report
+import piquant.statistics as statistics
+import piquant.tpms as t
+import json
+import os.path
+import pandas as pd
+import utils
+
+
+def _get_statistic():
+    return sorted(statistics.get_graphable_statistics(),
+                  key=lambda s: s.name)[0]
+
+
+def _write_overall_stats(stats_dir):
+    stats = pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["A", "A", "B", "B"],
+        po.READ_DEPTH.name: [10, 20, 10, 20],
+        _get_statistic().name: [0.5, 0.6, float("nan"), 0.8]
+    })
+    stats.to_csv(statistics.get_stats_file(
+        stats_dir, statistics.OVERALL_STATS_PREFIX, t.TRANSCRIPT),
+        index=False)
+
+
+def _read_report_data(report_file):
+    with open(report_file) as in_file:
+        contents = in_file.read()
+    start = contents.index("var REPORT = ") + len("var REPORT = ")
+    end = contents.index(";\n", start)
+    return json.loads(contents[start:end])
+
+
+def test_report_tables_contain_overall_stats():
+    with utils.temp_dir_created() as dir_name:
+        _write_overall_stats(dir_name)
+        tables = report.get_report_tables(dir_name, 300, False)
+
+        assert len(tables) == 1
+        assert [c for c, _ in tables[0]["x"]] == [po.READ_DEPTH.name]
+        assert _get_statistic().name in [c for c, _ in tables[0]["y"]]
+
+
+def test_report_tables_record_missing_values_as_null():
+    with utils.temp_dir_created() as dir_name:
+        _write_overall_stats(dir_name)
+        data = report.get_report_tables(dir_name, 300, False)[0]["data"]
+
+        assert data[_get_statistic().name] == [0.5, 0.6, None, 0.8]
+        assert data[po.QUANT_METHOD.name] == ["A", "A", "B", "B"]
+
+
+def test_html_report_embeds_report_tables():
+    with utils.temp_dir_created() as dir_name:
+        _write_overall_stats(dir_name)
+        tables = report.get_report_tables(dir_name, 300, False)
+
+        report_file = os.path.join(dir_name, report.REPORT_FILE)
+        report.write_html_report(report_file, tables)
+
+        assert _read_report_data(report_file) == {"tables": tables}
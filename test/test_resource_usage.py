@@ -0,0 +1,138 @@
+import piquant.resource_usage as ru
+import math
+import os.path
+import pandas as pd
+import utils
+
+
+def _write_usage_file(dir_name, rows):
+    usage_file = os.path.join(dir_name, "usage.csv")
+    with open(usage_file, "w") as out_file:
+        for row in rows:
+            out_file.write(row + "\n")
+    return usage_file
+
+
+def test_get_usage_summary_sums_times_and_io_and_takes_max_memory():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",10.0,5.0,1.0,1048576,1073741824,0,1000000,0",
+            "\"b\",90.0,5.0,9.0,2097152,1073741824,0,1000000,500000"])
+        summary = ru.get_usage_summary(usage_file)
+
+        assert summary["real-time"][0] == 2
+        assert summary["user-time"][0] == 1
+        assert summary["sys-time"][0] == 1
+        assert summary["max-memory"][0] == 2
+        assert summary["read-bytes"][0] == 2
+        assert summary["write-bytes"][0] == 0
+        assert summary["read-syscalls"][0] == 2
+        assert summary["write-syscalls"][0] == 0.5
+
+
+def test_get_usage_summary_handles_commands_recorded_as_taking_no_time():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",0.0,0.0,0.0,1048576,0,0,0,0"])
+        summary = ru.get_usage_summary(usage_file)
+
+        assert summary["real-time"][0] == -2
+
+
+def test_get_usage_summary_handles_usage_files_without_io():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",10.0,10.0,10.0,1048576"])
+        summary = ru.get_usage_summary(usage_file)
+
+        assert summary["real-time"][0] == 1
+        assert math.isnan(summary["read-bytes"][0])
+
+
+def test_get_usage_summary_calculates_efficiency_given_number_of_reads():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",10.0,15.0,1.0,1048576,0,0,0,0",
+            "\"b\",10.0,20.0,4.0,2097152,0,0,0,0"])
+        summary = ru.get_usage_summary(
+            usage_file, num_reads=2000000, num_threads=4)
+
+        assert summary["reads-per-second"][0] == 100000
+        assert summary["cpu-time-per-million-reads"][0] == 20
+        assert summary["memory-per-million-reads"][0] == 1
+        assert summary["cpu-utilisation"][0] == 0.5
+
+
+def test_get_usage_summary_omits_efficiency_if_number_of_reads_unknown():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",10.0,15.0,1.0,1048576,0,0,0,0"])
+        summary = ru.get_usage_summary(usage_file)
+
+        for es in ru.get_efficiency_statistics():
+            assert es.name not in summary
+
+
+def test_get_command_usage_returns_steps_with_relative_times():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"/usr/bin/bowtie -p 1 ref\",10.0,5.0,1.0,1048576," +
+            "0,0,0,0,1000.0,1010.0",
+            "\"bash -c express ref | gzip\",5.0,5.0,0.0,1048576," +
+            "0,0,0,0,1010.0,1015.0"])
+        command_usage = ru.get_command_usage(usage_file)
+
+        assert list(command_usage[ru.STEP]) == [1, 2]
+        assert list(command_usage[ru.STEP_NAME]) == ["bowtie", "express"]
+        assert list(command_usage[ru.START_TIME]) == [0, 10]
+        assert list(command_usage[ru.END_TIME]) == [10, 15]
+        assert list(command_usage["real-time"]) == [10, 5]
+
+
+def test_get_usage_summary_takes_median_over_timing_trials():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"a\",{t},1.0,1.0,1048576,0,0,0,0,0.0,1.0,{n}".format(
+                t=t, n=n) for n, t in enumerate([10, 1000, 100, 100000], 1)])
+        summary = ru.get_usage_summary(usage_file)
+
+        min_col, iqr_col, lower_col, upper_col = \
+            ru.get_trial_variability_columns("real-time")
+        assert summary[ru.TRIALS][0] == 4
+        assert summary["real-time"][0] == 2.5
+        assert summary[min_col][0] == 1
+        assert summary[lower_col][0] == 1.75
+        assert summary[upper_col][0] == 3.5
+        assert summary[iqr_col][0] == 1.75
+
+
+def test_get_command_usage_numbers_steps_within_timing_trials():
+    with utils.temp_dir_created() as dir_name:
+        usage_file = _write_usage_file(dir_name, [
+            "\"{c}\",1.0,1.0,1.0,1048576,0,0,0,0,0.0,1.0,{n}".format(
+                c=c, n=n) for c, n in [("a", 1), ("b", 1), ("a", 2), ("b", 2)]])
+        command_usage = ru.get_command_usage(usage_file)
+
+        assert list(command_usage[ru.TRIAL]) == [1, 1, 2, 2]
+        assert list(command_usage[ru.STEP]) == [1, 2, 1, 2]
+
+
+def test_add_speedup_compares_runs_with_fewest_threads():
+    usage_data = pd.DataFrame.from_dict({
+        "quant_method": ["A", "A", "A", "B", "B"],
+        "num_threads": [1, 2, 4, 2, 4],
+        "real-time": [2.0, 1.75, 1.5, 3.0, 3.0]
+    })
+    usage_data = ru.add_speedup(usage_data, "num_threads", ["quant_method"])
+
+    assert list(usage_data["speedup"].round(3)) == \
+        [1, 1.778, 3.162, 1, 1]
+    assert list(usage_data["parallel-efficiency"].round(3)) == \
+        [1, 0.889, 0.791, 1, 0.5]
+
+
+def test_add_speedup_leaves_usage_without_threads_unchanged():
+    usage_data = pd.DataFrame.from_dict({"real-time": [2.0, 1.0]})
+    usage_data = ru.add_speedup(usage_data, "num_threads", [])
+    assert "speedup" not in usage_data
+    assert "parallel-efficiency" not in usage_data
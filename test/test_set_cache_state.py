@@ -0,0 +1,41 @@
+import piquant.set_cache_state as scs
+import os
+import os.path
+import pytest
+import utils
+
+
+def _write_files(dir_name):
+    sub_dir = os.path.join(dir_name, "index")
+    os.mkdir(sub_dir)
+    file_names = [os.path.join(dir_name, "reads.fasta"),
+                  os.path.join(sub_dir, "index.bin")]
+    for file_name in file_names:
+        with open(file_name, "w") as out_file:
+            out_file.write(">read\nACGT\n")
+    return file_names
+
+
+def test_warm_cache_state_reads_files_in_directories():
+    with utils.temp_dir_created() as dir_name:
+        reads_file, _ = _write_files(dir_name)
+        num_files = scs.set_page_cache_state(
+            scs.WARM, [reads_file, os.path.join(dir_name, "index")])
+        assert num_files == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"),
+                    reason="posix_fadvise is not available")
+def test_cold_cache_state_evicts_files_without_changing_them():
+    with utils.temp_dir_created() as dir_name:
+        file_names = _write_files(dir_name)
+        assert scs.set_page_cache_state(scs.COLD, [dir_name]) == 2
+
+        with open(file_names[0]) as in_file:
+            assert in_file.read() == ">read\nACGT\n"
+
+
+def test_missing_paths_are_ignored():
+    with utils.temp_dir_created() as dir_name:
+        assert scs.set_page_cache_state(
+            scs.WARM, [os.path.join(dir_name, "missing")]) == 0
@@ -0,0 +1,188 @@
+import piquant.flux_simulator as fs
+import piquant.genome as gnm
+import piquant.gtf as gtf
+import piquant.prepare_read_simulation as prs
+import piquant.simulate_reads as sr
+import numpy as np
+import os.path
+import random
+import utils
+
+GENOME_LENGTH = 5000
+LINE_LENGTH = 60
+READ_LENGTH = 50
+
+COMPLEMENT = {"A": "T", "C": "G", "G": "C", "T": "A"}
+
+# Transcript T1 has two exons on the forward strand, T2 two exons on the
+# reverse strand, and T3 is shorter than the reads simulated
+EXONS = [
+    ("T1", "exon", 101, 400, "+"),
+    ("T1", "exon", 601, 900, "+"),
+    ("T1", "CDS", 601, 700, "+"),
+    ("T2", "exon", 2001, 2300, "-"),
+    ("T2", "exon", 1501, 1800, "-"),
+    ("T3", "exon", 3001, 3020, "+")
+]
+
+
+def _reverse_complement(sequence):
+    return "".join(COMPLEMENT[base] for base in reversed(sequence))
+
+
+def _write_test_files(dir_name):
+    rand = random.Random(1)
+    genome = "".join(rand.choice("ACGT") for _ in range(GENOME_LENGTH))
+
+    genome_dir = os.path.join(dir_name, "genome")
+    os.mkdir(genome_dir)
+    with open(os.path.join(genome_dir, "chr1.fa"), "w") as out_file:
+        out_file.write(">chr1\n")
+        for i in range(0, GENOME_LENGTH, LINE_LENGTH):
+            out_file.write(genome[i:i + LINE_LENGTH].lower() + "\n")
+
+    gtf_file = os.path.join(dir_name, "transcripts.gtf")
+    with open(gtf_file, "w") as out_file:
+        for transcript, feature, start, end, strand in EXONS:
+            out_file.write("\t".join([
+                "chr1", "test", feature, str(start), str(end), ".", strand,
+                ".", "gene_id \"G{t}\"; transcript_id \"{t}\"; ".format(
+                    t=transcript) + "exon_number \"1\""]) + "\n")
+
+    return genome, genome_dir, gtf_file
+
+
+def _get_transcript_sequences(genome):
+    return {
+        "T1": genome[100:400] + genome[600:900],
+        "T2": _reverse_complement(genome[1500:1800] + genome[2000:2300])
+    }
+
+
+def _simulate_reads(num_reads, paired_end=False, errors=False):
+    with utils.temp_dir_created() as dir_name:
+        genome, genome_dir, gtf_file = _write_test_files(dir_name)
+        transcripts = gtf.read_transcripts(gtf_file)
+        reads_file = os.path.join(dir_name, "reads")
+
+        fragments, reads = sr.write_simulated_reads(
+            reads_file, transcripts, np.array([10, 5, 100]), genome_dir,
+            num_reads, READ_LENGTH, paired_end, errors,
+            np.random.RandomState(1))
+
+        with open(reads_file) as in_file:
+            lines = in_file.read().splitlines()
+
+    return _get_transcript_sequences(genome), fragments, reads, lines
+
+
+def test_read_transcripts_returns_transcript_structure():
+    with utils.temp_dir_created() as dir_name:
+        _, _, gtf_file = _write_test_files(dir_name)
+        transcripts = gtf.read_transcripts(gtf_file)
+
+    assert list(transcripts.ids) == ["T1", "T2", "T3"]
+    assert list(transcripts.lengths) == [600, 600, 20]
+    assert list(transcripts.starts) == [101, 1501, 3001]
+    assert list(transcripts.ends) == [900, 2300, 3020]
+    assert list(transcripts.coding) == [True, False, False]
+    assert list(transcripts.exon_starts) == [101, 601, 1501, 2001, 3001]
+
+
+def test_transcript_sequences_are_extracted_from_sense_strand():
+    with utils.temp_dir_created() as dir_name:
+        genome, genome_dir, gtf_file = _write_test_files(dir_name)
+        transcripts = gtf.read_transcripts(gtf_file)
+        sequences, offsets = gnm.get_transcript_sequences(
+            gnm.Genome(genome_dir), transcripts, np.array([1, 0]))
+
+    sequences = sequences.tobytes().decode("ascii")
+    expected = _get_transcript_sequences(genome)
+    assert sequences[offsets[0]:offsets[0] + 600] == expected["T1"]
+    assert sequences[offsets[1]:offsets[1] + 600] == expected["T2"]
+    assert offsets[2] == -1
+
+
+def test_molecules_are_distributed_between_transcripts():
+    molecules = sr.draw_molecule_numbers(
+        100, 10000, np.random.RandomState(1))
+    assert len(molecules) == 100
+    assert molecules.sum() == 10000
+
+
+def test_expression_profile_has_flux_simulator_columns():
+    with utils.temp_dir_created() as dir_name:
+        _, _, gtf_file = _write_test_files(dir_name)
+        transcripts = gtf.read_transcripts(gtf_file)
+
+    profile = sr.get_expression_profile(transcripts, np.array([1, 3, 0]))
+    assert list(profile[0]) == \
+        ["chr1:101-900W", "chr1:1501-2300C", "chr1:3001-3020W"]
+    assert list(profile[fs.PRO_FILE_TRANSCRIPT_ID_COL]) == ["T1", "T2", "T3"]
+    assert list(profile[fs.PRO_FILE_LENGTH_COL]) == [600, 600, 20]
+    assert list(profile[fs.PRO_FILE_FRAC_COL]) == [0.25, 0.75, 0]
+    assert list(profile[fs.PRO_FILE_NUM_COL]) == [1, 3, 0]
+
+
+def test_single_end_reads_originate_from_either_strand_of_transcripts():
+    sequences, fragments, reads, lines = _simulate_reads(100)
+    assert list(fragments) == list(reads)
+    assert fragments.sum() == 100
+    assert len(lines) == 200
+
+    strands = set()
+    for name, read in zip(lines[::2], lines[1::2]):
+        _, _, transcript, _, _, start, end, strand = name.split(":")
+        sequence = sequences[transcript][int(start) - 1:int(end)]
+        strands.add(strand)
+        if strand == sr.SENSE:
+            assert read == sequence[:READ_LENGTH]
+        else:
+            assert read == _reverse_complement(sequence[-READ_LENGTH:])
+
+    assert strands == set([sr.SENSE, sr.ANTISENSE])
+
+
+def test_paired_end_reads_are_taken_from_both_ends_of_fragments():
+    sequences, fragments, reads, lines = _simulate_reads(100, paired_end=True)
+    assert fragments.sum() == 50
+    assert reads.sum() == 100
+    assert len(lines) == 200
+
+    for i in range(0, len(lines), 4):
+        assert lines[i].endswith("/1")
+        assert lines[i + 2] == lines[i][:-1] + "2"
+
+        _, _, transcript, _, _, start, end = lines[i][:-2].split(":")
+        sequence = sequences[transcript][int(start) - 1:int(end)]
+        assert lines[i + 1] == sequence[:READ_LENGTH]
+        assert lines[i + 3] == _reverse_complement(sequence[-READ_LENGTH:])
+
+
+def test_transcripts_shorter_than_reads_are_not_sequenced():
+    _, fragments, _, _ = _simulate_reads(100)
+    assert fragments[2] == 0
+
+
+def test_reads_with_errors_are_written_as_fastq():
+    _, _, _, lines = _simulate_reads(100, errors=True)
+    assert len(lines) == 400
+    assert all(line.startswith("@") for line in lines[::4])
+    assert all(line == "+" for line in lines[2::4])
+    assert all(len(line) == READ_LENGTH for line in lines[3::4])
+
+
+def test_built_in_simulator_replaces_flux_simulator_in_simulation_script():
+    with utils.temp_dir_created() as dir_name:
+        reads_dir = os.path.join(dir_name, "reads")
+        prs.create_simulation_files(
+            reads_dir, True, simulator=prs.NUMPY_SIMULATOR)
+        with open(os.path.join(reads_dir, prs.RUN_SCRIPT)) as in_file:
+            script = in_file.read()
+
+    assert "flux-simulator" not in script
+    assert "rm *.lib" not in script
+    assert "simulate_reads --expression " + \
+        fs.get_expression_params_file(fs.MAIN_TRANSCRIPTS) in script
+    assert "simulate_reads --sequence " + \
+        fs.get_simulation_params_file(fs.MAIN_TRANSCRIPTS) in script
@@ -197,3 +197,15 @@ def test_specificity_statistic_calculates_correct_value():
 def test_specificity_statistic_calculates_correct_grouped_values():
     _check_grouped_statistic_values(
         statistics._Specificity, _specificity, _group_tpm_pairs)
+
+
+def test_weighted_median_calculates_median_of_each_weighting():
+    values = pd.Series([1.0, 2.0, 4.0, 8.0])
+    weights = np.array([[1, 1, 1, 0],
+                        [1, 1, 1, 1],
+                        [0, 0, 2, 1],
+                        [0, 0, 0, 0]])
+
+    medians = statistics._weighted_median(weights, values)
+    assert list(medians[:3]) == [2.0, 3.0, 4.0]
+    assert np.isnan(medians[3])
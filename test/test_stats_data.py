@@ -0,0 +1,69 @@
+import piquant.piquant_options as po
+import piquant.stats_data as stats_data
+import pandas as pd
+
+
+def _get_test_stats():
+    stats = pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["A", "B", "A", "B", "A"],
+        po.READ_DEPTH.name: [10, 10, 20, 20, 30],
+        po.READ_LENGTH.name: [50, 50, 50, 50, 100],
+        "stat": [1, 2, 3, 4, 5]
+    })
+    for option in po.get_multiple_quant_run_options():
+        if option.name not in stats.columns:
+            stats[option.name] = True
+    return stats
+
+
+def _exec_for_fixed_option_values_sets(non_fixed_options, data=None):
+    stats = _get_test_stats()
+    if data is None:
+        data = stats
+
+    calls = []
+    option_values_sets = stats_data.OptionValuesSets(stats)
+    option_values_sets.exec_for_fixed_option_values_sets(
+        lambda df, fixed: calls.append((df, fixed)), non_fixed_options, data)
+    return calls
+
+
+def test_exec_for_fixed_option_values_sets_passes_matching_subsets():
+    calls = _exec_for_fixed_option_values_sets([po.QUANT_METHOD])
+    for data_subset, fixed_option_values in calls:
+        assert sorted(fixed_option_values.keys(), key=lambda o: o.name) == \
+            [po.READ_DEPTH, po.READ_LENGTH]
+        for option, value in fixed_option_values.items():
+            assert (data_subset[option.name] == value).all()
+
+
+def test_exec_for_fixed_option_values_sets_covers_all_data():
+    calls = _exec_for_fixed_option_values_sets([po.QUANT_METHOD])
+    assert sorted(sum([list(df["stat"]) for df, _ in calls], [])) == \
+        [1, 2, 3, 4, 5]
+
+
+def test_exec_for_fixed_option_values_sets_skips_empty_subsets():
+    calls = _exec_for_fixed_option_values_sets([po.QUANT_METHOD])
+    assert len(calls) == 3
+    assert all([len(df) > 0 for df, _ in calls])
+
+
+def test_exec_for_fixed_option_values_sets_with_no_fixed_options():
+    calls = _exec_for_fixed_option_values_sets(
+        [po.QUANT_METHOD, po.READ_DEPTH, po.READ_LENGTH])
+    assert len(calls) == 1
+    assert len(calls[0][0]) == 5
+    assert calls[0][1] == {}
+
+
+def test_exec_for_fixed_option_values_sets_indexes_each_data_frame():
+    stats = _get_test_stats()
+    other_stats = stats[stats[po.READ_LENGTH.name] == 50]
+    option_values_sets = stats_data.OptionValuesSets(stats)
+
+    for data, num_subsets in [(stats, 3), (other_stats, 2), (stats, 3)]:
+        calls = []
+        option_values_sets.exec_for_fixed_option_values_sets(
+            lambda df, fixed: calls.append(df), [po.QUANT_METHOD], data)
+        assert len(calls) == num_subsets
@@ -0,0 +1,99 @@
+import piquant.statistics as statistics
+import piquant.sweeps as sweeps
+import piquant.tpms as t
+import numpy as np
+import pandas as pd
+import test_tpms
+
+
+def _get_test_tpms(not_present_cutoff=0.1):
+    tpms = pd.DataFrame.from_dict({
+        t.REAL_TPM: test_tpms.REAL_TPMS_VALS,
+        t.CALCULATED_TPM: test_tpms.CALC_TPMS_VALS
+    })
+
+    t.calculate_percent_error(tpms)
+    t.mark_positives_and_negatives(not_present_cutoff, tpms)
+
+    return tpms, t.get_true_positives(tpms)
+
+
+def _get_statistic(name):
+    return [s for s in statistics.get_statistics() if s.name == name][0]
+
+
+def _get_sweep(sweep_class):
+    return [s for s in sweeps.get_sweeps() if isinstance(s, sweep_class)][0]
+
+
+def _check_cutoff_sweep_statistic(column, stat_name):
+    sweep = _get_sweep(sweeps._NotPresentCutoffSweep)
+    tpms, tp_tpms = _get_test_tpms()
+    sweep_stats = sweep.calculate(tpms, tp_tpms)
+
+    for cutoff, value in zip(sweep_stats[sweep.get_column_name()],
+                             sweep_stats[column]):
+        cutoff_tpms, cutoff_tp_tpms = _get_test_tpms(cutoff)
+        correct_value = _get_statistic(stat_name).calculate(
+            cutoff_tpms, cutoff_tp_tpms)
+        assert np.isclose(value, correct_value)
+
+
+def test_get_sweeps_returns_sweeps():
+    assert len(sweeps.get_sweeps()) > 0
+
+
+def test_sweep_stats_file_suffix_contains_column_name():
+    for sweep in sweeps.get_sweeps():
+        suffix = sweep.get_stats_file_suffix()
+        assert sweep.get_column_name().replace(' ', '_') in suffix
+
+
+def test_sweep_returns_row_per_threshold():
+    tpms, tp_tpms = _get_test_tpms()
+    for sweep in sweeps.get_sweeps():
+        sweep_stats = sweep.calculate(tpms, tp_tpms)
+        assert len(sweep_stats) == len(sweep.get_thresholds())
+        assert list(sweep_stats[sweep.get_column_name()]) == \
+            list(sweep.get_thresholds())
+
+
+def test_cutoff_sweep_calculates_correct_sensitivity():
+    _check_cutoff_sweep_statistic(sweeps.SENSITIVITY, "sensitivity")
+
+
+def test_cutoff_sweep_calculates_correct_specificity():
+    _check_cutoff_sweep_statistic(sweeps.SPECIFICITY, "specificity")
+
+
+def test_cutoff_sweep_calculates_correct_false_positive_rate():
+    sweep = _get_sweep(sweeps._NotPresentCutoffSweep)
+    sweep_stats = sweep.calculate(*_get_test_tpms())
+    assert np.allclose(sweep_stats[sweeps.FALSE_POSITIVE_RATE],
+                       1 - sweep_stats[sweeps.SPECIFICITY])
+
+
+def test_cutoff_sweep_calculates_correct_precision():
+    sweep = _get_sweep(sweeps._NotPresentCutoffSweep)
+    tpms, tp_tpms = _get_test_tpms()
+    sweep_stats = sweep.calculate(tpms, tp_tpms)
+
+    for cutoff, value in zip(sweep_stats[sweep.get_column_name()],
+                             sweep_stats[sweeps.PRECISION]):
+        cutoff_tpms, cutoff_tp_tpms = _get_test_tpms(cutoff)
+        num_calc_pos = len(cutoff_tpms[cutoff_tpms[t.CALCULATED_TPM] > cutoff])
+        correct_value = float(len(cutoff_tp_tpms)) / num_calc_pos \
+            if num_calc_pos > 0 else 1
+        assert np.isclose(value, correct_value)
+
+
+def test_error_fraction_sweep_calculates_correct_error_fraction():
+    sweep = _get_sweep(sweeps._ErrorFractionThresholdSweep)
+    tpms, tp_tpms = _get_test_tpms()
+    sweep_stats = sweep.calculate(tpms, tp_tpms)
+
+    for threshold, value in zip(sweep_stats[sweep.get_column_name()],
+                                sweep_stats[sweeps.ERROR_FRACTION]):
+        statistic = _get_statistic("tp-error-frac")
+        correct_value = statistic._calculate(tp_tpms, threshold)
+        assert np.isclose(value, correct_value)
@@ -0,0 +1,103 @@
+import piquant.piquant_options as po
+import piquant.tpm_matrix as tpm_matrix
+import piquant.tpm_store as tpm_store
+import piquant.tpms as t
+import numpy as np
+import os.path
+import pandas as pd
+import utils
+
+TRANSCRIPTS = ["T1", "T2", "T3"]
+REAL_TPMS = [10, 20, 30]
+
+
+def _get_test_tpms(transcripts, calc_tpms):
+    return pd.DataFrame.from_dict({
+        t.TRANSCRIPT: transcripts,
+        t.GENE: ["G1"] * len(transcripts),
+        t.LENGTH: [1000] * len(transcripts),
+        t.UNIQUE_SEQ_LENGTH: [100] * len(transcripts),
+        t.TRANSCRIPT_COUNT: [len(transcripts)] * len(transcripts),
+        t.REAL_TPM: REAL_TPMS[:len(transcripts)],
+        t.CALCULATED_TPM: calc_tpms
+    })
+
+
+def _get_qr_options(quant_method, read_depth):
+    return {po.QUANT_METHOD.name: quant_method,
+            po.READ_DEPTH.name: read_depth}
+
+
+def _write_run(dir_name, run_name, tpms):
+    store_dir = os.path.join(dir_name, run_name)
+    tpm_store.write_tpms(store_dir, tpms, dir_name)
+    return store_dir
+
+
+def _write_test_matrix(dir_name, runs):
+    run_stores = [
+        (_get_qr_options(method, depth),
+         _write_run(dir_name, "{m}_{d}".format(m=method, d=depth),
+                    _get_test_tpms(transcripts, calc_tpms)))
+        for method, depth, transcripts, calc_tpms in runs]
+
+    matrix_dir = os.path.join(dir_name, tpm_matrix.MATRIX_DIRECTORY)
+    tpm_matrix.write_tpm_matrix(matrix_dir, run_stores)
+    return tpm_matrix.read_tpm_matrix(matrix_dir)
+
+
+def test_matrix_has_row_per_run_in_order():
+    with utils.temp_dir_created() as dir_name:
+        matrix = _write_test_matrix(dir_name, [
+            ("A", 10, TRANSCRIPTS, [1, 2, 3]),
+            ("B", 10, TRANSCRIPTS, [4, 5, 6])])
+
+        assert matrix.calculated_tpms.shape == (2, len(TRANSCRIPTS))
+        assert matrix.calculated_tpms.tolist() == [[1, 2, 3], [4, 5, 6]]
+        assert matrix.real_tpms.tolist() == [REAL_TPMS, REAL_TPMS]
+
+
+def test_matrix_is_memory_mapped():
+    with utils.temp_dir_created() as dir_name:
+        matrix = _write_test_matrix(dir_name, [
+            ("A", 10, TRANSCRIPTS, [1, 2, 3])])
+        assert isinstance(matrix.calculated_tpms, np.memmap)
+
+
+def test_matrix_runs_hold_option_values():
+    with utils.temp_dir_created() as dir_name:
+        matrix = _write_test_matrix(dir_name, [
+            ("A", 10, TRANSCRIPTS, [1, 2, 3]),
+            ("B", 20, TRANSCRIPTS, [4, 5, 6])])
+
+        assert list(matrix.runs[po.QUANT_METHOD.name]) == ["A", "B"]
+        assert list(matrix.runs[po.READ_DEPTH.name]) == [10, 20]
+        assert list(matrix.runs[tpm_matrix.RUN_INDEX]) == [0, 1]
+
+
+def test_matrix_aligns_runs_on_different_transcripts():
+    with utils.temp_dir_created() as dir_name:
+        matrix = _write_test_matrix(dir_name, [
+            ("A", 10, ["T2", "T3"], [2, 3]),
+            ("B", 10, ["T1", "T2"], [4, 5])])
+
+        transcripts = [tr.decode("utf-8") for tr in matrix.transcripts]
+        assert transcripts == TRANSCRIPTS
+
+        calc_tpms = matrix.calculated_tpms
+        assert np.isnan(calc_tpms[0, 0])
+        assert calc_tpms[0, 1:].tolist() == [2, 3]
+        assert calc_tpms[1, :2].tolist() == [4, 5]
+        assert np.isnan(calc_tpms[1, 2])
+
+
+def test_get_runs_selects_runs_with_option_values():
+    with utils.temp_dir_created() as dir_name:
+        matrix = _write_test_matrix(dir_name, [
+            ("A", 10, TRANSCRIPTS, [1, 2, 3]),
+            ("A", 20, TRANSCRIPTS, [4, 5, 6]),
+            ("B", 20, TRANSCRIPTS, [7, 8, 9])])
+
+        runs = matrix.get_runs({po.READ_DEPTH: 20})
+        assert list(runs[po.QUANT_METHOD.name]) == ["A", "B"]
+        assert matrix.get_tpms(runs).tolist() == [[4, 5, 6], [7, 8, 9]]
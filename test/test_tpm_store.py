@@ -0,0 +1,176 @@
+import piquant.tpm_store as tpm_store
+import piquant.tpms as t
+import numpy as np
+import os
+import os.path
+import pandas as pd
+import utils
+
+TRANSCRIPTS = ["T3", "T1", "T2", "T4"]
+GENES = ["G2", "G1", "G1", "G3"]
+LENGTHS = [1000, 2000, 1500, 500]
+UNIQUE_LENGTHS = [1000, 500, 250, 0]
+TRANSCRIPT_COUNTS = [1, 2, 2, 1]
+REAL_TPMS = [0.5, 10.25, 100, 0]
+CALC_TPMS = [0.25, 12, 90.5, 3]
+
+
+def _get_test_tpms(calc_tpms=CALC_TPMS):
+    return pd.DataFrame.from_dict({
+        t.TRANSCRIPT: TRANSCRIPTS,
+        t.GENE: GENES,
+        t.LENGTH: LENGTHS,
+        t.UNIQUE_SEQ_LENGTH: UNIQUE_LENGTHS,
+        t.TRANSCRIPT_COUNT: TRANSCRIPT_COUNTS,
+        t.REAL_TPM: REAL_TPMS,
+        t.CALCULATED_TPM: calc_tpms
+    })
+
+
+def _get_annotation_dirs(dir_name):
+    return [d for d in os.listdir(dir_name)
+            if d.startswith(tpm_store._ANNOTATION_DIR_PREFIX)]
+
+
+def test_written_store_is_tpm_store():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+        assert tpm_store.is_tpm_store(store_dir)
+
+
+def test_read_tpms_returns_written_tpms():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpms = _get_test_tpms()
+        tpm_store.write_tpms(store_dir, tpms)
+
+        read_tpms = tpm_store.read_tpms(store_dir)
+        tpms = tpms.set_index(t.TRANSCRIPT)
+        for _, row in read_tpms.iterrows():
+            expected = tpms.loc[row[t.TRANSCRIPT]]
+            assert row[t.GENE] == expected[t.GENE]
+            for column in [t.LENGTH, t.UNIQUE_SEQ_LENGTH, t.TRANSCRIPT_COUNT,
+                           t.REAL_TPM, t.CALCULATED_TPM]:
+                assert row[column] == expected[column]
+
+
+def test_read_tpms_returns_tpms_identical_to_those_written():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(
+            store_dir, _get_test_tpms(calc_tpms=[0.1, 0.2, 0.3, 1e-7]))
+
+        read_tpms = tpm_store.read_tpms(store_dir).set_index(t.TRANSCRIPT)
+        assert read_tpms.loc["T3"][t.CALCULATED_TPM] == 0.1
+        assert read_tpms.loc["T4"][t.CALCULATED_TPM] == 1e-7
+
+
+def test_read_tpms_returns_tpms_in_transcript_order():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+        read_tpms = tpm_store.read_tpms(store_dir)
+        assert list(read_tpms[t.TRANSCRIPT]) == sorted(TRANSCRIPTS)
+
+
+def test_read_tpm_columns_memory_maps_tpms():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+        columns = tpm_store.read_tpm_columns(store_dir)
+
+        assert isinstance(columns[t.REAL_TPM], np.memmap)
+        assert columns[t.REAL_TPM].dtype == np.float64
+        assert isinstance(columns[t.CALCULATED_TPM], np.memmap)
+
+
+def test_runs_on_same_transcripts_share_annotation():
+    with utils.temp_dir_created() as dir_name:
+        tpm_store.write_tpms(
+            os.path.join(dir_name, "run1"), _get_test_tpms(), dir_name)
+        tpm_store.write_tpms(
+            os.path.join(dir_name, "run2"),
+            _get_test_tpms(calc_tpms=[1, 2, 3, 4]), dir_name)
+        assert len(_get_annotation_dirs(dir_name)) == 1
+
+
+def test_runs_on_different_transcripts_do_not_share_annotation():
+    with utils.temp_dir_created() as dir_name:
+        tpm_store.write_tpms(
+            os.path.join(dir_name, "run1"), _get_test_tpms(), dir_name)
+
+        tpms = _get_test_tpms()
+        tpms[t.LENGTH] = [1, 2, 3, 4]
+        tpm_store.write_tpms(os.path.join(dir_name, "run2"), tpms, dir_name)
+
+        assert len(_get_annotation_dirs(dir_name)) == 2
+
+
+def test_write_tpms_replaces_existing_store():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+        tpm_store.write_tpms(store_dir, _get_test_tpms(calc_tpms=[1, 2, 3, 4]))
+
+        read_tpms = tpm_store.read_tpms(store_dir).set_index(t.TRANSCRIPT)
+        assert read_tpms.loc["T3"][t.CALCULATED_TPM] == 1
+
+
+def test_replaced_store_remains_readable_by_existing_readers():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+        columns = tpm_store.read_tpm_columns(store_dir)
+        tpm_store.write_tpms(store_dir, _get_test_tpms(calc_tpms=[1, 2, 3, 4]))
+
+        # TPMs are stored in transcript order
+        assert list(columns[t.CALCULATED_TPM]) == [12, 90.5, 0.25, 3]
+        assert sorted(os.listdir(dir_name)) == sorted(
+            ["tpms"] + _get_annotation_dirs(dir_name))
+
+
+def test_read_tpms_reads_csv_file():
+    with utils.temp_dir_created() as dir_name:
+        csv_file = os.path.join(dir_name, "tpms.csv")
+        _get_test_tpms().to_csv(csv_file, index=False)
+
+        assert not tpm_store.is_tpm_store(csv_file)
+        read_tpms = tpm_store.read_tpms(csv_file)
+        assert list(read_tpms[t.TRANSCRIPT]) == TRANSCRIPTS
+
+
+def test_sequence_composition_is_stored_if_present():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpms = _get_test_tpms()
+        tpms[t.GC_LENGTH] = [400, 1000, 700, 250]
+        tpms[t.HOMOPOLYMER_LENGTH] = [10, 0, 30, 5]
+        tpm_store.write_tpms(store_dir, tpms)
+
+        read_tpms = tpm_store.read_tpms(store_dir).set_index(t.TRANSCRIPT)
+        assert read_tpms.loc["T2"][t.GC_LENGTH] == 700
+        assert read_tpms.loc["T4"][t.HOMOPOLYMER_LENGTH] == 5
+
+
+def test_missing_sequence_composition_is_read_as_missing():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpms = _get_test_tpms()
+        tpms[t.GC_LENGTH] = [400, np.nan, 700, 250]
+        tpms[t.HOMOPOLYMER_LENGTH] = [10, np.nan, 30, 5]
+        tpm_store.write_tpms(store_dir, tpms)
+
+        read_tpms = tpm_store.read_tpms(store_dir).set_index(t.TRANSCRIPT)
+        assert np.isnan(read_tpms.loc["T1"][t.GC_LENGTH])
+        assert read_tpms.loc["T2"][t.GC_LENGTH] == 700
+
+
+def test_sequence_composition_is_absent_if_not_written():
+    with utils.temp_dir_created() as dir_name:
+        store_dir = os.path.join(dir_name, "tpms")
+        tpm_store.write_tpms(store_dir, _get_test_tpms())
+
+        read_tpms = tpm_store.read_tpms(store_dir)
+        assert t.GC_LENGTH not in read_tpms.columns
+        assert t.HOMOPOLYMER_LENGTH not in read_tpms.columns
@@ -251,3 +251,57 @@ def test_get_grouped_stats_calculates_correct_values():
     for group in set(GROUPS):
         assert stats[name1].ix[group] == len(tpms[tpms[GROUP_TEST_COL] == group])
         assert stats[name2].ix[group] == len(tp_tpms[tp_tpms[GROUP_TEST_COL] == group])
+
+
+def _get_boxplot_test_tpms():
+    random_state = np.random.RandomState(0)
+    return pd.DataFrame.from_dict({
+        GROUP_TEST_COL: random_state.randint(0, 3, 1000),
+        t.LOG10_RATIO: random_state.standard_t(3, 1000)
+    })
+
+
+def test_get_boxplot_stats_calculates_correct_quartiles():
+    tpms = _get_boxplot_test_tpms()
+    stats = t.get_boxplot_stats(tpms, GROUP_TEST_COL)
+
+    for group, group_tpms in tpms.groupby(GROUP_TEST_COL):
+        values = group_tpms[t.LOG10_RATIO].values
+        assert stats[t.BOXPLOT_COUNT][group] == len(values)
+        npt.assert_array_almost_equal(
+            [stats[t.BOXPLOT_LOWER_QUARTILE][group],
+             stats[t.BOXPLOT_MEDIAN][group],
+             stats[t.BOXPLOT_UPPER_QUARTILE][group]],
+            np.percentile(values, [25, 50, 75]))
+
+
+def test_get_boxplot_stats_calculates_correct_whiskers():
+    tpms = _get_boxplot_test_tpms()
+    stats = t.get_boxplot_stats(tpms, GROUP_TEST_COL)
+
+    for group, group_tpms in tpms.groupby(GROUP_TEST_COL):
+        values = group_tpms[t.LOG10_RATIO].values
+        q1, q3 = np.percentile(values, [25, 75])
+        within = values[(values >= q1 - 1.5 * (q3 - q1)) &
+                        (values <= q3 + 1.5 * (q3 - q1))]
+        assert stats[t.BOXPLOT_LOWER_WHISKER][group] == within.min()
+        assert stats[t.BOXPLOT_UPPER_WHISKER][group] == within.max()
+
+
+def test_get_boxplot_stats_returns_outliers_outside_whiskers():
+    tpms = _get_boxplot_test_tpms()
+    stats = t.get_boxplot_stats(tpms, GROUP_TEST_COL)
+
+    for group, row in stats.iterrows():
+        outliers = t.get_boxplot_outliers(row[t.BOXPLOT_OUTLIERS])
+        assert len(outliers) > 0
+        assert ((outliers < row[t.BOXPLOT_LOWER_WHISKER]) |
+                (outliers > row[t.BOXPLOT_UPPER_WHISKER])).all()
+
+
+def test_get_boxplot_stats_subsamples_outliers():
+    tpms = _get_boxplot_test_tpms()
+    stats = t.get_boxplot_stats(tpms, GROUP_TEST_COL, max_outliers=3)
+
+    for outliers in stats[t.BOXPLOT_OUTLIERS]:
+        assert len(t.get_boxplot_outliers(outliers)) == 3
@@ -0,0 +1,120 @@
+import piquant.piquant_options as po
+import piquant.resource_usage as ru
+import piquant.usage_comparison as uc
+import numpy as np
+import pandas as pd
+import utils
+
+THRESHOLD = 10
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def _get_trial_usage(real_times, quant_method="Salmon", read_depth=10):
+    return pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: [quant_method] * len(real_times),
+        po.READ_DEPTH.name: [read_depth] * len(real_times),
+        ru.TRIAL: list(range(1, len(real_times) + 1)),
+        uc.REAL_TIME: real_times,
+        uc.CPU_TIME: real_times,
+        uc.MAX_MEMORY: [2.0] * len(real_times)
+    })
+
+
+def _compare(baseline, new):
+    return uc.compare_usage(baseline, new, THRESHOLD, SIGNIFICANCE_LEVEL)
+
+
+def _get_real_time_comparison(comparison):
+    return comparison[comparison[uc.STATISTIC] == uc.REAL_TIME].iloc[0]
+
+
+def test_trial_usage_is_summed_over_commands_of_each_trial():
+    command_usage = pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["Salmon"] * 4,
+        ru.TRIAL: [1, 1, 2, 2],
+        "real-time": [1.0, 2.0, 3.0, 4.0],
+        "user-time": [1.0, 1.0, 2.0, 2.0],
+        "sys-time": [0.5, 0.5, 0.5, 0.5],
+        "max-memory": [1048576, 2097152, 1048576, 1048576]
+    })
+    with utils.temp_dir_created() as dir_name:
+        command_usage.to_csv(ru.get_command_usage_file(
+            ru.QUANT_RESOURCE_TYPE, prefix=ru.OVERALL_USAGE_PREFIX,
+            directory=dir_name), index=False)
+        trial_usage = uc.get_trial_usage(dir_name)
+
+    assert list(trial_usage[uc.REAL_TIME]) == [3.0, 7.0]
+    assert list(trial_usage[uc.CPU_TIME]) == [3.0, 5.0]
+    assert list(trial_usage[uc.MAX_MEMORY]) == [2.0, 1.0]
+
+
+def test_trial_usage_is_read_from_usage_summary_if_commands_not_recorded():
+    usage_summary = pd.DataFrame.from_dict({
+        po.QUANT_METHOD.name: ["Salmon"],
+        "real-time": [2.0], "user-time": [1.0], "sys-time": [0.0],
+        "max-memory": [1.5]
+    })
+    with utils.temp_dir_created() as dir_name:
+        usage_summary.to_csv(ru.get_resource_usage_file(
+            ru.QUANT_RESOURCE_TYPE, prefix=ru.OVERALL_USAGE_PREFIX,
+            directory=dir_name), index=False)
+        trial_usage = uc.get_trial_usage(dir_name)
+
+    assert np.isclose(trial_usage[uc.REAL_TIME][0], 100)
+    assert np.isclose(trial_usage[uc.CPU_TIME][0], 11)
+    assert trial_usage[uc.MAX_MEMORY][0] == 1.5
+
+
+def test_trial_usage_is_none_if_no_usage_recorded():
+    with utils.temp_dir_created() as dir_name:
+        assert uc.get_trial_usage(dir_name) is None
+
+
+def test_runs_are_matched_by_option_values():
+    baseline = pd.concat([_get_trial_usage([10.0], read_depth=10),
+                          _get_trial_usage([20.0], read_depth=20)])
+    new = pd.concat([_get_trial_usage([15.0], read_depth=20),
+                     _get_trial_usage([15.0], read_depth=30)])
+
+    comparison = _compare(baseline, new)
+    assert len(comparison) == len(uc.get_compared_statistics())
+    real_time = _get_real_time_comparison(comparison)
+    assert real_time[po.READ_DEPTH.name] == 20
+    assert real_time[uc.BASELINE] == 20.0
+    assert real_time[uc.NEW] == 15.0
+    assert real_time[uc.PERCENT_CHANGE] == -25.0
+
+
+def test_comparison_is_none_if_no_runs_match():
+    assert _compare(_get_trial_usage([10.0], quant_method="Salmon"),
+                    _get_trial_usage([10.0], quant_method="RSEM")) is None
+
+
+def test_increase_above_threshold_is_regression_for_single_trials():
+    comparison = _compare(_get_trial_usage([10.0]), _get_trial_usage([12.0]))
+    real_time = _get_real_time_comparison(comparison)
+    assert np.isnan(real_time[uc.P_VALUE])
+    assert real_time[uc.REGRESSION]
+
+
+def test_increase_below_threshold_is_not_regression():
+    comparison = _compare(_get_trial_usage([10.0]), _get_trial_usage([10.5]))
+    assert len(uc.get_regressions(comparison)) == 0
+
+
+def test_significant_increase_over_trials_is_regression():
+    comparison = _compare(_get_trial_usage([10.0, 10.2, 9.9, 10.1]),
+                          _get_trial_usage([12.0, 12.1, 11.9, 12.2]))
+    real_time = _get_real_time_comparison(comparison)
+    assert real_time[uc.P_VALUE] < SIGNIFICANCE_LEVEL
+    assert real_time[uc.BASELINE_TRIALS] == 4
+    assert real_time[uc.REGRESSION]
+
+
+def test_insignificant_increase_over_trials_is_not_regression():
+    comparison = _compare(_get_trial_usage([10.0, 14.0, 8.0]),
+                          _get_trial_usage([9.0, 16.0, 12.0]))
+    real_time = _get_real_time_comparison(comparison)
+    assert real_time[uc.PERCENT_CHANGE] > THRESHOLD
+    assert real_time[uc.P_VALUE] >= SIGNIFICANCE_LEVEL
+    assert not real_time[uc.REGRESSION]